@@ -6,6 +6,7 @@ import json
 import os
 import re
 import signal
+import socket
 import sqlite3
 import subprocess
 import sys
@@ -21,6 +22,7 @@ ARTIFACTS_ROOT = REPO_ROOT / "artifacts"
 AGENT_DIR = REPO_ROOT / ".agent"
 PID_FILE = AGENT_DIR / "ushareiplay.pid"
 COMMAND_SPOOL_DIR = AGENT_DIR / "commands"
+CONTROL_SOCKET = AGENT_DIR / "control.sock"
 
 
 def _now() -> float:
@@ -337,6 +339,74 @@ def inject_via_channel(
         return "agent_spool", write_spool_command(line)
 
 
+def send_control_command(
+    line: str,
+    *,
+    nickname: str = "Console",
+    timeout_s: float = 90.0,
+) -> Optional[Dict[str, Any]]:
+    """
+    Run one command over the control socket (control_api) and wait for its result.
+
+    Returns {"result": <result message>, "events": [<traced events>]}, or None when
+    the socket is not available so callers fall back to stdin / the file spool.
+    """
+    if not hasattr(socket, "AF_UNIX") or not CONTROL_SOCKET.exists():
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.settimeout(timeout_s + 5.0)
+        sock.connect(str(CONTROL_SOCKET))
+    except OSError:
+        sock.close()
+        return None
+    request = {
+        "op": "command",
+        "id": uuid.uuid4().hex[:12],
+        "content": line.rstrip("\n"),
+        "nickname": nickname,
+        "timeout_s": timeout_s,
+    }
+    events: List[Dict[str, Any]] = []
+    with sock, sock.makefile("rwb") as stream:
+        stream.write((json.dumps(request, ensure_ascii=False) + "\n").encode("utf-8"))
+        stream.flush()
+        for raw in stream:
+            reply = json.loads(raw.decode("utf-8"))
+            if reply.get("type") == "event":
+                events.append(reply.get("event") or {})
+            elif reply.get("type") == "result":
+                return {"result": reply, "events": events}
+            elif reply.get("type") == "error":
+                raise RuntimeError(f"control socket rejected command: {reply.get('error')}")
+    raise RuntimeError("control socket closed before the command result")
+
+
+def assert_control_result(reply: Dict[str, Any]) -> Dict[str, Any]:
+    """Same verdict shape as assert_command_flow, from a control-socket reply."""
+    events = reply.get("events") or []
+    names = [evt.get("event") for evt in events]
+    results = [evt for evt in events if evt.get("event") == "command.result"]
+    ok = bool(reply["result"].get("ok")) and "queue.enqueue" in names and bool(results)
+    return {
+        "ok": ok,
+        "last_command_result": results[-1] if results else None,
+        "observed_events": names[-50:] if ok else names[-200:],
+    }
+
+
+def inject_control_line(proc: Optional[subprocess.Popen[bytes]], line: str, *, timeout_s: float = 30.0) -> None:
+    """Inject a Console control line (e.g. !dump); synchronous over the socket, best effort otherwise."""
+    try:
+        if send_control_command(line, timeout_s=timeout_s) is not None:
+            return
+    except Exception:
+        pass
+    inject_via_channel(proc, line, nickname="Console")
+    # give it a little time to flush to disk
+    time.sleep(1.0)
+
+
 def resolve_injection_nickname(command: str, nickname: str) -> str:
     """
     Dollar-prefixed command tests should simulate a real online user.
@@ -721,25 +791,31 @@ def main(argv: Optional[List[str]] = None) -> int:
             last_status = wait_command_ready(run.status_json, timeout_s=args.ready_timeout)
             event_offset = run.events_jsonl.stat().st_size if run.events_jsonl.exists() else 0
             injection_nickname = resolve_injection_nickname(args.command, args.nickname)
-            injection_channel, _spool_path = inject_via_channel(
-                proc,
+            control_reply = send_control_command(
                 args.command,
                 nickname=injection_nickname,
-            )
-            assertion = assert_command_flow(
-                run.events_jsonl,
-                injected=args.command,
                 timeout_s=args.assert_timeout,
-                start_offset=event_offset,
             )
+            if control_reply is not None:
+                injection_channel = "agent_socket"
+                assertion = assert_control_result(control_reply)
+            else:
+                injection_channel, _spool_path = inject_via_channel(
+                    proc,
+                    args.command,
+                    nickname=injection_nickname,
+                )
+                assertion = assert_command_flow(
+                    run.events_jsonl,
+                    injected=args.command,
+                    timeout_s=args.assert_timeout,
+                    start_offset=event_offset,
+                )
             needs_dump = args.dump_after_command or bool(args.expect_page_source_text) or args.require_screenshot
             if needs_dump:
-                inject_via_channel(proc, "!dump", nickname="Console")
-                time.sleep(1.0)
+                inject_control_line(proc, "!dump")
             if (not assertion.get("ok")) and args.dump_on_fail:
-                inject_via_channel(proc, "!dump", nickname="Console")
-                # give it a little time to flush to disk
-                time.sleep(1.0)
+                inject_control_line(proc, "!dump")
 
         db_checks = run_db_queries(Path(args.db), list(args.db_query))
         log_checks = run_log_assertions(
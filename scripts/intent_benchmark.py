@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark of the local intent matcher over a corpus of logged mentions.
+
+    uv run python scripts/intent_benchmark.py tests/data/intent_mentions.jsonl --repeat 200
+
+The corpus is JSONL (``{"text": ..., "command": ...}``; ``command: null`` marks mentions that
+should fall through to the LLM) or plain text with one mention per line. Reports how many
+mentions resolve locally, accuracy against the labels, and per-call latency in microseconds.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import List, Optional
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from ushareiplay.core.config_loader import ConfigLoader
+    from ushareiplay.core.intent_matcher import IntentMatcher, benchmark_matcher, load_mentions
+
+    parser = argparse.ArgumentParser(description="Benchmark the local intent matcher on logged mentions.")
+    parser.add_argument("corpus", type=Path, help="JSONL or plain-text mention corpus")
+    parser.add_argument("--repeat", type=int, default=100)
+    args = parser.parse_args(argv)
+
+    if not args.corpus.exists():
+        print(f"corpus not found: {args.corpus}", file=sys.stderr)
+        return 2
+
+    matcher = IntentMatcher(ConfigLoader.load_config())
+    report = benchmark_matcher(matcher, load_mentions(args.corpus), repeat=args.repeat)
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Offline monitoring-loop benchmark over a recorded session.
+
+Record a session on a real device by enabling ``session_recorder`` in
+config.local.yaml; each run writes ``artifacts/sessions/<run_id>/``. Then:
+
+    uv run python scripts/replay_benchmark.py artifacts/sessions/<run_id> --ticks 200
+
+The full AppController graph (handlers, managers, commands, events) is built on
+top of a ReplayDriver and ``AppController.run_monitor_tick`` is driven directly,
+so the numbers cover the same code path as ``start_monitoring`` minus the 1s
+idle sleep. An in-memory SQLite database keeps the run side-effect free.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import sys
+from pathlib import Path
+from typing import List, Optional
+
+
+async def _run(session_dir: Path, ticks: int, loop: bool) -> dict:
+    from ushareiplay.core.app_controller import AppController
+    from ushareiplay.core.config_loader import ConfigLoader
+    from ushareiplay.core.db_manager import DatabaseManager
+    from ushareiplay.core.session_replay import ReplayDriver, ReplaySession, benchmark_ticks
+    from ushareiplay.core.singleton import Singleton
+    from ushareiplay.managers.keyword_manager import KeywordManager
+
+    config = ConfigLoader.load_config()
+    config.setdefault("session_recorder", {})["enabled"] = False
+    db_manager = DatabaseManager("sqlite://:memory:")
+    await db_manager.init()
+
+    session = ReplaySession.load(session_dir)
+    driver = ReplayDriver(session, loop=loop)
+    controller = None
+    try:
+        controller = AppController.initialize(config, driver_factory=lambda: driver)
+        controller._init_handlers()
+        controller.command_manager.load_all_commands()
+        await KeywordManager.instance().load_keywords_from_config()
+
+        report = await benchmark_ticks(controller.run_monitor_tick, ticks=ticks)
+        report["session"] = str(session_dir)
+        report["frames"] = len(session.page_source_entries())
+        report["replay_exhausted"] = driver.exhausted
+        report["ui_actions"] = len(driver.actions)
+        report["profiler"] = controller.profiler.snapshot()
+        return report
+    finally:
+        if controller is not None:
+            await controller.shutdown()
+        Singleton.reset_all_instances()
+        await db_manager.close()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Replay a recorded session through the monitoring loop.")
+    parser.add_argument("session_dir", type=Path, help="directory containing session.jsonl")
+    parser.add_argument("--ticks", type=int, default=100)
+    parser.add_argument("--loop", action="store_true", help="restart the recording when frames run out")
+    args = parser.parse_args(argv)
+
+    if not (args.session_dir / "session.jsonl").exists():
+        print(f"session.jsonl not found in {args.session_dir}", file=sys.stderr)
+        return 2
+
+    report = asyncio.run(_run(args.session_dir, args.ticks, args.loop))
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
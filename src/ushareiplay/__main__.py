@@ -3,6 +3,7 @@ from ushareiplay.core.config_loader import ConfigLoader
 from ushareiplay.core.db_manager import DatabaseManager
 from ushareiplay.core.singleton import Singleton
 import asyncio
+import traceback
 
 
 async def init_db():
@@ -22,6 +23,10 @@ async def run_app():
     try:
         controller = AppController.initialize(config)
         return await controller.start_monitoring()
+    except Exception:
+        if controller is not None:
+            controller.flight_recorder.dump("crash", {"error": traceback.format_exc()}, force=True)
+        raise
     finally:
         if controller is not None:
             await controller.shutdown()
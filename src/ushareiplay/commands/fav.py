@@ -294,10 +294,9 @@ class FavCommand(BaseCommand):
         if not favourite_search:
             return {'error': 'Cannot find favourite search'}
 
-        # 3) 粘贴关键字
-        self.handler.key_actions.set_clipboard_text(keyword)
-        self.handler.key_actions.paste_text()
-        self.handler.logger.info(f"Pasted keyword: {keyword}")
+        # 3) 输入关键字
+        self.handler.key_actions.type_text(keyword)
+        self.handler.logger.info(f"Entered keyword: {keyword}")
 
         # 4) 点击 play_favourite_search 播放搜索的歌曲列表
         play_search = self.handler.element_finder.wait_for_element_clickable('play_favourite_search')
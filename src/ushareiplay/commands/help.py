@@ -2,6 +2,12 @@ from __future__ import annotations
 
 from ushareiplay.core.base_command import BaseCommand
 class HelpCommand(BaseCommand):
+    # 内容只取决于命令配置，运行期间不变
+    cache_ttl_s = 3600.0
+
+    def cache_key(self, message_info, parameters):
+        return "help"
+
     async def do_process(self, message_info, parameters):
         cfg = getattr(self.controller, "config", {}) or {}
         commands = (cfg.get("commands") or [])
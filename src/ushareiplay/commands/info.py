@@ -1,8 +1,15 @@
 from ushareiplay.core.base_command import BaseCommand
+from ushareiplay.core.command_cache import PLAYLIST_CHANGED, SONG_CHANGED
 
 
 class InfoCommand(BaseCommand):
     handler_attr = 'soul_handler'
+    # 在线人数/派对时长也在输出中，有效期保持较短
+    cache_ttl_s = 10.0
+    cache_invalidated_by = (SONG_CHANGED, PLAYLIST_CHANGED)
+
+    def cache_key(self, message_info, parameters):
+        return "info" if not parameters else None
 
     async def do_process(self, message_info, parameters):
         # 从缓存获取播放信息
@@ -55,6 +62,12 @@ class InfoCommand(BaseCommand):
         else:
             result["current_playlist"] = "暂无活跃歌单"
 
+        # 追加最近播放（PlayHistory 内存窗口，不读 UI）
+        from ushareiplay.managers.play_history import PlayHistory
+        recent = PlayHistory.instance().recent(4) if PlayHistory.is_initialized() else []
+        recent = [record for record in recent if record.song != result.get("song")][:3]
+        result["recent_songs"] = ", ".join(record.song for record in recent) if recent else "暂无"
+
         from ushareiplay.handlers.qq_music_handler import QQMusicHandler
         music_handler = QQMusicHandler.instance()
         play_mode_key = getattr(music_handler, 'play_mode_key', 'unknown') if music_handler else 'unknown'
@@ -1,11 +1,26 @@
 import shlex
 
 from ushareiplay.core.base_command import BaseCommand
+from ushareiplay.core.command_cache import LEVEL_CHANGED
 from ushareiplay.dal.user_dao import UserDAO
 
 
 class LevelCommand(BaseCommand):
     error_message = '处理等级命令失败: {error}'
+    cache_ttl_s = 300.0
+    cache_invalidated_by = (LEVEL_CHANGED,)
+
+    def cache_key(self, message_info, parameters):
+        # 查看自己或单个用户的等级可缓存；设置等级（两个参数）不缓存
+        raw_text = ' '.join(parameters).strip()
+        if not raw_text:
+            nickname = getattr(message_info, 'nickname', '') if message_info else ''
+            return f"self:{nickname}" if nickname else None
+        try:
+            params = shlex.split(raw_text)
+        except ValueError:
+            return None
+        return f"user:{params[0].strip()}" if len(params) == 1 else None
 
     def _get_system_users(self) -> set[str]:
         system_users = set()
@@ -1,45 +1,15 @@
 import traceback
-from ushareiplay.core.base_command import BaseCommand
-from datetime import datetime, timedelta
 import time
-from langdetect import detect_langs
-import langdetect
 from html import unescape
-from ushareiplay.managers.music_manager import MusicManager
 
-# 在导入后设置种子
-langdetect.DetectorFactory.seed = 0
-
-
-def wrap_line_at_spaces(line: str, max_width: int) -> str:
-    """Insert newlines so each segment fits max_width, preferring breaks at whitespace.
-
-    English words stay intact when possible (break after last space before the limit).
-    When no space exists in the window (long word or unspaced CJK), breaks at max_width.
-    """
-    line = line.strip()
-    if not line or max_width <= 0:
-        return line
-    if len(line) <= max_width:
-        return line
-    out = []
-    remaining = line
-    while len(remaining) > max_width:
-        chunk = remaining[:max_width]
-        break_at = -1
-        for i in range(len(chunk) - 1, 0, -1):
-            if chunk[i].isspace():
-                break_at = i
-                break
-        if break_at > 0:
-            out.append(remaining[:break_at].rstrip())
-            remaining = remaining[break_at:].lstrip()
-        else:
-            out.append(remaining[:max_width])
-            remaining = remaining[max_width:].lstrip()
-    if remaining:
-        out.append(remaining)
-    return "\n".join(out)
+from ushareiplay.core.base_command import BaseCommand
+from ushareiplay.helpers.lyrics_text import (
+    group_lyrics_lines,
+    split_lyrics_lines,
+    wrap_lyrics_lines,
+)
+from ushareiplay.managers.lyrics_cache import LyricsCache, lyrics_key
+from ushareiplay.managers.music_manager import MusicManager
 
 
 class LyricsCommand(BaseCommand):
@@ -82,60 +52,84 @@ class LyricsCommand(BaseCommand):
             self.handler.log_error(f"Error selecting lyrics tab: {traceback.format_exc()}")
             return False
 
-    def query_lyrics(self, query, group_num=0):
-        """Query lyrics for current song
-        Args:
-            query: str, lyrics to search for
-            group_num: int, number of groups to force
+    def _current_song_info(self) -> dict:
+        """Currently playing song: the broadcaster's cached info when available, else read from the player."""
+        from ushareiplay.state.playback_broadcaster import PlaybackBroadcaster
+
+        if PlaybackBroadcaster.is_initialized():
+            info = PlaybackBroadcaster.instance().get_playback_info_cache()
+            if info and 'error' not in info and info.get('song') and info.get('song') != 'Unknown':
+                return info
+        return MusicManager.instance().get_playback_info()
+
+    def fetch_lyrics_text(self, query):
+        """Search QQ Music for ``query`` and read the raw lyrics text from the lyrics tab
         Returns:
-            dict: Result with lyrics groups or error
+            dict: {'text': str} or {'error': str}
         """
         # Make sure we're in the music app
         if not self.music_handler.key_actions.switch_to_app():
             return {'error': 'Failed to switch to music app'}
-            
-        # If no query provided, construct from current playing info
-        if query == "":
-            # Get current playing info
-            info = MusicManager.instance().get_playback_info()
-            if 'error' in info:
-                return {'error': 'Failed to get playback info'}
-            
-            # Construct search query from current song
-            query = f'{info["song"]} {info["singer"]} {info["album"]}'
-            self.handler.logger.info(f"Using current song info as query: {query}")
-        
+
         # Search for the song
         if not self.music_handler.query_music(query):
             self.handler.logger.error(f"Failed to query music with query {query}")
             return {'error': f'Failed to find song matching "{query}"'}
-        
+
         # Select lyrics tab after finding the song
         if not self.select_lyrics_tab():
             return {'error': 'Failed to select lyrics tab'}
-            
+
         # Get lyrics text
         key, element = self.music_handler.element_finder.wait_for_any_element(['lyrics_text', 'not_found'])
         if not key or key == 'not_found':
             self.music_handler.logger.error(f"Failed to find lyrics with query {query}")
             return {'error': f'No lyrics found for "{query}"'}
 
-        lyrics_text = element
-        lyrics_text.click()
-
+        element.click()
         # Process lyrics - handle HTML entities
-        lyrics_content = lyrics_text.text
-        lyrics_content = unescape(lyrics_content)  # Unescape HTML entities
-        
+        return {'text': unescape(element.text)}
+
+    async def query_lyrics(self, query, group_num=0):
+        """Query lyrics, answering from LyricsCache when the song was fetched before
+        Args:
+            query: str, lyrics to search for ("" = current song)
+            group_num: int, number of groups to force
+        Returns:
+            dict: Result with lyrics groups or error
+        """
+        song = singer = ""
+        if query == "":
+            # Get current playing info
+            info = self._current_song_info()
+            if 'error' in info:
+                return {'error': 'Failed to get playback info'}
+            song, singer = info["song"], info["singer"]
+            keys = [lyrics_key(song, singer)]
+            # Construct search query from current song
+            query = f'{info["song"]} {info["singer"]} {info["album"]}'
+            self.handler.logger.info(f"Using current song info as query: {query}")
+        else:
+            keys = [lyrics_key(query)]
+
         lyrics_cfg = (self.controller.config or {}).get("lyrics") or {}
         line_max_width = int(lyrics_cfg.get("line_max_width", 18))
 
-        lyrics_groups = self.process_lyrics(
-            lyrics_content,
-            max_width=line_max_width,
-            force_groups=group_num,
-        )
-        return {'groups': lyrics_groups}
+        cache = LyricsCache.instance() if LyricsCache.is_initialized() else None
+        if cache is not None:
+            record = await cache.get(keys[0])
+            if record is not None:
+                self.handler.logger.info(f"Lyrics cache hit: {keys[0]}")
+                return {'groups': record.groups_for(line_max_width, group_num)}
+
+        result = self.fetch_lyrics_text(query)
+        if 'error' in result:
+            return result
+
+        if cache is None:
+            return {'groups': self.process_lyrics(result['text'], max_width=line_max_width, force_groups=group_num)}
+        record = await cache.put(keys, result['text'], song=song, singer=singer)
+        return {'groups': record.groups_for(line_max_width, group_num)}
 
     def process_lyrics(
         self,
@@ -151,58 +145,8 @@ class LyricsCommand(BaseCommand):
         Returns:
             list: List of lyrics groups
         """
-        # Calculate total length of lyrics
-        total_length = len(lyrics_text)
-
-        # Determine number of groups
-        if force_groups > 0:
-            num_groups = force_groups
-        else:
-            # Default to groups of roughly 500 characters
-            num_groups = (total_length + 499) // 500  # Ceiling division
-
-        # Calculate target size per group
-        target_group_size = total_length / num_groups if num_groups > 0 else 0
-
-        # Split lyrics into lines and remove empty lines
-        lyrics_lines = [line.strip() for line in lyrics_text.split('\n') if line.strip()]
-
-        if not lyrics_lines:
-            return []
-
-        # Per source line: only split when longer than display width (prefer breaks at spaces)
-        wrapped_lines = []
-        for line in lyrics_lines:
-            wrapped = wrap_line_at_spaces(line, max_width)
-            wrapped_lines.extend(
-                [seg for seg in wrapped.split("\n") if seg.strip()]
-            )
-
-        # Group lines with balanced length
-        groups = []
-        current_group = []
-        current_length = 0
-
-        for line in wrapped_lines:
-            line_length = len(line) + 1  # +1 for newline
-            new_length = current_length + line_length
-
-            # Check if adding this line would make the group too far from target size
-            if (current_length > 0 and  # Don't check first line
-                    abs(new_length - target_group_size) > abs(current_length - target_group_size) and
-                    len(groups) < num_groups - 1):  # Don't create new group if we're on last group
-                groups.append('\n'.join(current_group))
-                current_group = [line]
-                current_length = len(line)
-            else:
-                current_group.append(line)
-                current_length = new_length
-
-        # Add the last group
-        if current_group:
-            groups.append('\n'.join(current_group))
-
-        return groups
+        wrapped_lines = wrap_lyrics_lines(split_lyrics_lines(lyrics_text), max_width)
+        return group_lyrics_lines(wrapped_lines, len(lyrics_text), force_groups)
 
     async def do_process(self, message_info, parameters):
         # Get lyrics of current song
@@ -222,7 +166,7 @@ class LyricsCommand(BaseCommand):
         else:
             query = ""
 
-        result = self.query_lyrics(query, force_groups)
+        result = await self.query_lyrics(query, force_groups)
         if 'error' in result:
             return result
 
@@ -37,9 +37,12 @@ class PlayCommand(BaseCommand):
             self.handler.logger.error(f'Failed to play music {music_query}')
             return playing_info
 
-        song_element = self.handler.element_finder.wait_for_element_clickable('result_item')
-        song_element.click()
-        self.handler.logger.info("Select first song")
+        if self.handler.tap_selected_result():
+            self.handler.logger.info("Select best matching song")
+        else:
+            song_element = self.handler.element_finder.wait_for_element_clickable('result_item')
+            song_element.click()
+            self.handler.logger.info("Select first song")
 
         # 播放页会自动弹出：未收藏则自动收藏
         self.handler.ensure_favorited_in_playing_page(timeout=10)
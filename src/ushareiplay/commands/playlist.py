@@ -3,11 +3,18 @@ import traceback
 from appium.webdriver.common.appiumby import AppiumBy
 
 from ushareiplay.core.base_command import BaseCommand
+from ushareiplay.core.command_cache import PLAYLIST_CHANGED, SONG_CHANGED
 from ushareiplay.helpers.playlist_info import get_playlist_text_and_first_song
 from ushareiplay.helpers.playlist_parser import PlaylistParser
 
 class PlaylistCommand(BaseCommand):
     handler_attr = 'music_handler'
+    cache_ttl_s = 60.0
+    cache_invalidated_by = (SONG_CHANGED, PLAYLIST_CHANGED)
+
+    def cache_key(self, message_info, parameters):
+        # 只缓存无参数的「查看当前播放队列」，带参数是播放操作
+        return "queue" if not parameters else None
 
     async def do_process(self, message_info, parameters):
         query = ' '.join(parameters)
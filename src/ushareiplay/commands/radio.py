@@ -4,13 +4,17 @@ from selenium.common import StaleElementReferenceException
 
 from ushareiplay.core.base_command import BaseCommand
 from ushareiplay.helpers.playlist_info import get_playlist_text_and_first_song
-from ushareiplay.helpers.song_release import QQMusicSongReleaseLookup, parse_release_date
+from ushareiplay.helpers.song_release import QQMusicSongReleaseLookup, parse_release_date, primary_topic
+from ushareiplay.managers.play_history import PlayHistory
+from ushareiplay.managers.radio_prefetcher import RadioPrefetcher
 
 
 class RadioCommand(BaseCommand):
     def __init__(self, controller):
         super().__init__(controller)
-        self.song_release_lookup = QQMusicSongReleaseLookup()
+        self.song_release_lookup = (
+            getattr(controller, 'song_release_lookup', None) or QQMusicSongReleaseLookup.from_config(getattr(controller, 'config', None))
+        )
 
     async def do_process(self, message_info, parameters):
         if not parameters:
@@ -72,13 +76,7 @@ class RadioCommand(BaseCommand):
         return None
 
     def _extract_primary_topic(self, raw_topic: Optional[str]) -> Optional[str]:
-        if not raw_topic:
-            return None
-        parts = [segment.strip() for segment in raw_topic.split("-") if segment.strip()]
-        if not parts:
-            cleaned_topic = raw_topic.strip()
-            return cleaned_topic or None
-        return parts[0]
+        return primary_topic(raw_topic)
 
     def _old_song_filter_config(self) -> dict:
         return (self.controller.config or {}).get("old_song_filter", {})
@@ -94,6 +92,17 @@ class RadioCommand(BaseCommand):
             )
             return None
 
+    def _candidate_release_date(self, song_text: Optional[str]):
+        """Release date from the RadioPrefetcher verdict cache, falling back to a direct lookup."""
+        if RadioPrefetcher.is_initialized():
+            verdict = RadioPrefetcher.instance().verdict(song_text)
+            return verdict.release_date if verdict else None
+        return self._song_release_date(song_text)
+
+    def _played_recently(self, song_text: Optional[str]) -> bool:
+        """Whether the candidate already played within play_history.radio_dedup_window_s."""
+        return PlayHistory.is_initialized() and PlayHistory.instance().played_recently(song_text)
+
     def _is_old_song(self, song_text: Optional[str]) -> bool:
         config = self._old_song_filter_config()
         if not config.get("enabled", True):
@@ -254,22 +263,24 @@ class RadioCommand(BaseCommand):
             collection_topic_text = self._read_collection_topic_text(collection_topic)
             if not collection_topic_text:
                 return self._report_error("Failed to read collection radio topic")
-            release_date = self._song_release_date(collection_topic_text)
+            release_date = self._candidate_release_date(collection_topic_text)
             self.music_handler.logger.info(
                 f"Radio recommendation candidate: {collection_topic_text}, release_date={release_date or 'unknown'}"
             )
             cutoff = parse_release_date(filter_config.get("cutoff_date") or "2000-01-01")
             is_old = bool(release_date and cutoff and release_date < cutoff)
-            if not is_old:
+            is_repeat = self._played_recently(collection_topic_text)
+            if not is_old and not is_repeat:
                 break
             if refresh_count >= max_refreshes:
                 self.music_handler.logger.warning(
-                    f"Radio recommendation still old after {refresh_count} refreshes, accepting: {collection_topic_text}"
+                    f"Radio recommendation still {'old' if is_old else 'recently played'} after {refresh_count} refreshes, accepting: {collection_topic_text}"
                 )
                 break
             refresh_count += 1
+            reason = f"old ({release_date} < {cutoff})" if is_old else "recently played"
             self.music_handler.logger.info(
-                f"Radio recommendation is old ({release_date} < {cutoff}): {collection_topic_text}; refreshing recommendation ({refresh_count}/{max_refreshes})"
+                f"Radio recommendation is {reason}: {collection_topic_text}; refreshing recommendation ({refresh_count}/{max_refreshes})"
             )
             refresh_result = self._refresh_collection_radio()
             if isinstance(refresh_result, dict) and "error" in refresh_result:
@@ -2,17 +2,25 @@ import re
 import shlex
 
 from ushareiplay.core.base_command import BaseCommand
+from ushareiplay.core.command_cache import TIMER_CHANGED
 from ushareiplay.managers.timer_manager import TimerManager
 
 
 class TimerCommand(BaseCommand):
     handler_attr = 'soul_handler'
     error_message = '处理命令失败: {error}'
+    cache_ttl_s = 60.0
+    cache_invalidated_by = (TIMER_CHANGED,)
 
     def __init__(self, controller):
         super().__init__(controller)
         self.timer_manager = TimerManager.instance()
 
+    def cache_key(self, message_info, parameters):
+        if not parameters or (len(parameters) == 1 and parameters[0].lower() == 'list'):
+            return "list"
+        return None
+
     async def do_process(self, message_info, parameters):
         """Process timer command"""
         if not parameters:
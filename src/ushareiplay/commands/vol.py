@@ -10,6 +10,13 @@ class VolumeCommand(BaseCommand):
             target_volume, err = self.coerce_int(parameters[0], error='Invalid parameter, must be a number')
             if err:
                 return {'error': err}
+            # +N / -N 为相对当前音量的增减，结果截断到 0-15
+            if str(parameters[0])[:1] in ('+', '-'):
+                # 读不到当前音量时不能按 0 处理，否则「小一点」会直接静音
+                current = MusicManager.instance().volume_control.get_level()
+                if current is None:
+                    return {'error': 'Failed to read current volume, try an absolute level like :vol 8'}
+                target_volume = min(15, max(0, current + target_volume))
             # Validate volume range
             if target_volume < 0 or target_volume > 15:
                 return {
@@ -25,21 +25,49 @@ from ushareiplay.core.runtime_context import (
     EventRuntimeContext,
 )
 from ushareiplay.core.singleton import Singleton
-from ushareiplay.core.observability import Observability, new_run_id
+from ushareiplay.core.observability import Observability, new_run_id, trace_context
+from ushareiplay.core.flight_recorder import FlightRecorder
+from ushareiplay.core.ui.text_input import TextInput
+from ushareiplay.core.command_cache import CommandResultCache
+from ushareiplay.core.rate_limiter import RateLimiter
+from ushareiplay.core.command_supervisor import CANCEL_COMMAND, CommandSupervisor
+from ushareiplay.core.control_server import QUEUED_EVENT, ControlServer
+from ushareiplay.core.loop_watchdog import LoopWatchdog
+from ushareiplay.core.metrics import DRIVER_REINITS, MetricsServer
+from ushareiplay.core.tick_profiler import TickProfiler
 from ushareiplay.handlers.qq_music_handler import QQMusicHandler
 from ushareiplay.handlers.soul_handler import SoulHandler
+from ushareiplay.helpers.song_release import QQMusicSongReleaseLookup
 from ushareiplay.managers.event_manager import EventManager
 from ushareiplay.managers.notice_manager import NoticeManager
 from ushareiplay.managers.party_manager import PartyManager
 
 
 class AppController(Singleton):
-    def __init__(self, config):
+    def __init__(self, config, driver_factory=None):
         self.config = config
+        # 可注入 driver 工厂（离线回放基准使用 ReplayDriver）；默认连接 Appium server
+        self._driver_factory = driver_factory
+        self._session_recorder = None
 
         self.run_id = new_run_id()
         self.obs = Observability(run_id=self.run_id)
         self.obs.emit("app.start", ctx={"component": "AppController"})
+        self.profiler = TickProfiler(config=self.config, obs=self.obs)
+        self.watchdog = LoopWatchdog(
+            config=self.config,
+            obs=self.obs,
+            stall_log_path=self.obs.paths().stalls_log,
+        )
+        self.metrics_server = MetricsServer(config=self.config, obs=self.obs)
+        self.flight_recorder = FlightRecorder(
+            config=self.config,
+            obs=self.obs,
+            dump_dir=self.obs.paths().flight_dir,
+        )
+        self.text_input = TextInput(config=self.config, obs=self.obs)
+        # 发行日期查询共享一个连接池与熔断器：接口不可用时所有调用方都快速失败
+        self.song_release_lookup = QQMusicSongReleaseLookup.from_config(self.config)
 
         # 先创建主driver（会自动启动Soul app）
         self.driver = None
@@ -62,6 +90,7 @@ class AppController(Singleton):
         self.agent_command_dir = Path(".agent") / "commands"
         self.is_running = True
         self.in_console_mode = False
+        self._paused = False
 
         # Initialize handlers using singleton pattern (delayed initialization)
         self.soul_handler = None
@@ -88,22 +117,35 @@ class AppController(Singleton):
         self.driver_recovery_context = DriverRecoveryContext(
             reinitialize_driver=self.reinitialize_driver,
             obs=self.obs,
+            flight_recorder=self.flight_recorder,
         )
         self.command_runtime_context = CommandRuntimeContext(controller=self)
-        self.event_runtime_context = EventRuntimeContext(ui_lock=self.ui_lock)
+        self.event_runtime_context = EventRuntimeContext(
+            ui_lock=self.ui_lock,
+            profiler=self.profiler,
+            flight_recorder=self.flight_recorder,
+        )
 
         # Driver重建防护标志
         self._is_reinitializing = False
         self._runtime_queue_drainer = None
+        self._radio_prefetcher = None
+        self._lyrics_cache = None
+        self._play_history = None
+        self._private_outbox = None
+        self._chat_archive = None
         self._agent_command_spool = AgentCommandSpool(
             input_queue=self.input_queue,
             command_dir=self.agent_command_dir,
             obs=self.obs,
         )
+        self.control_server = ControlServer(config=self.config, input_queue=self.input_queue, obs=self.obs)
         self._status_reporter = StatusReporter(
             config=self.config,
             ui_lock=self.ui_lock,
             obs=self.obs,
+            profiler=self.profiler,
+            watchdog=self.watchdog,
         )
 
     @asynccontextmanager
@@ -162,6 +204,9 @@ class AppController(Singleton):
             raise
 
     def _init_driver(self):
+        if getattr(self, "_driver_factory", None) is not None:
+            return self._driver_factory()
+
         options = AppiumOptions()
 
         # 设置基本能力
@@ -190,7 +235,33 @@ class AppController(Singleton):
             "waitForSelectorTimeout": 2000,  # Wait up to 2 seconds for elements
             "waitForPageLoad": 2000  # Wait up to 2 seconds for page load
         })
-        return driver
+        return self._wrap_session_recorder(self._wrap_flight_recorder(driver))
+
+    def _wrap_flight_recorder(self, driver):
+        """飞行记录仪开启时用 RecordingDriver 把 page_source / UI 动作镜像进内存环形缓冲。"""
+        recorder = getattr(self, "flight_recorder", None)
+        if recorder is None or not recorder.enabled:
+            return driver
+        from ushareiplay.core.session_replay import RecordingDriver
+
+        return RecordingDriver(driver, recorder)
+
+    def _wrap_session_recorder(self, driver):
+        """按 session_recorder 配置把 driver 包装为 RecordingDriver（重建 driver 时沿用同一录制目录）。"""
+        cfg = self.config.get("session_recorder") or {}
+        if not cfg.get("enabled"):
+            return driver
+        from ushareiplay.core.paths import safe_workspace_path
+        from ushareiplay.core.session_replay import RecordingDriver, SessionRecorder
+
+        if self._session_recorder is None:
+            root = safe_workspace_path(cfg.get("directory", ""), "artifacts/sessions")
+            self._session_recorder = SessionRecorder(root / self.run_id)
+            self.obs.emit(
+                "session.record.start",
+                ctx={"path": str(self._session_recorder.directory)},
+            )
+        return RecordingDriver(driver, self._session_recorder)
 
     def register_driver_subscriber(self, component) -> None:
         """Register a component whose .driver reference must track controller.driver."""
@@ -249,6 +320,7 @@ class AppController(Singleton):
             if self.logger:
                 self.logger.info("新driver创建成功")
             self.obs.emit("driver.reinit.ok")
+            DRIVER_REINITS.labels("ok").inc()
 
             # Optimize driver settings
             self.driver.update_settings({
@@ -273,6 +345,7 @@ class AppController(Singleton):
             if self.logger:
                 self.logger.error(f"Driver重建失败: {traceback.format_exc()}")
             self.obs.emit("driver.reinit.error", level="ERROR", ctx={"error": traceback.format_exc()})
+            DRIVER_REINITS.labels("error").inc()
             return False
         finally:
             self._is_reinitializing = False
@@ -291,6 +364,10 @@ class AppController(Singleton):
         while self.is_running:
             try:
                 user_input = input("Console> " if self.in_console_mode else "")
+                if user_input.strip() == CANCEL_COMMAND:
+                    # 输入线程直接取消：主循环正被运行中的命令占住，排队就来不及了
+                    self._cancel_running_command("console")
+                    continue
                 # Process all input, including empty strings (just pressing Enter)
                 self.input_queue.put((user_input, "console"))
                 self.logger.critical(f"{user_input}")
@@ -304,6 +381,12 @@ class AppController(Singleton):
                     self.is_running = False
                 break
 
+    def _cancel_running_command(self, source: str) -> None:
+        if not CommandSupervisor.is_initialized():
+            return
+        prefix = CommandSupervisor.instance().cancel_running(source)
+        self.logger.critical(f"cancel requested by {source}: {prefix or 'no running command'}")
+
     def _drain_agent_command_spool(self) -> None:
         self._agent_command_spool.drain()
 
@@ -385,7 +468,7 @@ class AppController(Singleton):
             # .instance() as a lookup-only API.
             UserManager.initialize()
             SleepManager.initialize(self.config)
-            MessageQueue.initialize()
+            MessageQueue.initialize(self.config)
             RecoveryManager.initialize()
             MessageManager.initialize()
             self.message_dispatch = MessageDispatch.initialize()
@@ -414,6 +497,24 @@ class AppController(Singleton):
             TitleManager.initialize()
             AdminManager.initialize()
             KeywordManager.initialize()
+            self._self_test_text_input()
+            from ushareiplay.managers.radio_prefetcher import RadioPrefetcher
+            self._radio_prefetcher = RadioPrefetcher.initialize(self.config, lookup=self.song_release_lookup)
+            self._radio_prefetcher.configure_runtime(self.command_runtime_context)
+            CommandResultCache.initialize(self.config)
+            RateLimiter.initialize(self.config)
+            self.command_supervisor = CommandSupervisor.initialize(self.config)
+            self.command_supervisor.add_cancel_probe(self._agent_command_spool.take_cancel_request)
+            from ushareiplay.managers.play_history import PlayHistory
+            self._play_history = PlayHistory.initialize(self.config)
+            from ushareiplay.managers.chat_archive import ChatArchive
+            self._chat_archive = ChatArchive.initialize(self.config)
+            from ushareiplay.managers.private_outbox import PrivateOutbox
+            self._private_outbox = PrivateOutbox.initialize(self.config)
+            self._private_outbox.configure_runtime(self.command_runtime_context)
+            from ushareiplay.managers.lyrics_cache import LyricsCache
+            self._lyrics_cache = LyricsCache.initialize(self.config)
+            self._lyrics_cache.configure_runtime(self.command_runtime_context)
             self.post_party_create_automation = PostPartyCreateAutomation(self)
             self._runtime_queue_drainer = RuntimeQueueDrainer(
                 handler=self.soul_handler,
@@ -444,6 +545,16 @@ class AppController(Singleton):
                 self.logger.error(f"Error initializing handlers: {traceback.format_exc()}")
             raise
 
+    def _self_test_text_input(self):
+        """Pick the fastest text-input backend for the connected device (text_input.self_test)."""
+        if not ((self.config.get("text_input", {}) or {}).get("self_test", True)):
+            return
+        try:
+            backend = self.text_input.self_test(self.driver)
+            self.logger.info(f"文本输入后端: {backend}")
+        except Exception:
+            self.logger.warning(f"Text input self-test failed: {traceback.format_exc()}")
+
     async def start_monitoring(self):
         error_count = 0
 
@@ -481,82 +592,18 @@ class AppController(Singleton):
         await self._detect_initial_room_state()
 
         self.logger.info("开始主监控循环...")
+        self.watchdog.start()
+        self.metrics_server.start()
+        self.control_server.start()
+        if self.control_server.listening:
+            self._agent_command_spool.poll_interval_s = self.control_server.spool_poll_interval_s
 
-        paused = False
+        self._paused = False
         while self.is_running:
             try:
-                self._drain_agent_command_spool()
-                if self._runtime_queue_drainer:
-                    await self._runtime_queue_drainer.drain()
-                # Check for console input (高优先级，在事件管理器前处理)
-                try:
-                    while not self.input_queue.empty():
-                        item = self.input_queue.get_nowait()
-                        if isinstance(item, dict):
-                            message = item.get("content", "")
-                            input_source = item.get("source", "console")
-                            nickname = item.get("nickname", "Console")
-                        elif isinstance(item, tuple):
-                            message, input_source = item
-                            nickname = "Console"
-                        else:
-                            message, input_source = item, "console"
-                            nickname = "Console"
-                        # Only send non-empty messages
-                        if message.strip():
-                            if message == '!stop':
-                                paused = not paused
-                                self.soul_handler.logger.critical(f'paused: {paused}')
-                            elif message == '!timer':
-                                if self.timer_manager.is_running():
-                                    await self.timer_manager.stop()
-                                else:
-                                    await self.timer_manager.start()
-                                self.soul_handler.logger.critical(f'is_running:{self.timer_manager.is_running()}')
-                            elif message == '!dump':
-                                # read-only dump of artifacts using existing session
-                                try:
-                                    await self._dump_readonly_artifacts(reason=input_source)
-                                except Exception:
-                                    self.obs.emit(
-                                        "artifact.dump.error",
-                                        level="ERROR",
-                                        ctx={"error": traceback.format_exc(), "reason": input_source},
-                                    )
-                            else:
-                                from ushareiplay.core.chat_intake import ChatIntakeKind, expand_queue_text
-                                from ushareiplay.models.message_info import MessageInfo
-
-                                for result in expand_queue_text(message, nickname):
-                                    if result.kind == ChatIntakeKind.COMMAND and result.text.strip():
-                                        message_info = MessageInfo(
-                                            content=result.text,
-                                            nickname=nickname,
-                                            silent=result.silent,
-                                            private_reply=result.private_reply,
-                                            sleep_exempt=result.sleep_exempt,
-                                        )
-                                        await MessageQueue.instance().put_message(message_info)
-                                        self.obs.emit(
-                                            "queue.enqueue",
-                                            ctx={"source": input_source, "content": message_info.content, "nickname": message_info.nickname},
-                                        )
-                                        self.logger.info(f"{input_source} message added to queue: {message_info.content}")
-                                    elif result.kind == ChatIntakeKind.PLAIN_CHAT and not result.silent:
-                                        self.message_dispatch.send_screen_message(result.text)
-                                    elif result.kind == ChatIntakeKind.PLAIN_CHAT and result.silent:
-                                        self.logger.info(f"Silent queued message suppressed: {result.text}")
-
-                except queue.Empty:
-                    pass
-
-                if paused:
+                if not await self.run_monitor_tick():
                     continue
 
-                outcome = await self.event_manager.process_current_screen()
-                if outcome["page_source"]:
-                    await self._update_status_from_screen(outcome["screen"])
-
                 # clear error once back to normal
                 error_count = 0
                 if self.soul_handler.error_count > 9:
@@ -589,6 +636,128 @@ class AppController(Singleton):
                     return False
         return None
 
+    async def run_monitor_tick(self) -> bool:
+        """
+        执行一轮主监控循环（spool → 队列 → 控制台输入 → 页面事件 → 状态上报）。
+        暂停（!stop）时返回 False；离线回放基准直接驱动该方法。
+        """
+        with self.profiler.span("spool"):
+            self._drain_agent_command_spool()
+        if self._runtime_queue_drainer:
+            with self.profiler.span("queue_drain"):
+                await self._runtime_queue_drainer.drain()
+        # Check for console input (高优先级，在事件管理器前处理)
+        with self.profiler.span("console_input"):
+            try:
+                while not self.input_queue.empty():
+                    item = self.input_queue.get_nowait()
+                    request_id = None
+                    if isinstance(item, dict):
+                        message = item.get("content", "")
+                        input_source = item.get("source", "console")
+                        nickname = item.get("nickname", "Console")
+                        request_id = item.get("request_id")
+                    elif isinstance(item, tuple):
+                        message, input_source = item
+                        nickname = "Console"
+                    else:
+                        message, input_source = item, "console"
+                        nickname = "Console"
+                    # 控制接口请求：处理过程中的事件都带上请求 ID，入队后报告命令条数
+                    with trace_context(request_id):
+                        queued = await self._handle_input_message(message, input_source, nickname, request_id)
+                        if request_id:
+                            self.obs.emit(QUEUED_EVENT, ctx={"source": input_source, "commands": queued})
+            except queue.Empty:
+                pass
+
+        if self._paused:
+            return False
+
+        with self.profiler.span("screen"):
+            outcome = await self.event_manager.process_current_screen()
+        if outcome["page_source"]:
+            with self.profiler.span("status"):
+                await self._update_status_from_screen(outcome["screen"])
+        if self._radio_prefetcher:
+            with self.profiler.span("radio_prefetch"):
+                await self._radio_prefetcher.maybe_prefetch()
+        if self._lyrics_cache:
+            with self.profiler.span("lyrics_warm_up"):
+                await self._lyrics_cache.maybe_warm_up()
+        if self._play_history:
+            with self.profiler.span("play_history_flush"):
+                await self._play_history.maybe_flush()
+        if self._chat_archive:
+            with self.profiler.span("chat_archive_flush"):
+                await self._chat_archive.maybe_flush()
+        if self._private_outbox:
+            with self.profiler.span("private_outbox"):
+                await self._private_outbox.maybe_flush()
+        if self.post_party_create_automation and self.post_party_create_automation.running:
+            with self.profiler.span("post_party_create"):
+                await self.post_party_create_automation.maybe_advance()
+        self.profiler.end_tick()
+        return True
+
+    async def _handle_input_message(self, message: str, input_source: str, nickname: str, request_id=None) -> int:
+        """Handle one console / agent input line; returns the number of commands queued."""
+        queued = 0
+        # Only send non-empty messages
+        if message.strip():
+            if message == '!stop':
+                self._paused = not self._paused
+                self.soul_handler.logger.critical(f'paused: {self._paused}')
+            elif message == '!timer':
+                if self.timer_manager.is_running():
+                    await self.timer_manager.stop()
+                else:
+                    await self.timer_manager.start()
+                self.soul_handler.logger.critical(f'is_running:{self.timer_manager.is_running()}')
+            elif message.strip() == CANCEL_COMMAND:
+                self._cancel_running_command(input_source)
+            elif message == '!dump':
+                # read-only dump of artifacts using existing session
+                try:
+                    await self._dump_readonly_artifacts(reason=input_source)
+                except Exception:
+                    self.obs.emit(
+                        "artifact.dump.error",
+                        level="ERROR",
+                        ctx={"error": traceback.format_exc(), "reason": input_source},
+                    )
+            else:
+                from ushareiplay.core.chat_intake import ChatIntakeKind, expand_queue_text
+                from ushareiplay.models.message_info import MessageInfo
+
+                for result in expand_queue_text(message, nickname):
+                    if result.kind == ChatIntakeKind.COMMAND and result.text.strip():
+                        message_info = MessageInfo(
+                            content=result.text,
+                            nickname=nickname,
+                            silent=result.silent,
+                            private_reply=result.private_reply,
+                            sleep_exempt=result.sleep_exempt,
+                            request_id=request_id,
+                        )
+                        accepted = await MessageQueue.instance().put_message(message_info, source=input_source)
+                        queued += int(accepted)
+                        self.obs.emit(
+                            "queue.enqueue",
+                            ctx={
+                                "source": input_source,
+                                "content": message_info.content,
+                                "nickname": message_info.nickname,
+                                "accepted": accepted,
+                            },
+                        )
+                        self.logger.info(f"{input_source} message added to queue: {message_info.content}")
+                    elif result.kind == ChatIntakeKind.PLAIN_CHAT and not result.silent:
+                        self.message_dispatch.send_screen_message(result.text)
+                    elif result.kind == ChatIntakeKind.PLAIN_CHAT and result.silent:
+                        self.logger.info(f"Silent queued message suppressed: {result.text}")
+        return queued
+
     async def _dump_readonly_artifacts(self, reason: str = "") -> None:
         paths = self.obs.paths()
         # page source
@@ -623,6 +792,10 @@ class AppController(Singleton):
             except asyncio.CancelledError:
                 pass
 
+        await self.watchdog.stop()
+        self.metrics_server.stop()
+        self.control_server.stop()
+
         # Stop async timer manager
         await self.timer_manager.stop()
         self.logger.info("Application stopped")
@@ -641,6 +814,21 @@ class AppController(Singleton):
         if self.timer_manager and self.timer_manager.is_running():
             await self.timer_manager.stop()
 
+        await self.watchdog.stop()
+        self.metrics_server.stop()
+        self.control_server.stop()
+        if self._radio_prefetcher:
+            self._radio_prefetcher.close()
+        self.song_release_lookup.close()
+        if self._play_history:
+            await self._play_history.close()
+        if self._chat_archive:
+            await self._chat_archive.close()
+        if self._private_outbox:
+            await self._private_outbox.close()
+        if self.post_party_create_automation:
+            self.post_party_create_automation.close()
+
         if self.driver:
             try:
                 self.driver.quit()
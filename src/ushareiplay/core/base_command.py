@@ -11,11 +11,15 @@ class BaseCommand(ABC):
       - requires_mic: run soul_handler.ensure_mic_active() before do_process
       - handler_attr: 'soul_handler' | 'music_handler', exposed as self.handler
       - error_message: template (may contain {error}) returned when do_process raises
+      - cache_ttl_s / cache_invalidated_by: result caching for read-only calls,
+        enabled per call by cache_key() (see core.command_cache)
     """
 
     requires_mic = False
     handler_attr = None
     error_message = 'Failed to process command: {error}'
+    cache_ttl_s = 0.0
+    cache_invalidated_by = ()
 
     def __init__(self, controller):
         self.controller = controller
@@ -58,6 +62,13 @@ class BaseCommand(ABC):
         """
         return {}
 
+    def cache_key(self, message_info, parameters):
+        """Cache key for a read-only call whose result may be reused, or None (default: never cached).
+
+        Override together with cache_ttl_s / cache_invalidated_by.
+        """
+        return None
+
     @abstractmethod
     async def do_process(self, message_info, parameters):
         """Command decision logic. Implemented by subclasses."""
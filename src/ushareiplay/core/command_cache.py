@@ -0,0 +1,107 @@
+"""
+命令结果缓存（CommandResultCache）
+
+`:info`、无参数的 `:playlist`、`:level`、`:help`、`:timer` 列表等只读命令每次都重新计算，
+其中 `:playlist` 要走一整轮 QQ 音乐 UI。热闹的房间里这些命令常被刷屏。
+
+命令通过类属性声明可缓存性：
+
+- ``cache_key(message_info, parameters)``：返回缓存键，None 表示本次调用不可缓存（写操作/带参数）；
+- ``cache_ttl_s``：有效期（config ``command_cache.ttl_s.<prefix>`` 可覆盖）；
+- ``cache_invalidated_by``：使结果失效的事件标签（``song`` / ``playlist`` / ``level`` / ``timer``）。
+
+状态变化处调用 :func:`invalidate_command_cache` 清除带对应标签的条目（用户等级经 User 的 post_save
+信号统一失效）。只缓存成功结果（dict 副本），`@昵称` 等按请求者渲染的部分仍由 CommandManager 每次拼接。
+"""
+
+from __future__ import annotations
+
+import copy
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+from tortoise.signals import post_save
+
+from ushareiplay.core.singleton import Singleton
+from ushareiplay.models.user import User
+
+
+SONG_CHANGED = "song"
+PLAYLIST_CHANGED = "playlist"
+LEVEL_CHANGED = "level"
+TIMER_CHANGED = "timer"
+
+
+@dataclass
+class _Entry:
+    result: dict
+    expires_at: float
+    tags: Tuple[str, ...]
+
+
+class CommandResultCache(Singleton):
+    """Per-key command results with TTL and tag-based invalidation."""
+
+    def __init__(self, config: Optional[dict] = None, *, clock: Callable[[], float] = time.monotonic):
+        cfg = (config or {}).get("command_cache", {}) or {}
+        self.enabled = bool(cfg.get("enabled", True))
+        self.ttl_overrides: Dict[str, float] = {str(k): float(v) for k, v in (cfg.get("ttl_s") or {}).items()}
+        self._clock = clock
+        self._entries: Dict[str, _Entry] = {}
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def ttl_for(self, prefix: str, default: float) -> float:
+        return self.ttl_overrides.get(prefix, default)
+
+    def get(self, key: str) -> Optional[dict]:
+        """A copy of the cached result, or None when absent/expired."""
+        if not self.enabled:
+            return None
+        entry = self._entries.get(key)
+        if entry is None or entry.expires_at <= self._clock():
+            self._entries.pop(key, None)
+            self.misses += 1
+            return None
+        self.hits += 1
+        return copy.deepcopy(entry.result)
+
+    def put(self, key: str, result: dict, ttl_s: float, tags: Iterable[str] = ()) -> None:
+        if not self.enabled or ttl_s <= 0 or not isinstance(result, dict) or "error" in result:
+            return
+        self._entries[key] = _Entry(copy.deepcopy(result), self._clock() + ttl_s, tuple(tags))
+
+    def invalidate(self, tag: str) -> int:
+        """Drop every entry tagged with ``tag``; returns the number dropped."""
+        stale = [key for key, entry in self._entries.items() if tag in entry.tags]
+        for key in stale:
+            del self._entries[key]
+        self.invalidations += len(stale)
+        return len(stale)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def status(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+        }
+
+
+def invalidate_command_cache(tag: str) -> int:
+    """State-change hook for managers/DAOs; no-op before the cache is initialized."""
+    if not CommandResultCache.is_initialized():
+        return 0
+    return CommandResultCache.instance().invalidate(tag)
+
+
+@post_save(User)
+async def _invalidate_levels_on_user_save(sender, instance, created, using_db, update_fields) -> None:
+    # 等级散落在多处（:level、送礼、热度升级）修改，统一在保存时失效；未指定 update_fields 时保守处理
+    if created or not update_fields or "level" in update_fields:
+        invalidate_command_cache(LEVEL_CHANGED)
@@ -0,0 +1,151 @@
+"""
+命令执行流水线（CommandPipeline）
+
+一批待执行命令此前逐条「解析 → 查用户/等级 → 执行」，查库等准备工作排在 UI 通道里串行进行。
+流水线把一批命令拆成三段，段与段之间是容量为 lookahead 的 asyncio.Queue：
+
+- classify（后台任务）：规整文本、识别私聊/静默前缀、校验并解析命令、加载命令模块；
+- enrich（后台任务）：非系统用户查 User，等级供限流与权限校验共用（每条命令只查一次库）；
+- execute（调用方）：按原顺序逐条交给 CommandManager 执行，命令在 ``ui_session`` 内占用 UI。
+
+前一条命令持有 UI 锁并在 await（页面等待、LLM、数据库）时，后几条的解析和查库在后台段里完成；
+UI 一空出来下一条直接开始。缓冲写满后上游段停下等待，内存与提前量都有上限。
+
+- 执行前若有 User 被保存过（等级调整、马甲合并），该条的用户重新查询，不拿过期等级做判断；
+- 睡眠时段、客房模式检查只读内存状态，且前一条命令可能改变它们，仍在执行时进行；
+- 关键字 / 自然语言解析在入队前（MessageContentEvent → KeywordManager）已完成，这里不重复。
+"""
+
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Iterable, Optional
+
+from tortoise.signals import post_save
+
+from ushareiplay.models.user import User
+
+
+DEFAULT_LOOKAHEAD = 4
+
+_user_saves = 0
+
+
+@post_save(User)
+async def _count_user_saves(sender, instance, created, using_db, update_fields) -> None:
+    global _user_saves
+    _user_saves += 1
+
+
+@dataclass
+class PreparedCommand:
+    """One queued message with everything execution needs, resolved ahead of its turn."""
+
+    message_info: Any
+    command_info: Optional[dict] = None
+    command: Any = None
+    user: Any = None
+    user_saves: int = 0
+
+    @property
+    def prefix(self) -> Optional[str]:
+        return self.command_info["prefix"] if self.command_info else None
+
+    @property
+    def silent(self) -> bool:
+        return bool(self.command_info and self.command_info.get("silent"))
+
+    @property
+    def user_is_stale(self) -> bool:
+        return self.user is not None and self.user_saves != _user_saves
+
+
+class CommandPipeline:
+    """Classify and enrich commands in background stages while earlier ones execute."""
+
+    _DONE = object()
+
+    def __init__(self, manager, *, lookahead: int = DEFAULT_LOOKAHEAD):
+        self.manager = manager
+        self.lookahead = max(1, lookahead)
+
+    def classify(self, message_info) -> PreparedCommand:
+        """Normalize and parse one message; ``command_info`` stays None when it is not a command."""
+        manager = self.manager
+        prepared = PreparedCommand(message_info)
+        if not message_info.content:
+            return prepared
+        # Normalize command input (tolerate leading spaces and spaces after colon)
+        extracted_private_reply, content = manager._extract_private_reply_and_normalize(message_info.content)
+        message_info.private_reply = bool(getattr(message_info, "private_reply", False)) or extracted_private_reply
+        silent = bool(getattr(message_info, "silent", False)) or manager._is_silent_command_candidate(
+            message_info.content
+        )
+        if not content or not manager.is_valid_command(content):
+            return prepared
+        command_info = manager.parse_command(content)
+        if not command_info:
+            return prepared
+        command_info["silent"] = silent
+        prepared.command_info = command_info
+        prepared.command = manager.get_command(command_info["prefix"])
+        return prepared
+
+    async def enrich(self, prepared: PreparedCommand) -> PreparedCommand:
+        """Resolve the requester for commands that will be checked against levels / quotas."""
+        if prepared.command is None or self.manager.is_system_user(prepared.message_info.nickname):
+            return prepared
+        from ushareiplay.dal.user_dao import UserDAO
+
+        prepared.user_saves = _user_saves
+        try:
+            prepared.user = await UserDAO.get_or_create(prepared.message_info.nickname)
+        except Exception:
+            # 查不到就留给执行阶段按原路径再查
+            prepared.user = None
+        return prepared
+
+    async def refresh(self, prepared: PreparedCommand) -> PreparedCommand:
+        """Re-resolve the user when any user was saved after enrichment (levels may have changed)."""
+        if prepared.user_is_stale:
+            prepared.user = None
+            return await self.enrich(prepared)
+        return prepared
+
+    async def _classify_stage(self, messages: Iterable, out: asyncio.Queue) -> None:
+        try:
+            for message_info in messages:
+                await out.put(self.classify(message_info))
+        finally:
+            await self._finish(out)
+
+    async def _enrich_stage(self, inp: asyncio.Queue, out: asyncio.Queue) -> None:
+        try:
+            while (prepared := await inp.get()) is not self._DONE:
+                await out.put(await self.enrich(prepared))
+        finally:
+            await self._finish(out)
+
+    async def _finish(self, out: asyncio.Queue) -> None:
+        # 被取消说明执行段已经停下，缓冲可能一直是满的，不再放结束标记
+        if not asyncio.current_task().cancelling():
+            await out.put(self._DONE)
+
+    async def run(self, messages: Iterable, execute: Callable[[PreparedCommand], Awaitable[None]]) -> None:
+        """Execute prepared commands in order; earlier stages run up to ``lookahead`` items ahead."""
+        classified: asyncio.Queue = asyncio.Queue(maxsize=self.lookahead)
+        enriched: asyncio.Queue = asyncio.Queue(maxsize=self.lookahead)
+        stages = [
+            asyncio.create_task(self._classify_stage(list(messages), classified)),
+            asyncio.create_task(self._enrich_stage(classified, enriched)),
+        ]
+        try:
+            while (prepared := await enriched.get()) is not self._DONE:
+                await execute(await self.refresh(prepared))
+            await asyncio.gather(*stages)
+        finally:
+            pending = [stage for stage in stages if not stage.done()]
+            for stage in pending:
+                stage.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
@@ -0,0 +1,227 @@
+"""
+命令执行监督（CommandSupervisor）
+
+`playlist` / `radio` / `lyrics` / `fav` / 上麦等长 UI 命令在 ui_session 内一直跑到结束，没有期限；
+一串卡住的 wait_for_element 能占住 UI 锁好几分钟，也没有办法中途叫停。
+
+- 每条命令在 :class:`CommandScope` 内执行：期限取 ``command_deadline.timeout_s.<prefix>``，缺省 ``default_s``；
+- 协作式取消：ElementFinder 的每次等待都先调用 :func:`bound_timeout`（已超时/已取消则抛出
+  :class:`CommandCancelled`，否则把等待时长截到剩余期限内），等待轮询中再调用 :func:`checkpoint`；
+  命令中的 ``await`` 点由 asyncio 取消打断；
+- 取消来源：控制台 ``!cancel``（输入线程直接调用 :meth:`CommandSupervisor.cancel_running`，线程安全），
+  以及在检查点上节流轮询的取消探针（agent spool 中的 ``!cancel``）；
+- 中止后由 CommandManager 发 ``command.timeout`` / ``command.cancelled`` 并用 RecoveryManager 把 UI 拉回房间。
+
+:class:`CommandCancelled` 继承 BaseException（同 asyncio.CancelledError），命令与 ElementFinder 中大量
+``except Exception`` 不会把它吞掉。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional
+
+from ushareiplay.core.singleton import Singleton
+
+
+DEFAULT_DEADLINE_S = 120.0
+DEFAULT_PROBE_INTERVAL_S = 0.5
+
+TIMEOUT = "timeout"
+CANCEL_COMMAND = "!cancel"
+
+
+class CommandCancelled(BaseException):
+    """Raised at a checkpoint once the running command hit its deadline or was cancelled."""
+
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+    @property
+    def timed_out(self) -> bool:
+        return self.reason == TIMEOUT
+
+
+class CommandScope:
+    """Deadline and cancellation flag of one running command."""
+
+    def __init__(self, prefix: str, timeout_s: float, *, supervisor: "CommandSupervisor"):
+        self.prefix = prefix
+        self.timeout_s = timeout_s
+        self._supervisor = supervisor
+        self._clock = supervisor._clock
+        self.started_at = self._clock()
+        self.deadline = self.started_at + timeout_s if timeout_s > 0 else None
+        self.reason: Optional[str] = None
+        self._cancelled = threading.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def remaining(self) -> Optional[float]:
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - self._clock())
+
+    def elapsed(self) -> float:
+        return self._clock() - self.started_at
+
+    def cancel(self, reason: str) -> None:
+        """Request cancellation (thread-safe); the command stops at its next checkpoint or await."""
+        if self._cancelled.is_set():
+            return
+        self.reason = reason
+        self._cancelled.set()
+        task, loop = self._task, self._loop
+        if task is not None and loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(task.cancel)
+
+    def checkpoint(self) -> None:
+        if not self._cancelled.is_set():
+            if self.deadline is not None and self._clock() >= self.deadline:
+                self.cancel(TIMEOUT)
+            else:
+                self._supervisor._poll_probes(self)
+        if self._cancelled.is_set():
+            raise CommandCancelled(self.reason or TIMEOUT)
+
+    async def run(self, coro):
+        """Await ``coro`` as a task bounded by the deadline; cancellation surfaces as CommandCancelled."""
+        self._loop = asyncio.get_running_loop()
+        task = self._task = asyncio.ensure_future(coro)
+        try:
+            if self._cancelled.is_set():
+                task.cancel()
+            done, _ = await asyncio.wait({task}, timeout=self.remaining())
+            if not done:
+                self.cancel(TIMEOUT)
+                await asyncio.wait({task})
+            try:
+                return task.result()
+            except asyncio.CancelledError:
+                if self.reason:
+                    raise CommandCancelled(self.reason) from None
+                raise
+        except asyncio.CancelledError:
+            # 外层被取消（如关闭）：不留下孤儿任务
+            task.cancel()
+            raise
+        finally:
+            self._task = None
+
+
+_current_scope: ContextVar[Optional[CommandScope]] = ContextVar("command_scope", default=None)
+
+
+def current_scope() -> Optional[CommandScope]:
+    return _current_scope.get()
+
+
+def checkpoint() -> None:
+    """Raise CommandCancelled when the running command is past its deadline or cancelled; no-op outside commands."""
+    scope = _current_scope.get()
+    if scope is not None:
+        scope.checkpoint()
+
+
+def bound_timeout(timeout: float) -> float:
+    """Check for cancellation, then cap a wait ``timeout`` to the running command's remaining budget."""
+    scope = _current_scope.get()
+    if scope is None:
+        return timeout
+    scope.checkpoint()
+    remaining = scope.remaining()
+    return timeout if remaining is None else min(timeout, remaining)
+
+
+def cancellable(condition):
+    """Wrap a WebDriverWait condition so every poll is also a cancellation checkpoint."""
+
+    def _poll(driver):
+        checkpoint()
+        return condition(driver)
+
+    return _poll
+
+
+class CommandSupervisor(Singleton):
+    """Per-command deadlines and cancellation of the running command."""
+
+    def __init__(self, config: Optional[dict] = None, *, clock: Callable[[], float] = time.monotonic):
+        cfg = (config or {}).get("command_deadline", {}) or {}
+        self.enabled = bool(cfg.get("enabled", True))
+        self.default_s = float(cfg.get("default_s", DEFAULT_DEADLINE_S))
+        self.timeouts: Dict[str, float] = {str(k): float(v) for k, v in (cfg.get("timeout_s") or {}).items()}
+        self.restore_ui = bool(cfg.get("restore_ui", True))
+        self.probe_interval_s = float(cfg.get("probe_interval_s", DEFAULT_PROBE_INTERVAL_S))
+        self._clock = clock
+        self._probes: List[Callable[[], Optional[str]]] = []
+        self._last_probe = 0.0
+        self.running: Optional[CommandScope] = None
+        self.timeouts_total = 0
+        self.cancelled_total = 0
+
+    def timeout_for(self, prefix: str) -> float:
+        return self.timeouts.get(prefix, self.default_s)
+
+    def add_cancel_probe(self, probe: Callable[[], Optional[str]]) -> None:
+        """Register a callable polled at checkpoints; a non-empty return value cancels with that reason."""
+        self._probes.append(probe)
+
+    def _poll_probes(self, scope: CommandScope) -> None:
+        if not self._probes:
+            return
+        now = self._clock()
+        if now - self._last_probe < self.probe_interval_s:
+            return
+        self._last_probe = now
+        for probe in self._probes:
+            try:
+                reason = probe()
+            except Exception:
+                reason = None
+            if reason:
+                scope.cancel(reason)
+                return
+
+    @contextmanager
+    def scope(self, prefix: str):
+        """Run the enclosed command under its deadline; yields None when supervision is disabled."""
+        if not self.enabled:
+            yield None
+            return
+        scope = CommandScope(prefix, self.timeout_for(prefix), supervisor=self)
+        token = _current_scope.set(scope)
+        previous, self.running = self.running, scope
+        try:
+            yield scope
+        except CommandCancelled as exc:
+            if exc.timed_out:
+                self.timeouts_total += 1
+            else:
+                self.cancelled_total += 1
+            raise
+        finally:
+            self.running = previous
+            _current_scope.reset(token)
+
+    def cancel_running(self, reason: str) -> Optional[str]:
+        """Cancel the running command (thread-safe); returns its prefix, or None when idle."""
+        scope = self.running
+        if scope is None:
+            return None
+        scope.cancel(reason)
+        return scope.prefix
+
+    def status(self) -> dict:
+        scope = self.running
+        return {
+            "running": scope.prefix if scope else None,
+            "elapsed_s": round(scope.elapsed(), 1) if scope else None,
+            "timeouts": self.timeouts_total,
+            "cancelled": self.cancelled_total,
+        }
@@ -0,0 +1,222 @@
+"""
+本地控制接口（ControlServer）
+
+此前 agent 与 E2E 只能经文件交互：主循环每轮 glob `.agent/commands/*.cmd`（AgentCommandSpool），
+状态靠轮询 status.json，结果靠 tail events.jsonl。控制接口改为在 Unix 域套接字上按行收发 JSON：
+
+- ``{"op": "command", "content": ":help", "nickname": "Console", "id": "...", "stream": true, "timeout_s": 120}``：
+  与 spool 一样放入控制台输入队列（来源 ``agent_socket``），先回 ``accepted``；处理过程中带该请求 ID
+  （trace_id）的事件逐条回传（``stream``），全部命令执行完后回 ``result``（超时回 ``ok: false``）；
+- ``{"op": "status"}``：最近一次状态快照（同 status.json）与正在执行的命令；
+- ``{"op": "cancel"}``：取消正在执行的命令（同控制台 ``!cancel``）；``{"op": "ping"}``：存活检查。
+
+请求 ID 经 MessageInfo.request_id 随命令流转，执行时由 :func:`trace_context` 打到事件上；
+主循环入队后发 ``control.request.queued``（命令条数），每条命令结束（含无效、出错）发 ``control.command.done``；
+出队时一条再按 ``;`` 展开成多条的，发 ``control.request.expanded``（多出的条数）补足应等的结果数。
+套接字监听成功后 spool 退为兜底通道，改为每 spool_poll_interval_s 扫描一次。
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import queue
+import socket
+import socketserver
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+
+DEFAULT_SOCKET_PATH = ".agent/control.sock"
+DEFAULT_TIMEOUT_S = 120.0
+DEFAULT_SPOOL_POLL_INTERVAL_S = 5.0
+
+SOURCE = "agent_socket"
+QUEUED_EVENT = "control.request.queued"
+DONE_EVENT = "control.command.done"
+EXPANDED_EVENT = "control.request.expanded"
+
+
+class _Request:
+    """Events of one in-flight command request, fed by the observability listener."""
+
+    def __init__(self, request_id: str):
+        self.id = request_id
+        self.events: "queue.Queue[Dict[str, Any]]" = queue.Queue()
+
+
+class ControlServer:
+    """Serve the JSON-lines control protocol on a Unix domain socket from a daemon thread."""
+
+    def __init__(
+        self,
+        *,
+        config: Optional[dict] = None,
+        input_queue,
+        obs,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        cfg = (config or {}).get("control_api", {}) or {}
+        self.enabled = bool(cfg.get("enabled", False))
+        self.socket_path = Path(str(cfg.get("socket_path", DEFAULT_SOCKET_PATH)))
+        self.default_timeout_s = float(cfg.get("default_timeout_s", DEFAULT_TIMEOUT_S))
+        self.spool_poll_interval_s = float(cfg.get("spool_poll_interval_s", DEFAULT_SPOOL_POLL_INTERVAL_S))
+        self.input_queue = input_queue
+        self.obs = obs
+        self._clock = clock
+        self._requests: Dict[str, _Request] = {}
+        self._server: Optional[socketserver.ThreadingUnixStreamServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def listening(self) -> bool:
+        return self._server is not None
+
+    def start(self) -> None:
+        if not self.enabled or self._server is not None:
+            return
+        if not hasattr(socket, "AF_UNIX"):
+            self._emit("control.server.error", level="ERROR", ctx={"error": "AF_UNIX not supported"})
+            return
+        control = self
+
+        class _Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                for line in self.rfile:
+                    if not line.strip():
+                        continue
+                    try:
+                        control._handle_line(line, self._send)
+                    except (BrokenPipeError, ConnectionResetError):
+                        return
+
+            def _send(self, message: Dict[str, Any]) -> None:
+                self.wfile.write((json.dumps(message, ensure_ascii=False) + "\n").encode("utf-8"))
+                self.wfile.flush()
+
+        try:
+            self.socket_path.parent.mkdir(parents=True, exist_ok=True)
+            # 上次异常退出留下的套接字文件会导致 bind 失败
+            self.socket_path.unlink(missing_ok=True)
+            self._server = socketserver.ThreadingUnixStreamServer(str(self.socket_path), _Handler)
+            os.chmod(self.socket_path, 0o600)
+        except OSError as e:
+            self._server = None
+            self._emit("control.server.error", level="ERROR", ctx={"path": str(self.socket_path), "error": str(e)})
+            return
+        self._server.daemon_threads = True
+        self.obs.add_listener(self._on_event)
+        self._thread = threading.Thread(target=self._server.serve_forever, name="control-server", daemon=True)
+        self._thread.start()
+        self._emit("control.server.start", ctx={"path": str(self.socket_path)})
+
+    def stop(self) -> None:
+        if self._server is None:
+            return
+        self.obs.remove_listener(self._on_event)
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+        self._server = None
+        self._thread = None
+        self.socket_path.unlink(missing_ok=True)
+
+    def _on_event(self, payload: Dict[str, Any]) -> None:
+        request = self._requests.get(payload.get("trace_id"))
+        if request is not None:
+            request.events.put(payload)
+
+    def _handle_line(self, line: bytes, send: Callable[[Dict[str, Any]], None]) -> None:
+        try:
+            message = json.loads(line.decode("utf-8"))
+            if not isinstance(message, dict):
+                raise ValueError("request must be a JSON object")
+        except Exception as e:
+            send({"type": "error", "error": f"invalid request: {e}"})
+            return
+        op = message.get("op")
+        if op == "command":
+            self._handle_command(message, send)
+        elif op == "status":
+            send({"id": message.get("id"), "type": "status", **self.status()})
+        elif op == "cancel":
+            send({"id": message.get("id"), "type": "cancelled", "prefix": self._cancel_running()})
+        elif op == "ping":
+            send({"id": message.get("id"), "type": "pong", "run_id": getattr(self.obs, "run_id", None)})
+        else:
+            send({"id": message.get("id"), "type": "error", "error": f"unknown op: {op!r}"})
+
+    def _handle_command(self, message: Dict[str, Any], send: Callable[[Dict[str, Any]], None]) -> None:
+        content = str(message.get("content") or "").rstrip("\r\n")
+        request_id = str(message.get("id") or uuid.uuid4().hex[:12])
+        if not content.strip():
+            send({"id": request_id, "type": "error", "error": "empty content"})
+            return
+        if request_id in self._requests:
+            send({"id": request_id, "type": "error", "error": "duplicate request id"})
+            return
+        nickname = str(message.get("nickname") or "Console")
+        stream = bool(message.get("stream", True))
+        timeout_s = float(message.get("timeout_s") or self.default_timeout_s)
+
+        request = self._requests[request_id] = _Request(request_id)
+        try:
+            self.input_queue.put(
+                {"content": content, "source": SOURCE, "nickname": nickname, "request_id": request_id}
+            )
+            self._emit(
+                "agent.inject.received",
+                ctx={"source": SOURCE, "content": content, "nickname": nickname, "request_id": request_id},
+            )
+            send({"id": request_id, "type": "accepted"})
+            result = self._await_result(request, stream, timeout_s, send)
+        finally:
+            self._requests.pop(request_id, None)
+        # 先注销再回结果：客户端收到结果时 status() 里已不再计入这条请求
+        send({"id": request_id, "type": "result", **result})
+
+    def _await_result(self, request: _Request, stream: bool, timeout_s: float, send) -> Dict[str, Any]:
+        deadline = self._clock() + timeout_s
+        expected: Optional[int] = None
+        extra = 0
+        commands = []
+        while expected is None or len(commands) < expected + extra:
+            remaining = deadline - self._clock()
+            try:
+                if remaining <= 0:
+                    raise queue.Empty
+                payload = request.events.get(timeout=remaining)
+            except queue.Empty:
+                return {"ok": False, "error": "timeout", "queued": expected, "commands": commands}
+            if stream:
+                send({"id": request.id, "type": "event", "event": payload})
+            if payload.get("event") == QUEUED_EVENT:
+                expected = int((payload.get("ctx") or {}).get("commands") or 0)
+            elif payload.get("event") == EXPANDED_EVENT:
+                extra += int((payload.get("ctx") or {}).get("extra") or 0)
+            elif payload.get("event") == DONE_EVENT:
+                commands.append(payload.get("ctx") or {})
+        return {"ok": True, "queued": expected, "commands": commands}
+
+    def _cancel_running(self) -> Optional[str]:
+        from ushareiplay.core.command_supervisor import CommandSupervisor
+
+        if not CommandSupervisor.is_initialized():
+            return None
+        return CommandSupervisor.instance().cancel_running(SOURCE)
+
+    def status(self) -> Dict[str, Any]:
+        from ushareiplay.core.command_supervisor import CommandSupervisor
+
+        command = CommandSupervisor.instance().status() if CommandSupervisor.is_initialized() else None
+        return {"status": getattr(self.obs, "last_status", None), "command": command, "pending": len(self._requests)}
+
+    def _emit(self, event: str, **kwargs) -> None:
+        try:
+            self.obs.emit(event, **kwargs)
+        except Exception:
+            pass
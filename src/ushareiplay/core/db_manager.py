@@ -1,9 +1,35 @@
 from tortoise import Tortoise
 from tortoise import connections
+import functools
+import time
 from datetime import datetime, timedelta
 from typing import Optional, List
 from pathlib import Path
 
+from ushareiplay.core.metrics import DB_QUERY
+
+_TIMED_CLIENT_METHODS = (
+    "execute_query",
+    "execute_query_dict",
+    "execute_insert",
+    "execute_many",
+    "execute_script",
+)
+
+
+def _timed_query(method, histogram):
+    @functools.wraps(method)
+    async def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return await method(*args, **kwargs)
+        finally:
+            histogram.observe(time.perf_counter() - started)
+
+    wrapper._query_timed = True
+    return wrapper
+
+
 class DatabaseManager:
     def __init__(self, db_url: str = None):
         if db_url is None:
@@ -24,6 +50,7 @@ class DatabaseManager:
             modules={'models': ['ushareiplay.models']},
             use_tz=False,
         )
+        self._instrument_query_timing()
         await Tortoise.generate_schemas()
         await self._ensure_user_canonical_column()
         await self._ensure_user_heat_value_column()
@@ -31,6 +58,19 @@ class DatabaseManager:
         await self._ensure_keyword_allowed_users_column()
         await self._ensure_focus_events_created_at()
         await self._ensure_receive_events_created_at()
+        await self._ensure_chat_messages_fts()
+
+    def _instrument_query_timing(self) -> None:
+        """
+        在默认连接实例上包装 execute_* 方法，把每次查询耗时记入 DB_QUERY 直方图（按方法名打标签）。
+        ORM 查询集与 DAO 都经由这些方法落到 SQLite，因此无需逐个 DAO 打点。
+        """
+        conn = connections.get("default")
+        for op in _TIMED_CLIENT_METHODS:
+            method = getattr(conn, op, None)
+            if method is None or getattr(method, "_query_timed", False):
+                continue
+            setattr(conn, op, _timed_query(method, DB_QUERY.labels(op)))
 
     async def _ensure_focus_events_created_at(self) -> None:
         """
@@ -96,6 +136,35 @@ class DatabaseManager:
 
 
 
+    async def _ensure_chat_messages_fts(self) -> None:
+        """
+        为 chat_messages 建立 FTS5 外部内容索引（trigram 分词，中文子串可检索），触发器随增删同步。
+        SQLite 未编译 FTS5 / trigram 时跳过，ChatMessageDAO 退回逐行子串匹配。
+        """
+        conn = connections.get("default")
+        tables = await conn.execute_query_dict(
+            "SELECT name FROM sqlite_master WHERE type='table' AND name='chat_messages_fts'"
+        )
+        if tables:
+            return
+        try:
+            await conn.execute_script(
+                """
+                CREATE VIRTUAL TABLE chat_messages_fts USING fts5(
+                    text, content='chat_messages', content_rowid='id', tokenize='trigram'
+                );
+                CREATE TRIGGER IF NOT EXISTS chat_messages_fts_ai AFTER INSERT ON chat_messages BEGIN
+                    INSERT INTO chat_messages_fts(rowid, text) VALUES (new.id, new.text);
+                END;
+                CREATE TRIGGER IF NOT EXISTS chat_messages_fts_ad AFTER DELETE ON chat_messages BEGIN
+                    INSERT INTO chat_messages_fts(chat_messages_fts, rowid, text) VALUES ('delete', old.id, old.text);
+                END;
+                INSERT INTO chat_messages_fts(chat_messages_fts) VALUES ('rebuild');
+                """
+            )
+        except Exception:
+            return
+
     async def _ensure_user_canonical_column(self) -> None:
         """
         Tortoise `generate_schemas()` does not evolve existing SQLite tables.
@@ -47,6 +47,17 @@ def with_driver_recovery(func=None, *, retry: bool = True, op: str = "read"):
                 if context is None:
                     return None
 
+                # 重建前落盘飞行记录，保留失效前的页面与动作序列
+                try:
+                    context.dump_flight(
+                        "driver_recovery",
+                        method=f.__name__,
+                        op=op,
+                        error=str(e),
+                    )
+                except Exception:
+                    pass
+
                 ok = False
                 try:
                     ok = bool(context.reinitialize_driver())
@@ -0,0 +1,197 @@
+"""
+飞行记录仪（FlightRecorder）
+
+内存环形缓冲：最近 N 帧 page_source（zlib 压缩，连续相同帧只存一次）与最近 M 个 UI 动作
+（点击坐标、按键、shell 命令、按配置 key 解析的元素查找）及其耗时。平时只占内存，
+在 driver 失效恢复、未知页面恢复或进程崩溃时整体落盘到 ``artifacts/<run_id>/flight/``，
+事后排查偶发的慢恢复不再需要长时间复现。
+
+与 SessionRecorder 实现同一组 record_* 接口，因此直接复用 RecordingDriver 作为 driver 代理。
+"""
+
+from __future__ import annotations
+
+import json
+import re
+import threading
+import time
+import zlib
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, Optional
+
+from ushareiplay.core.session_replay import to_jsonable
+
+
+DEFAULT_MAX_SNAPSHOTS = 20
+DEFAULT_MAX_ACTIONS = 200
+DEFAULT_MIN_DUMP_INTERVAL_S = 30.0
+MAX_SHELL_OUTPUT_CHARS = 2000
+TIMELINE_FILE = "timeline.jsonl"
+SNAPSHOTS_DIR = "snapshots"
+_FIND_METHODS = {"find_element", "find_elements"}
+_UNSAFE_CHARS = re.compile(r"[^A-Za-z0-9_.-]+")
+
+
+def _locator_keys(config: Optional[dict]) -> Dict[str, str]:
+    """Map locator value -> element key across every ``elements`` section in config."""
+    keys: Dict[str, str] = {}
+    for section in (config or {}).values():
+        elements = section.get("elements") if isinstance(section, dict) else None
+        if not isinstance(elements, dict):
+            continue
+        for key, value in elements.items():
+            if isinstance(value, str):
+                keys.setdefault(value, key)
+    return keys
+
+
+class FlightRecorder:
+    """Bounded in-memory history of screens and UI actions, dumped on incidents."""
+
+    def __init__(
+        self,
+        *,
+        config: Optional[dict] = None,
+        obs=None,
+        dump_dir: Optional[Path] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        cfg = (config or {}).get("flight_recorder", {}) or {}
+        self.enabled = bool(cfg.get("enabled", True))
+        self.max_snapshots = int(cfg.get("max_snapshots", DEFAULT_MAX_SNAPSHOTS))
+        self.max_actions = int(cfg.get("max_actions", DEFAULT_MAX_ACTIONS))
+        self.min_dump_interval_s = float(cfg.get("min_dump_interval_s", DEFAULT_MIN_DUMP_INTERVAL_S))
+        self.obs = obs
+        self.dump_dir = dump_dir
+        self._clock = clock
+        self._started = clock()
+        self._seq = 0
+        self._snapshots: Deque[dict] = deque(maxlen=max(1, self.max_snapshots))
+        self._actions: Deque[dict] = deque(maxlen=max(1, self.max_actions))
+        self._last_source: Optional[str] = None
+        self._last_dump: Dict[str, float] = {}
+        self._locator_keys = _locator_keys(config)
+        self._lock = threading.Lock()
+
+    def _entry(self, op: str, duration_s: float, **fields) -> dict:
+        self._seq += 1
+        entry = {
+            "seq": self._seq,
+            "t": round(self._clock() - self._started, 4),
+            "wall": datetime.now().isoformat(timespec="milliseconds"),
+            "op": op,
+            "duration_ms": round(duration_s * 1000.0, 2),
+        }
+        entry.update(fields)
+        return entry
+
+    def record_page_source(self, source: Optional[str], duration_s: float) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            if source is not None and source == self._last_source and self._snapshots:
+                # 静止页面不重复压缩，只在最近一帧上计数
+                last = self._snapshots[-1]
+                last["repeats"] += 1
+                self._actions.append(
+                    self._entry("page_source", duration_s, snapshot=last["seq"], bytes=last["bytes"])
+                )
+                return
+            raw = source.encode("utf-8") if source else b""
+            entry = self._entry("page_source", duration_s, bytes=len(raw))
+            if source is not None:
+                entry["snapshot"] = entry["seq"]
+                self._snapshots.append(
+                    {
+                        "seq": entry["seq"],
+                        "bytes": len(raw),
+                        "repeats": 0,
+                        "data": zlib.compress(raw, 1),
+                    }
+                )
+                self._last_source = source
+            self._actions.append(entry)
+
+    def record_shell(self, command: str, output: Any, duration_s: float) -> None:
+        if not self.enabled:
+            return
+        text = output if isinstance(output, str) else repr(output)
+        with self._lock:
+            self._actions.append(
+                self._entry("shell", duration_s, command=command, output=text[:MAX_SHELL_OUTPUT_CHARS])
+            )
+
+    def record_action(self, name: str, args: list, duration_s: float) -> None:
+        if not self.enabled:
+            return
+        fields: Dict[str, Any] = {"name": name, "args": [to_jsonable(a) for a in args]}
+        if name in _FIND_METHODS and len(args) >= 2:
+            element_key = self._locator_keys.get(args[1])
+            if element_key:
+                fields["element_key"] = element_key
+        with self._lock:
+            self._actions.append(self._entry("action", duration_s, **fields))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "snapshots": len(self._snapshots),
+                "actions": len(self._actions),
+                "compressed_bytes": sum(len(s["data"]) for s in self._snapshots),
+            }
+
+    def dump(self, reason: str, ctx: Optional[dict] = None, *, force: bool = False) -> Optional[Path]:
+        """Write the buffered history to ``dump_dir/<timestamp>-<reason>/``; rate-limited per reason."""
+        if not self.enabled or self.dump_dir is None:
+            return None
+        now = self._clock()
+        last = self._last_dump.get(reason)
+        if not force and last is not None and now - last < self.min_dump_interval_s:
+            return None
+        self._last_dump[reason] = now
+
+        with self._lock:
+            snapshots = list(self._snapshots)
+            timeline = list(self._actions)
+
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+        directory = Path(self.dump_dir) / f"{stamp}-{_UNSAFE_CHARS.sub('_', reason)}"
+        try:
+            (directory / SNAPSHOTS_DIR).mkdir(parents=True, exist_ok=True)
+            for snapshot in snapshots:
+                (directory / SNAPSHOTS_DIR / f"{snapshot['seq']:06d}.xml").write_bytes(
+                    zlib.decompress(snapshot["data"])
+                )
+            with (directory / TIMELINE_FILE).open("w", encoding="utf-8") as f:
+                for entry in timeline:
+                    f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            meta = {
+                "reason": reason,
+                "ctx": to_jsonable(ctx or {}),
+                "snapshots": [
+                    {"seq": s["seq"], "bytes": s["bytes"], "repeats": s["repeats"]} for s in snapshots
+                ],
+                "timeline_entries": len(timeline),
+            }
+            (directory / "meta.json").write_text(
+                json.dumps(meta, ensure_ascii=False, indent=2), encoding="utf-8"
+            )
+        except Exception as e:
+            self._emit("flight.dump.error", level="ERROR", ctx={"reason": reason, "error": str(e)})
+            return None
+
+        self._emit(
+            "flight.dump",
+            ctx={"reason": reason, "path": str(directory), "snapshots": len(snapshots), "entries": len(timeline)},
+        )
+        return directory
+
+    def _emit(self, event: str, **kwargs) -> None:
+        if self.obs is None:
+            return
+        try:
+            self.obs.emit(event, **kwargs)
+        except Exception:
+            pass
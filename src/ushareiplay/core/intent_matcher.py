@@ -0,0 +1,319 @@
+"""
+本地意图匹配（IntentMatcher）
+
+未命中关键字的 @提及 原先全部交给 NaturalLanguageResolver（一次 LLM 往返，秒级），其中大量是
+「放一首周杰伦的晴天」「下一首」「音量大一点」「歌词」这类句式固定的请求。本模块在 LLM 之前：
+
+- 以 ``commands`` 配置中的前缀为准，只生成当前可用（客房模式已过滤）的命令；
+- 用一组人工整理的句式规则抽取槽位（歌名、歌手、音量增量/数值、歌单、专辑）；
+- 每条规则带基础置信度，槽位含疑问/否定词、指代「我/你」或过长时降分；
+- 仅当置信度 >= min_confidence 时直接转成命令，否则仍交给 LLM。
+
+规则顺序无关，取置信度最高者；纯内存正则匹配，单次为微秒级。
+"""
+
+from __future__ import annotations
+
+import json
+import re
+import time
+import unicodedata
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
+
+
+DEFAULT_MIN_CONFIDENCE = 0.75
+VOLUME_STEP = 2
+MAX_VOLUME = 15
+MAX_SLOT_LENGTH = 30
+VAGUE_PENALTY = 0.3
+
+_PLAY = r"(?:放|播放?|来|点|听)"
+_CLASSIFIER = r"(?:一首|一下|首|个)"
+# 句首客套与句尾标点，不影响意图
+_LEADING = re.compile(r"^(?:请|麻烦|帮我|给我|帮忙|能不能|可以|能|我想|我要|想)+")
+_TRAILING = re.compile(r"(?:谢谢|~|!|。|\.|,|，)+$")
+# 句尾语气词：固定句式在规则末尾吞掉，贪婪槽位里的由 _slot 去掉（「来首十年吧」）
+_PARTICLE_CHARS = "吧呀啊哦噢哈嘛呗"
+_PARTICLES = rf"[{_PARTICLE_CHARS}]*"
+# 槽位末尾的语气词与悬空的「的」；书名号/引号括起的歌名原样保留（《回来吧》）
+_SLOT_TAIL = re.compile(rf"[{_PARTICLE_CHARS}的]+$")
+_QUOTES = " 《》\"'“”"
+# 「周杰伦的」「快乐的歌」：只有修饰语、没有具体歌名，多半是按歌手/风格泛指
+_MODIFIER_ONLY = re.compile(rf"的(?:歌|歌曲|音乐)?[{_PARTICLE_CHARS}]*$")
+# 「快乐的歌」「伤感的音乐」里的情绪/风格词不是歌手
+_MOOD = re.compile(
+    r"^(?:很|超|比较|特别|有点)?(?:快乐|开心|欢快|伤感|悲伤|难过|安静|轻松|抒情|温柔|治愈|浪漫|甜甜?|嗨|动感"
+    r"|好听|经典|热门|流行|古风|摇滚|民谣|怀旧|老|新|慢|快)$"
+)
+_DOUBTFUL = re.compile(r"吗|呢|\?|不要|别|不想|为什么|怎么|什么")
+_DEICTIC = re.compile(r"我|你|他|她|这首|那首")
+# 泛指「歌」而非具体歌名的槽位值
+_GENERIC = {"歌", "歌曲", "音乐", "首歌", "一首歌", "好听的", "好听的歌", "点歌", "些歌"}
+# 只是量词或播放器术语（「来个歌单」「播放列表」「播放模式」），不是槽位值
+_NOT_A_SLOT = re.compile(rf"^(?:{_CLASSIFIER}|张|列表|模式|下一首|歌单|专辑)$")
+# 「来个」「点个」「放个」开头多是闲聊（「点个赞」「来个笑话」「放个屁」），按歌名理解的把握不足
+_VAGUE_PLAY = re.compile(r"^(?:来|点|放|播放?)个")
+
+
+@dataclass(frozen=True)
+class IntentMatch:
+    """A locally resolved command with its confidence."""
+
+    command: str
+    prefix: str
+    confidence: float
+    rule: str
+
+
+@dataclass(frozen=True)
+class IntentRule:
+    name: str
+    prefix: str
+    pattern: "re.Pattern[str]"
+    confidence: float
+    build: Callable[[Dict[str, str]], Optional[str]]
+    vague: Optional["re.Pattern[str]"] = None  # 命中时置信度再降 VAGUE_PENALTY
+
+
+def normalize_mention(text: str) -> str:
+    """NFKC, collapse whitespace, strip politeness prefixes and trailing punctuation."""
+    text = " ".join(unicodedata.normalize("NFKC", text or "").split())
+    text = _TRAILING.sub("", text).strip()
+    return _LEADING.sub("", text).strip()
+
+
+def _slot(value: Optional[str]) -> Optional[str]:
+    value = (value or "").strip()
+    quoted = bool(value) and value[0] in "《\"'“"
+    value = value.strip(_QUOTES)
+    if not quoted:
+        value = _SLOT_TAIL.sub("", value)
+    if not value or value in _GENERIC or _NOT_A_SLOT.match(value):
+        return None
+    return value
+
+
+def _song_and_singer(slots: Dict[str, str]) -> Optional[str]:
+    song = _slot(slots.get("song"))
+    if not song:
+        return None
+    singer = _slot(slots.get("singer"))
+    return f"{song} {singer}" if singer else song
+
+
+def _split_target(slots: Dict[str, str]) -> Optional[str]:
+    """``周杰伦的稻香`` -> ``稻香 周杰伦``; without ``的`` the whole target is the song."""
+    target = slots.get("target") or ""
+    singer, sep, song = target.partition("的")
+    return _song_and_singer({"song": song, "singer": singer} if sep else {"song": target})
+
+
+def _fixed(params: str = "") -> Callable[[Dict[str, str]], Optional[str]]:
+    return lambda _slots: params
+
+
+def _singer(slots: Dict[str, str]) -> Optional[str]:
+    singer = _slot(slots.get("singer"))
+    return None if singer is None or _MOOD.match(singer) else singer
+
+
+def _volume_delta(slots: Dict[str, str]) -> Optional[str]:
+    return f"+{VOLUME_STEP}" if slots.get("dir") in ("大", "高") else f"-{VOLUME_STEP}"
+
+
+def _volume_level(slots: Dict[str, str]) -> Optional[str]:
+    level = int(slots["level"])
+    return str(level) if 0 <= level <= MAX_VOLUME else None
+
+
+def _rule(name: str, prefix: str, pattern: str, confidence: float, build, vague: Optional[str] = None) -> IntentRule:
+    return IntentRule(
+        name, prefix, re.compile(f"^(?:{pattern}){_PARTICLES}$", re.IGNORECASE), confidence, build,
+        re.compile(vague) if vague else None,
+    )
+
+
+RULES: List[IntentRule] = [
+    _rule("next", "next", r"下一首|下一曲|切歌|换一首|换首歌|换歌|切一首|next|skip", 0.95, _fixed()),
+    _rule(
+        "queue_song", "next",
+        rf"(?:下一首|接下来|待会儿?|然后)(?:再)?{_PLAY}{_CLASSIFIER}?(?P<target>.+)",
+        0.85, _split_target,
+    ),
+    _rule("pause", "pause", r"暂停(?:播放|一下)?|停一下|先停一下|停止播放|别放了", 0.9, _fixed("1")),
+    _rule("resume", "pause", r"继续(?:播放|放)?|接着放|恢复播放", 0.9, _fixed("0")),
+    _rule(
+        "lyrics", "lyrics",
+        r"(?:看看|看下|看一下|发一下|发下|显示|查看|来点)?(?:这首歌的?|这首的|当前的?|现在的?)?歌词",
+        0.95, _fixed(),
+    ),
+    _rule(
+        "volume_step", "vol",
+        r"(?:把)?(?:音量|声音)(?:调|开|再)?(?P<dir>大|小|高|低)(?:一)?(?:点|些|一点)?"
+        r"|(?P<dir2>大|小)声(?:一)?点"
+        r"|(?:调|开)(?P<dir3>大|小|高|低)(?:一点)?(?:音量|声音)",
+        0.9, lambda s: _volume_delta({"dir": s.get("dir") or s.get("dir2") or s.get("dir3")}),
+    ),
+    _rule(
+        "volume_set", "vol",
+        r"(?:把)?(?:音量|声音)(?:调到|调成|设为|设置为|设成|开到|到|调)?(?P<level>\d{1,2})(?:格)?",
+        0.95, _volume_level,
+    ),
+    _rule("volume_query", "vol", r"(?:现在|当前)?(?:音量|声音)(?:是)?(?:多少|多大)", 0.9, _fixed()),
+    _rule(
+        "playlist", "playlist",
+        rf"{_PLAY}(?:一下|个)?歌单(?P<playlist>.+)|{_PLAY}(?:一下)?(?P<playlist2>.+?)(?:这个)?歌单",
+        0.9, lambda s: _slot(s.get("playlist") or s.get("playlist2")),
+    ),
+    _rule(
+        "album", "album",
+        rf"{_PLAY}(?:一下|张)?专辑(?P<album>.+)|{_PLAY}(?:一下)?(?P<album2>.+?)(?:这张)?专辑",
+        0.9, lambda s: _slot(s.get("album") or s.get("album2")),
+    ),
+    _rule(
+        "singer", "singer",
+        rf"{_PLAY}{_CLASSIFIER}?(?:点|一些|几首|一点)?(?P<singer>[^的]+?)的(?:歌|歌曲|音乐)",
+        0.85, _singer,
+    ),
+    _rule(
+        "play_by_singer", "play",
+        rf"{_PLAY}{_CLASSIFIER}?(?P<singer>[^的]+?)的(?P<song>.+)",
+        0.88, _song_and_singer,
+    ),
+    _rule("play_song", "play", rf"{_PLAY}{_CLASSIFIER}(?P<song>.+)|播放(?P<song2>.+)", 0.82,
+          lambda s: _song_and_singer({"song": s.get("song") or s.get("song2")}), vague=_VAGUE_PLAY.pattern),
+    # 「放晴天」类无量词的短句歧义较大（「放开」「来吧」），默认低于阈值交给 LLM
+    _rule("play_bare", "play", rf"(?:放|来)(?P<song>.+)", 0.6, _song_and_singer),
+    _rule(
+        "now_playing", "info",
+        r"(?:现在|当前)?(?:在)?(?:放|播)的?(?:是)?(?:什么|啥)(?:歌)?|这是什么歌|这首歌叫什么(?:名字)?",
+        0.9, _fixed(),
+    ),
+    _rule("help", "help", r"帮助|怎么用|有哪些命令|有什么命令|命令列表|菜单|help", 0.95, _fixed()),
+]
+
+
+class IntentMatcher:
+    """Rule-based mention -> command matcher run ahead of the LLM resolver."""
+
+    def __init__(self, config: Optional[dict] = None, rules: Optional[List[IntentRule]] = None):
+        root = config or {}
+        cfg = root.get("intent_matcher", {}) or {}
+        self.enabled = bool(cfg.get("enabled", True))
+        self.min_confidence = float(cfg.get("min_confidence", DEFAULT_MIN_CONFIDENCE))
+        self.rules = list(RULES if rules is None else rules)
+        self.prefixes = {cmd.get("prefix") for cmd in root.get("commands", []) or [] if cmd.get("prefix")}
+
+    def _allowed(self, commands_config: Optional[Iterable[dict]]) -> set:
+        if commands_config is None:
+            return self.prefixes
+        return {cmd.get("prefix") for cmd in commands_config if cmd.get("prefix")}
+
+    def _direct(self, text: str, allowed: set) -> Optional[IntentMatch]:
+        """``play 晴天`` / ``:next`` typed without the colon-command syntax."""
+        head, _, rest = text.lstrip(":").partition(" ")
+        prefix = head.lower()
+        if prefix not in allowed:
+            return None
+        command = f":{prefix} {rest.strip()}".strip()
+        return IntentMatch(command=command, prefix=prefix, confidence=0.95, rule="prefix")
+
+    def match(self, text: str, commands_config: Optional[Iterable[dict]] = None) -> Optional[IntentMatch]:
+        """Best match regardless of threshold (for benchmarking); None when nothing applies."""
+        normalized = normalize_mention(text)
+        if not normalized:
+            return None
+        allowed = self._allowed(commands_config)
+        best = self._direct(normalized, allowed)
+        for rule in self.rules:
+            if rule.prefix not in allowed:
+                continue
+            found = rule.pattern.match(normalized)
+            if not found:
+                continue
+            slots = {k: v for k, v in found.groupdict().items() if v}
+            params = rule.build(slots)
+            if params is None:
+                continue
+            confidence = rule.confidence - self._penalty(slots)
+            if rule.vague is not None and rule.vague.search(normalized):
+                confidence -= VAGUE_PENALTY
+            if best is None or confidence > best.confidence:
+                command = f":{rule.prefix} {params}".strip()
+                best = IntentMatch(command=command, prefix=rule.prefix, confidence=round(confidence, 3), rule=rule.name)
+        return best
+
+    @staticmethod
+    def _penalty(slots: Dict[str, str]) -> float:
+        penalty = 0.0
+        for value in slots.values():
+            if _DOUBTFUL.search(value):
+                penalty += 0.3
+            if _DEICTIC.search(value):
+                penalty += 0.2
+            if len(value) > MAX_SLOT_LENGTH:
+                penalty += 0.2
+            if _MODIFIER_ONLY.search(value):
+                penalty += 0.3
+        return penalty
+
+    def resolve(self, text: str, commands_config: Optional[Iterable[dict]] = None) -> Optional[IntentMatch]:
+        """Confident local match, or None to fall through to the LLM."""
+        if not self.enabled:
+            return None
+        found = self.match(text, commands_config)
+        if found is None or found.confidence < self.min_confidence:
+            return None
+        return found
+
+
+def load_mentions(path) -> List[dict]:
+    """Corpus of logged mentions: JSONL ``{"text", "command"}`` (command null = expected LLM) or plain lines."""
+    mentions = []
+    for line in Path(path).read_text(encoding="utf-8").splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith("{"):
+            mentions.append(json.loads(line))
+        else:
+            mentions.append({"text": line})
+    return mentions
+
+
+def benchmark_matcher(matcher: IntentMatcher, mentions: List[dict], repeat: int = 100) -> dict:
+    """Coverage, accuracy (for labelled mentions) and per-call latency of :meth:`IntentMatcher.resolve`."""
+    local = 0
+    labelled = 0
+    correct = 0
+    mismatches = []
+    for mention in mentions:
+        found = matcher.resolve(mention["text"])
+        local += found is not None
+        if "command" in mention:
+            labelled += 1
+            got = found.command if found else None
+            if got == mention["command"]:
+                correct += 1
+            else:
+                mismatches.append({"text": mention["text"], "expected": mention["command"], "got": got})
+
+    samples = []
+    for _ in range(max(1, repeat)):
+        for mention in mentions:
+            started = time.perf_counter()
+            matcher.resolve(mention["text"])
+            samples.append((time.perf_counter() - started) * 1e6)
+    samples.sort()
+    total = len(mentions) or 1
+    return {
+        "mentions": len(mentions),
+        "local": local,
+        "coverage": round(local / total, 3),
+        "accuracy": round(correct / labelled, 3) if labelled else None,
+        "mismatches": mismatches,
+        "mean_us": round(sum(samples) / len(samples), 2) if samples else 0.0,
+        "p95_us": round(samples[int(len(samples) * 0.95) - 1], 2) if samples else 0.0,
+    }
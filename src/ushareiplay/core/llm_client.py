@@ -0,0 +1,172 @@
+"""
+LLM 客户端层（OpenAI 兼容 /chat/completions）
+
+原先 NaturalLanguageResolver 每次调用都新建 urllib 连接（每次一次 TLS 握手），也没有并发上限与缓存。
+
+- LLMClient：urllib3 连接池复用 keep-alive 连接；asyncio 信号量限制同时在途的请求数；
+- ResponseCache：按调用方给出的键做 TTL 缓存，并合并同一键的在途请求（多人同时说同一句话只发一次）。
+  只缓存非 None 的结果，失败不入缓存。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+import urllib3
+
+
+DEFAULT_MAX_CONCURRENCY = 2
+DEFAULT_CACHE_TTL_S = 300.0
+DEFAULT_CACHE_SIZE = 256
+
+
+def chat_completions_url(base_url: str) -> str:
+    base = (base_url or "").rstrip("/")
+    return base if base.endswith("/chat/completions") else f"{base}/chat/completions"
+
+
+class LLMClient:
+    """Pooled keep-alive client for an OpenAI-compatible chat completions endpoint."""
+
+    def __init__(
+        self,
+        base_url: str,
+        api_key: str = "",
+        *,
+        timeout: float = 4.0,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    ):
+        self.url = chat_completions_url(base_url)
+        self.api_key = api_key
+        self.timeout = float(timeout)
+        self.max_concurrency = max(1, int(max_concurrency))
+        self._pool = urllib3.PoolManager(maxsize=self.max_concurrency, retries=False)
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._semaphore_loop = None
+        self.requests = 0
+
+    def post(self, payload: dict) -> str:
+        """Blocking POST over the shared pool; raises on transport errors and HTTP >= 400."""
+        self.requests += 1
+        response = self._pool.request(
+            "POST",
+            self.url,
+            body=json.dumps(payload).encode("utf-8"),
+            headers={
+                "Content-Type": "application/json",
+                "Authorization": f"Bearer {self.api_key}",
+            },
+            timeout=urllib3.Timeout(total=self.timeout),
+        )
+        if response.status >= 400:
+            raise urllib3.exceptions.HTTPError(f"HTTP {response.status} from {self.url}")
+        return response.data.decode("utf-8")
+
+    def _loop_semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._semaphore_loop = loop
+        return self._semaphore
+
+    async def complete(self, payload: dict) -> str:
+        """:meth:`post` on a worker thread, at most ``max_concurrency`` in flight."""
+        async with self._loop_semaphore():
+            return await asyncio.to_thread(self.post, payload)
+
+    def close(self) -> None:
+        self._pool.clear()
+
+
+class ResponseCache:
+    """TTL + LRU cache of resolved responses with in-flight request coalescing."""
+
+    def __init__(
+        self,
+        ttl_s: float = DEFAULT_CACHE_TTL_S,
+        max_entries: int = DEFAULT_CACHE_SIZE,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.ttl_s = float(ttl_s)
+        self.max_entries = max(1, int(max_entries))
+        self._clock = clock
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._in_flight: Dict[Hashable, asyncio.Future] = {}
+        self.hits = 0
+        self.coalesced = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at <= self._clock():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        if value is None or self.ttl_s <= 0:
+            return
+        self._entries[key] = (value, self._clock() + self.ttl_s)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def get_or_compute(
+        self,
+        key: Hashable,
+        compute: Callable[[], Awaitable[Any]],
+        keep: Optional[Callable[[Any], bool]] = None,
+    ) -> Tuple[Any, bool]:
+        """``(value, shared)``: the cached value or an identical in-flight call's result (``shared=True``), else a fresh ``compute()``.
+
+        A fresh value is stored only when ``keep`` (if given) accepts it; in-flight callers still share it.
+        """
+        cached = self.get(key)
+        if cached is not None:
+            self.hits += 1
+            return cached, True
+        pending = self._in_flight.get(key)
+        if pending is not None:
+            self.coalesced += 1
+            return await asyncio.shield(pending), True
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            value = await compute()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as exc:
+            future.set_exception(exc)
+            # 没有等待者时避免 "exception was never retrieved"
+            future.exception()
+            raise
+        else:
+            if keep is None or keep(value):
+                self.put(key, value)
+            future.set_result(value)
+            return value, False
+        finally:
+            self._in_flight.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def status(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "in_flight": len(self._in_flight),
+            "hits": self.hits,
+            "coalesced": self.coalesced,
+            "misses": self.misses,
+        }
@@ -0,0 +1,231 @@
+"""
+事件循环卡顿看门狗（LoopWatchdog）
+
+事件循环内的心跳协程定期刷新时间戳；独立的守护线程检查心跳间隔，
+一旦超过阈值（同步 WebDriver 调用、time.sleep、阻塞 urllib 等卡住了循环），
+立即抓取主线程 Python 栈和所有 pending asyncio task 的栈，写入 events.jsonl
+（loop.stall）与专用文件 stalls.log，并按调用点累计卡顿次数。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import sys
+import threading
+import time
+import traceback
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+
+DEFAULT_HEARTBEAT_INTERVAL_S = 0.25
+DEFAULT_STALL_THRESHOLD_MS = 1000.0
+PACKAGE_MARKER = "ushareiplay"
+
+
+def _format_frame(frame_summary) -> str:
+    return f"{frame_summary.filename}:{frame_summary.lineno} in {frame_summary.name}"
+
+
+def blocking_call_site(stack: List[traceback.FrameSummary], marker: str = PACKAGE_MARKER) -> str:
+    """Innermost frame of our own package in ``stack`` (falls back to the innermost frame)."""
+    if not stack:
+        return "<unknown>"
+    for frame_summary in reversed(stack):
+        if marker and marker in frame_summary.filename.replace("\\", "/"):
+            return _short_site(frame_summary, marker)
+    return _short_site(stack[-1], marker)
+
+
+def _short_site(frame_summary, marker: str) -> str:
+    path = frame_summary.filename.replace("\\", "/")
+    if marker and marker in path:
+        path = path[path.rindex(marker):]
+    else:
+        path = Path(path).name
+    return f"{path}:{frame_summary.lineno}:{frame_summary.name}"
+
+
+class LoopWatchdog:
+    """Heartbeat-based event-loop lag detector with stack dumps."""
+
+    def __init__(
+        self,
+        *,
+        config: Optional[dict] = None,
+        obs=None,
+        stall_log_path: Optional[Path] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        cfg = (config or {}).get("loop_watchdog", {}) or {}
+        self.enabled = bool(cfg.get("enabled", True))
+        self.heartbeat_interval_s = float(
+            cfg.get("heartbeat_interval_s", DEFAULT_HEARTBEAT_INTERVAL_S)
+        )
+        self.stall_threshold_s = float(
+            cfg.get("stall_threshold_ms", DEFAULT_STALL_THRESHOLD_MS)
+        ) / 1000.0
+        self.obs = obs
+        self.stall_log_path = stall_log_path
+        self._clock = clock
+        self._last_beat = clock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._heartbeat_task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._in_stall = False
+        self._stall_started: Optional[float] = None
+        self._max_lag_s = 0.0
+        self._stall_sites: Counter = Counter()
+        self._stall_count = 0
+
+    def start(self) -> None:
+        """Start heartbeat + watchdog thread; must be called from the running event loop."""
+        if not self.enabled or self._thread is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = self._clock()
+        self._stop.clear()
+        self._heartbeat_task = self._loop.create_task(self._heartbeat())
+        self._thread = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._thread.start()
+
+    async def stop(self) -> None:
+        self._stop.set()
+        if self._heartbeat_task is not None:
+            self._heartbeat_task.cancel()
+            try:
+                await self._heartbeat_task
+            except asyncio.CancelledError:
+                pass
+            self._heartbeat_task = None
+        if self._thread is not None:
+            self._thread.join(timeout=max(1.0, self.heartbeat_interval_s * 4))
+            self._thread = None
+
+    async def _heartbeat(self) -> None:
+        while True:
+            self._last_beat = self._clock()
+            await asyncio.sleep(self.heartbeat_interval_s)
+
+    def _watch(self) -> None:
+        while not self._stop.wait(self.heartbeat_interval_s):
+            self.check()
+
+    def check(self) -> Optional[dict]:
+        """One watchdog pass; returns the stall report when a new stall is detected."""
+        lag_s = self._clock() - self._last_beat - self.heartbeat_interval_s
+        if lag_s < self.stall_threshold_s:
+            if self._in_stall:
+                self._finish_stall()
+            return None
+        if lag_s > self._max_lag_s:
+            self._max_lag_s = lag_s
+        if self._in_stall:
+            return None
+
+        self._in_stall = True
+        self._stall_started = self._last_beat
+        report = self._capture(lag_s)
+        self._stall_count += 1
+        self._stall_sites[report["call_site"]] += 1
+        self._emit("loop.stall", level="WARNING", ctx=report)
+        self._write_stall_log(report)
+        return report
+
+    def _finish_stall(self) -> None:
+        duration_s = self._clock() - (self._stall_started or self._clock())
+        self._emit(
+            "loop.stall.end",
+            ctx={"duration_ms": round(duration_s * 1000.0, 1), "max_lag_ms": round(self._max_lag_s * 1000.0, 1)},
+        )
+        self._in_stall = False
+        self._stall_started = None
+        self._max_lag_s = 0.0
+
+    def _capture(self, lag_s: float) -> Dict[str, Any]:
+        main_stack: List[traceback.FrameSummary] = []
+        frame = sys._current_frames().get(self._loop_thread_id) if self._loop_thread_id else None
+        if frame is not None:
+            main_stack = traceback.extract_stack(frame)
+        return {
+            "lag_ms": round(lag_s * 1000.0, 1),
+            "threshold_ms": round(self.stall_threshold_s * 1000.0, 1),
+            "call_site": blocking_call_site(main_stack),
+            "main_stack": [_format_frame(f) for f in main_stack],
+            "tasks": self._task_stacks(),
+        }
+
+    def _task_stacks(self) -> List[Dict[str, Any]]:
+        if self._loop is None:
+            return []
+        tasks = []
+        # all_tasks() iterates a WeakSet owned by the loop thread; retry on concurrent mutation.
+        for _ in range(3):
+            try:
+                tasks = list(asyncio.all_tasks(self._loop))
+                break
+            except RuntimeError:
+                continue
+        result = []
+        for task in tasks:
+            if task is self._heartbeat_task or task.done():
+                continue
+            try:
+                frames = task.get_stack()
+            except Exception:
+                frames = []
+            result.append(
+                {
+                    "name": task.get_name(),
+                    "stack": [
+                        f"{f.f_code.co_filename}:{f.f_lineno} in {f.f_code.co_name}" for f in frames
+                    ],
+                }
+            )
+        return result
+
+    def _write_stall_log(self, report: Dict[str, Any]) -> None:
+        if self.stall_log_path is None:
+            return
+        try:
+            self.stall_log_path.parent.mkdir(parents=True, exist_ok=True)
+            lines = [
+                f"=== {datetime.now().isoformat(timespec='seconds')} loop stall "
+                f"lag={report['lag_ms']}ms site={report['call_site']}",
+                "--- main thread ---",
+                *report["main_stack"],
+            ]
+            for task in report["tasks"]:
+                lines.append(f"--- task {task['name']} ---")
+                lines.extend(task["stack"])
+            with self.stall_log_path.open("a", encoding="utf-8") as f:
+                f.write("\n".join(lines) + "\n\n")
+        except Exception:
+            pass
+
+    def stall_counts(self) -> List[tuple]:
+        """Blocking call sites ranked by stall count."""
+        return self._stall_sites.most_common()
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "stalls": self._stall_count,
+            "in_stall": self._in_stall,
+            "top_call_sites": [
+                {"call_site": site, "count": count} for site, count in self.stall_counts()[:10]
+            ],
+        }
+
+    def _emit(self, event: str, **kwargs) -> None:
+        if self.obs is None:
+            return
+        try:
+            self.obs.emit(event, **kwargs)
+        except Exception:
+            pass
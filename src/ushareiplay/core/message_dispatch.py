@@ -76,8 +76,25 @@ class MessageDispatch(Singleton):
         )
         return result
 
+    def _private_outbox(self):
+        from ushareiplay.managers.private_outbox import PrivateOutbox
+
+        if not PrivateOutbox.is_initialized():
+            return None
+        outbox = PrivateOutbox.instance()
+        return outbox if outbox.enabled else None
+
     def send_private_message(self, nickname: str, message: str) -> bool:
         """Send a private reply and record its outcome without logging its contents."""
+        outbox = self._private_outbox()
+        if outbox is not None:
+            # 入队后由主循环在空闲时按收件人合并投递，命令不再等一整轮私聊往返
+            queued = outbox.enqueue(nickname, message)
+            self._emit(
+                "message.dispatch.private",
+                {"nickname": nickname, "message_len": len(message), "sent": False, "queued": queued},
+            )
+            return queued
         try:
             sent = self.user_manager.send_private_message_to_user(nickname, message)
             if not sent:
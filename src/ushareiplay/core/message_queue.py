@@ -1,61 +1,203 @@
-import asyncio
-import threading
-from collections import deque
-from dataclasses import replace
-from datetime import datetime
-from typing import Optional, Dict, Any, List
+import logging
+import time
+from collections import Counter, deque
+from dataclasses import dataclass, replace
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+
 from ushareiplay.core.command_silence import is_command_silent
+from ushareiplay.core.metrics import QUEUE_DEPTH, QUEUE_DROPPED
 from ushareiplay.core.singleton import Singleton
 
+logger = logging.getLogger(__name__)
+
+
+# 优先级类别：数值越小越先执行
+PRIORITY_CONSOLE = 0
+PRIORITY_TIMER = 1
+PRIORITY_CHAT = 2
+PRIORITY_CLASSES = {"console": PRIORITY_CONSOLE, "timer": PRIORITY_TIMER, "chat": PRIORITY_CHAT}
+
+# 入队来源 -> 类别；未显式给出来源时按昵称推断
+SOURCE_CLASSES = {
+    "console": "console",
+    "agent": "console",
+    "agent_spool": "console",
+    "agent_socket": "console",
+    "timer": "timer",
+}
+NICKNAME_CLASSES = {"Console": "console", "Agent": "console", "Timer": "timer"}
+
+DEFAULT_COALESCE_WINDOW_S = 2.0
+# 不论谁发都是同一效果的命令，窗口内跨用户合并
+DEFAULT_COALESCE_GLOBAL = ("next", "skip", "pause", "lyrics", "info", "help")
+DEFAULT_SOURCE_CAPS = {"chat": 30, "timer": 20, "console": 0}
+DEFAULT_MAX_AGE_S = {"chat": 120.0, "timer": 600.0, "console": 0.0}
+CAP_NOTICE = "@{nickname} 点歌队列已满，请稍后再试"
+
+
+@dataclass
+class _Entry:
+    message_info: Any
+    source_class: str
+    priority: int
+    enqueued_at: float
+    key: Optional[Tuple]
+    seq: int
+
 
 class MessageQueue(Singleton):
     """
     消息队列管理器（协程版本）
-    用于 timer 和 controller 之间的消息传递
+    用于 timer、控制台/agent spool、关键字与聊天补漏 和 controller 之间的消息传递
+
+    - 优先级：console/agent > timer > chat，同级内保持 FIFO；
+    - 合并：窗口内重复的同一命令只保留一条（next/skip 等跨用户合并，其余按 用户+内容）；
+    - 每类来源设上限（0 表示不限），满时拒绝新消息（背压），聊天用户在队列排空前只收到一次提示；
+    - 出队时丢弃超过 max_age_s 的陈旧请求；深度与丢弃计数暴露到 metrics 与 status()。
     """
-    
-    def __init__(self):
-        self._queue = asyncio.Queue()
-    
-    async def put_message(self, message_info):
+
+    def __init__(self, config: Optional[dict] = None, *, clock: Callable[[], float] = time.monotonic):
+        cfg = (config or {}).get("message_queue", {}) or {}
+        self.coalesce_window_s = float(cfg.get("coalesce_window_s", DEFAULT_COALESCE_WINDOW_S))
+        self.coalesce_global = set(cfg.get("coalesce_global", DEFAULT_COALESCE_GLOBAL))
+        self.source_caps = {**DEFAULT_SOURCE_CAPS, **(cfg.get("source_caps") or {})}
+        self.max_age_s = {**DEFAULT_MAX_AGE_S, **(cfg.get("max_age_s") or {})}
+        self._clock = clock
+        self._lanes: Dict[int, Deque[_Entry]] = {p: deque() for p in sorted(PRIORITY_CLASSES.values())}
+        self._by_key: Dict[Tuple, _Entry] = {}
+        self._seq = 0
+        self.dropped: Counter = Counter()
+        self.coalesced = 0
+        self._cap_notified: set = set()
+        # 抓取时读取队列长度，热路径无额外开销
+        QUEUE_DEPTH.labels("message_queue").set_function(self.get_queue_size)
+        for name, priority in PRIORITY_CLASSES.items():
+            QUEUE_DEPTH.labels(f"message_queue_{name}").set_function(
+                lambda p=priority: len(self._lanes[p])
+            )
+
+    @staticmethod
+    def classify(message_info, source: Optional[str] = None) -> str:
+        """Priority class (console / timer / chat) from an explicit source or the sender nickname."""
+        if source and source in SOURCE_CLASSES:
+            return SOURCE_CLASSES[source]
+        return NICKNAME_CLASSES.get(getattr(message_info, "nickname", ""), "chat")
+
+    def _coalesce_key(self, message_info) -> Optional[Tuple]:
+        if getattr(message_info, "request_id", None):
+            # 控制接口的请求方在等自己这条的结果，不能被合并掉
+            return None
+        content = " ".join((message_info.content or "").split())
+        if not content.startswith(":"):
+            # 非命令（如「@xx 谢谢」）逐条发送，不合并
+            return None
+        prefix = content[1:].split(" ", 1)[0].lower()
+        if prefix in self.coalesce_global:
+            return ("*", content, message_info.silent, message_info.private_reply)
+        return (message_info.nickname, content, message_info.silent, message_info.private_reply)
+
+    def _drop(self, reason: str) -> None:
+        self.dropped[reason] += 1
+        QUEUE_DROPPED.labels(reason).inc()
+
+    async def put_message(self, message_info, source: Optional[str] = None) -> bool:
         """
         向队列添加消息
         Args:
             message_info: MessageInfo 对象
+            source: 入队来源（console / agent_spool / timer ...），缺省按昵称推断
+        Returns:
+            False 表示被合并或因来源上限被拒绝
         """
         if is_command_silent():
             message_info = replace(message_info, silent=True)
-        await self._queue.put(message_info)
-    
+        source_class = self.classify(message_info, source)
+        priority = PRIORITY_CLASSES[source_class]
+        now = self._clock()
+
+        key = self._coalesce_key(message_info)
+        existing = self._by_key.get(key) if key is not None else None
+        if existing is not None and now - existing.enqueued_at <= self.coalesce_window_s:
+            if priority < existing.priority:
+                # 高优先级来源发了同一命令：提升已有条目而不是再排一条
+                self._lanes[existing.priority].remove(existing)
+                existing.priority = priority
+                existing.source_class = source_class
+                self._lanes[priority].append(existing)
+            self.coalesced += 1
+            self._drop("coalesced")
+            # 已排队的同一命令会照常执行，只记录不提示
+            logger.info(f"Queue coalesced {message_info.content!r} from {message_info.nickname} ({source_class})")
+            return False
+
+        cap = int(self.source_caps.get(source_class, 0) or 0)
+        if cap and sum(1 for e in self._lanes[priority] if e.source_class == source_class) >= cap:
+            self._drop("cap")
+            logger.warning(
+                f"Queue rejected {message_info.content!r} from {message_info.nickname}: {source_class} cap {cap} reached"
+            )
+            if source_class == "chat":
+                self._notify_cap(message_info)
+            return False
+
+        self._seq += 1
+        entry = _Entry(message_info, source_class, priority, now, key, self._seq)
+        self._lanes[priority].append(entry)
+        if key is not None:
+            self._by_key[key] = entry
+        return True
+
+    def _notify_cap(self, message_info) -> None:
+        """Tell a chat requester once (until the queue drains) that their command was not queued."""
+        nickname = getattr(message_info, "nickname", "")
+        if not nickname or nickname in self._cap_notified:
+            return
+        self._cap_notified.add(nickname)
+        try:
+            from ushareiplay.core.message_dispatch import MessageDispatch
+
+            MessageDispatch.instance().send_for_message_info(
+                message_info, CAP_NOTICE.format(nickname=nickname), silent=message_info.silent
+            )
+        except Exception as e:
+            logger.warning(f"Failed to notify {nickname} about a full queue: {e}")
+
+    def _expired(self, entry: _Entry, now: float) -> bool:
+        max_age = float(self.max_age_s.get(entry.source_class, 0) or 0)
+        return bool(max_age) and now - entry.enqueued_at > max_age
+
     async def get_all_messages(self) -> Dict[str, Any]:
         """
-        获取队列中的所有消息并清空队列
+        获取队列中的所有消息并清空队列（按优先级、同级 FIFO）
         Returns:
             Dict[str, MessageInfo]: 消息字典 {msg_id: MessageInfo}
         """
-        messages = []
-        while not self._queue.empty():
-            try:
-                message = self._queue.get_nowait()
-                messages.append(message)
-            except asyncio.QueueEmpty:
-                break
-        
-        # Convert list to dict format expected by command manager
+        now = self._clock()
         result = {}
-        for i, message_info in enumerate(messages):
-            result[f"queue_msg_{i}"] = message_info
-        
+        for lane in self._lanes.values():
+            while lane:
+                entry = lane.popleft()
+                if self._expired(entry, now):
+                    self._drop("expired")
+                    continue
+                result[f"queue_msg_{len(result)}"] = entry.message_info
+        self._by_key.clear()
+        self._cap_notified.clear()
         return result
-    
+
     def get_queue_size(self) -> int:
         """获取队列大小"""
-        return self._queue.qsize()
-    
+        return sum(len(lane) for lane in self._lanes.values())
+
+    def depth_by_class(self) -> Dict[str, int]:
+        return {name: len(self._lanes[priority]) for name, priority in PRIORITY_CLASSES.items()}
+
+    def status(self) -> dict:
+        return {"depth": self.depth_by_class(), "coalesced": self.coalesced, "dropped": dict(self.dropped)}
+
     async def clear_queue(self):
         """清空队列"""
-        while not self._queue.empty():
-            try:
-                self._queue.get_nowait()
-            except asyncio.QueueEmpty:
-                break
+        for lane in self._lanes.values():
+            lane.clear()
+        self._by_key.clear()
+        self._cap_notified.clear()
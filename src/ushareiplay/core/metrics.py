@@ -0,0 +1,394 @@
+"""
+进程内指标注册表（Prometheus 文本格式）
+
+Counter / Gauge / Histogram 三种指标，支持标签；热路径上只有一次字典查找与
+整数/浮点累加，渲染在抓取时（HTTP 线程）才发生。MetricsServer 在本地端口上以
+``text/plain; version=0.0.4`` 暴露 ``/metrics``，替代 tail events.jsonl / status.json
+做看板与告警。
+
+使用模块级默认注册表 ``REGISTRY`` 和下方预定义的指标；各组件直接 import 指标对象打点。
+"""
+
+from __future__ import annotations
+
+import bisect
+import math
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+DEFAULT_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 9464
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if value == -math.inf:
+        return "-Inf"
+    if math.isnan(value):
+        return "NaN"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [f'{n}="{_escape_label(v)}"' for n, v in zip(names, values)]
+    if extra is not None:
+        pairs.append(f'{extra[0]}="{_escape_label(extra[1])}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values) -> object:
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {key}")
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _default(self):
+        if self.labelnames:
+            raise ValueError(f"{self.name} requires labels {self.labelnames}")
+        return self.labels()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def _samples(self) -> Iterable[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return "\n".join(lines)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._children.clear()
+
+
+class _CounterChild:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        if amount < 0:
+            raise ValueError("counters can only increase")
+        self.value += amount
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._default().inc(amount)
+
+    def value(self, *labels) -> float:
+        child = self._children.get(tuple(str(v) for v in labels))
+        return child.value if child is not None else 0.0
+
+    def _samples(self):
+        for key, child in list(self._children.items()):
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(child.value)}"
+
+
+class _GaugeChild:
+    __slots__ = ("value", "function")
+
+    def __init__(self):
+        self.value = 0.0
+        self.function: Optional[Callable[[], float]] = None
+
+    def set(self, value: float) -> None:
+        self.value = float(value)
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.value -= amount
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        """Evaluate ``function`` at scrape time instead of storing a value."""
+        self.function = function
+
+    def get(self) -> float:
+        if self.function is not None:
+            try:
+                return float(self.function())
+            except Exception:
+                return math.nan
+        return self.value
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def set(self, value: float) -> None:
+        self._default().set(value)
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._default().inc(amount)
+
+    def dec(self, amount: float = 1.0) -> None:
+        self._default().dec(amount)
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        self._default().set_function(function)
+
+    def value(self, *labels) -> float:
+        child = self._children.get(tuple(str(v) for v in labels))
+        return child.get() if child is not None else 0.0
+
+    def _samples(self):
+        for key, child in list(self._children.items()):
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(child.get())}"
+
+
+class _HistogramChild:
+    __slots__ = ("upper_bounds", "buckets", "sum", "count")
+
+    def __init__(self, upper_bounds: Tuple[float, ...]):
+        self.upper_bounds = upper_bounds
+        self.buckets = [0] * (len(upper_bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.buckets[bisect.bisect_left(self.upper_bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    @contextmanager
+    def time(self):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.upper_bounds = tuple(sorted(float(b) for b in buckets if b != math.inf))
+
+    def _new_child(self):
+        return _HistogramChild(self.upper_bounds)
+
+    def observe(self, value: float) -> None:
+        self._default().observe(value)
+
+    def time(self):
+        return self._default().time()
+
+    def count(self, *labels) -> int:
+        child = self._children.get(tuple(str(v) for v in labels))
+        return child.count if child is not None else 0
+
+    def _samples(self):
+        for key, child in list(self._children.items()):
+            cumulative = 0
+            counts = list(child.buckets)
+            for bound, bucket_count in zip(self.upper_bounds + (math.inf,), counts):
+                cumulative += bucket_count
+                le = _format_labels(self.labelnames, key, ("le", _format_value(bound)))
+                yield f"{self.name}_bucket{le} {cumulative}"
+            labels = _format_labels(self.labelnames, key)
+            yield f"{self.name}_sum{labels} {_format_value(child.sum)}"
+            yield f"{self.name}_count{labels} {child.count}"
+
+
+class MetricsRegistry:
+    """Named collection of metrics rendered together in Prometheus text format."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+                    raise ValueError(f"metric {metric.name} already registered with a different shape")
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, help, labelnames))
+
+    def gauge(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, help, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, help, labelnames, buckets))
+
+    def metrics(self) -> List[_Metric]:
+        with self._lock:
+            return list(self._metrics.values())
+
+    def render(self) -> str:
+        return "\n".join(metric.render() for metric in self.metrics()) + "\n"
+
+    def clear(self) -> None:
+        """Drop all recorded samples (metric definitions stay registered)."""
+        for metric in self.metrics():
+            metric.clear()
+
+
+REGISTRY = MetricsRegistry()
+
+COMMANDS = REGISTRY.counter(
+    "ushareiplay_commands_total", "Commands executed by prefix and outcome", ("command", "outcome")
+)
+COMMAND_LATENCY = REGISTRY.histogram(
+    "ushareiplay_command_latency_seconds", "Command execution latency by prefix", ("command",)
+)
+QUEUE_DEPTH = REGISTRY.gauge(
+    "ushareiplay_queue_depth", "Pending messages per queue", ("queue",)
+)
+QUEUE_DROPPED = REGISTRY.counter(
+    "ushareiplay_queue_dropped_total", "Messages not executed by reason (coalesced, cap, expired)", ("reason",)
+)
+RATE_LIMITED = REGISTRY.counter(
+    "ushareiplay_rate_limited_total", "Commands rejected by the intake rate limiter", ("scope",)
+)
+DRIVER_REINITS = REGISTRY.counter(
+    "ushareiplay_driver_reinitializations_total", "Appium driver rebuilds by outcome", ("outcome",)
+)
+PAGE_SOURCE_BYTES = REGISTRY.histogram(
+    "ushareiplay_page_source_bytes",
+    "Size of fetched page_source XML in characters (mostly ASCII, so close to bytes)",
+    buckets=(4096, 16384, 65536, 131072, 262144, 524288, 1048576, 2097152),
+)
+PAGE_SOURCE_FETCH = REGISTRY.histogram(
+    "ushareiplay_page_source_fetch_seconds", "Time spent fetching page_source from the driver"
+)
+PAGE_SOURCE_PARSE = REGISTRY.histogram(
+    "ushareiplay_page_source_parse_seconds",
+    "Time spent parsing page_source XML",
+    ("site",),
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5),
+)
+LLM_CALLS = REGISTRY.counter(
+    "ushareiplay_llm_calls_total", "LLM requests by outcome", ("outcome",)
+)
+LLM_LATENCY = REGISTRY.histogram(
+    "ushareiplay_llm_latency_seconds", "LLM request latency"
+)
+DB_QUERY = REGISTRY.histogram(
+    "ushareiplay_db_query_seconds",
+    "Database query time by client method",
+    ("op",),
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0),
+)
+
+
+class MetricsServer:
+    """Serve ``registry.render()`` on ``http://host:port/metrics`` from a daemon thread."""
+
+    def __init__(self, *, config: Optional[dict] = None, registry: MetricsRegistry = REGISTRY, obs=None):
+        cfg = (config or {}).get("metrics", {}) or {}
+        self.enabled = bool(cfg.get("enabled", False))
+        self.host = str(cfg.get("host", DEFAULT_HOST))
+        self.port = int(cfg.get("port", DEFAULT_PORT))
+        self.registry = registry
+        self.obs = obs
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def address(self) -> Optional[Tuple[str, int]]:
+        if self._server is None:
+            return None
+        return self._server.server_address[:2]
+
+    def start(self) -> None:
+        if not self.enabled or self._server is not None:
+            return
+        registry = self.registry
+
+        class _Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?", 1)[0] not in ("/metrics", "/"):
+                    self.send_error(404)
+                    return
+                body = registry.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        try:
+            self._server = ThreadingHTTPServer((self.host, self.port), _Handler)
+        except OSError as e:
+            self._emit("metrics.server.error", level="ERROR", ctx={"host": self.host, "port": self.port, "error": str(e)})
+            return
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, name="metrics-server", daemon=True)
+        self._thread.start()
+        host, port = self.address
+        self._emit("metrics.server.start", ctx={"host": host, "port": port})
+
+    def stop(self) -> None:
+        if self._server is None:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+        self._server = None
+        self._thread = None
+
+    def _emit(self, event: str, **kwargs) -> None:
+        if self.obs is None:
+            return
+        try:
+            self.obs.emit(event, **kwargs)
+        except Exception:
+            pass
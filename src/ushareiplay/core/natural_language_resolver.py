@@ -2,17 +2,29 @@
 
 from __future__ import annotations
 
-import asyncio
+import hashlib
 import json
 import logging
 import re
-import urllib.error
-import urllib.request
+import time
+import unicodedata
 from dataclasses import dataclass
-from typing import Any, Optional
+from typing import Optional
+
+from ushareiplay.core.llm_client import LLMClient, ResponseCache
+from ushareiplay.core.metrics import LLM_CALLS, LLM_LATENCY
 
 logger = logging.getLogger(__name__)
 
+# 静态提示词缓存上限（命令表 × 用户等级的组合数），超出后整体重建
+MAX_STATIC_PROMPTS = 64
+
+
+def normalize_utterance(text: str) -> str:
+    """Cache-key form of an utterance: NFKC, case-folded, whitespace collapsed, trailing punctuation dropped."""
+    text = unicodedata.normalize("NFKC", text or "").casefold()
+    return " ".join(text.split()).rstrip("~～!！?？。.，, ")
+
 
 @dataclass(frozen=True)
 class NaturalLanguageResult:
@@ -43,6 +55,17 @@ class NaturalLanguageResolver:
             self.system_users = set(system_users_cfg)
         else:
             self.system_users = {"Timer", "Console", "Agent"}
+        self.client = LLMClient(
+            self.base_url,
+            self.api_key,
+            timeout=self.timeout,
+            max_concurrency=int(cfg.get("max_concurrency", 2)),
+        )
+        self.cache = ResponseCache(
+            ttl_s=float(cfg.get("cache_ttl_s", 300)),
+            max_entries=int(cfg.get("cache_size", 256)),
+        )
+        self._static_prompts: dict[tuple, tuple[str, str]] = {}
 
     def _format_player_description(self, player: str, system_users: set[str]) -> str:
         """Format player name, distinguishing system users."""
@@ -68,17 +91,17 @@ class NaturalLanguageResolver:
         room_info: Optional[dict] = None,
     ) -> str:
         """Construct the system prompt with command schemas, user context, playback state, and room state."""
-        cmd_lines = []
-        for cmd in commands_config or []:
-            prefix = cmd.get("prefix", "")
-            if not prefix:
-                continue
-            lvl = cmd.get("level", 0)
-            desc = cmd.get("description") or cmd.get("response_template") or prefix
-            cmd_lines.append(f"- `:{prefix}` (所需等级: L{lvl}): {desc}")
-
-        cmd_table = "\n".join(cmd_lines) if cmd_lines else "- `:play` (所需等级: L1): 播放指定歌曲"
+        static_section, _version = self._static_prompt(commands_config, user_level)
+        return self._context_prompt(user_name, user_level, playback_info, room_info) + static_section
 
+    def _context_prompt(
+        self,
+        user_name: str,
+        user_level: int,
+        playback_info: Optional[dict] = None,
+        room_info: Optional[dict] = None,
+    ) -> str:
+        """Per-request part of the system prompt: speaker, playback state and room state."""
         playback_lines = []
         playback_desc = "无"
         if playback_info:
@@ -136,10 +159,6 @@ class NaturalLanguageResolver:
 
         room_desc = "\n".join(room_desc_lines)
 
-        custom_section = ""
-        if self.custom_prompt:
-            custom_section = f"\n\n【用户自定义行为指令 / 补充设定】\n{self.custom_prompt}"
-
         return f"""你是一个智能派对房间命令解析助手。你的任务是将用户的自然语言转换为标准命令或友好的中文回复。
 
 【当前环境与上下文】
@@ -148,7 +167,32 @@ class NaturalLanguageResolver:
 {playback_section}
 {room_desc}
 
-【可用系统命令列表】
+"""
+
+    def _static_prompt(self, commands_config: list[dict], user_level: int) -> tuple[str, str]:
+        """Command table + output rules and their version digest, rebuilt only when the command table changes."""
+        commands = tuple(
+            (
+                cmd["prefix"],
+                cmd.get("level", 0),
+                cmd.get("description") or cmd.get("response_template") or cmd["prefix"],
+            )
+            for cmd in commands_config or []
+            if cmd.get("prefix", "")
+        )
+        key = (commands, user_level)
+        cached = self._static_prompts.get(key)
+        if cached is not None:
+            return cached
+
+        cmd_lines = [f"- `:{prefix}` (所需等级: L{lvl}): {desc}" for prefix, lvl, desc in commands]
+        cmd_table = "\n".join(cmd_lines) if cmd_lines else "- `:play` (所需等级: L1): 播放指定歌曲"
+
+        custom_section = ""
+        if self.custom_prompt:
+            custom_section = f"\n\n【用户自定义行为指令 / 补充设定】\n{self.custom_prompt}"
+
+        text = f"""【可用系统命令列表】
 {cmd_table}
 
 【输出规则】
@@ -170,6 +214,11 @@ class NaturalLanguageResolver:
 8. 如果用户意图完全无法理解或无法匹配任何操作:
    - 输出 {{"type": "reply", "content": "未能理解你的指令，你可以直接发送 :play 歌名 点歌哦~"}}。{custom_section}
 """
+        if len(self._static_prompts) >= MAX_STATIC_PROMPTS:
+            self._static_prompts.clear()
+        cached = (text, hashlib.sha1(text.encode("utf-8")).hexdigest()[:12])
+        self._static_prompts[key] = cached
+        return cached
 
     def _extract_json(self, raw_content: str) -> Optional[dict]:
         """Extract and parse JSON object from raw LLM output text."""
@@ -210,26 +259,9 @@ class NaturalLanguageResolver:
         logger.debug(f"Failed to parse JSON from LLM output: {raw_content}")
         return None
 
-    def _sync_http_call(self, payload: dict) -> str:
-        """Synchronous HTTP call to OpenAI-compatible endpoint."""
-        base = self.base_url.rstrip("/")
-        if base.endswith("/chat/completions"):
-            url = base
-        else:
-            url = f"{base}/chat/completions"
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {self.api_key}",
-        }
-        data_bytes = json.dumps(payload).encode("utf-8")
-        req = urllib.request.Request(url, data=data_bytes, headers=headers, method="POST")
-
-        with urllib.request.urlopen(req, timeout=self.timeout) as resp:
-            return resp.read().decode("utf-8")
-
     async def _call_api(self, payload: dict) -> str:
-        """Asynchronous wrapper for API call."""
-        return await asyncio.to_thread(self._sync_http_call, payload)
+        """Chat completion over the pooled keep-alive client (bounded concurrency)."""
+        return await self.client.complete(payload)
 
     async def resolve(
         self,
@@ -256,13 +288,9 @@ class NaturalLanguageResolver:
         if not self.enabled or not self.api_key or not user_text:
             return None
 
-        system_prompt = self._build_system_prompt(
-            user_name=user_name,
-            user_level=user_level,
-            commands_config=commands_config or [],
-            playback_info=playback_info,
-            room_info=room_info,
-        )
+        static_section, prompt_version = self._static_prompt(commands_config or [], user_level)
+        context_section = self._context_prompt(user_name, user_level, playback_info, room_info)
+        system_prompt = context_section + static_section
 
         payload = {
             "model": self.model,
@@ -273,8 +301,50 @@ class NaturalLanguageResolver:
             "temperature": 0.1,
         }
 
+        key = (
+            normalize_utterance(user_text),
+            user_name,
+            user_level,
+            prompt_version,
+            self._context_key(playback_info, room_info),
+        )
+        # 回复（type=reply）可能引用在线/专注人数、房间 ID 等不在键里的上下文，只缓存解析出的命令
+        result, shared = await self.cache.get_or_compute(
+            key, lambda: self._request(payload), keep=lambda r: r is not None and r.type == "command"
+        )
+        if shared:
+            LLM_CALLS.labels("cached").inc()
+        return result
+
+    @staticmethod
+    def _context_key(playback_info: Optional[dict] = None, room_info: Optional[dict] = None) -> tuple:
+        """Context that changes the resolved command: current song, player, playlist and guest-room mode.
+
+        Online/focus counts vary on every request without changing the command, so they stay out of the
+        key; replies that quote them are not cached at all.
+        """
+        playback = playback_info or {}
+        return (
+            playback.get("song") or "",
+            playback.get("singer") or "",
+            playback.get("player") or "",
+            playback.get("playlist_type") or "",
+            playback.get("playlist_name") or "",
+            bool((room_info or {}).get("is_guest_room", False)),
+        )
+
+    async def _request(self, payload: dict) -> Optional[NaturalLanguageResult]:
+        """One LLM round trip; errors are logged and yield None (never cached)."""
         try:
-            response_json_str = await self._call_api(payload)
+            started = time.perf_counter()
+            try:
+                response_json_str = await self._call_api(payload)
+            except Exception:
+                LLM_CALLS.labels("error").inc()
+                raise
+            finally:
+                LLM_LATENCY.observe(time.perf_counter() - started)
+            LLM_CALLS.labels("ok").inc()
             resp_data = json.loads(response_json_str)
             choices = resp_data.get("choices", [])
             if not choices:
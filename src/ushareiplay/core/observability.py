@@ -2,11 +2,14 @@ from __future__ import annotations
 
 import json
 import os
+import threading
 import uuid
-from dataclasses import dataclass
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Callable, Dict, List, Optional
 
 from ushareiplay.core.paths import artifacts_paths
 
@@ -24,10 +27,30 @@ def new_run_id() -> str:
     return datetime.now().strftime("%Y%m%d-%H%M%S") + "-" + uuid.uuid4().hex[:8]
 
 
+_current_trace: ContextVar[Optional[str]] = ContextVar("trace_id", default=None)
+
+
+@contextmanager
+def trace_context(trace_id: Optional[str]):
+    """Tag every event emitted inside the block with ``trace_id`` (no-op when None)."""
+    if not trace_id:
+        yield
+        return
+    token = _current_trace.set(trace_id)
+    try:
+        yield
+    finally:
+        _current_trace.reset(token)
+
+
 @dataclass
 class Observability:
     run_id: str
     artifacts_root_rel: str = "artifacts"
+    # emit() is also called from the loop watchdog thread; keep JSONL lines whole.
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+    _listeners: List[Callable[[Dict[str, Any]], None]] = field(default_factory=list, repr=False, compare=False)
+    last_status: Optional[Dict[str, Any]] = field(default=None, repr=False, compare=False)
 
     def paths(self):
         return artifacts_paths(self.run_id, root_rel=self.artifacts_root_rel)
@@ -48,13 +71,31 @@ class Observability:
             "run_id": self.run_id,
             "ctx": ctx or {},
         }
+        trace_id = trace_id or _current_trace.get()
         if trace_id:
             payload["trace_id"] = trace_id
 
+        line = json.dumps(payload, ensure_ascii=False) + "\n"
         p = self.paths().events_jsonl
-        p.parent.mkdir(parents=True, exist_ok=True)
-        with p.open("a", encoding="utf-8") as f:
-            f.write(json.dumps(payload, ensure_ascii=False) + "\n")
+        with self._lock:
+            p.parent.mkdir(parents=True, exist_ok=True)
+            with p.open("a", encoding="utf-8") as f:
+                f.write(line)
+            for listener in self._listeners:
+                try:
+                    listener(payload)
+                except Exception:
+                    pass
+
+    def add_listener(self, listener: Callable[[Dict[str, Any]], None]) -> None:
+        """Call ``listener(payload)`` for every emitted event (from the emitting thread; keep it cheap)."""
+        with self._lock:
+            self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[Dict[str, Any]], None]) -> None:
+        with self._lock:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
 
     def write_status(self, status: Dict[str, Any]) -> Path:
         p = self.paths().status_json
@@ -63,6 +104,7 @@ class Observability:
         body.setdefault("schema_version", STATUS_SCHEMA_VERSION)
         body.setdefault("run_id", self.run_id)
         body.setdefault("ts", _now_iso())
+        self.last_status = body
         p.write_text(json.dumps(body, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
         return p
 
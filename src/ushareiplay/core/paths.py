@@ -76,6 +76,8 @@ class ArtifactsPaths:
     status_json: Path
     page_source_xml: Path
     screenshot_png: Path
+    stalls_log: Path
+    flight_dir: Path
 
 
 def artifacts_paths(run_id: str, root_rel: str = "artifacts") -> ArtifactsPaths:
@@ -88,5 +90,7 @@ def artifacts_paths(run_id: str, root_rel: str = "artifacts") -> ArtifactsPaths:
         status_json=run_dir / "status.json",
         page_source_xml=run_dir / "page_source.xml",
         screenshot_png=run_dir / "screenshot.png",
+        stalls_log=run_dir / "stalls.log",
+        flight_dir=run_dir / "flight",
     )
 
@@ -1,29 +1,143 @@
+"""
+新建派对后的自动化（按依赖分波次的幂等工作流）
+
+此前命令字符串逐条投递、逐条等 UI 锁，且不记录哪些已完成，进程重启或 __main__ 重启循环后会全部重做。
+现在把配置声明为步骤（``soul.post_party_create.steps``）：
+
+- 每步 ``{name, command, after: [...]}``；依赖全部完成（或跳过）的步骤同一波一起入队，
+  命令流水线（CommandPipeline）会提前完成这一波的解析与查用户，UI 步骤仍按队列顺序执行；
+- 入队前先对比期望与当前房间状态（notice / topic / title / mode / vol，均读内存状态、不碰 UI），
+  已满足的步骤直接记为 ``skipped``；
+- 每次尝试带请求 ID 入队，按 ``command.result`` / ``control.command.done`` 判定成败，
+  失败按 retry_backoff_s 指数退避重试，至多 max_attempts 次；依赖失败的步骤记为 ``blocked``；
+- 步骤状态写入 workflow_steps 表：resume_window_s 内同一派对再次触发（或重启后 CommandReady）
+  沿用上次运行，已完成的步骤不再执行，未完成的继续。
+
+旧写法 ``commands`` 仍可用：视为无依赖的步骤，同一波按原顺序入队。不是命令的纯文本入队即视为完成；
+一步内 ``;`` 分隔的多条命令全部结束才算这一步结束；无法解析的命令直接记为失败、不重试。
+"""
+
 from __future__ import annotations
 
+import time
 import traceback
 import logging
-from typing import List, Optional
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
 
+from ushareiplay.core.chat_intake import ChatIntakeKind, expand_queue_text
+from ushareiplay.core.control_server import DONE_EVENT
 from ushareiplay.core.message_queue import MessageQueue
 from ushareiplay.models import MessageInfo
 
 
+WORKFLOW = "post_party_create"
+REQUEST_PREFIX = "post_party"
+
+DEFAULT_MAX_ATTEMPTS = 3
+DEFAULT_RETRY_BACKOFF_S = 5.0
+DEFAULT_STEP_TIMEOUT_S = 300.0
+DEFAULT_RESUME_WINDOW_S = 1800.0
+
+DONE = "done"
+SKIPPED = "skipped"
+FAILED = "failed"
+BLOCKED = "blocked"
+PENDING = "pending"
+RUNNING = "running"
+TERMINAL = (DONE, SKIPPED, FAILED, BLOCKED)
+
+
+def _notice_is(args: List[str]) -> bool:
+    from ushareiplay.managers.notice_manager import NoticeManager
+
+    return NoticeManager.is_initialized() and NoticeManager.instance().current_notice == " ".join(args)
+
+
+def _topic_is(args: List[str]) -> bool:
+    from ushareiplay.managers.topic_manager import TopicManager
+
+    return TopicManager.is_initialized() and TopicManager.instance().current_topic == " ".join(args)
+
+
+def _title_is(args: List[str]) -> bool:
+    from ushareiplay.managers.room_name_manager import RoomNameManager
+
+    return RoomNameManager.is_initialized() and RoomNameManager.instance().current_title == " ".join(args)
+
+
+def _mode_is(args: List[str]) -> bool:
+    from ushareiplay.handlers.qq_music_handler import QQMusicHandler
+
+    target = {"0": "list", "1": "single", "-1": "random"}.get(args[0] if args else "")
+    return bool(target) and QQMusicHandler.is_initialized() and QQMusicHandler.instance().play_mode_key == target
+
+
+def _vol_is(args: List[str]) -> bool:
+    from ushareiplay.managers.music_manager import MusicManager
+
+    # 只比较绝对音量；+n/-n 是相对调整，总要执行
+    if not args or not args[0].isdigit() or not MusicManager.is_initialized():
+        return False
+    return MusicManager.instance().volume_control.cached_level() == int(args[0])
+
+
+# 命令前缀 → 期望状态是否已满足（只读内存中的状态；读不到时视为未满足）
+SATISFIED_CHECKS: Dict[str, Callable[[List[str]], bool]] = {
+    "notice": _notice_is,
+    "topic": _topic_is,
+    "title": _title_is,
+    "mode": _mode_is,
+    "vol": _vol_is,
+}
+
+
+class _Step:
+    def __init__(self, name: str, command: str, after: List[str], check: bool = True):
+        self.name = name
+        self.command = command
+        self.after = after
+        self.check = check
+        self.status = PENDING
+        self.attempts = 0
+        self.error: Optional[str] = None
+        self.next_at = 0.0
+        self.started_at = 0.0
+
+
 class PostPartyCreateAutomation:
     """
-    新建派对成功后的自动化：等待 CommandReady 后（可配置），按序投递命令到 MessageQueue。
+    新建派对成功后的自动化：等待 CommandReady 后（可配置），按步骤依赖分波次投递命令到 MessageQueue。
 
     约束：
     - 动作仅支持“命令字符串 → MessageQueue”
-    - 仅对“新建派对成功”触发一次（AND+once 门闩语义）
+    - 仅对“新建派对成功”触发一次（AND+once 门闩语义）；重启后只续跑未完成的运行
     """
 
-    def __init__(self, controller):
+    def __init__(self, controller, clock: Callable[[], float] = time.monotonic, now: Callable[[], datetime] = datetime.now):
         self.controller = controller
+        self._clock = clock
+        self._now = now
 
         # Latch state (AND + once)
         self._party_created_new: bool = False
         self._command_ready: bool = False
         self._fired: bool = False
+        self._resume_checked: bool = False
+
+        # Active run
+        self._run_key: Optional[str] = None
+        self._party_id: Optional[str] = None
+        self._steps: Dict[str, _Step] = {}
+        self._run_started_at = 0.0
+        self._inflight: Dict[str, _Step] = {}  # request_id → step
+        self._parts: Dict[str, int] = {}  # request_id → 还差几条命令的结束事件
+        self._outcomes: Dict[str, str] = {}
+        self._results: Dict[str, Dict[str, Any]] = {}
+        self._done_events: deque = deque()
+        self._listening = False
+        self._store_ok = True
 
     def _cfg(self) -> dict:
         soul_cfg = (self.controller.config.get("soul", {}) or {}) if self.controller else {}
@@ -42,6 +156,56 @@ class PostPartyCreateAutomation:
             return []
         return [c for c in cmds if isinstance(c, str) and c.strip()]
 
+    def _declared_steps(self) -> List[_Step]:
+        """Steps from ``steps`` when configured, else the legacy ``commands`` as independent steps."""
+        raw = self._cfg().get("steps")
+        steps: List[_Step] = []
+        if isinstance(raw, list) and raw:
+            for i, item in enumerate(raw):
+                if not isinstance(item, dict) or not str(item.get("command") or "").strip():
+                    self._log_warning(f"[post_party_create] ignoring invalid step #{i + 1}: {item!r}")
+                    continue
+                after = item.get("after") or []
+                if isinstance(after, str):
+                    after = [after]
+                steps.append(_Step(
+                    name=str(item.get("name") or item["command"]).strip(),
+                    command=str(item["command"]).strip(),
+                    after=[str(a) for a in after],
+                    check=bool(item.get("check", True)),
+                ))
+        else:
+            steps = [_Step(name=cmd.strip(), command=cmd, after=[]) for cmd in self._commands()]
+
+        unique: Dict[str, _Step] = {}
+        for step in steps:
+            name, n = step.name, 2
+            while name in unique:
+                name, n = f"{step.name}#{n}", n + 1
+            step.name = name
+            unique[name] = step
+        for step in unique.values():
+            missing = [a for a in step.after if a not in unique]
+            if missing:
+                self._log_warning(f"[post_party_create] step {step.name} depends on unknown steps {missing}")
+        return list(unique.values())
+
+    def _max_attempts(self) -> int:
+        return max(1, int(self._cfg().get("max_attempts", DEFAULT_MAX_ATTEMPTS)))
+
+    def _retry_backoff_s(self) -> float:
+        return float(self._cfg().get("retry_backoff_s", DEFAULT_RETRY_BACKOFF_S))
+
+    def _step_timeout_s(self) -> float:
+        return float(self._cfg().get("step_timeout_s", DEFAULT_STEP_TIMEOUT_S))
+
+    def _resume_window_s(self) -> float:
+        return float(self._cfg().get("resume_window_s", DEFAULT_RESUME_WINDOW_S))
+
+    def _current_party_id(self) -> Optional[str]:
+        party_id = getattr(getattr(self.controller, "soul_handler", None), "party_id", None)
+        return str(party_id) if party_id else None
+
     def _log_info(self, msg: str) -> None:
         logger = getattr(self.controller, "logger", None)
         if logger:
@@ -56,61 +220,321 @@ class PostPartyCreateAutomation:
         else:
             logging.getLogger(__name__).warning(msg)
 
-    async def on_party_created_new(self) -> None:
-        self._party_created_new = True
+    def _emit(self, event: str, **kwargs) -> None:
         obs = getattr(self.controller, "obs", None)
         if obs:
-            obs.emit(
-                "automation.post_party_create.signal",
-                ctx={"signal": "party_created_new"},
-            )
+            obs.emit(event, **kwargs)
+
+    async def on_party_created_new(self) -> None:
+        self._party_created_new = True
+        self._emit("automation.post_party_create.signal", ctx={"signal": "party_created_new"})
         await self._maybe_fire(trigger="party_created_new")
 
     async def on_command_ready(self) -> None:
         self._command_ready = True
-        obs = getattr(self.controller, "obs", None)
-        if obs:
-            obs.emit(
-                "automation.post_party_create.signal",
-                ctx={"signal": "command_ready"},
-            )
+        self._emit("automation.post_party_create.signal", ctx={"signal": "command_ready"})
         await self._maybe_fire(trigger="command_ready")
 
     async def _maybe_fire(self, trigger: str) -> None:
         if self._fired:
             return
         if not self._enabled():
-            obs = getattr(self.controller, "obs", None)
-            if obs:
-                obs.emit(
-                    "automation.post_party_create.skipped",
-                    ctx={"reason": "disabled", "trigger": trigger},
-                )
+            self._emit("automation.post_party_create.skipped", ctx={"reason": "disabled", "trigger": trigger})
             return
         if not self._party_created_new:
+            # 未新建派对：重启后首次就绪时续跑上次未完成的运行
+            if self._command_ready and not self._resume_checked:
+                self._resume_checked = True
+                await self._maybe_resume()
             return
         if self._wait_for_ready() and not self._command_ready:
             return
 
-        cmds = self._commands()
-        if not cmds:
+        steps = self._declared_steps()
+        if not steps:
             self._fired = True
             self._log_info("[post_party_create] enabled but commands empty; no-op")
             return
 
         try:
+            party_id = self._current_party_id()
+            run_key = await self._recent_run_key(party_id)
+            resumed = run_key is not None
+            run_key = run_key or f"{party_id or 'party'}@{self._now():%Y%m%d%H%M%S}"
+            self._fired = True
             self._log_info(
-                f"[post_party_create] firing ({trigger}), commands={len(cmds)}, wait_for_ready={self._wait_for_ready()}"
+                f"[post_party_create] firing ({trigger}), run={run_key}, steps={len(steps)}, "
+                f"resumed={resumed}, wait_for_ready={self._wait_for_ready()}"
             )
-            queue = MessageQueue.instance()
-            for cmd in cmds:
-                await queue.put_message(MessageInfo(content=cmd, nickname="Console"))
-            self._fired = True
-            obs = getattr(self.controller, "obs", None)
-            if obs:
-                obs.emit(
-                    "automation.post_party_create.fired",
-                    ctx={"commands": cmds, "trigger": trigger, "wait_for_ready": self._wait_for_ready()},
-                )
+            await self._start_run(run_key, party_id, steps, trigger=trigger, resumed=resumed)
         except Exception:
             self._log_warning(f"[post_party_create] failed: {traceback.format_exc()}")
+
+    async def _maybe_resume(self) -> None:
+        # 续跑不占用门闩：之后真正新建派对时照常触发
+        party_id = self._current_party_id()
+        if party_id is None:
+            return
+        run_key = await self._recent_run_key(party_id)
+        if run_key is None:
+            return
+        try:
+            await self._start_run(run_key, party_id, self._declared_steps(), trigger="resume", resumed=True)
+        except Exception:
+            self._log_warning(f"[post_party_create] resume failed: {traceback.format_exc()}")
+
+    async def _recent_run_key(self, party_id: Optional[str]) -> Optional[str]:
+        if not self._store_ok:
+            return None
+        from ushareiplay.dal.workflow_step_dao import WorkflowStepDAO
+
+        try:
+            since = self._now() - timedelta(seconds=self._resume_window_s())
+            return await WorkflowStepDAO.latest_run_key(WORKFLOW, party_id, since)
+        except Exception as e:
+            self._store_failed(e)
+            return None
+
+    async def _start_run(self, run_key: str, party_id: Optional[str], steps: List[_Step], *, trigger: str, resumed: bool) -> None:
+        self._run_key, self._party_id = run_key, party_id
+        self._steps = {step.name: step for step in steps}
+        self._inflight.clear()
+        self._parts.clear()
+        self._outcomes.clear()
+        self._results.clear()
+        self._done_events.clear()
+        self._run_started_at = self._clock()
+
+        restored = await self._load_run(run_key) if resumed else {}
+        for step in steps:
+            row = restored.get(step.name)
+            if row is None:
+                continue
+            # 完成/跳过的步骤不再执行；其余（含上次运行中断、失败的）重新来过
+            if row.status in (DONE, SKIPPED) and row.command == step.command:
+                step.status = row.status
+                step.attempts = row.attempts
+        if resumed and all(step.status in TERMINAL for step in steps):
+            self._emit(
+                "automation.post_party_create.skipped",
+                ctx={"reason": "already_done", "trigger": trigger, "run": run_key},
+            )
+            self._run_key = None
+            return
+
+        self._emit(
+            "automation.post_party_create.fired",
+            ctx={
+                "commands": [step.command for step in steps],
+                "trigger": trigger,
+                "wait_for_ready": self._wait_for_ready(),
+                "run": run_key,
+                "resumed": [step.name for step in steps if step.status in TERMINAL],
+            },
+        )
+        obs = getattr(self.controller, "obs", None)
+        if obs is not None and not self._listening:
+            obs.add_listener(self._on_event)
+            self._listening = True
+        await self.maybe_advance()
+
+    async def _load_run(self, run_key: str) -> Dict[str, Any]:
+        if not self._store_ok:
+            return {}
+        from ushareiplay.dal.workflow_step_dao import WorkflowStepDAO
+
+        try:
+            return {row.step: row for row in await WorkflowStepDAO.get_run(run_key)}
+        except Exception as e:
+            self._store_failed(e)
+            return {}
+
+    async def _persist(self, step: _Step) -> None:
+        if not self._store_ok or self._run_key is None:
+            return
+        from ushareiplay.dal.workflow_step_dao import WorkflowStepDAO
+
+        try:
+            await WorkflowStepDAO.save(
+                WORKFLOW, self._run_key, self._party_id, step.name,
+                command=step.command, status=step.status, attempts=step.attempts, error=step.error,
+            )
+        except Exception as e:
+            self._store_failed(e)
+
+    def _store_failed(self, error: Exception) -> None:
+        # 数据库不可用时退化为仅内存（不能跨重启去重），只告警一次
+        self._store_ok = False
+        self._log_warning(f"[post_party_create] step store unavailable, continuing in memory: {error}")
+
+    def _on_event(self, payload: Dict[str, Any]) -> None:
+        request_id = payload.get("trace_id")
+        if request_id not in self._inflight:
+            return
+        ctx = payload.get("ctx") or {}
+        if payload.get("event") == "command.result":
+            # 一步含多条命令（``;`` 分隔）时以第一条失败为准
+            previous = self._results.get(request_id)
+            if previous is None or previous.get("success", True):
+                self._results[request_id] = ctx
+        elif payload.get("event") == DONE_EVENT:
+            outcome = ctx.get("outcome")
+            if self._outcomes.get(request_id, "done") == "done":
+                self._outcomes[request_id] = outcome
+            self._parts[request_id] = self._parts.get(request_id, 1) - 1
+            if self._parts[request_id] <= 0:
+                self._done_events.append((request_id, self._outcomes.get(request_id)))
+
+    @property
+    def running(self) -> bool:
+        return self._run_key is not None
+
+    async def maybe_advance(self) -> None:
+        """Main-loop hook: settle finished steps, then enqueue every step whose dependencies are satisfied."""
+        if self._run_key is None:
+            return
+        try:
+            await self._settle()
+            await self._release()
+            await self._maybe_finish()
+        except Exception:
+            self._log_warning(f"[post_party_create] advance failed: {traceback.format_exc()}")
+
+    async def _settle(self) -> None:
+        while self._done_events:
+            request_id, outcome = self._done_events.popleft()
+            step = self._inflight.pop(request_id, None)
+            self._parts.pop(request_id, None)
+            self._outcomes.pop(request_id, None)
+            if step is None:
+                continue
+            result = self._results.pop(request_id, {})
+            if outcome == "done" and result.get("success", True):
+                await self._set_status(step, DONE)
+            elif outcome == "invalid":
+                # 解析不了的命令重试也一样，不再重复投递
+                step.error = "invalid command"
+                await self._set_status(step, FAILED, level="ERROR")
+            else:
+                await self._fail(step, result.get("error") or outcome or "unknown")
+        now = self._clock()
+        for request_id, step in list(self._inflight.items()):
+            if now - step.started_at >= self._step_timeout_s():
+                self._inflight.pop(request_id, None)
+                self._parts.pop(request_id, None)
+                self._outcomes.pop(request_id, None)
+                self._results.pop(request_id, None)
+                await self._fail(step, "timeout")
+
+    async def _fail(self, step: _Step, error: str) -> None:
+        step.error = str(error)
+        if step.attempts < self._max_attempts():
+            step.status = PENDING
+            step.next_at = self._clock() + self._retry_backoff_s() * (2 ** (step.attempts - 1))
+            self._emit(
+                "automation.post_party_create.step",
+                level="WARNING",
+                ctx={"step": step.name, "status": "retry", "attempts": step.attempts,
+                     "retry_in_s": round(step.next_at - self._clock(), 3), "error": step.error},
+            )
+            await self._persist(step)
+        else:
+            await self._set_status(step, FAILED, level="ERROR")
+
+    async def _set_status(self, step: _Step, status: str, level: str = "INFO") -> None:
+        step.status = status
+        if status in (DONE, SKIPPED):
+            step.error = None
+        self._emit(
+            "automation.post_party_create.step",
+            level=level,
+            ctx={"step": step.name, "status": status, "attempts": step.attempts, "error": step.error},
+        )
+        await self._persist(step)
+
+    def _satisfied(self, step: _Step) -> bool:
+        if not step.check:
+            return False
+        parts = step.command.strip().split()
+        prefix = parts[0].lstrip(":").lower() if parts else ""
+        check = SATISFIED_CHECKS.get(prefix)
+        if check is None:
+            return False
+        try:
+            return bool(check(parts[1:]))
+        except Exception:
+            return False
+
+    async def _release(self) -> None:
+        obs = getattr(self.controller, "obs", None)
+        changed = True
+        while changed:
+            changed = False
+            now = self._clock()
+            wave: List[_Step] = []
+            for step in self._steps.values():
+                if step.status != PENDING or step.next_at > now:
+                    continue
+                deps = [self._steps.get(name) for name in step.after]
+                if any(dep is None or dep.status in (FAILED, BLOCKED) for dep in deps):
+                    await self._set_status(step, BLOCKED, level="WARNING")
+                    changed = True
+                elif all(dep.status in (DONE, SKIPPED) for dep in deps):
+                    if self._satisfied(step):
+                        await self._set_status(step, SKIPPED)
+                        changed = True
+                    else:
+                        wave.append(step)
+
+            queue = MessageQueue.instance()
+            for step in wave:
+                step.attempts += 1
+                step.status = RUNNING
+                step.started_at = now
+                request_id = f"{REQUEST_PREFIX}:{self._run_key}:{step.name}:{step.attempts}"
+                await self._persist(step)
+                parts = sum(r.kind == ChatIntakeKind.COMMAND for r in expand_queue_text(step.command, "Console"))
+                if obs is None or parts == 0:
+                    # 无事件流时无法确认结果、纯文本不会有命令结束事件：入队即视为完成，避免超时后重复发送
+                    await queue.put_message(MessageInfo(content=step.command, nickname="Console"))
+                    await self._set_status(step, DONE)
+                    changed = True
+                    continue
+                self._inflight[request_id] = step
+                self._parts[request_id] = parts
+                await queue.put_message(MessageInfo(content=step.command, nickname="Console", request_id=request_id))
+
+    async def _maybe_finish(self) -> None:
+        if self._inflight or any(step.status == RUNNING for step in self._steps.values()):
+            return
+        if any(step.status == PENDING and step.next_at > self._clock() for step in self._steps.values()):
+            return
+        # 剩余 pending 的步骤依赖无法满足（例如循环依赖）
+        for step in self._steps.values():
+            if step.status == PENDING:
+                await self._set_status(step, BLOCKED, level="WARNING")
+
+        counts: Dict[str, int] = {}
+        for step in self._steps.values():
+            counts[step.status] = counts.get(step.status, 0) + 1
+        self._emit(
+            "automation.post_party_create.finished",
+            level="INFO" if set(counts) <= {DONE, SKIPPED} else "WARNING",
+            ctx={"run": self._run_key, "elapsed_s": round(self._clock() - self._run_started_at, 3), **counts},
+        )
+        self._log_info(f"[post_party_create] run {self._run_key} finished: {counts}")
+        self._run_key = None
+        self.close()
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "run": self._run_key,
+            "steps": {name: step.status for name, step in self._steps.items()},
+            "inflight": len(self._inflight),
+        }
+
+    def close(self) -> None:
+        obs = getattr(self.controller, "obs", None)
+        if obs is not None and self._listening:
+            obs.remove_listener(self._on_event)
+        self._listening = False
@@ -0,0 +1,172 @@
+"""
+命令入口限流（RateLimiter）
+
+所有命令最终排进同一条 UI 通道，一个人连刷 `:play` / `:lyrics` 就能占住设备好几分钟。
+CommandManager 在确认命令、进入 UI 会话之前向这里申请令牌：
+
+- 每个用户一个总令牌桶（``user``），部分命令再叠加「用户 + 命令」桶（``commands.<prefix>``），两者都有令牌才放行；
+- 容量与补充速率按 ``User.level`` 缩放（``level_scale``：等级 >= 键时取该倍数），``exempt_level`` 及以上不限流；
+  系统用户（Timer / Console / Agent）不经过这里；
+- 一段连续被拒（burst）只回复一次「慢一点」，之后静默丢弃，直到该用户再次被放行；
+- 令牌桶存放在进程级 :data:`PROCESS_STORE`，``__main__`` 重启循环里 ``Singleton.reset_all_instances()``
+  不会清空它，重启不等于限流清零。
+"""
+
+from __future__ import annotations
+
+import math
+import time
+from collections import Counter
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Tuple
+
+from ushareiplay.core.metrics import RATE_LIMITED
+from ushareiplay.core.singleton import Singleton
+
+
+DEFAULT_USER_BUCKET = {"capacity": 6, "refill_per_s": 0.1}
+DEFAULT_MAX_BUCKETS = 4096
+
+
+@dataclass
+class TokenBucket:
+    tokens: float
+    updated_at: float
+
+    def refill(self, capacity: float, refill_per_s: float, now: float) -> None:
+        elapsed = max(0.0, now - self.updated_at)
+        self.tokens = min(capacity, self.tokens + elapsed * refill_per_s)
+        self.updated_at = now
+
+    def wait_s(self, refill_per_s: float) -> float:
+        """Seconds until one token is available (0 when one already is)."""
+        if self.tokens >= 1:
+            return 0.0
+        if refill_per_s <= 0:
+            return math.inf
+        return (1 - self.tokens) / refill_per_s
+
+
+@dataclass
+class _Burst:
+    rejected: int = 0
+
+
+class BucketStore:
+    """Token buckets and burst state keyed by (nickname, scope); outlives singleton resets."""
+
+    def __init__(self, max_buckets: int = DEFAULT_MAX_BUCKETS):
+        self.max_buckets = max_buckets
+        self.buckets: Dict[Tuple[str, str], TokenBucket] = {}
+        self.bursts: Dict[str, _Burst] = {}
+
+    def bucket(self, key: Tuple[str, str], capacity: float, now: float) -> TokenBucket:
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            if len(self.buckets) >= self.max_buckets:
+                self._evict_oldest()
+            bucket = self.buckets[key] = TokenBucket(tokens=capacity, updated_at=now)
+        return bucket
+
+    def _evict_oldest(self) -> None:
+        # 最久未活动的桶已回满（或接近），丢掉它等价于给该用户一个满桶
+        oldest = sorted(self.buckets, key=lambda k: self.buckets[k].updated_at)[: max(1, self.max_buckets // 8)]
+        for key in oldest:
+            del self.buckets[key]
+            self.bursts.pop(key[0], None)
+
+    def clear(self) -> None:
+        self.buckets.clear()
+        self.bursts.clear()
+
+
+PROCESS_STORE = BucketStore()
+
+
+@dataclass(frozen=True)
+class RateDecision:
+    allowed: bool
+    retry_after_s: float = 0.0
+    notify: bool = False  # 本轮 burst 的第一次拒绝：需要回复一次
+    scope: str = ""
+
+
+ALLOWED = RateDecision(allowed=True)
+
+
+class RateLimiter(Singleton):
+    """Per-user and per-command token buckets checked at command intake."""
+
+    def __init__(
+        self,
+        config: Optional[dict] = None,
+        *,
+        store: Optional[BucketStore] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        cfg = (config or {}).get("rate_limit", {}) or {}
+        self.enabled = bool(cfg.get("enabled", True))
+        self.user_bucket = self._bucket_spec(cfg.get("user"), DEFAULT_USER_BUCKET)
+        self.command_buckets = {
+            str(prefix): self._bucket_spec(spec, DEFAULT_USER_BUCKET)
+            for prefix, spec in (cfg.get("commands") or {}).items()
+        }
+        self.level_scale = sorted((int(k), float(v)) for k, v in (cfg.get("level_scale") or {}).items())
+        exempt = cfg.get("exempt_level")
+        self.exempt_level = None if exempt is None else int(exempt)
+        self.store = store if store is not None else PROCESS_STORE
+        self._clock = clock
+        self.rejected: Counter = Counter()
+
+    @staticmethod
+    def _bucket_spec(spec, default) -> Tuple[float, float]:
+        spec = {**default, **(spec or {})}
+        return float(spec["capacity"]), float(spec["refill_per_s"])
+
+    def scale_for(self, level: int) -> float:
+        scale = 1.0
+        for min_level, value in self.level_scale:
+            if level >= min_level:
+                scale = value
+        return scale
+
+    def _scopes(self, prefix: str):
+        yield "*", self.user_bucket
+        if prefix in self.command_buckets:
+            yield prefix, self.command_buckets[prefix]
+
+    def check(self, nickname: str, prefix: str, level: int = 0) -> RateDecision:
+        """Take one token from every bucket that applies, or none when any is empty."""
+        if not self.enabled or (self.exempt_level is not None and level >= self.exempt_level):
+            return ALLOWED
+        now = self._clock()
+        scale = self.scale_for(level)
+        buckets = []
+        for scope, (capacity, refill_per_s) in self._scopes(prefix or ""):
+            capacity, refill_per_s = capacity * scale, refill_per_s * scale
+            bucket = self.store.bucket((nickname, scope), capacity, now)
+            bucket.refill(capacity, refill_per_s, now)
+            buckets.append((scope, bucket, refill_per_s))
+
+        blocked = [(bucket.wait_s(rate), scope) for scope, bucket, rate in buckets if bucket.tokens < 1]
+        if not blocked:
+            for _scope, bucket, _rate in buckets:
+                bucket.tokens -= 1
+            self.store.bursts.pop(nickname, None)
+            return ALLOWED
+
+        retry_after_s, scope = max(blocked)
+        burst = self.store.bursts.setdefault(nickname, _Burst())
+        burst.rejected += 1
+        self.rejected[scope] += 1
+        RATE_LIMITED.labels("user" if scope == "*" else "command").inc()
+        return RateDecision(
+            allowed=False, retry_after_s=retry_after_s, notify=burst.rejected == 1, scope=scope
+        )
+
+    def status(self) -> dict:
+        return {
+            "buckets": len(self.store.buckets),
+            "limited_users": len(self.store.bursts),
+            "rejected": dict(self.rejected),
+        }
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, nullcontext
 from dataclasses import dataclass
 from typing import Any, Callable
 
@@ -9,21 +9,37 @@ from typing import Any, Callable
 class DriverRecoveryContext:
     reinitialize_driver: Callable[[], bool]
     obs: Any = None
+    flight_recorder: Any = None
 
     def emit(self, event: str, **kwargs) -> None:
         if self.obs is not None:
             self.obs.emit(event, **kwargs)
 
+    def dump_flight(self, reason: str, **ctx) -> None:
+        if self.flight_recorder is not None:
+            self.flight_recorder.dump(reason, ctx)
+
 
 @dataclass(frozen=True)
 class EventRuntimeContext:
     ui_lock: Any = None
+    profiler: Any = None
+    flight_recorder: Any = None
 
     def is_ui_busy(self) -> bool:
         if self.ui_lock is None:
             return False
         return bool(self.ui_lock.locked())
 
+    def span(self, phase: str):
+        if self.profiler is None:
+            return nullcontext()
+        return self.profiler.span(phase)
+
+    def dump_flight(self, reason: str, **ctx) -> None:
+        if self.flight_recorder is not None:
+            self.flight_recorder.dump(reason, ctx)
+
 
 @dataclass(frozen=True)
 class CommandRuntimeContext:
@@ -33,6 +49,20 @@ class CommandRuntimeContext:
     def obs(self):
         return getattr(self.controller, "obs", None)
 
+    @property
+    def profiler(self):
+        return getattr(self.controller, "profiler", None)
+
+    def is_ui_busy(self) -> bool:
+        ui_lock = getattr(self.controller, "ui_lock", None)
+        return bool(ui_lock is not None and ui_lock.locked())
+
+    def span(self, phase: str):
+        profiler = self.profiler
+        if profiler is None:
+            return nullcontext()
+        return profiler.span(phase)
+
     @asynccontextmanager
     async def ui_session(self, reason: str):
         async with self.controller.ui_session(reason):
@@ -1,8 +1,12 @@
+import time
 import traceback
 from pathlib import Path
+from typing import Optional
 import json
 
+from ushareiplay.core.command_supervisor import CANCEL_COMMAND
 from ushareiplay.core.message_queue import MessageQueue
+from ushareiplay.core.metrics import QUEUE_DEPTH
 
 
 class RuntimeQueueDrainer:
@@ -23,10 +27,15 @@ class RuntimeQueueDrainer:
         if self.obs:
             self.obs.emit("queue.drain.start", ctx={"count": len(queue_messages)})
 
-        command_count = await self.command_manager.execute_runtime_queue_messages(
-            queue_messages.values(),
-            send_screen_message=self.send_screen_message,
-        )
+        depth = QUEUE_DEPTH.labels("runtime_drainer")
+        depth.set(len(queue_messages))
+        try:
+            command_count = await self.command_manager.execute_runtime_queue_messages(
+                queue_messages.values(),
+                send_screen_message=self.send_screen_message,
+            )
+        finally:
+            depth.set(0)
 
         if self.obs:
             self.obs.emit(
@@ -38,12 +47,38 @@ class RuntimeQueueDrainer:
 
 
 class AgentCommandSpool:
-    def __init__(self, *, input_queue, command_dir: Path, obs=None):
+    def __init__(self, *, input_queue, command_dir: Path, obs=None, clock=time.monotonic):
         self.input_queue = input_queue
         self.command_dir = command_dir
         self.obs = obs
+        # 控制接口（ControlServer）监听时 spool 只是兜底，按间隔扫描而不是每轮 glob
+        self.poll_interval_s = 0.0
+        self._clock = clock
+        self._last_drain: Optional[float] = None
+
+    def take_cancel_request(self) -> Optional[str]:
+        """Consume a pending ``!cancel`` spool file (polled while a command runs); returns the cancel reason."""
+        try:
+            for path in sorted(self.command_dir.glob("*.cmd")):
+                if path.read_text(encoding="utf-8").strip() != CANCEL_COMMAND:
+                    continue
+                path.unlink(missing_ok=True)
+                if self.obs:
+                    self.obs.emit(
+                        "agent.inject.received",
+                        ctx={"source": "agent_spool", "content": CANCEL_COMMAND, "nickname": "Console"},
+                    )
+                return "agent_spool"
+        except Exception:
+            return None
+        return None
 
     def drain(self) -> None:
+        if self.poll_interval_s > 0:
+            now = self._clock()
+            if self._last_drain is not None and now - self._last_drain < self.poll_interval_s:
+                return
+            self._last_drain = now
         try:
             self.command_dir.mkdir(parents=True, exist_ok=True)
             for path in sorted(self.command_dir.glob("*.cmd")):
@@ -96,26 +131,39 @@ class AgentCommandSpool:
 
 
 class StatusReporter:
-    def __init__(self, *, config, ui_lock, obs, soul_handler=None, timer_manager=None):
+    def __init__(
+        self,
+        *,
+        config,
+        ui_lock,
+        obs,
+        soul_handler=None,
+        timer_manager=None,
+        profiler=None,
+        watchdog=None,
+    ):
         self.config = config
         self.ui_lock = ui_lock
         self.obs = obs
         self.soul_handler = soul_handler
         self.timer_manager = timer_manager
+        self.profiler = profiler
+        self.watchdog = watchdog
 
     async def update(self, *, screen: dict, automation=None) -> None:
         try:
             foreground_app = screen["foreground_app"]
             anchors = screen["anchors"]
             ui_lock_state = "locked" if (self.ui_lock and self.ui_lock.locked()) else "unlocked"
-            queue_size = MessageQueue.instance().get_queue_size()
+            queue = MessageQueue.instance()
+            queue_size = queue.get_queue_size()
 
             status = {
                 "foreground_app": foreground_app,
                 "soul_ui_state": screen["soul_ui_state"],
                 "qqmusic_ui_state": screen["qqmusic_ui_state"],
                 "anchors": anchors,
-                "pipeline": {"ui_lock": ui_lock_state, "queue_size": queue_size},
+                "pipeline": {"ui_lock": ui_lock_state, "queue_size": queue_size, "queue": queue.status()},
                 "business": {
                     "party_id_current": getattr(self.soul_handler, "party_id", None)
                     if self.soul_handler
@@ -125,6 +173,10 @@ class StatusReporter:
                     "playback_info_summary": None,
                 },
             }
+            if self.profiler is not None:
+                status["profiler"] = self.profiler.status()
+            if self.watchdog is not None:
+                status["watchdog"] = self.watchdog.status()
             self.obs.write_status(status)
             self.obs.emit("state.snapshot", ctx={"foreground_app": foreground_app, "anchors": anchors})
             if foreground_app == "Soul" and screen["soul_ui_state"] == "InChatReady":
@@ -0,0 +1,394 @@
+"""
+会话录制与回放（Record & Replay）
+
+- SessionRecorder / RecordingDriver：透明包装真实 Appium driver，把 page_source、
+  `mobile: shell` 输出（dumpsys media_session / dumpsys audio 等）、其它 UI 动作及其耗时
+  写入一个 fixture 目录（session.jsonl + frames/*.xml）。
+- ReplaySession / ReplayDriver：离线加载该目录，按录制顺序确定性地回放 page_source，
+  并基于录制的 XML 提供 find_element / find_elements，使 EventManager、ElementFinder
+  等热点路径可以在没有设备的 Linux/CI 上跑基准。
+- benchmark_ticks：对任意 async tick 函数统计 ticks/second 与内存分配。
+"""
+
+from __future__ import annotations
+
+import json
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from lxml import etree
+from selenium.common.exceptions import NoSuchElementException
+
+from ushareiplay.core.ui.page_snapshot import parse_bounds
+
+
+SESSION_FILE = "session.jsonl"
+FRAMES_DIR = "frames"
+
+
+class SessionRecorder:
+    """Append-only writer for one recorded driver session."""
+
+    def __init__(self, directory: Path, *, clock: Callable[[], float] = time.monotonic):
+        self.directory = Path(directory)
+        self.frames_dir = self.directory / FRAMES_DIR
+        self.frames_dir.mkdir(parents=True, exist_ok=True)
+        self._clock = clock
+        self._started = clock()
+        self._seq = 0
+        self._last_frame_file: Optional[str] = None
+        self._last_frame_source: Optional[str] = None
+
+    def _append(self, op: str, duration_s: float, **fields) -> None:
+        self._seq += 1
+        entry = {
+            "seq": self._seq,
+            "t": round(self._clock() - self._started, 4),
+            "op": op,
+            "duration_ms": round(duration_s * 1000.0, 2),
+        }
+        entry.update(fields)
+        with (self.directory / SESSION_FILE).open("a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    def record_page_source(self, source: Optional[str], duration_s: float) -> None:
+        # Consecutive identical frames share one file to keep sessions small.
+        if source is not None and source != self._last_frame_source:
+            frame_file = f"{FRAMES_DIR}/{self._seq + 1:06d}.xml"
+            (self.directory / frame_file).write_text(source, encoding="utf-8")
+            self._last_frame_file = frame_file
+            self._last_frame_source = source
+        self._append(
+            "page_source",
+            duration_s,
+            file=self._last_frame_file if source is not None else None,
+            bytes=len(source.encode("utf-8")) if source else 0,
+        )
+
+    def record_shell(self, command: str, output: Any, duration_s: float) -> None:
+        self._append("shell", duration_s, command=command, output=output)
+
+    def record_action(self, name: str, args: list, duration_s: float) -> None:
+        self._append("action", duration_s, name=name, args=[to_jsonable(a) for a in args])
+
+
+def to_jsonable(value: Any) -> Any:
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    if isinstance(value, (list, tuple)):
+        return [to_jsonable(v) for v in value]
+    if isinstance(value, dict):
+        return {str(k): to_jsonable(v) for k, v in value.items()}
+    return repr(value)
+
+
+def _shell_command(args: tuple) -> str:
+    if args and isinstance(args[0], dict):
+        return str(args[0].get("command", ""))
+    return ""
+
+
+class RecordingDriver:
+    """Transparent driver proxy that mirrors every call into a SessionRecorder."""
+
+    def __init__(self, driver, recorder: SessionRecorder):
+        self._driver = driver
+        self._recorder = recorder
+
+    @property
+    def wrapped_driver(self):
+        return self._driver
+
+    @property
+    def page_source(self):
+        start = time.perf_counter()
+        source = self._driver.page_source
+        self._recorder.record_page_source(source, time.perf_counter() - start)
+        return source
+
+    def execute_script(self, script, *args):
+        start = time.perf_counter()
+        result = self._driver.execute_script(script, *args)
+        duration = time.perf_counter() - start
+        if script == "mobile: shell":
+            self._recorder.record_shell(_shell_command(args), result, duration)
+        else:
+            self._recorder.record_action("execute_script", [script, *args], duration)
+        return result
+
+    def __getattr__(self, name):
+        attr = getattr(self._driver, name)
+        if not callable(attr) or name.startswith("_"):
+            return attr
+
+        def recorded(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return attr(*args, **kwargs)
+            finally:
+                self._recorder.record_action(name, list(args), time.perf_counter() - start)
+
+        return recorded
+
+
+class ReplaySession:
+    """Recorded session loaded from a fixture directory."""
+
+    def __init__(self, directory: Path, entries: List[dict]):
+        self.directory = Path(directory)
+        self.entries = entries
+        self._frame_cache: Dict[str, str] = {}
+
+    @classmethod
+    def load(cls, directory) -> "ReplaySession":
+        directory = Path(directory)
+        entries = []
+        with (directory / SESSION_FILE).open(encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    entries.append(json.loads(line))
+        return cls(directory, entries)
+
+    def frame(self, file: Optional[str]) -> Optional[str]:
+        if file is None:
+            return None
+        if file not in self._frame_cache:
+            self._frame_cache[file] = (self.directory / file).read_text(encoding="utf-8")
+        return self._frame_cache[file]
+
+    def page_source_entries(self) -> List[dict]:
+        return [e for e in self.entries if e.get("op") == "page_source"]
+
+    def shell_outputs(self) -> Dict[str, List[Any]]:
+        outputs: Dict[str, List[Any]] = {}
+        for entry in self.entries:
+            if entry.get("op") == "shell":
+                outputs.setdefault(entry.get("command", ""), []).append(entry.get("output"))
+        return outputs
+
+
+class ReplayElement:
+    """WebElement look-alike backed by one node of a recorded page_source."""
+
+    def __init__(self, driver: "ReplayDriver", node):
+        self._driver = driver
+        self._node = node
+
+    @property
+    def id(self) -> str:
+        return self._node.getroottree().getpath(self._node)
+
+    @property
+    def text(self) -> str:
+        return self._node.get("text", "")
+
+    @property
+    def tag_name(self) -> str:
+        return self._node.get("class") or self._node.tag
+
+    def get_attribute(self, name: str) -> Optional[str]:
+        if name in ("className", "class"):
+            return self._node.get("class")
+        if name in ("contentDescription", "content-desc"):
+            return self._node.get("content-desc")
+        if name in ("resourceId", "resource-id"):
+            return self._node.get("resource-id")
+        return self._node.get(name)
+
+    @property
+    def rect(self) -> dict:
+        bounds = parse_bounds(self._node.get("bounds")) or (0, 0, 0, 0)
+        x1, y1, x2, y2 = bounds
+        return {"x": x1, "y": y1, "width": x2 - x1, "height": y2 - y1}
+
+    @property
+    def location(self) -> dict:
+        rect = self.rect
+        return {"x": rect["x"], "y": rect["y"]}
+
+    @property
+    def size(self) -> dict:
+        rect = self.rect
+        return {"width": rect["width"], "height": rect["height"]}
+
+    def is_displayed(self) -> bool:
+        return self._node.get("displayed", "true") != "false"
+
+    def is_enabled(self) -> bool:
+        return self._node.get("enabled", "true") != "false"
+
+    def click(self) -> None:
+        self._driver.actions.append(("click", self.id))
+
+    def send_keys(self, *values) -> None:
+        self._driver.actions.append(("send_keys", self.id, "".join(str(v) for v in values)))
+
+    def clear(self) -> None:
+        self._driver.actions.append(("clear", self.id))
+
+    def find_elements(self, by: str, value: str) -> List["ReplayElement"]:
+        return [ReplayElement(self._driver, n) for n in _query(self._node, by, value, relative=True)]
+
+    def find_element(self, by: str, value: str) -> "ReplayElement":
+        found = self.find_elements(by, value)
+        if not found:
+            raise NoSuchElementException(f"{by}={value}")
+        return found[0]
+
+
+def _query(node, by: str, value: str, *, relative: bool = False) -> list:
+    prefix = "." if relative else ""
+    if by == "xpath":
+        expr = value
+        if relative and value.startswith("/"):
+            expr = "." + value
+        try:
+            result = node.xpath(expr)
+        except etree.XPathError:
+            return []
+        return [r for r in result if isinstance(r, etree._Element)]
+    if by == "id":
+        return node.xpath(f"{prefix}//*[@resource-id=$v]", v=value)
+    if by == "class name":
+        return node.xpath(f"{prefix}//*[@class=$v]", v=value)
+    if by == "accessibility id":
+        return node.xpath(f"{prefix}//*[@content-desc=$v]", v=value)
+    return []
+
+
+class ReplayDriver:
+    """
+    Deterministic offline driver serving a ReplaySession.
+
+    Every ``page_source`` read advances to the next recorded frame; element
+    lookups resolve against the most recently served frame. Shell commands
+    return their recorded outputs in order (the last one repeats once the
+    sequence runs out). UI actions are appended to ``actions``.
+    """
+
+    def __init__(self, session: ReplaySession, *, loop: bool = False):
+        self.session = session
+        self.loop = loop
+        self.actions: List[tuple] = []
+        self.exhausted = False
+        self._frames = session.page_source_entries()
+        self._cursor = 0
+        self._current: Optional[str] = None
+        self._current_root = None
+        self._shell_outputs = session.shell_outputs()
+        self._shell_cursor: Dict[str, int] = {}
+
+    @property
+    def page_source(self) -> Optional[str]:
+        if not self._frames:
+            self.exhausted = True
+            return None
+        if self._cursor >= len(self._frames):
+            self.exhausted = True
+            if not self.loop:
+                return self._current
+            self._cursor = 0
+        entry = self._frames[self._cursor]
+        self._cursor += 1
+        self._set_current(self.session.frame(entry.get("file")))
+        return self._current
+
+    def _set_current(self, source: Optional[str]) -> None:
+        if source is self._current and self._current_root is not None:
+            return
+        self._current = source
+        self._current_root = None
+
+    def _root(self):
+        if self._current_root is None:
+            if self._current is None:
+                self._set_current(self.page_source)
+            if not self._current:
+                return None
+            self._current_root = etree.fromstring(self._current.encode("utf-8"))
+        return self._current_root
+
+    def find_elements(self, by: str, value: str) -> List[ReplayElement]:
+        root = self._root()
+        if root is None:
+            return []
+        return [ReplayElement(self, n) for n in _query(root, by, value)]
+
+    def find_element(self, by: str, value: str) -> ReplayElement:
+        found = self.find_elements(by, value)
+        if not found:
+            raise NoSuchElementException(f"{by}={value}")
+        return found[0]
+
+    def execute_script(self, script, *args):
+        if script != "mobile: shell":
+            self.actions.append(("execute_script", script))
+            return None
+        command = _shell_command(args)
+        self.actions.append(("shell", command))
+        outputs = self._shell_outputs.get(command)
+        if not outputs:
+            return ""
+        index = self._shell_cursor.get(command, 0)
+        self._shell_cursor[command] = index + 1
+        return outputs[min(index, len(outputs) - 1)]
+
+    def get_window_size(self) -> dict:
+        root = self._root()
+        if root is not None:
+            for node in root.iter():
+                bounds = parse_bounds(node.get("bounds"))
+                if bounds:
+                    return {"width": bounds[2], "height": bounds[3]}
+        return {"width": 1080, "height": 2340}
+
+    def get_screenshot_as_file(self, _path) -> bool:
+        return False
+
+    def update_settings(self, settings) -> None:
+        self.actions.append(("update_settings", settings))
+
+    def quit(self) -> None:
+        self.actions.append(("quit",))
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+
+        def action(*args, **_kwargs):
+            self.actions.append((name, *args))
+            return True
+
+        return action
+
+
+async def benchmark_ticks(tick: Callable[[], Awaitable[Any]], *, ticks: int) -> dict:
+    """Run ``tick`` ``ticks`` times and report throughput and allocations."""
+    started_tracing = not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    before, _ = tracemalloc.get_traced_memory()
+    snapshot_before = tracemalloc.take_snapshot()
+    start = time.perf_counter()
+    try:
+        for _ in range(ticks):
+            await tick()
+        elapsed = time.perf_counter() - start
+        current, peak = tracemalloc.get_traced_memory()
+        stats = tracemalloc.take_snapshot().compare_to(snapshot_before, "filename")
+    finally:
+        if started_tracing:
+            tracemalloc.stop()
+    allocated_blocks = sum(max(0, s.count_diff) for s in stats)
+    return {
+        "ticks": ticks,
+        "seconds": round(elapsed, 4),
+        "ticks_per_second": round(ticks / elapsed, 2) if elapsed > 0 else None,
+        "alloc_peak_kb": round((peak - before) / 1024.0, 1),
+        "alloc_retained_kb": round((current - before) / 1024.0, 1),
+        "alloc_blocks": allocated_blocks,
+    }
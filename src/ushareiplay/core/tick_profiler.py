@@ -0,0 +1,146 @@
+"""
+主循环分阶段耗时统计（TickProfiler）
+
+为 AppController.start_monitoring 的每个阶段（spool、队列、控制台输入、
+页面事件、命令 update、状态上报）以及每个事件/命令钩子记录耗时，
+在内存中保留滚动窗口并计算 p50/p95/p99，超出预算的阶段会被标记。
+"""
+
+from __future__ import annotations
+
+import math
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Deque, Dict, Optional
+
+
+DEFAULT_WINDOW = 300
+DEFAULT_SUMMARY_INTERVAL_TICKS = 60
+DEFAULT_BUDGET_MS = 1000.0
+
+
+def percentile(sorted_values, pct: float) -> float:
+    """Nearest-rank percentile of an already sorted sequence."""
+    if not sorted_values:
+        return 0.0
+    rank = math.ceil(pct / 100.0 * len(sorted_values)) - 1
+    rank = max(0, min(len(sorted_values) - 1, rank))
+    return sorted_values[rank]
+
+
+class _PhaseStats:
+    __slots__ = ("samples", "count", "over_budget", "max_ms")
+
+    def __init__(self, window: int):
+        self.samples: Deque[float] = deque(maxlen=window)
+        self.count = 0
+        self.over_budget = 0
+        self.max_ms = 0.0
+
+
+class TickProfiler:
+    """Rolling per-phase latency histograms for the monitoring loop."""
+
+    def __init__(
+        self,
+        *,
+        config: Optional[dict] = None,
+        obs=None,
+        clock: Callable[[], float] = time.perf_counter,
+    ):
+        cfg = (config or {}).get("tick_profiler", {}) or {}
+        self.enabled = bool(cfg.get("enabled", True))
+        self.window = max(1, int(cfg.get("window", DEFAULT_WINDOW)))
+        self.summary_interval_ticks = max(
+            0, int(cfg.get("summary_interval_ticks", DEFAULT_SUMMARY_INTERVAL_TICKS))
+        )
+        self.default_budget_ms = float(cfg.get("default_budget_ms", DEFAULT_BUDGET_MS))
+        self.budgets_ms: Dict[str, float] = {
+            str(k): float(v) for k, v in (cfg.get("budgets_ms") or {}).items()
+        }
+        self.obs = obs
+        self._clock = clock
+        self._phases: Dict[str, _PhaseStats] = {}
+        self._ticks = 0
+
+    def budget_for(self, phase: str) -> float:
+        """Budget of a phase; hook phases (``event:x``) fall back to their family."""
+        if phase in self.budgets_ms:
+            return self.budgets_ms[phase]
+        family = phase.split(":", 1)[0]
+        return self.budgets_ms.get(family, self.default_budget_ms)
+
+    @contextmanager
+    def span(self, phase: str):
+        if not self.enabled:
+            yield
+            return
+        start = self._clock()
+        try:
+            yield
+        finally:
+            self.record(phase, self._clock() - start)
+
+    def record(self, phase: str, duration_s: float) -> None:
+        if not self.enabled:
+            return
+        stats = self._phases.get(phase)
+        if stats is None:
+            stats = self._phases[phase] = _PhaseStats(self.window)
+        duration_ms = duration_s * 1000.0
+        stats.samples.append(duration_ms)
+        stats.count += 1
+        if duration_ms > stats.max_ms:
+            stats.max_ms = duration_ms
+
+        budget_ms = self.budget_for(phase)
+        if budget_ms > 0 and duration_ms > budget_ms:
+            stats.over_budget += 1
+            self._emit(
+                "tick.budget.exceeded",
+                level="WARNING",
+                ctx={
+                    "phase": phase,
+                    "duration_ms": round(duration_ms, 1),
+                    "budget_ms": budget_ms,
+                },
+            )
+
+    def end_tick(self) -> None:
+        """Mark one loop iteration done; emits a periodic ``tick.profile`` summary."""
+        if not self.enabled:
+            return
+        self._ticks += 1
+        if self.summary_interval_ticks and self._ticks % self.summary_interval_ticks == 0:
+            self._emit("tick.profile", ctx={"ticks": self._ticks, "phases": self.snapshot()})
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        result: Dict[str, Dict[str, Any]] = {}
+        for phase, stats in self._phases.items():
+            ordered = sorted(stats.samples)
+            budget_ms = self.budget_for(phase)
+            p95 = percentile(ordered, 95)
+            result[phase] = {
+                "count": stats.count,
+                "p50_ms": round(percentile(ordered, 50), 1),
+                "p95_ms": round(p95, 1),
+                "p99_ms": round(percentile(ordered, 99), 1),
+                "max_ms": round(stats.max_ms, 1),
+                "budget_ms": budget_ms,
+                "over_budget": stats.over_budget,
+                "hot": bool(budget_ms > 0 and p95 > budget_ms),
+            }
+        return result
+
+    def status(self) -> Dict[str, Any]:
+        """Compact view for status.json."""
+        return {"enabled": self.enabled, "ticks": self._ticks, "phases": self.snapshot()}
+
+    def _emit(self, event: str, **kwargs) -> None:
+        if self.obs is None:
+            return
+        try:
+            self.obs.emit(event, **kwargs)
+        except Exception:
+            pass
@@ -9,6 +9,7 @@ from selenium.webdriver.remote.webelement import WebElement
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.support.ui import WebDriverWait
 
+from ushareiplay.core.command_supervisor import bound_timeout, cancellable, checkpoint
 from ushareiplay.core.driver_decorator import with_driver_recovery
 
 
@@ -34,10 +35,11 @@ class ElementFinder:
     @with_driver_recovery(op="read")
     def wait_for_element(self, element_key: str, timeout: int = 10) -> WebElement:
         """Enhanced wait_for_element using just element key"""
+        timeout = bound_timeout(timeout)
         try:
             locator_type, value = self._get_locator(element_key)
             element = WebDriverWait(self.driver, timeout).until(
-                EC.presence_of_element_located((locator_type, value))
+                cancellable(EC.presence_of_element_located((locator_type, value)))
             )
             self.logger.debug(f"Found  element: {element_key}")
             return element
@@ -79,10 +81,11 @@ class ElementFinder:
             self, element_key: str, timeout: int = 10
     ) -> WebElement:
         """Enhanced wait_for_element using just element key"""
+        timeout = bound_timeout(timeout)
         try:
             locator_type, value = self._get_locator(element_key)
             element = WebDriverWait(self.driver, timeout).until(
-                EC.element_to_be_clickable((locator_type, value))
+                cancellable(EC.element_to_be_clickable((locator_type, value)))
             )
             self.logger.debug(f"Found clickable element: {element_key}")
             return element
@@ -110,10 +113,11 @@ class ElementFinder:
         Returns:
             bool: 元素消失或不可见返回 True，超时仍可见返回 False
         """
+        timeout = bound_timeout(timeout)
         try:
             locator_type, value = self._get_locator(element_key)
             WebDriverWait(self.driver, timeout, poll_frequency=poll_frequency).until(
-                EC.invisibility_of_element_located((locator_type, value))
+                cancellable(EC.invisibility_of_element_located((locator_type, value)))
             )
             self.logger.debug(f"Element {element_key} disappeared dynamically")
             return True
@@ -203,8 +207,9 @@ class ElementFinder:
         Returns:
             WebElement if found, None if not found
         """
-        end_time = time.time() + timeout
+        end_time = time.time() + bound_timeout(timeout)
         while time.time() < end_time:
+            checkpoint()
             try:
                 element = self.driver.find_element(locator_type, locator_value)
                 if element and element.is_displayed():
@@ -233,8 +238,9 @@ class ElementFinder:
         Returns:
             WebElement if found and clickable, None if not
         """
-        end_time = time.time() + timeout
+        end_time = time.time() + bound_timeout(timeout)
         while time.time() < end_time:
+            checkpoint()
             try:
                 element = self.driver.find_element(locator_type, locator_value)
                 if element and element.is_displayed() and element.is_enabled():
@@ -362,12 +368,13 @@ class ElementFinder:
             self.logger.warning("wait_for_any_element: 没有有效的元素key")
             return None, None
 
+        timeout = bound_timeout(timeout)
         try:
             # Selenium 4.8+ 支持 EC.any_of
             element = WebDriverWait(self.driver, timeout).until(
-                EC.any_of(
+                cancellable(EC.any_of(
                     *[EC.presence_of_element_located(locator) for locator in locators]
-                )
+                ))
             )
             # 找到是哪个key
             for locator, key in key_map.items():
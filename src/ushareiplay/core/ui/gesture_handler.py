@@ -134,6 +134,11 @@ class GestureHandler:
             self.logger.error(f"Error clicking element: {traceback.format_exc()}")
             return False
 
+    @with_driver_recovery(retry=False, op="write")
+    def click_at(self, x: int, y: int) -> bool:
+        """Tap absolute screen coordinates, e.g. the center of a PageSnapshot node's bounds."""
+        return self._perform_click_at(int(x), int(y))
+
     def _reversed_if_needed(self, lst: list, direction: str) -> list:
         return list(reversed(lst)) if direction in ("down", "right") else lst
 
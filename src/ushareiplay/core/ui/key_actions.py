@@ -113,3 +113,19 @@ class KeyActions:
         """Execute paste operation using Android keycode"""
         self.driver.press_keycode(279)  # KEYCODE_PASTE = 279
         self.logger.debug("Pressed paste key")
+
+    @with_driver_recovery(retry=False, op="write")
+    def type_text(self, text, element=None):
+        """Enter text through the controller's TextInput (fastest self-tested backend)
+        Args:
+            text: str, text to enter
+            element: optional WebElement that already has focus (enables send_keys)
+        """
+        text_input = getattr(getattr(self.owner, "controller", None), "text_input", None)
+        if text_input is None:
+            from ushareiplay.core.ui.text_input import TextInput
+
+            text_input = TextInput()
+        backend = text_input.type_text(self.driver, text, element)
+        self.logger.debug(f"Typed '{text}' via {backend}")
+        return True
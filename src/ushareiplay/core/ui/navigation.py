@@ -24,6 +24,23 @@ class Navigator:
     def logger(self):
         return self.owner.logger
 
+    def _find_on_current_screen(
+            self, target_key: str, interference_keys: list
+    ) -> Tuple[Optional[str], Optional[WebElement]]:
+        """
+        有 ScreenTracker 的 handler 先用一次 page_source 快照判断目标是否已可见且无干扰元素，
+        命中时跳过预防性的 press_back 与逐个等待。
+        """
+        if getattr(self.owner, "screen_tracker", None) is None:
+            return None, None
+        snapshot = self.owner.page_snapshot()
+        if snapshot is None or snapshot.find(target_key) is None:
+            return None, None
+        if any(snapshot.find(key) is not None for key in interference_keys):
+            return None, None
+        element = self.owner.element_finder.try_find_element(target_key)
+        return (target_key, element) if element is not None else (None, None)
+
     def navigate_to_element(
             self,
             target_key: str,
@@ -52,6 +69,10 @@ class Navigator:
             interference_keys = []
 
         self.logger.info(f"开始导航到目标元素: {target_key}")
+        found = self._find_on_current_screen(target_key, interference_keys)
+        if found[1] is not None:
+            self.logger.info(f"当前界面已有目标元素: {target_key}（单次快照确认）")
+            return found
         self.owner.key_actions.press_back()
 
         for attempt in range(max_attempts):
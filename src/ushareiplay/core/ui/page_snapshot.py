@@ -0,0 +1,87 @@
+"""
+PageSnapshot：一次 page_source 解析后按配置 key 查询元素
+
+把「多次 Appium find_element / .text / .location 往返」替换为「取一次 page_source，
+在本地 lxml 树上解析」。定位规则与 EventManager 相同：``//`` 开头按 XPath，
+否则按 resource-id 匹配。
+"""
+
+from __future__ import annotations
+
+import re
+from typing import Dict, List, Optional, Tuple
+
+from lxml import etree
+
+
+_BOUNDS_RE = re.compile(r"\[(-?\d+),(-?\d+)\]\[(-?\d+),(-?\d+)\]")
+TEXT_VIEW_CLASS = "android.widget.TextView"
+
+
+def parse_bounds(bounds: Optional[str]) -> Optional[tuple]:
+    """Parse UiAutomator2 ``[x1,y1][x2,y2]`` bounds into a tuple."""
+    if not bounds:
+        return None
+    match = _BOUNDS_RE.match(bounds)
+    if not match:
+        return None
+    return tuple(int(v) for v in match.groups())
+
+
+def locator_xpath(locator: str) -> str:
+    """Config locator (XPath or resource-id) as an XPath expression."""
+    if locator.startswith("//"):
+        return locator
+    return f"//*[@resource-id='{locator}']"
+
+
+class PageSnapshot:
+    """Parsed page_source plus config-key lookups against it."""
+
+    def __init__(self, root, elements: Optional[Dict[str, str]] = None):
+        self.root = root
+        self.elements = elements or {}
+
+    @classmethod
+    def parse(cls, page_source: Optional[str], elements: Optional[Dict[str, str]] = None) -> Optional["PageSnapshot"]:
+        if not page_source:
+            return None
+        try:
+            root = etree.fromstring(page_source.encode("utf-8"))
+        except etree.XMLSyntaxError:
+            return None
+        return cls(root, elements)
+
+    def find_all(self, element_key: str) -> list:
+        locator = self.elements.get(element_key)
+        if not locator:
+            return []
+        try:
+            return self.root.xpath(locator_xpath(locator))
+        except etree.XPathError:
+            return []
+
+    def find(self, element_key: str):
+        nodes = self.find_all(element_key)
+        return nodes[0] if nodes else None
+
+    def find_any(self, element_keys: List[str]) -> Tuple[Optional[str], object]:
+        """First key (in order) that matches, like ElementFinder.try_find_any_element."""
+        for key in element_keys:
+            node = self.find(key)
+            if node is not None:
+                return key, node
+        return None, None
+
+    @staticmethod
+    def bounds(node) -> Optional[tuple]:
+        return parse_bounds(node.get("bounds")) if node is not None else None
+
+    @staticmethod
+    def texts(node, class_name: str = TEXT_VIEW_CLASS) -> List[str]:
+        """``text`` of descendant nodes of ``class_name`` in document order."""
+        return [
+            n.get("text", "")
+            for n in node.iter()
+            if n is not node and (n.tag == class_name or n.get("class") == class_name)
+        ]
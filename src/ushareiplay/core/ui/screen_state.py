@@ -0,0 +1,238 @@
+"""
+ScreenTracker：基于单次 page_source 的界面状态识别与最短路径导航
+
+原先 QQ 音乐的各个流程靠「试探」确定当前所在页面：一串 wait_for_any_element（未命中各等 10 秒）
+外加预防性的 press_back。这里改为：
+
+- 声明式签名表（ScreenSignature）：一次 PageSnapshot 内按 all_of / any_of / none_of 匹配配置 key，
+  按表顺序取第一个命中的界面；
+- 转移图（Transition）：已知「在界面 A 执行动作 → 到达界面 B」，BFS 规划最短路径；
+  实际到达的界面会被记录下来，覆盖静态表中的预期（learned transitions）。
+
+猜对时流程零等待；无法识别或路径失败时返回 None，由调用方退回原有的试探逻辑。
+"""
+
+from __future__ import annotations
+
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from ushareiplay.core.ui.page_snapshot import PageSnapshot
+
+
+BACK = "back"
+CLICK_PREFIX = "click:"
+
+
+@dataclass(frozen=True)
+class ScreenSignature:
+    """A screen is recognised when all ``all_of`` keys, at least one ``any_of`` key and no ``none_of`` key are present."""
+
+    name: str
+    all_of: Tuple[str, ...] = ()
+    any_of: Tuple[str, ...] = ()
+    none_of: Tuple[str, ...] = ()
+
+    def matches(self, snapshot: PageSnapshot) -> bool:
+        def present(key: str) -> bool:
+            return snapshot.find(key) is not None
+
+        if not all(present(key) for key in self.all_of):
+            return False
+        if self.any_of and not any(present(key) for key in self.any_of):
+            return False
+        return not any(present(key) for key in self.none_of)
+
+
+@dataclass(frozen=True)
+class Transition:
+    """Performing ``action`` (``back`` or ``click:<element_key>``) on ``source`` is expected to reach ``target``."""
+
+    source: str
+    target: str
+    action: str
+
+
+@dataclass
+class Arrival:
+    """Result of a successful :meth:`ScreenTracker.navigate`."""
+
+    origin: str
+    snapshot: PageSnapshot
+    path: List[str] = field(default_factory=list)
+
+
+# 顺序即优先级：越具体的界面越靠前（播放页/弹层叠在其他页面之上）
+QQ_MUSIC_SCREENS: Tuple[ScreenSignature, ...] = (
+    ScreenSignature(
+        "playlist_panel",
+        any_of=(
+            "playlist_header",
+            "play_mode_list_in_playlist",
+            "play_mode_single_in_playlist",
+            "play_mode_random_in_playlist",
+        ),
+    ),
+    ScreenSignature("player", all_of=("minimize_screen",), any_of=("playing_record", "play_next")),
+    ScreenSignature("favorites", any_of=("favourite_search", "filter_favourite")),
+    ScreenSignature(
+        "results",
+        all_of=("search_box",),
+        any_of=("song_tab", "singer_tab", "playlist_tab", "album_tab", "lyrics_tab", "list_title"),
+    ),
+    ScreenSignature("search", all_of=("search_box",)),
+    ScreenSignature("mine", all_of=("home_nav", "fav_entry"), none_of=("go_back", "minimize_screen")),
+    ScreenSignature("home", all_of=("home_nav",), none_of=("go_back", "minimize_screen")),
+)
+
+QQ_MUSIC_TRANSITIONS: Tuple[Transition, ...] = (
+    Transition("home", "search", f"{CLICK_PREFIX}search_entry"),
+    Transition("home", "playlist_panel", f"{CLICK_PREFIX}playlist_entry"),
+    Transition("home", "mine", f"{CLICK_PREFIX}my_nav"),
+    Transition("mine", "favorites", f"{CLICK_PREFIX}fav_entry"),
+    Transition("mine", "home", f"{CLICK_PREFIX}home_nav"),
+    Transition("mine", "playlist_panel", f"{CLICK_PREFIX}playlist_entry"),
+    Transition("player", "playlist_panel", f"{CLICK_PREFIX}playlist_entry"),
+    Transition("player", "home", f"{CLICK_PREFIX}minimize_screen"),
+    Transition("results", "search", f"{CLICK_PREFIX}clear_search"),
+    Transition("results", "home", BACK),
+    Transition("search", "home", BACK),
+    Transition("playlist_panel", "home", BACK),
+    Transition("favorites", "mine", f"{CLICK_PREFIX}go_back"),
+)
+
+
+class ScreenTracker:
+    """Classifies the owner's current screen from one snapshot and walks the transition graph."""
+
+    def __init__(
+        self,
+        owner,
+        signatures: Sequence[ScreenSignature] = QQ_MUSIC_SCREENS,
+        transitions: Sequence[Transition] = QQ_MUSIC_TRANSITIONS,
+        *,
+        settle_timeout: float = 2.0,
+        poll_interval: float = 0.2,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.owner = owner
+        self.signatures = tuple(signatures)
+        self.transitions = tuple(transitions)
+        self.settle_timeout = settle_timeout
+        self.poll_interval = poll_interval
+        self._clock = clock
+        self._sleep = sleep
+        self._learned: Dict[Tuple[str, str], str] = {}
+        self.state: Optional[str] = None
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def logger(self):
+        return self.owner.logger
+
+    def classify(self, snapshot: Optional[PageSnapshot]) -> Optional[str]:
+        if snapshot is None:
+            return None
+        for signature in self.signatures:
+            if signature.matches(snapshot):
+                return signature.name
+        return None
+
+    def observe(self) -> Tuple[Optional[str], Optional[PageSnapshot]]:
+        """One page_source round trip → (screen name or None, snapshot)."""
+        snapshot = self.owner.page_snapshot()
+        self.state = self.classify(snapshot)
+        return self.state, snapshot
+
+    def _edges(self, source: str) -> List[Transition]:
+        edges = []
+        for transition in self.transitions:
+            if transition.source != source:
+                continue
+            target = self._learned.get((source, transition.action), transition.target)
+            edges.append(Transition(source, target, transition.action))
+        return edges
+
+    def plan(self, source: str, target: str) -> Optional[List[Transition]]:
+        """Shortest known action sequence from ``source`` to ``target`` (BFS); None when unreachable."""
+        if source == target:
+            return []
+        previous: Dict[str, Transition] = {}
+        queue = deque([source])
+        seen = {source}
+        while queue:
+            current = queue.popleft()
+            for edge in self._edges(current):
+                if edge.target in seen:
+                    continue
+                previous[edge.target] = edge
+                if edge.target == target:
+                    path = [edge]
+                    while path[0].source != source:
+                        path.insert(0, previous[path[0].source])
+                    return path
+                seen.add(edge.target)
+                queue.append(edge.target)
+        return None
+
+    def _perform(self, transition: Transition, snapshot: PageSnapshot) -> bool:
+        if transition.action == BACK:
+            return bool(self.owner.key_actions.press_back())
+        if not transition.action.startswith(CLICK_PREFIX):
+            return False
+        bounds = PageSnapshot.bounds(snapshot.find(transition.action[len(CLICK_PREFIX):]))
+        if not bounds:
+            return False
+        x1, y1, x2, y2 = bounds
+        return bool(self.owner.gesture_handler.click_at((x1 + x2) // 2, (y1 + y2) // 2))
+
+    def _settle(self, source: str) -> Tuple[Optional[str], Optional[PageSnapshot]]:
+        """Poll until the screen is recognised as something other than ``source`` (or time runs out)."""
+        deadline = self._clock() + self.settle_timeout
+        while True:
+            state, snapshot = self.observe()
+            if (state is not None and state != source) or self._clock() >= deadline:
+                return state, snapshot
+            self._sleep(self.poll_interval)
+
+    def navigate(self, target: str, max_steps: int = 6) -> Optional[Arrival]:
+        """
+        从当前界面沿已知转移走到 ``target``，每步只取一次（或少量轮询）page_source。
+        无法识别当前界面、没有已知路径或某步未生效时返回 None。
+        """
+        state, snapshot = self.observe()
+        if state is None:
+            self.misses += 1
+            self.logger.debug(f"ScreenTracker: unrecognised screen, target={target}")
+            return None
+        arrival = Arrival(origin=state, snapshot=snapshot, path=[state])
+        for _ in range(max_steps + 1):
+            if state == target:
+                self.hits += 1
+                arrival.snapshot = snapshot
+                return arrival
+            path = self.plan(state, target)
+            if not path:
+                break
+            step = path[0]
+            if not self._perform(step, snapshot):
+                self.logger.debug(f"ScreenTracker: action {step.action} failed on {state}")
+                break
+            reached, snapshot = self._settle(state)
+            if reached is None or reached == state:
+                self.logger.debug(f"ScreenTracker: {step.action} on {state} did not change screen")
+                break
+            if reached != step.target:
+                self.logger.info(f"ScreenTracker: {step.action} on {state} reached {reached}, expected {step.target}")
+            self._learned[(state, step.action)] = reached
+            state = reached
+            arrival.path.append(state)
+        self.misses += 1
+        return None
+
+    def stats(self) -> dict:
+        return {"state": self.state, "hits": self.hits, "misses": self.misses, "learned": len(self._learned)}
@@ -0,0 +1,203 @@
+"""
+文本输入后端（TextInput）
+
+聊天发送与 QQ 音乐搜索原先分别用 element.send_keys 与「剪贴板 + 粘贴键」输入文字：
+前者每次都要经由元素往返，后者两次往返且会与用户剪贴板互相覆盖。这里抽象出可插拔的输入后端：
+
+- ``adb_keyboard``：ADB Keyboard 输入法广播（``am broadcast -a ADB_INPUT_B64``），一次 shell 往返；
+- ``mobile_type``：UiAutomator2 的 ``mobile: type``，向当前焦点输入，一次往返；
+- ``send_keys``：元素 send_keys（需要目标元素）；
+- ``clipboard``：剪贴板 + KEYCODE_PASTE，两次往返（兜底）。
+
+启动时自检（self_test）按「往返次数、探测耗时」选出最快的可用后端；输入失败时自动降级到下一个可用后端。
+``adb_keyboard`` / ``mobile_type`` 只输入到当前焦点、不认目标元素：给了目标元素时先用 ``send_keys``，
+焦点类后端只作兜底，并在输入后读回元素文本核对，不一致视为失败、清空后换下一个后端。
+"""
+
+from __future__ import annotations
+
+import base64
+import time
+from typing import Callable, Dict, List, Optional
+
+
+ADB_KEYBOARD_IME = "com.android.adbkeyboard/.AdbIME"
+KEYCODE_PASTE = 279
+AUTO = "auto"
+
+
+class TextInputBackend:
+    """One way of entering text into the focused field (or a given element)."""
+
+    name = ""
+    # 每次输入的 WebDriver 往返次数（自检排序的主键）
+    round_trips = 1
+    requires_element = False
+    # probe 是否真正访问设备；未访问的后端探测耗时无参考意义，同往返次数时排在实测后端之后
+    probes_device = False
+
+    def probe(self, driver) -> bool:
+        """Cheap availability check run once by the startup self-test."""
+        return True
+
+    def type_text(self, driver, text: str, element=None) -> None:
+        raise NotImplementedError
+
+
+class ClipboardBackend(TextInputBackend):
+    name = "clipboard"
+    round_trips = 2
+
+    def type_text(self, driver, text: str, element=None) -> None:
+        driver.set_clipboard_text(text)
+        driver.press_keycode(KEYCODE_PASTE)
+
+
+class SendKeysBackend(TextInputBackend):
+    name = "send_keys"
+    requires_element = True
+
+    def type_text(self, driver, text: str, element=None) -> None:
+        element.send_keys(text)
+
+
+class MobileTypeBackend(TextInputBackend):
+    name = "mobile_type"
+    probes_device = True
+
+    def probe(self, driver) -> bool:
+        try:
+            driver.execute_script("mobile: type", {"text": ""})
+        except Exception as e:
+            # 未实现该命令的驱动版本才视为不可用；无焦点等错误说明命令存在
+            message = str(e).lower()
+            return "unknown mobile command" not in message and "not supported" not in message
+        return True
+
+    def type_text(self, driver, text: str, element=None) -> None:
+        driver.execute_script("mobile: type", {"text": text})
+
+
+class AdbKeyboardBackend(TextInputBackend):
+    name = "adb_keyboard"
+    probes_device = True
+
+    def probe(self, driver) -> bool:
+        output = driver.execute_script(
+            "mobile: shell", {"command": "settings get secure default_input_method"}
+        )
+        return isinstance(output, str) and ADB_KEYBOARD_IME in output
+
+    def type_text(self, driver, text: str, element=None) -> None:
+        encoded = base64.b64encode(text.encode("utf-8")).decode("ascii")
+        driver.execute_script(
+            "mobile: shell", {"command": f"am broadcast -a ADB_INPUT_B64 --es msg {encoded}"}
+        )
+
+
+def _entered(actual: Optional[str], text: str) -> bool:
+    return " ".join(text.split()) in " ".join((actual or "").split())
+
+
+BACKENDS: Dict[str, Callable[[], TextInputBackend]] = {
+    AdbKeyboardBackend.name: AdbKeyboardBackend,
+    MobileTypeBackend.name: MobileTypeBackend,
+    SendKeysBackend.name: SendKeysBackend,
+    ClipboardBackend.name: ClipboardBackend,
+}
+
+
+class TextInput:
+    """Selects and drives the fastest working text-input backend for the device."""
+
+    def __init__(self, *, config: Optional[dict] = None, obs=None, clock: Callable[[], float] = time.perf_counter):
+        cfg = (config or {}).get("text_input", {}) or {}
+        self.preferred = str(cfg.get("backend", AUTO))
+        candidates = cfg.get("candidates") or list(BACKENDS)
+        self.candidates: List[TextInputBackend] = [BACKENDS[name]() for name in candidates if name in BACKENDS]
+        self.obs = obs
+        self._clock = clock
+        # 自检前为空：保持原有行为（有元素用 send_keys，否则剪贴板）
+        self.available: List[TextInputBackend] = []
+        self.probes: Dict[str, Optional[float]] = {}
+
+    @property
+    def backend(self) -> Optional[TextInputBackend]:
+        return self.available[0] if self.available else None
+
+    def self_test(self, driver) -> Optional[str]:
+        """Probe every candidate once and order the available ones fastest first; returns the chosen name."""
+        if self.preferred != AUTO:
+            chosen = [b for b in self.candidates if b.name == self.preferred]
+            fallback = [b for b in self.candidates if b.name == ClipboardBackend.name and b.name != self.preferred]
+            self.available = chosen + fallback
+            self._emit("text_input.selected", backend=self.preferred, probes={}, forced=True)
+            return self.backend.name if self.backend else None
+
+        timings: Dict[str, float] = {}
+        for backend in self.candidates:
+            started = self._clock()
+            try:
+                ok = backend.probe(driver)
+            except Exception:
+                ok = False
+            elapsed_ms = round((self._clock() - started) * 1000.0, 2)
+            self.probes[backend.name] = elapsed_ms if ok else None
+            if ok:
+                timings[backend.name] = elapsed_ms
+        self.available = sorted(
+            (b for b in self.candidates if b.name in timings),
+            key=lambda b: (b.round_trips, not b.probes_device, timings[b.name]),
+        )
+        self._emit(
+            "text_input.selected",
+            backend=self.backend.name if self.backend else None,
+            probes=self.probes,
+            forced=False,
+        )
+        return self.backend.name if self.backend else None
+
+    def _ordered(self, element) -> List[TextInputBackend]:
+        focused = [b for b in self.available if not b.requires_element]
+        if element is None:
+            return focused or [ClipboardBackend()]
+        send_keys = next((b for b in self.available if b.requires_element), None) or SendKeysBackend()
+        return [send_keys] + focused
+
+    def type_text(self, driver, text: str, element=None, verify: Optional[Callable[[], str]] = None) -> str:
+        """Enter ``text``; falls through to the next available backend on failure. Returns the backend used.
+
+        ``verify`` reads back the field; it defaults to ``element.text`` and is checked after focus-based backends.
+        """
+        if verify is None and element is not None:
+            verify = lambda: element.text
+        last_error: Optional[Exception] = None
+        for backend in self._ordered(element):
+            try:
+                backend.type_text(driver, text, element)
+                if verify is not None and not backend.requires_element and not _entered(verify(), text):
+                    raise RuntimeError("typed text not found in the target field")
+                return backend.name
+            except Exception as e:
+                last_error = e
+                if element is not None:
+                    try:
+                        element.clear()
+                    except Exception:
+                        pass
+                if backend in self.available and len(self.available) > 1:
+                    # 失败的后端降到末尾，后续输入不再优先尝试
+                    self.available.remove(backend)
+                    self.available.append(backend)
+                self._emit("text_input.fallback", level="WARNING", backend=backend.name, error=str(e))
+        if last_error is not None:
+            raise last_error
+        raise RuntimeError("No text input backend available")
+
+    def _emit(self, event: str, level: str = "INFO", **ctx) -> None:
+        if self.obs is None:
+            return
+        try:
+            self.obs.emit(event, level=level, ctx=ctx)
+        except Exception:
+            pass
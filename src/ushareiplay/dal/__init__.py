@@ -1,5 +1,7 @@
 from ushareiplay.dal.user_dao import UserDAO
 from ushareiplay.dal.seat_reservation_dao import SeatReservationDAO
 from ushareiplay.dal.keyword_dao import KeywordDAO
+from ushareiplay.dal.lyrics_dao import LyricsDAO
+from ushareiplay.dal.play_history_dao import PlayHistoryDAO
 
-__all__ = ['UserDAO', 'SeatReservationDAO', 'KeywordDAO'] 
\ No newline at end of file
+__all__ = ['UserDAO', 'SeatReservationDAO', 'KeywordDAO', 'LyricsDAO', 'PlayHistoryDAO'] 
\ No newline at end of file
@@ -0,0 +1,88 @@
+from datetime import datetime
+from typing import Iterable, List, Optional
+
+from tortoise import connections
+
+from ushareiplay.models.chat_message import ChatMessage
+
+
+# trigram 索引只能匹配 3 个字符及以上的词；更短的词退回对时间/昵称过滤后的行做子串匹配
+FTS_MIN_TERM_CHARS = 3
+
+
+def _fts_phrase(term: str) -> str:
+    return '"' + term.replace('"', '""') + '"'
+
+
+class ChatMessageDAO:
+    @staticmethod
+    async def bulk_insert(records: Iterable[dict]) -> int:
+        """Insert buffered chat lines in one statement; returns the number written"""
+        entries = [ChatMessage(**record) for record in records]
+        if entries:
+            await ChatMessage.bulk_create(entries)
+        return len(entries)
+
+    @staticmethod
+    async def fts_available() -> bool:
+        """Whether the chat_messages_fts index exists (SQLite built with FTS5 trigram)"""
+        rows = await connections.get("default").execute_query_dict(
+            "SELECT name FROM sqlite_master WHERE type='table' AND name='chat_messages_fts'"
+        )
+        return bool(rows)
+
+    @staticmethod
+    async def search(
+        text: Optional[str] = None,
+        nickname: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        limit: int = 50,
+    ) -> List[ChatMessage]:
+        """Chat lines matching every given filter (text is a case-insensitive substring), newest first"""
+        joins, where, params = "", [], []
+        text = (text or "").strip()
+        if text:
+            if len(text) >= FTS_MIN_TERM_CHARS and await ChatMessageDAO.fts_available():
+                joins = "JOIN chat_messages_fts ON chat_messages_fts.rowid = m.id"
+                where.append("chat_messages_fts MATCH ?")
+                params.append(_fts_phrase(text))
+            else:
+                where.append("instr(lower(m.text), lower(?)) > 0")
+                params.append(text)
+        if nickname:
+            where.append("m.nickname = ?")
+            params.append(nickname)
+        # created_at 以 'YYYY-MM-DD HH:MM:SS[.ffffff]' 文本存储，按字典序比较即按时间比较
+        if since is not None:
+            where.append("m.created_at >= ?")
+            params.append(str(since))
+        if until is not None:
+            where.append("m.created_at < ?")
+            params.append(str(until))
+        sql = f"SELECT m.id FROM chat_messages m {joins}"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY m.created_at DESC, m.id DESC LIMIT ?"
+        params.append(max(1, int(limit)))
+
+        rows = await connections.get("default").execute_query_dict(sql, params)
+        ids = [row["id"] for row in rows]
+        if not ids:
+            return []
+        return await ChatMessage.filter(id__in=ids).order_by("-created_at", "-id")
+
+    @staticmethod
+    async def delete_before(cutoff: datetime) -> int:
+        """Drop chat lines older than ``cutoff`` (the FTS index follows via trigger); returns the number deleted"""
+        expired = ChatMessage.filter(created_at__lt=cutoff)
+        # 受影响行数含 FTS 触发器写入的影子表行，先数再删
+        count = await expired.count()
+        if count:
+            await expired.delete()
+        return count
+
+    @staticmethod
+    async def count() -> int:
+        """Number of archived chat lines"""
+        return await ChatMessage.all().count()
@@ -0,0 +1,38 @@
+import json
+from typing import List, Optional
+
+from ushareiplay.models.lyrics_entry import LyricsEntry
+
+
+class LyricsDAO:
+    @staticmethod
+    async def get_by_key(song_key: str) -> Optional[LyricsEntry]:
+        """Get cached lyrics by normalized song key"""
+        return await LyricsEntry.get_or_none(song_key=song_key)
+
+    @staticmethod
+    async def upsert(song_key: str, *, song: str, singer: str, raw_lines: List[str],
+                     text_length: int, line_max_width: int,
+                     wrapped_lines: List[str], groups: List[str]) -> LyricsEntry:
+        """Create or replace the cached lyrics for a song key"""
+        values = {
+            "song": song,
+            "singer": singer,
+            "raw_lines": json.dumps(raw_lines, ensure_ascii=False),
+            "text_length": text_length,
+            "line_max_width": line_max_width,
+            "wrapped_lines": json.dumps(wrapped_lines, ensure_ascii=False),
+            "groups": json.dumps(groups, ensure_ascii=False),
+        }
+        entry, _ = await LyricsEntry.update_or_create(defaults=values, song_key=song_key)
+        return entry
+
+    @staticmethod
+    async def delete_by_key(song_key: str) -> bool:
+        """Delete cached lyrics by song key"""
+        return await LyricsEntry.filter(song_key=song_key).delete() > 0
+
+    @staticmethod
+    async def count() -> int:
+        """Number of cached lyrics entries"""
+        return await LyricsEntry.all().count()
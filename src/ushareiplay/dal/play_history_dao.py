@@ -0,0 +1,29 @@
+from datetime import datetime
+from typing import Iterable, List
+
+from ushareiplay.models.play_history import PlayHistoryEntry
+
+
+class PlayHistoryDAO:
+    @staticmethod
+    async def bulk_insert(records: Iterable[dict]) -> int:
+        """Insert buffered play records in one statement; returns the number written"""
+        entries = [PlayHistoryEntry(**record) for record in records]
+        if entries:
+            await PlayHistoryEntry.bulk_create(entries)
+        return len(entries)
+
+    @staticmethod
+    async def recent(limit: int = 20) -> List[PlayHistoryEntry]:
+        """Most recent plays, newest first"""
+        return await PlayHistoryEntry.all().order_by("-played_at", "-id").limit(limit)
+
+    @staticmethod
+    async def played_since(since: datetime) -> List[PlayHistoryEntry]:
+        """Plays detected at or after ``since``, newest first"""
+        return await PlayHistoryEntry.filter(played_at__gte=since).order_by("-played_at", "-id")
+
+    @staticmethod
+    async def count() -> int:
+        """Number of recorded plays"""
+        return await PlayHistoryEntry.all().count()
@@ -0,0 +1,31 @@
+from datetime import datetime
+from typing import Iterable, List
+
+from ushareiplay.models.private_message import PrivateMessage
+
+
+class PrivateMessageDAO:
+    @staticmethod
+    async def create(recipient: str, content: str) -> PrivateMessage:
+        """Persist a queued private reply"""
+        return await PrivateMessage.create(recipient=recipient, content=content)
+
+    @staticmethod
+    async def pending() -> List[PrivateMessage]:
+        """Undelivered replies in queue order"""
+        return await PrivateMessage.filter(status="pending").order_by("id")
+
+    @staticmethod
+    async def mark_sent(ids: Iterable[int]) -> int:
+        """Mark replies as delivered; returns the number updated"""
+        ids = list(ids)
+        if not ids:
+            return 0
+        return await PrivateMessage.filter(id__in=ids).update(status="sent", sent_at=datetime.now())
+
+    @staticmethod
+    async def record_attempt(message_id: int, attempts: int, failed: bool = False) -> int:
+        """Store the attempt count of an undelivered reply, giving up on it when ``failed``"""
+        return await PrivateMessage.filter(id=message_id).update(
+            attempts=attempts, status="failed" if failed else "pending"
+        )
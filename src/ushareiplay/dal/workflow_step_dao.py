@@ -0,0 +1,46 @@
+from datetime import datetime
+from typing import List, Optional
+
+from ushareiplay.models.workflow_step import WorkflowStep
+
+
+class WorkflowStepDAO:
+    @staticmethod
+    async def latest_run_key(workflow: str, party_id: Optional[str], since: datetime) -> Optional[str]:
+        """Key of the newest run of ``workflow`` for this party started at or after ``since``"""
+        row = await WorkflowStep.filter(
+            workflow=workflow, party_id=party_id, created_at__gte=since
+        ).order_by("-created_at", "-id").first()
+        return row.run_key if row else None
+
+    @staticmethod
+    async def get_run(run_key: str) -> List[WorkflowStep]:
+        """All persisted steps of one run"""
+        return await WorkflowStep.filter(run_key=run_key).order_by("id")
+
+    @staticmethod
+    async def save(
+        workflow: str,
+        run_key: str,
+        party_id: Optional[str],
+        step: str,
+        *,
+        command: str,
+        status: str,
+        attempts: int = 0,
+        error: Optional[str] = None,
+    ) -> WorkflowStep:
+        """Insert or update the state of one step"""
+        entry, _ = await WorkflowStep.update_or_create(
+            defaults={
+                "workflow": workflow,
+                "party_id": party_id,
+                "command": command,
+                "status": status,
+                "attempts": attempts,
+                "error": error,
+            },
+            run_key=run_key,
+            step=step,
+        )
+        return entry
@@ -11,6 +11,7 @@ import traceback
 
 from ushareiplay.core.base_event import BaseEvent
 from ushareiplay.core.chat_intake import QUEUE_COMMAND_PREFIX_CHARS, ChatIntakeKind, classify_chat_line
+from ushareiplay.managers.chat_archive import archive_chat
 from ushareiplay.managers.command_manager import CommandManager
 from ushareiplay.state.playback_broadcaster import PlaybackBroadcaster
 
@@ -133,6 +134,7 @@ class MessageContentEvent(BaseEvent):
             for content in message_manager.latest_chats:
 
                 result = classify_chat_line(content, room_owner=room_owner)
+                archive_chat(result)
 
                 is_return = result.kind == ChatIntakeKind.USER_RETURN
                 if is_return:
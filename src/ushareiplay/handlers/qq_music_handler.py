@@ -1,13 +1,18 @@
 import re
 import time
 import traceback
+from typing import Optional
 
 import langdetect
-from appium.webdriver.common.appiumby import AppiumBy
-from selenium.common import StaleElementReferenceException
 
 from ushareiplay.core.app_handler import AppHandler
+from ushareiplay.core.command_cache import PLAYLIST_CHANGED, invalidate_command_cache
+from ushareiplay.core.command_supervisor import bound_timeout, checkpoint
+from ushareiplay.core.driver_decorator import with_driver_recovery
 from ushareiplay.core.singleton import Singleton
+from ushareiplay.core.ui.page_snapshot import PageSnapshot
+from ushareiplay.core.ui.screen_state import ScreenTracker
+from ushareiplay.helpers.search_results import low_quality_reason, parse_song_results, select_best
 
 
 # 在导入后设置种子
@@ -21,6 +26,9 @@ class QQMusicHandler(AppHandler, Singleton):
         self.no_skip = 0
         self.list_mode = 'unknown'
         self.play_mode_key = 'unknown'
+        self.screen_tracker = ScreenTracker(self)
+        # 最近一次搜索选中的单曲候选（SearchCandidate），供 play / play_next 按 bounds 点击
+        self.selected_result = None
 
     @staticmethod
     def play_mode_key_to_name(key: str) -> str:
@@ -41,42 +49,73 @@ class QQMusicHandler(AppHandler, Singleton):
             self.logger.info(
                 f"play_mode_key updated: {self.play_mode_key} -> {new_key} (reason={reason})"
             )
+            # :info 输出播放模式
+            invalidate_command_cache(PLAYLIST_CHANGED)
         self.play_mode_key = new_key
 
     @staticmethod
     def _normalize_song_title(title: str) -> str:
         return re.sub(r"\s*-\s*$", "", (title or "").strip())
 
-    def _read_playlist_items(self, items):
-        playlist_info = []
-        song_titles = []
-        for item in items:
-            try:
-                elements = item.find_elements(AppiumBy.CLASS_NAME, 'android.widget.TextView')
-                if not elements:
-                    continue
+    _PLAYLIST_PLAY_MODE_KEYS = {
+        'play_mode_list_in_playlist': 'list',
+        'play_mode_single_in_playlist': 'single',
+        'play_mode_random_in_playlist': 'random',
+    }
+
+    def _format_playlist_entry(self, song_text: str, singer_text: str) -> str:
+        song_title = self._normalize_song_title(song_text)
+        if singer_text:
+            # 首行可能自带末尾「 - 」；第二行常为「 - 歌手」，去重后再拼成「歌名 - 歌手」
+            singer_clean = re.sub(r"^\s*-\s*", "", singer_text.strip())
+            return f"{song_title} - {singer_clean}" if singer_clean else song_title
+        return song_text
+
+    def _parse_playlist(self, snapshot: PageSnapshot) -> dict:
+        """
+        从一次 page_source 解析播放列表面板：歌名/歌手、当前播放行、播放模式。
 
-                song = elements[0]
-                if not song:
-                    self.logger.info("Failed to find song in playlist")
-                    continue
-                if len(elements) < 2:
-                    self.logger.info("Failed to find singer in playlist")
-                    continue
-                singer = elements[1]
-                song_title = self._normalize_song_title(song.text)
-                song_titles.append(song_title)
-                if singer and singer.text:
-                    # 首行可能自带末尾「 - 」；第二行常为「 - 歌手」，去重后再拼成「歌名 - 歌手」
-                    singer_clean = re.sub(r"^\s*-\s*", "", (singer.text or "").strip())
-                    info = f"{song_title} - {singer_clean}" if singer_clean else song_title
-                else:
-                    info = song.text
-                playlist_info.append(info)
-            except StaleElementReferenceException:
-                self.logger.warning(f"Error getting song/singer text, {len(items)} ")
+        Returns:
+            dict: items（每项含 info / bounds）、current_bounds、play_mode
+        """
+        marker_nodes = snapshot.find_all('playlist_current')
+        items = []
+        for node in snapshot.find_all('playlist_item_container'):
+            texts = snapshot.texts(node)
+            if not texts:
                 continue
-        return playlist_info, song_titles
+            if len(texts) < 2:
+                self.logger.info("Failed to find singer in playlist")
+                continue
+            items.append({
+                'info': self._format_playlist_entry(texts[0], texts[1]),
+                'bounds': snapshot.bounds(node),
+            })
+
+        mode_key, _ = snapshot.find_any(list(self._PLAYLIST_PLAY_MODE_KEYS))
+        return {
+            'items': items,
+            'current_bounds': snapshot.bounds(marker_nodes[0]) if marker_nodes else None,
+            'play_mode': self._PLAYLIST_PLAY_MODE_KEYS.get(mode_key),
+        }
+
+    @with_driver_recovery(op="read")
+    def page_snapshot(self) -> Optional[PageSnapshot]:
+        return PageSnapshot.parse(self.driver.page_source, self.config.get('elements'))
+
+    def _capture_playlist(
+            self, timeout: float = 2.0, interval: float = 0.2, snapshot: Optional[PageSnapshot] = None
+    ) -> Optional[dict]:
+        """轮询 page_source 直到播放列表面板渲染出条目（或超时），每轮仅一次往返；可复用已取得的首帧。"""
+        deadline = time.time() + bound_timeout(timeout)
+        while True:
+            checkpoint()
+            snapshot = snapshot or self.page_snapshot()
+            playlist = self._parse_playlist(snapshot) if snapshot is not None else None
+            if (playlist and playlist['items']) or time.time() >= deadline:
+                return playlist
+            snapshot = None
+            time.sleep(interval)
 
     def open_favorites_entry(self, timeout: int = 10):
         """
@@ -90,6 +129,10 @@ class QQMusicHandler(AppHandler, Singleton):
             dict: 失败时返回 {'error': str}
         """
         try:
+            if self.screen_tracker.navigate('favorites') is not None:
+                self.logger.info("open_favorites_entry: reached favorites via screen tracker")
+                return None
+
             ok = self.navigate_to_home()
             if not ok:
                 return {'error': 'Cannot navigate to QQ Music home page'}
@@ -191,6 +234,10 @@ class QQMusicHandler(AppHandler, Singleton):
 
     def navigate_to_home(self):
         """Navigate back to home page"""
+        if self.screen_tracker.navigate('home') is not None:
+            self.logger.info("Back to home page")
+            return True
+
         # Keep clicking back until no more back buttons found
         n = 0
         self.key_actions.press_back()
@@ -268,21 +315,31 @@ class QQMusicHandler(AppHandler, Singleton):
             return None
         self.logger.info(f"Switched to QQ Music app")
 
-        key, element = self.navigator.navigate_to_element(
-            'search_box',
-            ['play_all', 'play_all_playlist', 'play_all_compact', 'fav_entry'],
-        )
-        if key == 'home_nav':
-            search_entry = self.element_finder.wait_for_element('search_entry')
-            if not search_entry:
-                self.logger.info(f"Search entry not found")
-                return None
-            search_entry.click()
-        elif key == 'search_box':
-            clear_search = self.element_finder.try_find_element('clear_search')
-            if clear_search:
-                clear_search.click()
+        arrival = self.screen_tracker.navigate('search')
+        if arrival is not None:
+            # 与试探路径的返回值保持一致：从首页进入搜索页为 home_nav，否则为 search_box
+            key = 'home_nav' if arrival.origin == 'home' else 'search_box'
+            clear_bounds = PageSnapshot.bounds(arrival.snapshot.find('clear_search'))
+            if clear_bounds:
+                x1, y1, x2, y2 = clear_bounds
+                self.gesture_handler.click_at((x1 + x2) // 2, (y1 + y2) // 2)
                 self.logger.info(f"Clear search")
+        else:
+            key, element = self.navigator.navigate_to_element(
+                'search_box',
+                ['play_all', 'play_all_playlist', 'play_all_compact', 'fav_entry'],
+            )
+            if key == 'home_nav':
+                search_entry = self.element_finder.wait_for_element('search_entry')
+                if not search_entry:
+                    self.logger.info(f"Search entry not found")
+                    return None
+                search_entry.click()
+            elif key == 'search_box':
+                clear_search = self.element_finder.try_find_element('clear_search')
+                if clear_search:
+                    clear_search.click()
+                    self.logger.info(f"Clear search")
 
         search_box = self.element_finder.wait_for_element_clickable('search_box')
         if search_box:
@@ -292,9 +349,7 @@ class QQMusicHandler(AppHandler, Singleton):
             self.logger.error(f"failed to find search box")
             return None
 
-        # Use clipboard operations from parent class
-        self.key_actions.set_clipboard_text(music_query)
-        self.key_actions.paste_text()
+        self.key_actions.type_text(music_query)
         return key
 
     def _prepare_music_playback(self, music_query):
@@ -345,7 +400,8 @@ class QQMusicHandler(AppHandler, Singleton):
                 self.logger.error(f"Failed to find first song")
                 return None
 
-        playing_info = self.get_playing_info()
+        candidate = self._select_search_result(music_query)
+        playing_info = candidate.as_playing_info() if candidate else self.get_playing_info()
         if not playing_info:
             self.logger.warning(f"No playing info found for query: {music_query}")
             playing_info = {
@@ -353,20 +409,34 @@ class QQMusicHandler(AppHandler, Singleton):
             }
             return playing_info
 
-        if self.list_mode == 'singer':
-            singer_text = (playing_info.get('singer') or "").strip()
-            artist_count = len([x.strip() for x in singer_text.split('/') if x.strip()]) if singer_text else 0
-            if (
-                    playing_info.get('song', '').endswith('(Live)')
-                    or (singer_text and singer_text == (playing_info.get('album') or '').strip())
-                    or artist_count >= 4
-            ):
-                # One-time allowlist for singer-mode low-quality filters (Live / suspicious / multi-artist).
-                # This preserves "play" as a temporary override without changing list_mode.
-                self.no_skip += 1
+        if self.list_mode == 'singer' and low_quality_reason(
+                playing_info.get('song', ''), playing_info.get('singer', ''), playing_info.get('album', ''), 'singer'
+        ) in ('live', 'suspicious', 'multi_artist'):
+            # One-time allowlist for singer-mode low-quality filters (Live / suspicious / multi-artist).
+            # This preserves "play" as a temporary override without changing list_mode.
+            self.no_skip += 1
         self.logger.info(f"Found playing info: {playing_info}")
         return playing_info
 
+    def _select_search_result(self, music_query):
+        """Parse all song rows from one snapshot and keep the best-scoring candidate."""
+        self.selected_result = None
+        candidates = parse_song_results(self.page_snapshot())
+        best = select_best(candidates, music_query, self.list_mode)
+        if best is not None:
+            self.selected_result = best
+            self.logger.info(f"Selected search result #{best.index + 1}/{len(candidates)}: {best.song} - {best.singer}")
+        return best
+
+    def tap_selected_result(self, queue: bool = False) -> bool:
+        """Tap the selected candidate's row (or its add-to-queue button) by bounds; False when unavailable."""
+        candidate = self.selected_result
+        bounds = (candidate.queue_bounds if queue else candidate.bounds) if candidate else None
+        if not bounds:
+            return False
+        x1, y1, x2, y2 = bounds
+        return bool(self.gesture_handler.click_at((x1 + x2) // 2, (y1 + y2) // 2))
+
     def select_song_tab(self):
         """Select the 'Songs' tab in search results"""
         try:
@@ -415,9 +485,12 @@ class QQMusicHandler(AppHandler, Singleton):
                 return playing_info
 
             # Click next button
-            next_button = self.element_finder.wait_for_element_clickable('next_button')
-            next_button.click()
+            if not self.tap_selected_result(queue=True):
+                next_button = self.element_finder.wait_for_element_clickable('next_button')
+                next_button.click()
             self.logger.info(f"Clicked next button")
+            # 歌曲已插入播放队列，:playlist / :info 的缓存结果过期
+            invalidate_command_cache(PLAYLIST_CHANGED)
 
             return playing_info
 
@@ -437,31 +510,23 @@ class QQMusicHandler(AppHandler, Singleton):
             self.logger.error("Cannot switch to QQ music")
             return {'error': 'Failed to switch to QQ Music app'}
 
-        # Try to find playlist entry in playing panel first
-        playlist_entry = self.element_finder.try_find_element('playlist_entry')
-        if not playlist_entry:
-            self.key_actions.press_back()
-
-        playlist_entry = self.element_finder.wait_for_element_clickable('playlist_entry')
-        if not playlist_entry:
-            return {'error': 'Failed to find play list entry'}
-        playlist_entry.click()
-
-        detected = None
-        detected_key, _ = self.element_finder.try_find_any_element(
-            [
-                'play_mode_list_in_playlist',
-                'play_mode_single_in_playlist',
-                'play_mode_random_in_playlist',
-            ]
-        )
-        if detected_key == 'play_mode_list_in_playlist':
-            detected = 'list'
-        elif detected_key == 'play_mode_single_in_playlist':
-            detected = 'single'
-        elif detected_key == 'play_mode_random_in_playlist':
-            detected = 'random'
+        arrival = self.screen_tracker.navigate('playlist_panel')
+        if arrival is None:
+            # Try to find playlist entry in playing panel first
+            playlist_entry = self.element_finder.try_find_element('playlist_entry')
+            if not playlist_entry:
+                self.key_actions.press_back()
+
+            playlist_entry = self.element_finder.wait_for_element_clickable('playlist_entry')
+            if not playlist_entry:
+                return {'error': 'Failed to find play list entry'}
+            playlist_entry.click()
+
+        playlist = self._capture_playlist(snapshot=arrival.snapshot if arrival else None)
+        if playlist is None:
+            return {'error': 'Failed to read playlist'}
 
+        detected = playlist['play_mode']
         if detected:
             if self.play_mode_key != detected:
                 self.logger.warning(
@@ -470,27 +535,23 @@ class QQMusicHandler(AppHandler, Singleton):
                 )
             self._update_play_mode_key(detected, reason='playlist_ui_self_heal')
 
-        items = self.element_finder.find_elements('playlist_item_container')
-        playlist_info, song_titles = self._read_playlist_items(items)
-
-        playlist_current = self.element_finder.try_find_element('playlist_current')
-        if playlist_current:
-            try:
-                playing_loc = playlist_current.location
-                playing_size = playlist_current.size
-                if len(items) > 0:
-                    playlist_first = items[0]
-                    start_x = playing_loc['x'] + playing_size['width'] // 2
-                    start_y = playing_loc['y'] + playing_size['height'] // 2
-                    end_y = playlist_first.location['y']
-                    if start_y - end_y > playlist_first.size['height']:
-                        self.gesture_handler.swipe(start_x, start_y, start_x, end_y, 1000)
-                        items = self.element_finder.find_elements('playlist_item_container')
-                        playlist_info, _ = self._read_playlist_items(items)
-                        self.logger.info(f"Scrolled playlist from y={start_y} to y={end_y}")
-
-            except StaleElementReferenceException:
-                self.logger.warning("Playing indicator invisible in playlist playing")
+        items = playlist['items']
+        playlist_info = [item['info'] for item in items]
+
+        # 当前播放行在首屏条目下方时，把它拖到列表顶部再读一次
+        current_bounds = playlist['current_bounds']
+        if current_bounds and items and items[0]['bounds']:
+            x1, y1, x2, y2 = current_bounds
+            first_top = items[0]['bounds'][1]
+            first_height = items[0]['bounds'][3] - first_top
+            start_x = x1 + (x2 - x1) // 2
+            start_y = y1 + (y2 - y1) // 2
+            if start_y - first_top > first_height:
+                self.gesture_handler.swipe(start_x, start_y, start_x, first_top, 1000)
+                scrolled = self._capture_playlist(timeout=0)
+                if scrolled and scrolled['items']:
+                    playlist_info = [item['info'] for item in scrolled['items']]
+                self.logger.info(f"Scrolled playlist from y={start_y} to y={first_top}")
 
         if not playlist_info:
             self.logger.warning("No songs found in playlist")
@@ -56,7 +56,14 @@ class SoulHandler(AppHandler, Singleton):
             }
 
         if len(message) > 0:
-            input_box.send_keys(message)
+            try:
+                entered = self.key_actions.type_text(message, input_box)
+            except Exception as e:
+                entered = False
+                self.logger.error(f"Failed to enter message: {e}")
+            if not entered:
+                # 没输进输入框就不点发送，避免发出空消息或残留内容
+                return {'error': 'Failed to enter message'}
             self.logger.info(f"Entered message: {message}")
 
             # click send button
@@ -0,0 +1,87 @@
+from typing import List
+
+
+def wrap_line_at_spaces(line: str, max_width: int) -> str:
+    """Insert newlines so each segment fits max_width, preferring breaks at whitespace.
+
+    English words stay intact when possible (break after last space before the limit).
+    When no space exists in the window (long word or unspaced CJK), breaks at max_width.
+    """
+    line = line.strip()
+    if not line or max_width <= 0:
+        return line
+    if len(line) <= max_width:
+        return line
+    out = []
+    remaining = line
+    while len(remaining) > max_width:
+        chunk = remaining[:max_width]
+        break_at = -1
+        for i in range(len(chunk) - 1, 0, -1):
+            if chunk[i].isspace():
+                break_at = i
+                break
+        if break_at > 0:
+            out.append(remaining[:break_at].rstrip())
+            remaining = remaining[break_at:].lstrip()
+        else:
+            out.append(remaining[:max_width])
+            remaining = remaining[max_width:].lstrip()
+    if remaining:
+        out.append(remaining)
+    return "\n".join(out)
+
+
+def split_lyrics_lines(lyrics_text: str) -> List[str]:
+    """Non-empty, stripped source lines of a lyrics text."""
+    return [line.strip() for line in lyrics_text.split('\n') if line.strip()]
+
+
+def wrap_lyrics_lines(lines: List[str], max_width: int) -> List[str]:
+    """Per source line: only split when longer than display width (prefer breaks at spaces)."""
+    wrapped_lines = []
+    for line in lines:
+        wrapped = wrap_line_at_spaces(line, max_width)
+        wrapped_lines.extend(seg for seg in wrapped.split("\n") if seg.strip())
+    return wrapped_lines
+
+
+def group_lyrics_lines(wrapped_lines: List[str], total_length: int, force_groups: int = 0) -> List[str]:
+    """Group wrapped lines into messages of balanced length (~500 chars each unless forced)."""
+    if not wrapped_lines:
+        return []
+
+    # Determine number of groups
+    if force_groups > 0:
+        num_groups = force_groups
+    else:
+        # Default to groups of roughly 500 characters
+        num_groups = (total_length + 499) // 500  # Ceiling division
+
+    # Calculate target size per group
+    target_group_size = total_length / num_groups if num_groups > 0 else 0
+
+    groups = []
+    current_group = []
+    current_length = 0
+
+    for line in wrapped_lines:
+        line_length = len(line) + 1  # +1 for newline
+        new_length = current_length + line_length
+
+        # Check if adding this line would make the group too far from target size
+        if (current_length > 0 and  # Don't check first line
+                abs(new_length - target_group_size) > abs(current_length - target_group_size) and
+                len(groups) < num_groups - 1):  # Don't create new group if we're on last group
+            groups.append('\n'.join(current_group))
+            current_group = [line]
+            current_length = len(line)
+        else:
+            current_group.append(line)
+            current_length = new_length
+
+    # Add the last group
+    if current_group:
+        groups.append('\n'.join(current_group))
+
+    return groups
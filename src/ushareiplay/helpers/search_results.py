@@ -0,0 +1,154 @@
+"""
+QQ 音乐搜索结果解析与打分
+
+原先点歌固定点第一条结果（result_item），读取歌名/歌手要多次 find_elements 与 .text 往返，
+DJ / Live / 多歌手过滤要等到开始播放后由 MusicManager 跳歌。这里：
+
+- 一次 PageSnapshot 解析出首屏全部单曲候选（歌名、歌手、专辑、行与「添加到播放队列」按钮的 bounds）；
+- 在内存中按「查询词匹配 + 低质量策略 + 原始排名」为每个候选打分，选出最佳一条；
+- 调用方按 bounds 点击，选择结果确定且可单元测试。
+
+歌手 / 专辑 / 歌单结果的定位规则只匹配到 TextView，没有行节点可取点击区域，仍按原流程点第一条。
+"""
+
+from __future__ import annotations
+
+import re
+import unicodedata
+from dataclasses import dataclass
+from typing import List, Optional, Sequence
+
+from ushareiplay.core.ui.page_snapshot import PageSnapshot
+
+
+QUEUE_BUTTON_DESC = "添加到播放队列"
+MULTI_ARTIST_THRESHOLD = 4
+
+# 打分权重：匹配度为主，低质量惩罚足以让同等匹配的正常版本胜出，原始排名只用于打破平局
+_MATCH_WEIGHT = 10.0
+_LOW_QUALITY_PENALTY = 6.0
+_RANK_WEIGHT = 0.1
+_TOKEN_RE = re.compile(r"[\w一-鿿]+", re.UNICODE)
+
+
+@dataclass(frozen=True)
+class SearchCandidate:
+    """One song row in the search results."""
+
+    index: int
+    song: str
+    singer: str
+    album: str
+    bounds: Optional[tuple]
+    queue_bounds: Optional[tuple] = None
+
+    def as_playing_info(self) -> dict:
+        return {"song": self.song, "singer": self.singer or "Unknown", "album": self.album or "Unknown"}
+
+
+def low_quality_reason(song: str, singer: str = "", album: str = "", list_mode: str = "") -> Optional[str]:
+    """Skip-policy classification shared with MusicManager: ``dj`` / ``multi_artist`` / ``live`` / ``suspicious`` or None."""
+    song = song or ""
+    if "DJ" in song or "Remix" in song:
+        return "dj"
+    if list_mode != "singer":
+        return None
+    singer_text = (singer or "").strip()
+    artists = [x.strip() for x in singer_text.split("/") if x.strip()]
+    if len(artists) >= MULTI_ARTIST_THRESHOLD:
+        return "multi_artist"
+    if song.endswith("(Live)"):
+        return "live"
+    if singer_text and singer_text == (album or "").strip():
+        return "suspicious"
+    return None
+
+
+def _split_singer_album(text: str) -> tuple:
+    parts = text.split("·")
+    singer = parts[0].strip()
+    album = parts[1].strip() if len(parts) > 1 else ""
+    return singer, album
+
+
+def parse_song_results(snapshot: Optional[PageSnapshot], item_key: str = "result_item") -> List[SearchCandidate]:
+    """All song rows visible in one snapshot, in on-screen order."""
+    if snapshot is None:
+        return []
+    candidates = []
+    for row in snapshot.find_all(item_key):
+        texts = [t.strip() for t in PageSnapshot.texts(row) if t and t.strip()]
+        if not texts:
+            continue
+        song = texts[0]
+        meta = next((t for t in texts[1:] if "·" in t), texts[1] if len(texts) > 1 else "")
+        singer, album = _split_singer_album(meta)
+        queue_node = next(
+            (n for n in row.iter() if n is not row and n.get("content-desc") == QUEUE_BUTTON_DESC),
+            None,
+        )
+        candidates.append(
+            SearchCandidate(
+                index=len(candidates),
+                song=song,
+                singer=singer,
+                album=album,
+                bounds=PageSnapshot.bounds(row),
+                queue_bounds=PageSnapshot.bounds(queue_node),
+            )
+        )
+    return candidates
+
+
+def _normalize(text: str) -> str:
+    return unicodedata.normalize("NFKC", text or "").casefold()
+
+
+def _tokens(text: str) -> List[str]:
+    return _TOKEN_RE.findall(_normalize(text))
+
+
+def match_score(candidate: SearchCandidate, query: str) -> float:
+    """Fraction of query tokens found in the candidate's song/singer/album (0..1); exact title adds a bonus."""
+    tokens = _tokens(query)
+    if not tokens:
+        return 0.0
+    haystack = _normalize(f"{candidate.song} {candidate.singer} {candidate.album}")
+    found = sum(1 for token in tokens if token in haystack)
+    score = found / len(tokens)
+    if _is_token_run(_tokens(candidate.song), tokens):
+        score += 0.5
+    return score
+
+
+def _is_token_run(title: List[str], tokens: List[str]) -> bool:
+    """Title tokens appear as a contiguous run of query tokens (``晴天`` in ``晴天 周杰伦``, not in ``晴天的雨``)."""
+    if not title:
+        return False
+    width = len(title)
+    return any(tokens[i:i + width] == title for i in range(len(tokens) - width + 1))
+
+
+def score_candidate(candidate: SearchCandidate, query: str, list_mode: str = "") -> float:
+    score = _MATCH_WEIGHT * match_score(candidate, query) - _RANK_WEIGHT * candidate.index
+    reason = low_quality_reason(candidate.song, candidate.singer, candidate.album, list_mode)
+    # 查询里明确要 Live / DJ / Remix 时不惩罚
+    if reason and not _requested(reason, query):
+        score -= _LOW_QUALITY_PENALTY
+    return score
+
+
+def _requested(reason: str, query: str) -> bool:
+    query = _normalize(query)
+    if reason == "live":
+        return "live" in query
+    if reason == "dj":
+        return "dj" in query or "remix" in query
+    return False
+
+
+def select_best(candidates: Sequence[SearchCandidate], query: str, list_mode: str = "") -> Optional[SearchCandidate]:
+    """Highest-scoring candidate; ties keep QQ Music's own order."""
+    if not candidates:
+        return None
+    return max(candidates, key=lambda c: (score_candidate(c, query, list_mode), -c.index))
@@ -1,9 +1,13 @@
 from __future__ import annotations
 
+import asyncio
 import datetime as dt
 import json
-from typing import Any
-from urllib import parse, request
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable
+
+import urllib3
 
 
 def parse_release_date(value: str | None) -> dt.date | None:
@@ -15,16 +19,123 @@ def parse_release_date(value: str | None) -> dt.date | None:
         return None
 
 
+def primary_topic(raw_topic: str | None) -> str | None:
+    """First ``-``-separated segment of a QQ Music recommendation topic (the song title)."""
+    if not raw_topic:
+        return None
+    parts = [segment.strip() for segment in raw_topic.split("-") if segment.strip()]
+    if not parts:
+        cleaned_topic = raw_topic.strip()
+        return cleaned_topic or None
+    return parts[0]
+
+
+class ReleaseLookupUnavailable(RuntimeError):
+    """Raised without touching the network while the circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker: after ``failure_threshold`` failures calls fail fast for
+    ``reset_timeout_s``, then a single probe decides whether to close again.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 3,
+        reset_timeout_s: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.reset_timeout_s = float(reset_timeout_s)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: float | None = None
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if self._probing or self._clock() - self._opened_at >= self.reset_timeout_s:
+                return "half_open"
+            return "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if self._probing or self._clock() - self._opened_at < self.reset_timeout_s:
+                return False
+            self._probing = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._probing or self._failures >= self.failure_threshold:
+                self._opened_at = self._clock()
+            self._probing = False
+
+
 class QQMusicSongReleaseLookup:
+    """
+    Release date of the top ``client_search_cp`` hit for a keyword.
+
+    Requests share one keep-alive connection pool; each has its own deadline, and a circuit breaker
+    turns an unreachable endpoint into immediate :class:`ReleaseLookupUnavailable` errors. The async
+    API runs lookups on worker threads, bounded by ``max_concurrency``.
+    """
+
     SEARCH_URL = "https://c.y.qq.com/soso/fcgi-bin/client_search_cp"
+    HEADERS = {
+        "User-Agent": "Mozilla/5.0",
+        "Referer": "https://y.qq.com/",
+    }
 
-    def __init__(self, timeout: int = 15):
-        self.timeout = timeout
+    def __init__(
+        self,
+        timeout: float = 15,
+        *,
+        search_url: str | None = None,
+        max_concurrency: int = 4,
+        failure_threshold: int = 3,
+        reset_timeout_s: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.timeout = float(timeout)
+        self.search_url = search_url or self.SEARCH_URL
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout_s, clock)
+        self._pool = urllib3.PoolManager(maxsize=self.max_concurrency, retries=False, headers=self.HEADERS)
+        self._semaphore: asyncio.Semaphore | None = None
+        self._semaphore_loop = None
 
-    def get_release_date(self, keyword: str) -> str | None:
+    @classmethod
+    def from_config(cls, config: dict | None) -> "QQMusicSongReleaseLookup":
+        cfg = (config or {}).get("song_release", {}) or {}
+        return cls(
+            timeout=float(cfg.get("timeout_s", 15)),
+            search_url=cfg.get("search_url") or None,
+            max_concurrency=int(cfg.get("max_concurrency", 4)),
+            failure_threshold=int(cfg.get("failure_threshold", 3)),
+            reset_timeout_s=float(cfg.get("reset_timeout_s", 60)),
+        )
+
+    def get_release_date(self, keyword: str, timeout: float | None = None) -> str | None:
         keyword = (keyword or "").strip()
         if not keyword:
             return None
+        if not self.breaker.allow():
+            raise ReleaseLookupUnavailable(f"release date endpoint unavailable, skipped lookup for {keyword}")
 
         params = {
             "p": 1,
@@ -32,20 +143,55 @@ class QQMusicSongReleaseLookup:
             "w": keyword,
             "format": "json",
         }
-        headers = {
-            "User-Agent": "Mozilla/5.0",
-            "Referer": "https://y.qq.com/",
-        }
-        url = f"{self.SEARCH_URL}?{parse.urlencode(params)}"
-        req = request.Request(url, headers=headers)
-        with request.urlopen(req, timeout=self.timeout) as response:
-            payload = json.loads(response.read().decode("utf-8"))
+        try:
+            response = self._pool.request(
+                "GET",
+                self.search_url,
+                fields=params,
+                timeout=urllib3.Timeout(total=self.timeout if timeout is None else timeout),
+            )
+            if response.status >= 400:
+                raise urllib3.exceptions.HTTPError(f"HTTP {response.status} from {self.search_url}")
+            payload = json.loads(response.data.decode("utf-8"))
+        except Exception:
+            self.breaker.record_failure()
+            raise
+        self.breaker.record_success()
 
         songs = payload.get("data", {}).get("song", {}).get("list", [])
         if not songs:
             return None
         return self._date_from_timestamp(songs[0].get("pubtime"))
 
+    def _loop_semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._semaphore_loop = loop
+        return self._semaphore
+
+    async def get_release_date_async(self, keyword: str, timeout: float | None = None) -> str | None:
+        """:meth:`get_release_date` on a worker thread, at most ``max_concurrency`` at a time."""
+        async with self._loop_semaphore():
+            return await asyncio.to_thread(self.get_release_date, keyword, timeout)
+
+    async def get_release_dates(
+        self, keywords: Iterable[str | None], timeout: float | None = None
+    ) -> Dict[str, str | None]:
+        """Resolve a whole playlist concurrently; failed or unknown lookups map to None."""
+        unique = list(dict.fromkeys((k or "").strip() for k in keywords if k and k.strip()))
+        results = await asyncio.gather(
+            *(self.get_release_date_async(keyword, timeout) for keyword in unique),
+            return_exceptions=True,
+        )
+        return {
+            keyword: None if isinstance(result, BaseException) else result
+            for keyword, result in zip(unique, results)
+        }
+
+    def close(self) -> None:
+        self._pool.clear()
+
     @staticmethod
     def _date_from_timestamp(value: Any) -> str | None:
         try:
@@ -0,0 +1,107 @@
+"""
+绝对音量控制（VolumeControl）
+
+原先 `:vol` 通过 `dumpsys audio`（输出数百 KB）读取 STREAM_MUSIC 音量，再逐次按音量键逼近目标，
+从 2 调到 15 需要 13 次按键加两次 dumpsys。这里改为：
+
+- 读取：`cmd media_session volume --stream 3 --get` 一次定向 shell 调用（旧系统回退到 `media volume`，
+  都不可用时才解析 dumpsys audio）；
+- 设置：`... --set <level>` 一次调用直接设置绝对音量；
+- 缓存最近一次已知音量，cache_ttl_s 内的查询与「已是目标音量」判断不再访问设备。
+"""
+
+from __future__ import annotations
+
+import re
+import time
+from typing import Callable, List, Optional
+
+
+STREAM_MUSIC = 3
+DEFAULT_CACHE_TTL_S = 30.0
+DEFAULT_MAX_LEVEL = 15
+VOLUME_TOOLS = ("cmd media_session volume", "media volume")
+_VOLUME_RE = re.compile(r"volume is (\d+)(?: in range \[(\d+)\.\.(\d+)\])?")
+_TOOL_ERROR_MARKERS = ("unknown command", "not found", "inaccessible", "usage:", "error")
+
+
+class VolumeControl:
+    """Reads and sets the music stream volume with single shell calls, caching the last known level."""
+
+    def __init__(self, execute_shell: Callable[[str], object], config: Optional[dict] = None, *, clock: Callable[[], float] = time.monotonic):
+        cfg = (config or {}).get("volume", {}) or {}
+        self._execute_shell = execute_shell
+        self.stream = int(cfg.get("stream", STREAM_MUSIC))
+        self.cache_ttl_s = float(cfg.get("cache_ttl_s", DEFAULT_CACHE_TTL_S))
+        self.max_level = int(cfg.get("max_level", DEFAULT_MAX_LEVEL))
+        self._clock = clock
+        # 首个可用的音量工具；None 表示尚未探测
+        self._tool: Optional[str] = None
+        self._level: Optional[int] = None
+        self._level_at = 0.0
+
+    def _tools(self) -> List[str]:
+        if self._tool:
+            return [self._tool]
+        return list(VOLUME_TOOLS)
+
+    def _shell(self, command: str) -> str:
+        output = self._execute_shell(command)
+        return output if isinstance(output, str) else ""
+
+    def _remember(self, level: int) -> int:
+        level = max(0, min(self.max_level, level))
+        self._level = level
+        self._level_at = self._clock()
+        return level
+
+    def cached_level(self) -> Optional[int]:
+        """Last known level while it is younger than ``cache_ttl_s``."""
+        if self._level is None or self._clock() - self._level_at > self.cache_ttl_s:
+            return None
+        return self._level
+
+    def invalidate(self) -> None:
+        self._level = None
+
+    def read_level(self) -> Optional[int]:
+        """Current stream index from one targeted shell call (dumpsys audio only as last resort)."""
+        for tool in self._tools():
+            output = self._shell(f"{tool} --stream {self.stream} --get")
+            match = _VOLUME_RE.search(output)
+            if match:
+                self._tool = tool
+                if match.group(3):
+                    self.max_level = int(match.group(3))
+                return self._remember(int(match.group(1)))
+        self._tool = None
+        level = parse_dumpsys_stream_volume(self._shell("dumpsys audio"))
+        return self._remember(level) if level is not None else None
+
+    def get_level(self) -> Optional[int]:
+        cached = self.cached_level()
+        return cached if cached is not None else self.read_level()
+
+    def set_level(self, level: int) -> bool:
+        """Set the absolute level in one shell call; False when no volume tool is usable."""
+        for tool in self._tools():
+            output = self._shell(f"{tool} --stream {self.stream} --set {level}").lower()
+            if any(marker in output for marker in _TOOL_ERROR_MARKERS):
+                continue
+            self._tool = tool
+            self._remember(level)
+            return True
+        self._tool = None
+        self.invalidate()
+        return False
+
+
+def parse_dumpsys_stream_volume(output: str, max_level: int = DEFAULT_MAX_LEVEL) -> Optional[int]:
+    """STREAM_MUSIC ``streamVolume`` from ``dumpsys audio`` output."""
+    parts = (output or "").split("- STREAM_MUSIC:")
+    if len(parts) < 2:
+        return None
+    match = re.search(r"streamVolume:(\d+)", parts[1])
+    if not match:
+        return None
+    return max(0, min(max_level, int(match.group(1))))
@@ -0,0 +1,143 @@
+"""
+聊天归档（ChatArchive）
+
+聊天记录此前只写 chat.log（纯文本 FileHandler），内存里只有 MessageManager.recent_chats 的最近 3 条；
+谁点过什么、重复刷屏、漏读补查都只能 grep 巨大的日志文件。本管理器把解析后的每条聊天归档到 SQLite：
+
+- MessageContentEvent / 漏读补查在分类后调用 :meth:`ChatArchive.record`（同步、无 I/O），进缓冲；
+- 主循环 maybe_flush 每 flush_interval_s 或满 batch_size 条时批量插入 chat_messages 表，
+  FTS5 外部内容索引（chat_messages_fts，trigram 分词）由触发器同步；写库失败的记录放回缓冲，下次重试；
+- 保留期按天分区：每 prune_interval_s 删除 retention_days 天之前整天的记录（0 表示不清理）；
+- :meth:`search` 按文本子串 / 昵称 / 时间范围查询，先把缓冲落盘，刚收到的消息也能查到。
+"""
+
+from __future__ import annotations
+
+import time
+import traceback
+from datetime import datetime, timedelta
+from typing import Callable, List, Optional
+
+from ushareiplay.core.singleton import Singleton
+from ushareiplay.dal.chat_message_dao import ChatMessageDAO
+
+
+DEFAULT_FLUSH_INTERVAL_S = 10.0
+DEFAULT_BATCH_SIZE = 100
+DEFAULT_RETENTION_DAYS = 30
+DEFAULT_PRUNE_INTERVAL_S = 3600.0
+DEFAULT_SEARCH_LIMIT = 50
+MAX_PENDING = 5000
+
+
+class ChatArchive(Singleton):
+    """Buffered chat archive in SQLite with full-text search and day-based retention."""
+
+    def __init__(
+        self,
+        config: Optional[dict] = None,
+        *,
+        clock: Callable[[], float] = time.monotonic,
+        now: Callable[[], datetime] = datetime.now,
+    ):
+        cfg = (config or {}).get("chat_archive", {}) or {}
+        self.enabled = bool(cfg.get("enabled", True))
+        self.flush_interval_s = float(cfg.get("flush_interval_s", DEFAULT_FLUSH_INTERVAL_S))
+        self.batch_size = max(1, int(cfg.get("batch_size", DEFAULT_BATCH_SIZE)))
+        self.retention_days = max(0, int(cfg.get("retention_days", DEFAULT_RETENTION_DAYS)))
+        self.prune_interval_s = float(cfg.get("prune_interval_s", DEFAULT_PRUNE_INTERVAL_S))
+        self.search_limit = max(1, int(cfg.get("search_limit", DEFAULT_SEARCH_LIMIT)))
+        self._clock = clock
+        self._now = now
+        self._pending: List[dict] = []
+        self._last_flush = clock()
+        self._last_prune: Optional[float] = None
+        self.written = 0
+        self.pruned = 0
+
+    @property
+    def logger(self):
+        from ushareiplay.handlers.soul_handler import SoulHandler
+
+        return SoulHandler.instance().logger
+
+    def record(self, result) -> bool:
+        """Buffer one classified chat line (a ChatIntakeResult; sync, no I/O)."""
+        if not self.enabled or result is None:
+            return False
+        text = result.text
+        if result.params:
+            text = f"{text} {result.params}"
+        text = (text or result.raw or "").strip()
+        if not text:
+            return False
+        self._pending.append(
+            {
+                "nickname": result.nickname or "",
+                "kind": result.kind.value,
+                "text": text,
+                "created_at": self._now(),
+            }
+        )
+        if len(self._pending) > MAX_PENDING:
+            del self._pending[: len(self._pending) - MAX_PENDING]
+        return True
+
+    async def maybe_flush(self, force: bool = False) -> int:
+        """Main-loop hook: batch-insert buffered lines when due, then prune expired days; returns the number written."""
+        if not self.enabled:
+            return 0
+        written = 0
+        due = len(self._pending) >= self.batch_size or self._clock() - self._last_flush >= self.flush_interval_s
+        if self._pending and (force or due):
+            batch, self._pending = self._pending, []
+            self._last_flush = self._clock()
+            try:
+                written = await ChatMessageDAO.bulk_insert(batch)
+            except Exception:
+                self.logger.warning(f"Failed to flush chat archive: {traceback.format_exc()}")
+                self._pending = batch + self._pending
+            self.written += written
+        await self._maybe_prune()
+        return written
+
+    async def _maybe_prune(self) -> None:
+        if not self.retention_days:
+            return
+        if self._last_prune is not None and self._clock() - self._last_prune < self.prune_interval_s:
+            return
+        self._last_prune = self._clock()
+        # 按整天清理：保留今天及之前 retention_days 天
+        today = self._now().replace(hour=0, minute=0, second=0, microsecond=0)
+        try:
+            self.pruned += await ChatMessageDAO.delete_before(today - timedelta(days=self.retention_days))
+        except Exception:
+            self.logger.warning(f"Failed to prune chat archive: {traceback.format_exc()}")
+
+    async def search(
+        self,
+        text: Optional[str] = None,
+        *,
+        nickname: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        limit: Optional[int] = None,
+    ):
+        """Archived chat lines matching all given filters, newest first (buffered lines are flushed first)."""
+        if self._pending:
+            await self.maybe_flush(force=True)
+        return await ChatMessageDAO.search(
+            text, nickname=nickname, since=since, until=until, limit=limit or self.search_limit
+        )
+
+    async def close(self) -> None:
+        await self.maybe_flush(force=True)
+
+    def status(self) -> dict:
+        return {"pending": len(self._pending), "written": self.written, "pruned": self.pruned}
+
+
+def archive_chat(result) -> None:
+    """Record a classified chat line when the archive is running (no-op otherwise)."""
+    if ChatArchive.is_initialized():
+        ChatArchive.instance().record(result)
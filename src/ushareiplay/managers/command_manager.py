@@ -1,7 +1,10 @@
 import asyncio
 import importlib
+import math
 import sys
+import time
 import traceback
+from contextlib import nullcontext
 from datetime import datetime
 from pathlib import Path
 
@@ -14,7 +17,15 @@ from ushareiplay.core.chat_intake import (
     is_silent_prefix,
     normalize_command_text,
 )
+from ushareiplay.core.command_pipeline import CommandPipeline
 from ushareiplay.core.command_silence import command_silence
+from ushareiplay.core.command_supervisor import CommandCancelled, CommandSupervisor
+from ushareiplay.core.control_server import (
+    DONE_EVENT as CONTROL_DONE_EVENT,
+    EXPANDED_EVENT as CONTROL_EXPANDED_EVENT,
+)
+from ushareiplay.core.metrics import COMMAND_LATENCY, COMMANDS
+from ushareiplay.core.observability import trace_context
 from ushareiplay.core.message_dispatch import MessageDispatch
 from ushareiplay.core.singleton import Singleton
 from ushareiplay.core.command_parser import CommandParser
@@ -168,12 +179,18 @@ class CommandManager(Singleton):
         except Exception:
             self.logger.error(f"Error loading commands: {traceback.format_exc()}")
 
+    def _span(self, phase: str):
+        """TickProfiler span for one command hook (no-op when runtime has no profiler)."""
+        span = getattr(self._runtime, "span", None)
+        return span(phase) if span is not None else nullcontext()
+
     def update_commands(self):
         """Update all loaded commands"""
-        for module in self.command_modules.values():
+        for name, module in self.command_modules.items():
             try:
                 if hasattr(module, 'command'):
-                    module.command.update()
+                    with self._span(f"command_update:{name}"):
+                        module.command.update()
             except Exception as e:
                 self.logger.error(f"Error updating command {module.__name__}: {str(e)}")
 
@@ -182,12 +199,13 @@ class CommandManager(Singleton):
         module = self.load_command_module(command_name)
         return module.command if module else None
 
-    async def process_command(self, command, message_info, command_info):
+    async def process_command(self, command, message_info, command_info, user=None):
         """Process command using module if available
         Args:
             command: Command instance
             message_info: MessageInfo object
             command_info: dict containing command details
+            user: requester already resolved by the intake pipeline (looked up when None)
         Returns:
             str: Response message
         """
@@ -210,13 +228,11 @@ class CommandManager(Singleton):
                 pass
             
             # 检查用户等级（系统用户不受限制）
-            system_users = self.handler.config.get('system_users', [])
-            is_system_user = message_info.nickname in system_users
-            
-            if not is_system_user:
+            if not self.is_system_user(message_info.nickname):
                 required_level = command_info.get('level', 1)
-                from ushareiplay.dal.user_dao import UserDAO
-                user = await UserDAO.get_or_create(message_info.nickname)
+                if user is None:
+                    from ushareiplay.dal.user_dao import UserDAO
+                    user = await UserDAO.get_or_create(message_info.nickname)
                 
                 if user.level < required_level:
                     result = {
@@ -226,6 +242,7 @@ class CommandManager(Singleton):
                     if parameters:
                         format_kwargs['party_id'] = parameters[0]
                     res = command_info['error_template'].format(**format_kwargs)
+                    COMMANDS.labels(command_info.get("prefix") or "unknown", "rejected").inc()
                     return res
 
                 # Sleep mode: non-system users may be blocked in sleep window
@@ -244,6 +261,7 @@ class CommandManager(Singleton):
                         format_kwargs = {"user": message_info.nickname, **result}
                         if parameters:
                             format_kwargs["party_id"] = parameters[0]
+                        COMMANDS.labels(prefix or "unknown", "rejected").inc()
                         return command_info["error_template"].format(**format_kwargs)
                 except Exception:
                     # Guard should never break command execution.
@@ -261,46 +279,22 @@ class CommandManager(Singleton):
                     format_kwargs = {'user': message_info.nickname, **result}
                     if parameters:
                         format_kwargs['party_id'] = parameters[0]
+                    COMMANDS.labels(prefix or "unknown", "rejected").inc()
                     return command_info.get('error_template', '{error}').format(**format_kwargs)
             except Exception:
                 pass
 
-            # UI 互斥：命令执行期间禁止 EventManager 的"未知页面自动 back"打断弹窗/子页面流程
-            result = {'error': 'unknown'}
-            retry_enabled = bool(command_info.get("retry"))
-            with command_silence(silent):
-                async with self.runtime.ui_session(f"command:{command_info.get('prefix', 'unknown')}"):
-                    try:
-                        self.runtime.emit(
-                            "command.dispatch",
-                            ctx={
-                                "prefix": command_info.get("prefix"),
-                                "parameters": parameters,
-                                "nickname": message_info.nickname,
-                                "silent": silent,
-                            },
-                        )
-                    except Exception:
-                        pass
-                    result = await command.process(message_info, parameters)
-                    if 'error' in result and retry_enabled:
-                        cmd_prefix = command_info.get('prefix', 'unknown')
-                        self.logger.warning(
-                            f"Command '{cmd_prefix}' failed on first attempt ({result.get('error')}), retrying (1/1)..."
-                        )
-                        try:
-                            self.runtime.emit(
-                                "command.retry",
-                                ctx={
-                                    "prefix": cmd_prefix,
-                                    "first_error": result.get("error"),
-                                    "nickname": message_info.nickname,
-                                },
-                            )
-                        except Exception:
-                            pass
-                        await asyncio.sleep(0.5)
-                        result = await command.process(message_info, parameters)
+            metric_prefix = command_info.get("prefix") or "unknown"
+            started = time.perf_counter()
+            cache_key = self._result_cache_key(command, message_info, parameters)
+            result = self._cached_result(cache_key)
+            if result is not None:
+                self._emit_cache_hit(command_info, message_info, cache_key)
+            else:
+                result = await self._execute_command(command, message_info, command_info, parameters, silent)
+                self._store_result(cache_key, command, command_info, result)
+            COMMAND_LATENCY.labels(metric_prefix).observe(time.perf_counter() - started)
+            COMMANDS.labels(metric_prefix, "error" if 'error' in result else "ok").inc()
 
             if 'error' in result:
                 # 合并 result 中的字段（如 party_id），以便各命令的 error_template 能正确渲染
@@ -329,9 +323,186 @@ class CommandManager(Singleton):
                 pass
             return res
         except Exception:
+            COMMANDS.labels(command_info.get("prefix") or "unknown", "exception").inc()
             self.logger.error(f"Error processing command {command_info}: {traceback.format_exc()}")
             return f"Error processing command {command_info}"
 
+    def is_system_user(self, nickname) -> bool:
+        return nickname in self.handler.config.get('system_users', [])
+
+    async def _rate_limit(self, message_info, command_info, user=None):
+        """None when the command may run; otherwise the reply to send ("" once a burst was already answered)."""
+        from ushareiplay.core.rate_limiter import RateLimiter
+
+        if not RateLimiter.is_initialized():
+            return None
+        if self.is_system_user(message_info.nickname):
+            return None
+        try:
+            if user is None:
+                from ushareiplay.dal.user_dao import UserDAO
+
+                user = await UserDAO.get_or_create(message_info.nickname)
+            prefix = command_info.get("prefix") or ""
+            decision = RateLimiter.instance().check(message_info.nickname, prefix, user.level)
+        except Exception:
+            # Guard should never break command execution.
+            return None
+        if decision.allowed:
+            return None
+
+        COMMANDS.labels(prefix or "unknown", "rate_limited").inc()
+        try:
+            self.runtime.emit(
+                "command.rate_limited",
+                ctx={
+                    "prefix": prefix,
+                    "nickname": message_info.nickname,
+                    "scope": decision.scope,
+                    "retry_after_s": round(decision.retry_after_s, 1),
+                    "notified": decision.notify,
+                },
+            )
+        except Exception:
+            pass
+        if not decision.notify:
+            return ""
+        retry_after = max(1, math.ceil(decision.retry_after_s)) if math.isfinite(decision.retry_after_s) else None
+        error = f"操作太频繁，请 {retry_after} 秒后再试" if retry_after else "操作太频繁，请稍后再试"
+        return command_info.get('error_template', '{error}').format(
+            **{'user': message_info.nickname, 'error': error, 'party_id': ''}
+        )
+
+    def _result_cache_key(self, command, message_info, parameters):
+        """Cache key for this call when the command opts into result caching (core.command_cache)."""
+        from ushareiplay.core.command_cache import CommandResultCache
+
+        if not CommandResultCache.is_initialized() or not getattr(command, "cache_ttl_s", 0):
+            return None
+        try:
+            key = command.cache_key(message_info, parameters)
+        except Exception:
+            return None
+        return f"{type(command).__name__}:{key}" if key else None
+
+    def _cached_result(self, cache_key):
+        from ushareiplay.core.command_cache import CommandResultCache
+
+        if not cache_key:
+            return None
+        return CommandResultCache.instance().get(cache_key)
+
+    def _store_result(self, cache_key, command, command_info, result):
+        from ushareiplay.core.command_cache import CommandResultCache
+
+        if not cache_key:
+            return
+        cache = CommandResultCache.instance()
+        ttl_s = cache.ttl_for(command_info.get("prefix") or "", command.cache_ttl_s)
+        cache.put(cache_key, result, ttl_s, command.cache_invalidated_by)
+
+    def _emit_cache_hit(self, command_info, message_info, cache_key):
+        try:
+            self.runtime.emit(
+                "command.cache_hit",
+                ctx={
+                    "prefix": command_info.get("prefix"),
+                    "key": cache_key,
+                    "nickname": message_info.nickname,
+                },
+            )
+        except Exception:
+            pass
+
+    async def _execute_command(self, command, message_info, command_info, parameters, silent):
+        """Run the command under the UI session, retrying once when the command config enables it."""
+        # UI 互斥：命令执行期间禁止 EventManager 的"未知页面自动 back"打断弹窗/子页面流程
+        result = {'error': 'unknown'}
+        retry_enabled = bool(command_info.get("retry"))
+        prefix = command_info.get('prefix', 'unknown')
+        with command_silence(silent):
+            async with self.runtime.ui_session(f"command:{prefix}"):
+                try:
+                    self.runtime.emit(
+                        "command.dispatch",
+                        ctx={
+                            "prefix": command_info.get("prefix"),
+                            "parameters": parameters,
+                            "nickname": message_info.nickname,
+                            "silent": silent,
+                        },
+                    )
+                except Exception:
+                    pass
+                try:
+                    with self._command_scope(prefix) as scope:
+                        result = await self._run_process(scope, command, message_info, parameters)
+                        if 'error' in result and retry_enabled:
+                            self.logger.warning(
+                                f"Command '{prefix}' failed on first attempt ({result.get('error')}), retrying (1/1)..."
+                            )
+                            try:
+                                self.runtime.emit(
+                                    "command.retry",
+                                    ctx={
+                                        "prefix": prefix,
+                                        "first_error": result.get("error"),
+                                        "nickname": message_info.nickname,
+                                    },
+                                )
+                            except Exception:
+                                pass
+                            await asyncio.sleep(0.5)
+                            result = await self._run_process(scope, command, message_info, parameters)
+                except CommandCancelled as exc:
+                    result = self._abort_command(prefix, message_info, scope, exc)
+        return result
+
+    def _command_scope(self, prefix):
+        if not CommandSupervisor.is_initialized():
+            return nullcontext()
+        return CommandSupervisor.instance().scope(prefix)
+
+    @staticmethod
+    async def _run_process(scope, command, message_info, parameters):
+        if scope is None:
+            return await command.process(message_info, parameters)
+        return await scope.run(command.process(message_info, parameters))
+
+    def _abort_command(self, prefix, message_info, scope, exc):
+        """Report a timed-out/cancelled command and bring the UI back to the room (still under the UI lock)."""
+        timed_out = exc.timed_out
+        COMMANDS.labels(prefix, "timeout" if timed_out else "cancelled").inc()
+        restored = None
+        if CommandSupervisor.instance().restore_ui:
+            try:
+                from ushareiplay.managers.recovery_manager import RecoveryManager
+
+                restored = RecoveryManager.instance().restore_after_abort()
+            except Exception:
+                self.logger.error(f"UI restore after aborted command failed: {traceback.format_exc()}")
+                restored = False
+        elapsed_s = round(scope.elapsed(), 1) if scope else None
+        self.logger.warning(f"Command '{prefix}' aborted ({exc.reason}) after {elapsed_s}s")
+        try:
+            self.runtime.emit(
+                "command.timeout" if timed_out else "command.cancelled",
+                level="WARNING",
+                ctx={
+                    "prefix": prefix,
+                    "nickname": message_info.nickname,
+                    "reason": exc.reason,
+                    "timeout_s": scope.timeout_s if scope else None,
+                    "elapsed_s": elapsed_s,
+                    "ui_restored": restored,
+                },
+            )
+        except Exception:
+            pass
+        if timed_out:
+            return {'error': f'执行超时（{scope.timeout_s:g} 秒），已中止'}
+        return {'error': '命令已被取消'}
+
     def is_valid_command(self, content):
         """Check if content is a valid command"""
         if not self.command_parser:
@@ -367,6 +538,15 @@ class CommandManager(Singleton):
                 silent=bool(getattr(message_info, "silent", False)),
                 sleep_exempt=bool(getattr(message_info, "sleep_exempt", False)),
             )
+            request_id = getattr(message_info, "request_id", None)
+            expanded = sum(result.kind == ChatIntakeKind.COMMAND for result in results)
+            if request_id and expanded != 1:
+                # 请求方按入队条数等结果：出队时再展开的多出（或少了）的条数要告诉它
+                with trace_context(request_id):
+                    try:
+                        self.runtime.emit(CONTROL_EXPANDED_EVENT, ctx={"extra": expanded - 1})
+                    except Exception:
+                        pass
             for result in results:
                 if result.kind == ChatIntakeKind.COMMAND:
                     command_messages.append(
@@ -376,6 +556,7 @@ class CommandManager(Singleton):
                             silent=result.silent,
                             private_reply=result.private_reply,
                             sleep_exempt=result.sleep_exempt,
+                            request_id=request_id,
                         )
                     )
                 elif not result.silent:
@@ -418,50 +599,68 @@ class CommandManager(Singleton):
         if not messages:
             return success_count
 
-        # Iterate through message info objects
-        for message_info in messages:
-            if not message_info.content:
-                continue
+        async def run(prepared):
+            """Execute one prepared command; returns (outcome, reply)."""
+            nonlocal success_count
+            message_info, command_info, command = prepared.message_info, prepared.command_info, prepared.command
+            silent = prepared.silent
+            cmd = prepared.prefix
+            if command:
+                # 限流在确认回显之前：被限流的刷屏既不占 UI 也不刷回显
+                limited = await self._rate_limit(message_info, command_info, user=prepared.user)
+                if limited is not None:
+                    if limited:
+                        self.message_dispatch.send_for_message_info(
+                            message_info, limited, silent=silent
+                        )
+                    return "rate_limited", limited
 
-            # Normalize command input (tolerate leading spaces and spaces after colon)
-            extracted_private_reply, content = self._extract_private_reply_and_normalize(
-                message_info.content
+            time_prefix = datetime.now().strftime('%H:%M:%S')
+            self.message_dispatch.send_screen_message(
+                f'[{time_prefix}] {cmd} ... @{message_info.nickname}',
+                silent=silent,
             )
-            message_info.private_reply = bool(
-                getattr(message_info, "private_reply", False)
-            ) or extracted_private_reply
-            silent = bool(getattr(message_info, "silent", False)) or self._is_silent_command_candidate(
-                message_info.content
-            )
-            if not content:
-                continue
 
-            if self.is_valid_command(content):
-                command_info = self.parse_command(content)
-                if command_info:
-                    command_info["silent"] = silent
-                    # Handle different commands using match-case
-                    cmd = command_info['prefix']
-                    time_prefix = datetime.now().strftime('%H:%M:%S')
-                    self.message_dispatch.send_screen_message(
-                        f'[{time_prefix}] {cmd} ... @{message_info.nickname}',
-                        silent=silent,
+            if command:
+                response = await self.process_command(command, message_info, command_info, user=prepared.user)
+                if response:
+                    self.message_dispatch.send_for_message_info(
+                        message_info, response, silent=silent
                     )
+                success_count += 1
+                return "done", response
+            self.logger.error(f"Unknown command: {cmd}")
+            self.message_dispatch.send_screen_message(
+                f'[{time_prefix}] Unknown command: {cmd} @{message_info.nickname}',
+                silent=silent,
+            )
+            return "unknown", None
 
-                    command = self.get_command(cmd)
-                    if command:
-                        response = await self.process_command(command, message_info, command_info)
-                        if response:
-                            self.message_dispatch.send_for_message_info(
-                                message_info, response, silent=silent
+        async def execute(prepared):
+            request_id = getattr(prepared.message_info, "request_id", None)
+            outcome, reply = "invalid", None
+            # 控制接口请求：命令执行中的事件带上请求 ID；无论无效、出错还是正常结束都报告一次，请求方不会空等到超时
+            with trace_context(request_id):
+                try:
+                    if not prepared.command_info:
+                        return
+                    outcome = "error"
+                    outcome, reply = await run(prepared)
+                except Exception as e:
+                    reply = str(e)
+                    raise
+                finally:
+                    if request_id:
+                        try:
+                            self.runtime.emit(
+                                CONTROL_DONE_EVENT,
+                                ctx={"prefix": prepared.prefix, "outcome": outcome, "response": reply},
                             )
-                        success_count += 1
-                    else:
-                        self.logger.error(f"Unknown command: {cmd}")
-                        self.message_dispatch.send_screen_message(
-                            f'[{time_prefix}] Unknown command: {cmd} @{message_info.nickname}',
-                            silent=silent,
-                        )
+                        except Exception:
+                            pass
+
+        # 解析与查用户在后台段里提前进行，执行严格按原顺序逐条进行
+        await CommandPipeline(self).run(messages, execute)
 
         self.logger.info(f"{success_count}/{len(messages)} commands processed")
 
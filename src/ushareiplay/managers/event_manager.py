@@ -10,12 +10,14 @@ import re
 import sys
 import time
 import traceback
+from contextlib import nullcontext
 from pathlib import Path
 from typing import Dict, List, Optional, Set, Tuple
 
 from lxml import etree
 
 from ushareiplay.core.driver_decorator import with_driver_recovery
+from ushareiplay.core.metrics import PAGE_SOURCE_BYTES, PAGE_SOURCE_FETCH, PAGE_SOURCE_PARSE
 from ushareiplay.core.singleton import Singleton
 from ushareiplay.core.element_wrapper import ElementWrapper
 import asyncio
@@ -84,6 +86,21 @@ class EventManager(Singleton):
             raise RuntimeError("EventManager runtime has not been configured")
         return self._runtime
 
+    def _span(self, phase: str):
+        """TickProfiler span for one event hook (no-op when runtime has no profiler)."""
+        span = getattr(self._runtime, "span", None)
+        return span(phase) if span is not None else nullcontext()
+
+    def _dump_flight(self, reason: str, **ctx) -> None:
+        """Dump the FlightRecorder ring buffer (no-op when runtime has no recorder)."""
+        dump = getattr(self._runtime, "dump_flight", None)
+        if dump is None:
+            return
+        try:
+            dump(reason, **ctx)
+        except Exception:
+            self.logger.debug(f"Flight recorder dump failed: {traceback.format_exc()}")
+
     def initialize_events(self):
         """初始化事件管理器，加载所有事件模块"""
         if self._initialized:
@@ -306,7 +323,8 @@ class EventManager(Singleton):
             return screen
 
         try:
-            root = etree.fromstring(page_source.encode("utf-8"))
+            with PAGE_SOURCE_PARSE.labels("describe_screen").time():
+                root = etree.fromstring(page_source.encode("utf-8"))
         except etree.XMLSyntaxError:
             return screen
 
@@ -445,6 +463,10 @@ class EventManager(Singleton):
                             self.handler.key_actions.press_back()
                             recovery["pressed_back"] = True
                             self.logger.warning("No events triggered, pressed back to exit unknown page")
+                            self._dump_flight(
+                                "unknown_page",
+                                consecutive=self._consecutive_unknown_pages + 1,
+                            )
                             self._consecutive_unknown_pages += 1
                             if self._consecutive_unknown_pages > 10:
                                 backoff_s = min(10.0, 0.5 * (self._consecutive_unknown_pages - 10))
@@ -503,7 +525,8 @@ class EventManager(Singleton):
             return 0
 
         triggered_count = 0
-        root = etree.fromstring(page_source.encode("utf-8"))
+        with PAGE_SOURCE_PARSE.labels("events").time():
+            root = etree.fromstring(page_source.encode("utf-8"))
 
         keys_ordered: List[str] = []
         for k in self._PRIORITY_EVENT_KEYS:
@@ -525,7 +548,8 @@ class EventManager(Singleton):
                 if module and hasattr(module, "event"):
                     if isinstance(xml_element, list):
                         wrapper_list = [ElementWrapper(elem, self.handler, element_key) for elem in xml_element]
-                        result = await module.event.handle(element_key, wrapper_list)
+                        with self._span(f"event:{element_key}"):
+                            result = await module.event.handle(element_key, wrapper_list)
                         triggered_count += 1
                         if result is True:
                             self.logger.debug(
@@ -534,7 +558,8 @@ class EventManager(Singleton):
                             break
                     else:
                         wrapper = ElementWrapper(xml_element, self.handler, element_key)
-                        result = await module.event.handle(element_key, wrapper)
+                        with self._span(f"event:{element_key}"):
+                            result = await module.event.handle(element_key, wrapper)
                         triggered_count += 1
                         if result is True:
                             self.logger.debug(
@@ -598,7 +623,12 @@ class EventManager(Singleton):
         Returns:
             页面源码 XML 字符串，失败返回 None
         """
-        return self.handler.driver.page_source
+        started = time.perf_counter()
+        page_source = self.handler.driver.page_source
+        PAGE_SOURCE_FETCH.observe(time.perf_counter() - started)
+        if page_source:
+            PAGE_SOURCE_BYTES.observe(len(page_source))
+        return page_source
 
     def get_event(self, element_key: str):
         """
@@ -21,6 +21,7 @@ class KeywordManager(Singleton):
         self._config = None
         self._default_keyword_command = None
         self._nl_resolver = None
+        self._intent_matcher = None
         self._mode_aliases = {
             'sequence': Keyword.MODE_SEQUENCE,
             'sequential': Keyword.MODE_SEQUENCE,
@@ -396,6 +397,15 @@ class KeywordManager(Singleton):
             self._nl_resolver = NaturalLanguageResolver(cfg)
         return self._nl_resolver
 
+    @property
+    def intent_matcher(self):
+        """延迟获取 IntentMatcher 实例（LLM 之前的本地句式匹配）"""
+        if self._intent_matcher is None:
+            from ushareiplay.core.intent_matcher import IntentMatcher
+
+            self._intent_matcher = IntentMatcher(self.config or {})
+        return self._intent_matcher
+
     def _get_playback_info(self) -> Optional[dict]:
         """获取当前活跃的播放与歌单信息缓存"""
         info = {}
@@ -483,16 +493,24 @@ class KeywordManager(Singleton):
             except Exception:
                 pass
 
-            playback_info = self._get_playback_info()
+            local_match = self.intent_matcher.resolve(user_text, commands_config)
+            if local_match:
+                from ushareiplay.core.natural_language_resolver import NaturalLanguageResult
 
-            resolved = await self.nl_resolver.resolve(
-                user_text=user_text,
-                user_name=result.nickname,
-                user_level=user_level,
-                commands_config=commands_config,
-                playback_info=playback_info,
-                room_info=room_info,
-            )
+                self.logger.info(
+                    f"Local intent match ({local_match.rule}, {local_match.confidence:.2f}) "
+                    f"for {result.nickname}: {user_text} -> {local_match.command}"
+                )
+                resolved = NaturalLanguageResult(type="command", content=local_match.command)
+            else:
+                resolved = await self.nl_resolver.resolve(
+                    user_text=user_text,
+                    user_name=result.nickname,
+                    user_level=user_level,
+                    commands_config=commands_config,
+                    playback_info=self._get_playback_info(),
+                    room_info=room_info,
+                )
 
             if not resolved or not resolved.content:
                 return False
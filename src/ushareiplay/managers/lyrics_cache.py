@@ -0,0 +1,240 @@
+"""
+歌词缓存（LyricsCache）
+
+`:lyrics` 每次都要在 QQ 音乐里完整搜索、滚动到歌词页并读取文本，热门歌曲被反复请求。
+本管理器按归一化的「歌名|歌手」（显式查询时为查询词）持久化：
+
+- 原始歌词行；
+- 按 lyrics.line_max_width 预先换行的行与默认分组。
+
+命中时 `:lyrics` 不再操作设备；指定分组数或换行宽度变化时只在本地重新分组。
+空闲时（UI 锁空闲、消息队列为空）对当前播放歌曲做一次后台预热。
+"""
+
+from __future__ import annotations
+
+import json
+import re
+import time
+import traceback
+import unicodedata
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Iterable, List, Optional
+
+from ushareiplay.core.singleton import Singleton
+from ushareiplay.dal.lyrics_dao import LyricsDAO
+from ushareiplay.helpers.lyrics_text import (
+    group_lyrics_lines,
+    split_lyrics_lines,
+    wrap_lyrics_lines,
+)
+
+
+DEFAULT_MEMORY_ENTRIES = 200
+DEFAULT_WARM_UP_INTERVAL_S = 60.0
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def lyrics_key(song: Optional[str], singer: Optional[str] = "") -> str:
+    """Normalized cache key: NFKC + casefold + collapsed whitespace, ``song|singer``."""
+
+    def normalize(value: Optional[str]) -> str:
+        value = unicodedata.normalize("NFKC", value or "").casefold()
+        return _WHITESPACE_RE.sub(" ", value).strip()
+
+    return f"{normalize(song)}|{normalize(singer)}"
+
+
+@dataclass(frozen=True)
+class LyricsRecord:
+    """Processed lyrics as stored in the cache."""
+
+    song: str
+    singer: str
+    raw_lines: List[str]
+    text_length: int
+    line_max_width: int
+    wrapped_lines: List[str]
+    groups: List[str]
+
+    @classmethod
+    def build(cls, lyrics_text: str, *, song: str = "", singer: str = "", max_width: int = 18) -> "LyricsRecord":
+        raw_lines = split_lyrics_lines(lyrics_text)
+        wrapped_lines = wrap_lyrics_lines(raw_lines, max_width)
+        return cls(
+            song=song,
+            singer=singer,
+            raw_lines=raw_lines,
+            text_length=len(lyrics_text),
+            line_max_width=max_width,
+            wrapped_lines=wrapped_lines,
+            groups=group_lyrics_lines(wrapped_lines, len(lyrics_text)),
+        )
+
+    @classmethod
+    def from_entry(cls, entry) -> "LyricsRecord":
+        return cls(
+            song=entry.song,
+            singer=entry.singer,
+            raw_lines=json.loads(entry.raw_lines or "[]"),
+            text_length=entry.text_length,
+            line_max_width=entry.line_max_width,
+            wrapped_lines=json.loads(entry.wrapped_lines or "[]"),
+            groups=json.loads(entry.groups or "[]"),
+        )
+
+    def groups_for(self, max_width: int, force_groups: int = 0) -> List[str]:
+        """Message groups for the requested width/group count; the default case is precomputed."""
+        if max_width == self.line_max_width and force_groups <= 0:
+            return list(self.groups)
+        wrapped = self.wrapped_lines if max_width == self.line_max_width else wrap_lyrics_lines(self.raw_lines, max_width)
+        return group_lyrics_lines(wrapped, self.text_length, force_groups)
+
+
+class LyricsCache(Singleton):
+    """Persistent lyrics store with an in-memory LRU front and idle warm-up."""
+
+    def __init__(self, config: Optional[dict] = None, *, clock: Callable[[], float] = time.monotonic):
+        self.config = config or {}
+        cfg = self.config.get("lyrics_cache", {}) or {}
+        self.enabled = bool(cfg.get("enabled", True))
+        self.warm_up_enabled = bool(cfg.get("warm_up", True))
+        self.warm_up_interval_s = float(cfg.get("warm_up_interval_s", DEFAULT_WARM_UP_INTERVAL_S))
+        self.memory_entries = max(1, int(cfg.get("memory_entries", DEFAULT_MEMORY_ENTRIES)))
+        self._memory: "OrderedDict[str, LyricsRecord]" = OrderedDict()
+        self._warm_attempted: set[str] = set()
+        self._clock = clock
+        self._last_warm_up = clock()
+        self.runtime = None
+        self.hits = 0
+        self.misses = 0
+
+    def configure_runtime(self, runtime) -> None:
+        """Runtime providing ``is_ui_busy()`` and ``ui_session(reason)`` (CommandRuntimeContext)."""
+        self.runtime = runtime
+
+    @property
+    def logger(self):
+        from ushareiplay.handlers.soul_handler import SoulHandler
+
+        return SoulHandler.instance().logger
+
+    @property
+    def line_max_width(self) -> int:
+        return int((self.config.get("lyrics") or {}).get("line_max_width", 18))
+
+    def _remember(self, key: str, record: LyricsRecord) -> None:
+        self._memory[key] = record
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    async def get(self, key: str) -> Optional[LyricsRecord]:
+        """Cached lyrics for a :func:`lyrics_key`, from memory or the database."""
+        if not self.enabled:
+            return None
+        record = self._memory.get(key)
+        if record is None:
+            try:
+                entry = await LyricsDAO.get_by_key(key)
+            except Exception:
+                self.logger.warning(f"Failed to read lyrics cache for {key}: {traceback.format_exc()}")
+                entry = None
+            record = LyricsRecord.from_entry(entry) if entry else None
+        if record is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._remember(key, record)
+        return record
+
+    async def put(self, keys: Iterable[str], lyrics_text: str, *, song: str = "", singer: str = "") -> LyricsRecord:
+        """Process lyrics once (lines, wrapping, default groups) and store them under every key."""
+        record = LyricsRecord.build(lyrics_text, song=song, singer=singer, max_width=self.line_max_width)
+        if not self.enabled:
+            return record
+        for key in dict.fromkeys(keys):
+            self._remember(key, record)
+            try:
+                await LyricsDAO.upsert(
+                    key,
+                    song=record.song,
+                    singer=record.singer,
+                    raw_lines=record.raw_lines,
+                    text_length=record.text_length,
+                    line_max_width=record.line_max_width,
+                    wrapped_lines=record.wrapped_lines,
+                    groups=record.groups,
+                )
+            except Exception:
+                self.logger.warning(f"Failed to persist lyrics cache for {key}: {traceback.format_exc()}")
+        return record
+
+    # ------------------------------------------------------------------
+    # Idle warm-up
+    # ------------------------------------------------------------------
+
+    def _current_song(self) -> Optional[dict]:
+        from ushareiplay.state.playback_broadcaster import PlaybackBroadcaster
+
+        if not PlaybackBroadcaster.is_initialized():
+            return None
+        info = PlaybackBroadcaster.instance().get_playback_info_cache()
+        if not info or "error" in info or not info.get("song") or info.get("song") == "Unknown":
+            return None
+        return info
+
+    def _is_idle(self) -> bool:
+        from ushareiplay.core.message_queue import MessageQueue
+
+        if self.runtime is None or self.runtime.is_ui_busy():
+            return False
+        if MessageQueue.is_initialized() and MessageQueue.instance().get_queue_size() > 0:
+            return False
+        return True
+
+    async def maybe_warm_up(self) -> bool:
+        """Main-loop hook: fetch lyrics for the currently playing song once, while idle."""
+        if not (self.enabled and self.warm_up_enabled):
+            return False
+        if self._clock() - self._last_warm_up < self.warm_up_interval_s:
+            return False
+        info = self._current_song()
+        if info is None:
+            return False
+        key = lyrics_key(info["song"], info.get("singer"))
+        if key in self._warm_attempted or key in self._memory:
+            return False
+        if not self._is_idle():
+            return False
+        self._last_warm_up = self._clock()
+        self._warm_attempted.add(key)
+        if await self.get(key) is not None:
+            return False
+
+        from ushareiplay.handlers.soul_handler import SoulHandler
+        from ushareiplay.managers.command_manager import CommandManager
+
+        command = CommandManager.instance().get_command("lyrics")
+        if command is None:
+            return False
+        query = f'{info["song"]} {info.get("singer", "")} {info.get("album", "")}'.strip()
+        try:
+            async with self.runtime.ui_session("lyrics_warm_up"):
+                try:
+                    result = command.fetch_lyrics_text(query)
+                finally:
+                    SoulHandler.instance().key_actions.switch_to_app()
+        except Exception:
+            self.logger.error(f"Lyrics warm-up failed: {traceback.format_exc()}")
+            return False
+        if "error" in result:
+            self.logger.info(f"Lyrics warm-up skipped for {query}: {result['error']}")
+            return False
+        await self.put([key], result["text"], song=info["song"], singer=info.get("singer", ""))
+        self.logger.info(f"Lyrics warmed up for {query}")
+        return True
+
+    def status(self) -> dict:
+        return {"memory": len(self._memory), "hits": self.hits, "misses": self.misses}
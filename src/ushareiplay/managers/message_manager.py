@@ -13,6 +13,7 @@ from ushareiplay.core.chat_intake import QUEUE_COMMAND_PREFIX_CHARS, ChatIntakeK
 from ushareiplay.core.log_formatter import ColoredFormatter
 from ushareiplay.core.message_queue import MessageQueue
 from ushareiplay.core.singleton import Singleton
+from ushareiplay.managers.chat_archive import archive_chat
 from ushareiplay.managers.recovery_manager import RecoveryManager
 from ushareiplay.models.message_info import MessageInfo
 
@@ -156,6 +157,8 @@ class MessageManager(Singleton):
                 is_missed = True
 
             result = classify_chat_line(chat, room_owner=room_owner)
+            if is_missed:
+                archive_chat(result)
 
             if result.kind == ChatIntakeKind.KEYWORD_MENTION and is_missed:
                 from ushareiplay.managers.keyword_manager import KeywordManager
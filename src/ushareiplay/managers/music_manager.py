@@ -3,6 +3,7 @@ import time
 import traceback
 from ushareiplay.core.singleton import Singleton
 from ushareiplay.core.driver_decorator import with_driver_recovery
+from ushareiplay.helpers.search_results import low_quality_reason
 
 
 class MusicManager(Singleton):
@@ -20,6 +21,7 @@ class MusicManager(Singleton):
         self.logger = self.music_handler.logger
         self.driver = self.music_handler.driver
         self._song_release_lookup = None
+        self._volume_control = None
 
     @property
     def config(self):
@@ -48,7 +50,10 @@ class MusicManager(Singleton):
     def song_release_lookup(self):
         if self._song_release_lookup is None:
             from ushareiplay.helpers.song_release import QQMusicSongReleaseLookup
-            self._song_release_lookup = QQMusicSongReleaseLookup()
+            controller = getattr(self.music_handler, "controller", None)
+            self._song_release_lookup = (
+                getattr(controller, "song_release_lookup", None) or QQMusicSongReleaseLookup.from_config(self.config)
+            )
         return self._song_release_lookup
 
     @property
@@ -128,30 +133,29 @@ class MusicManager(Singleton):
         """Public alias for get_current_song_info, used by commands and broadcaster."""
         return self.get_current_song_info()
 
-    @with_driver_recovery
-    def get_volume_level(self) -> int:
-        """Get current volume level - system level"""
-        result = self.driver.execute_script(
-            'mobile: shell',
-            {'command': 'dumpsys audio'}
-        )
-
-        if result and isinstance(result, str):
-            parts = result.split('- STREAM_MUSIC:')
-            if len(parts) > 1:
-                match = re.search(r'streamVolume:(\d+)', parts[1])
-                if match:
-                    volume = int(match.group(1))
-                    volume = max(0, min(15, volume))
-                    self.logger.info(f"Current volume: {volume}")
-                    return volume
+    @property
+    def volume_control(self):
+        if self._volume_control is None:
+            from ushareiplay.helpers.volume_control import VolumeControl
+            self._volume_control = VolumeControl(self._execute_shell, self.config)
+        return self._volume_control
 
-        self.logger.warning("Could not parse volume level, using default value 0")
-        return 0
+    def _execute_shell(self, command: str):
+        return self.driver.execute_script('mobile: shell', {'command': command})
 
     @with_driver_recovery
+    def get_volume_level(self) -> int:
+        """Get current volume level - system level (cached for volume.cache_ttl_s)"""
+        volume = self.volume_control.get_level()
+        if volume is None:
+            self.logger.warning("Could not parse volume level, using default value 0")
+            return 0
+        self.logger.info(f"Current volume: {volume}")
+        return volume
+
+    @with_driver_recovery(retry=False, op="write")
     def adjust_volume(self, target_volume: int = None) -> dict:
-        """Adjust volume to specified level - system level control"""
+        """Adjust volume to specified level - one absolute set call, key presses only as fallback"""
         if target_volume is None:
             current_volume = self.get_volume_level()
             if current_volume is None:
@@ -161,7 +165,23 @@ class MusicManager(Singleton):
         if not isinstance(target_volume, int) or target_volume < 0 or target_volume > 15:
             return {'error': f'Invalid target volume: {target_volume}. Must be integer between 0-15'}
 
-        current_volume = self.get_volume_level()
+        volume_control = self.volume_control
+        known_volume = volume_control.cached_level()
+        if known_volume == target_volume:
+            return {'volume': target_volume}
+
+        if volume_control.set_level(target_volume):
+            self.logger.info(f"Set volume to {target_volume}")
+            result = {'volume': target_volume}
+            if known_volume is not None:
+                result['delta'] = target_volume - known_volume
+            return result
+
+        self.logger.warning("Absolute volume command unavailable, falling back to volume keys")
+        return self._step_volume(target_volume)
+
+    def _step_volume(self, target_volume: int) -> dict:
+        current_volume = self.volume_control.read_level()
         if current_volume is None:
             return {'error': 'Failed to get current volume level'}
 
@@ -176,7 +196,7 @@ class MusicManager(Singleton):
             action()
             self.logger.info(f"{'Decreased' if delta < 0 else 'Increased'} volume ({i + 1}/{times})")
 
-        final_volume = self.get_volume_level()
+        final_volume = self.volume_control.read_level()
         if final_volume is None:
             final_volume = current_volume
         self.logger.info(f"Adjusted volume to {final_volume}")
@@ -260,30 +280,19 @@ class MusicManager(Singleton):
             if self._is_old_song(song, singer, album, song_info):
                 return True
 
-            if 'DJ' in song or 'Remix' in song:
+            reason = low_quality_reason(song, singer, album, self.list_mode)
+            if reason == 'dj':
                 self.logger.info(f"Skipping DJ/Remix song: {song}")
                 return True
 
-            if self.list_mode == 'singer':
-                singer_text = (singer or "").strip()
-                artist_count = len([x.strip() for x in singer_text.split('/') if x.strip()]) if singer_text else 0
-                if artist_count >= 4:
-                    if self.no_skip > 0:
-                        self.no_skip -= 1
-                        self.logger.info(
-                            f"Allowing multi-artist song (remaining skips: {self.no_skip}): {song} - {singer_text}"
-                        )
-                        return False
-                    self.logger.info(f"Skipping multi-artist song (>=4): {song} - {singer_text}")
-                    return True
-
-                if song.endswith('(Live)'):
-                    if self.no_skip > 0:
-                        self.no_skip -= 1
-                        self.logger.info(f"Allowing Live song (remaining skips: {self.no_skip}): {song}")
-                        return False
-                    self.logger.info(f"Skipping Live song (no skips left): {song}")
-                    return True
+            if reason in ('multi_artist', 'live'):
+                label = 'multi-artist' if reason == 'multi_artist' else 'Live'
+                if self.no_skip > 0:
+                    self.no_skip -= 1
+                    self.logger.info(f"Allowing {label} song (remaining skips: {self.no_skip}): {song} - {singer}")
+                    return False
+                self.logger.info(f"Skipping {label} song: {song} - {singer}")
+                return True
 
             return False
         except Exception:
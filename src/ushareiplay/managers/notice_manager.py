@@ -13,6 +13,7 @@ class NoticeManager(Singleton):
         self.last_update_time = None
         self.cooldown_minutes = 15  # 15分钟冷却时间
         self.pending_notice = None  # 待设置的notice
+        self.current_notice = None  # 最近一次成功设置的notice
 
     @property
     def handler(self):
@@ -169,6 +170,7 @@ class NoticeManager(Singleton):
             self.logger.info("隐藏party info 对话框")
 
             self.logger.info(f"成功设置notice: {notice}")
+            self.current_notice = notice
             return {'success': f'Notice restored to: {notice}'}
 
         except Exception:
@@ -0,0 +1,189 @@
+"""
+播放历史（PlayHistory）
+
+PlaybackBroadcaster 按 歌名/歌手/专辑 检测切歌，但此前没有任何可查询的历史：`:info`、`:radio`
+与老歌过滤每次都要重新读 UI 或查网络。本管理器在每次切歌时记录一条：
+
+- 歌曲信息、播放者（PlaylistState.player_name）、歌单名、列表模式（list_mode）、发行日期；
+- 内存中保留最近 recent_window 条，供「最近播放」与电台去重即时读取；
+- 写库为 write-behind：先进缓冲，主循环每 flush_interval_s 或满 batch_size 条时批量插入，
+  关闭时强制落盘。写库失败的记录放回缓冲，下次重试。
+"""
+
+from __future__ import annotations
+
+import time
+import traceback
+import unicodedata
+from collections import deque
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
+from typing import Callable, Deque, List, Optional
+
+from ushareiplay.core.singleton import Singleton
+from ushareiplay.dal.play_history_dao import PlayHistoryDAO
+
+
+DEFAULT_RECENT_WINDOW = 50
+DEFAULT_FLUSH_INTERVAL_S = 30.0
+DEFAULT_BATCH_SIZE = 20
+DEFAULT_RADIO_DEDUP_WINDOW_S = 3 * 3600
+MAX_PENDING = 1000
+
+
+def _normalize(value: Optional[str]) -> str:
+    return unicodedata.normalize("NFKC", value or "").casefold().strip()
+
+
+@dataclass(frozen=True)
+class PlayRecord:
+    """One detected song change."""
+
+    song: str
+    singer: str
+    album: str
+    requester: str
+    playlist: str
+    mode: str
+    release_date: Optional[str]
+    played_at: datetime
+
+    @classmethod
+    def from_entry(cls, entry) -> "PlayRecord":
+        return cls(
+            song=entry.song,
+            singer=entry.singer,
+            album=entry.album,
+            requester=entry.requester,
+            playlist=entry.playlist,
+            mode=entry.mode,
+            release_date=entry.release_date,
+            played_at=entry.played_at,
+        )
+
+    def as_row(self) -> dict:
+        return asdict(self)
+
+    def label(self) -> str:
+        return f"{self.song} - {self.singer}" if self.singer else self.song
+
+
+class PlayHistory(Singleton):
+    """Song-change history with an in-memory recent window and batched DB writes."""
+
+    def __init__(
+        self,
+        config: Optional[dict] = None,
+        *,
+        clock: Callable[[], float] = time.monotonic,
+        now: Callable[[], datetime] = datetime.now,
+    ):
+        cfg = (config or {}).get("play_history", {}) or {}
+        self.enabled = bool(cfg.get("enabled", True))
+        self.flush_interval_s = float(cfg.get("flush_interval_s", DEFAULT_FLUSH_INTERVAL_S))
+        self.batch_size = max(1, int(cfg.get("batch_size", DEFAULT_BATCH_SIZE)))
+        self.radio_dedup_window_s = float(cfg.get("radio_dedup_window_s", DEFAULT_RADIO_DEDUP_WINDOW_S))
+        self._clock = clock
+        self._now = now
+        self._recent: Deque[PlayRecord] = deque(maxlen=max(1, int(cfg.get("recent_window", DEFAULT_RECENT_WINDOW))))
+        self._pending: List[PlayRecord] = []
+        self._last_flush = clock()
+        self._loaded = False
+        self.written = 0
+
+    @property
+    def logger(self):
+        from ushareiplay.handlers.soul_handler import SoulHandler
+
+        return SoulHandler.instance().logger
+
+    def _context(self) -> dict:
+        """Requester / playlist / mode at the moment of the song change."""
+        from ushareiplay.handlers.qq_music_handler import QQMusicHandler
+        from ushareiplay.state.playlist_state import PlaylistState
+
+        context = {"requester": "", "playlist": "", "mode": "unknown"}
+        if PlaylistState.is_initialized():
+            state = PlaylistState.instance()
+            context["requester"] = state.player_name or ""
+            context["playlist"] = state.current_playlist_name or ""
+        if QQMusicHandler.is_initialized():
+            context["mode"] = getattr(QQMusicHandler.instance(), "list_mode", None) or "unknown"
+        return context
+
+    def record(self, info: dict, **context) -> Optional[PlayRecord]:
+        """Buffer a song change (sync, no I/O); explicit ``requester``/``playlist``/``mode`` override the live state."""
+        if not self.enabled or not info or "error" in info or not info.get("song"):
+            return None
+        values = self._context()
+        values.update({k: v for k, v in context.items() if v is not None})
+        record = PlayRecord(
+            song=info["song"],
+            singer=info.get("singer") or "",
+            album=info.get("album") or "",
+            requester=values["requester"],
+            playlist=values["playlist"],
+            mode=values["mode"],
+            release_date=info.get("release_date") or None,
+            played_at=self._now(),
+        )
+        self._recent.appendleft(record)
+        self._pending.append(record)
+        if len(self._pending) > MAX_PENDING:
+            del self._pending[: len(self._pending) - MAX_PENDING]
+        return record
+
+    def recent(self, limit: int = 10) -> List[PlayRecord]:
+        """Most recent plays from memory, newest first."""
+        return list(self._recent)[:limit]
+
+    def played_recently(self, song: Optional[str], within_s: Optional[float] = None) -> bool:
+        """Whether ``song`` (title match, normalized) was played within the window (default radio_dedup_window_s)."""
+        title = _normalize(song)
+        if not title:
+            return False
+        window = self.radio_dedup_window_s if within_s is None else within_s
+        cutoff = self._now() - timedelta(seconds=window)
+        return any(_normalize(r.song) == title and r.played_at >= cutoff for r in self._recent)
+
+    async def _load_recent(self) -> None:
+        self._loaded = True
+        try:
+            entries = await PlayHistoryDAO.recent(self._recent.maxlen)
+        except Exception:
+            self.logger.warning(f"Failed to load play history: {traceback.format_exc()}")
+            return
+        # 内存中已有的（本次运行新记录的）排在前面
+        known = {(r.song, r.played_at) for r in self._recent}
+        for entry in entries:
+            record = PlayRecord.from_entry(entry)
+            if (record.song, record.played_at) not in known and len(self._recent) < self._recent.maxlen:
+                self._recent.append(record)
+
+    async def maybe_flush(self, force: bool = False) -> int:
+        """Main-loop hook: batch-insert buffered records when due; returns the number written."""
+        if not self.enabled:
+            return 0
+        if not self._loaded:
+            await self._load_recent()
+        if not self._pending:
+            return 0
+        due = len(self._pending) >= self.batch_size or self._clock() - self._last_flush >= self.flush_interval_s
+        if not (force or due):
+            return 0
+        batch, self._pending = self._pending, []
+        self._last_flush = self._clock()
+        try:
+            written = await PlayHistoryDAO.bulk_insert(record.as_row() for record in batch)
+        except Exception:
+            self.logger.warning(f"Failed to flush play history: {traceback.format_exc()}")
+            self._pending = batch + self._pending
+            return 0
+        self.written += written
+        return written
+
+    async def close(self) -> None:
+        await self.maybe_flush(force=True)
+
+    def status(self) -> dict:
+        return {"recent": len(self._recent), "pending": len(self._pending), "written": self.written}
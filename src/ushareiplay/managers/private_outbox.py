@@ -0,0 +1,236 @@
+"""
+私聊回复发件箱（PrivateOutbox）
+
+`private_reply` 命令的回复原本在命令执行中同步私聊：打开在线列表、找人、进私聊页、输入、发送、
+再返回聊天室，每条回复一整轮，期间主房间无人值守。发件箱改为：
+
+- MessageDispatch.send_private_message 只入队（同步、无 I/O），按收件人分组；
+- 主循环 maybe_flush：先把新入队的回复写入 private_messages 表（status=pending），
+  空闲（UI 锁空闲、消息队列为空）或最早一条等待超过 max_wait_s 时投递；
+- 同一收件人的多条回复在一次私聊会话里发完，每次最多处理 max_recipients_per_flush 个收件人，
+  避免长时间离开房间；
+- 投递结果写回库（sent / attempts），失败的留待下次重试，超过 max_attempts 标记 failed；
+  重启后从库中恢复未投递的回复。
+"""
+
+from __future__ import annotations
+
+import time
+import traceback
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+from ushareiplay.core.singleton import Singleton
+from ushareiplay.dal.private_message_dao import PrivateMessageDAO
+
+
+DEFAULT_MAX_WAIT_S = 30.0
+DEFAULT_MAX_RECIPIENTS_PER_FLUSH = 2
+DEFAULT_MAX_MESSAGES_PER_SESSION = 5
+DEFAULT_MAX_ATTEMPTS = 3
+MAX_PENDING = 500
+
+
+@dataclass
+class OutboxItem:
+    """One queued private reply."""
+
+    recipient: str
+    content: str
+    queued_at: float
+    attempts: int = 0
+    entry_id: Optional[int] = None
+
+
+class PrivateOutbox(Singleton):
+    """Per-recipient private reply queue delivered in batched DM sessions."""
+
+    def __init__(self, config: Optional[dict] = None, *, clock: Callable[[], float] = time.monotonic):
+        cfg = (config or {}).get("private_outbox", {}) or {}
+        self.enabled = bool(cfg.get("enabled", True))
+        self.max_wait_s = float(cfg.get("max_wait_s", DEFAULT_MAX_WAIT_S))
+        self.max_recipients_per_flush = max(
+            1, int(cfg.get("max_recipients_per_flush", DEFAULT_MAX_RECIPIENTS_PER_FLUSH))
+        )
+        self.max_messages_per_session = max(
+            1, int(cfg.get("max_messages_per_session", DEFAULT_MAX_MESSAGES_PER_SESSION))
+        )
+        self.max_attempts = max(1, int(cfg.get("max_attempts", DEFAULT_MAX_ATTEMPTS)))
+        self._clock = clock
+        self._recipients: "OrderedDict[str, List[OutboxItem]]" = OrderedDict()
+        self._loaded = False
+        self.runtime = None
+        self.sent = 0
+        self.failed = 0
+        self.sessions = 0
+
+    def configure_runtime(self, runtime) -> None:
+        """Runtime providing ``is_ui_busy()``, ``ui_session(reason)`` and ``emit`` (CommandRuntimeContext)."""
+        self.runtime = runtime
+
+    @property
+    def logger(self):
+        from ushareiplay.handlers.soul_handler import SoulHandler
+
+        return SoulHandler.instance().logger
+
+    @property
+    def user_manager(self):
+        from ushareiplay.managers.user_manager import UserManager
+
+        return UserManager.instance()
+
+    def _emit(self, event: str, ctx: dict) -> None:
+        if self.runtime is None:
+            return
+        try:
+            self.runtime.emit(event, ctx=ctx)
+        except Exception:
+            pass
+
+    def pending_count(self) -> int:
+        return sum(len(items) for items in self._recipients.values())
+
+    def enqueue(self, recipient: str, content: str) -> bool:
+        """Queue a reply for ``recipient`` (sync, no I/O); persisted on the next ``maybe_flush``."""
+        if not recipient or not content:
+            return False
+        if self.pending_count() >= MAX_PENDING:
+            return False
+        self._recipients.setdefault(recipient, []).append(OutboxItem(recipient, content, queued_at=self._clock()))
+        return True
+
+    async def _load_pending(self) -> None:
+        """Restore replies left undelivered by a previous run, ahead of anything queued since."""
+        self._loaded = True
+        try:
+            entries = await PrivateMessageDAO.pending()
+        except Exception:
+            self.logger.warning(f"Failed to load private outbox: {traceback.format_exc()}")
+            return
+        restored: "OrderedDict[str, List[OutboxItem]]" = OrderedDict()
+        now = self._clock()
+        for entry in entries:
+            restored.setdefault(entry.recipient, []).append(
+                OutboxItem(entry.recipient, entry.content, now, entry.attempts, entry.id)
+            )
+        for recipient, items in self._recipients.items():
+            restored.setdefault(recipient, []).extend(items)
+        self._recipients = restored
+
+    async def _persist_new(self) -> None:
+        for items in self._recipients.values():
+            for item in items:
+                if item.entry_id is not None:
+                    continue
+                try:
+                    item.entry_id = (await PrivateMessageDAO.create(item.recipient, item.content)).id
+                except Exception:
+                    # 写库失败不影响投递，下一轮再试
+                    self.logger.warning(f"Failed to persist private reply: {traceback.format_exc()}")
+                    return
+
+    def _is_idle(self) -> bool:
+        from ushareiplay.core.message_queue import MessageQueue
+
+        if MessageQueue.is_initialized() and MessageQueue.instance().get_queue_size() > 0:
+            return False
+        return True
+
+    def _due(self) -> bool:
+        if not self._recipients or self.runtime is None or self.runtime.is_ui_busy():
+            return False
+        if self._is_idle():
+            return True
+        oldest = min(items[0].queued_at for items in self._recipients.values())
+        return self._clock() - oldest >= self.max_wait_s
+
+    async def maybe_flush(self, force: bool = False) -> int:
+        """Main-loop hook: persist new replies, then deliver when idle or overdue; returns the number sent."""
+        if not self.enabled:
+            return 0
+        if not self._loaded:
+            await self._load_pending()
+        if not self._recipients:
+            return 0
+        await self._persist_new()
+        if not (force or self._due()):
+            return 0
+
+        delivered = 0
+        recipients = list(self._recipients)[: self.max_recipients_per_flush]
+        try:
+            async with self.runtime.ui_session("private_outbox"):
+                for recipient in recipients:
+                    sent, returned = await self._deliver(recipient)
+                    delivered += sent
+                    if not returned:
+                        # 恢复后仍不在聊天室，本轮不再打开其他私聊，剩余收件人下次再投递
+                        break
+        except Exception:
+            self.logger.error(f"Private outbox flush failed: {traceback.format_exc()}")
+        return delivered
+
+    async def _deliver(self, recipient: str) -> Tuple[int, bool]:
+        items = self._recipients.pop(recipient)
+        batch = items[: self.max_messages_per_session]
+        try:
+            sent, returned = self.user_manager.send_private_messages_to_user(recipient, [i.content for i in batch])
+        except Exception:
+            self.logger.error(f"Private reply session failed for {recipient}: {traceback.format_exc()}")
+            sent, returned = 0, False
+        self.sessions += 1
+
+        delivered, undelivered = batch[:sent], batch[sent:]
+        for item in undelivered:
+            item.attempts += 1
+        gave_up = [item for item in undelivered if item.attempts >= self.max_attempts]
+        done = {id(item) for item in delivered + gave_up}
+        remaining = [item for item in items if id(item) not in done]
+        if remaining:
+            # 有失败的收件人排到队尾，不阻塞其他人
+            self._recipients[recipient] = remaining
+
+        self.sent += len(delivered)
+        self.failed += len(gave_up)
+        try:
+            await PrivateMessageDAO.mark_sent(i.entry_id for i in delivered if i.entry_id is not None)
+            for item in undelivered:
+                if item.entry_id is not None:
+                    await PrivateMessageDAO.record_attempt(
+                        item.entry_id, item.attempts, failed=item.attempts >= self.max_attempts
+                    )
+        except Exception:
+            self.logger.warning(f"Failed to record private reply status: {traceback.format_exc()}")
+
+        if undelivered:
+            self.logger.warning(f"Private reply undelivered for {recipient}: {len(undelivered)} pending retry")
+        if not returned:
+            self.logger.warning(f"Private reply session for {recipient} did not return to the room")
+        self._emit(
+            "message.outbox.flush",
+            {
+                "nickname": recipient,
+                "messages": len(batch),
+                "sent": len(delivered),
+                "retry": len(undelivered) - len(gave_up),
+                "failed": len(gave_up),
+                "returned": returned,
+            },
+        )
+        return len(delivered), returned
+
+    async def close(self) -> None:
+        """Persist replies still queued so the next run delivers them."""
+        if self.enabled and self._recipients:
+            await self._persist_new()
+
+    def status(self) -> Dict[str, int]:
+        return {
+            "pending": self.pending_count(),
+            "recipients": len(self._recipients),
+            "sent": self.sent,
+            "failed": self.failed,
+            "sessions": self.sessions,
+        }
@@ -0,0 +1,229 @@
+"""
+电台候选预取（RadioPrefetcher）
+
+`:radio` 精选电台会在持有 UI 锁的情况下串行查询推荐歌曲的发行日期，旧歌则点击刷新后再查，
+最多 radio_max_refreshes 次。本管理器把这部分网络往返移出命令路径：
+
+- 空闲时（UI 锁空闲、消息队列为空、距上次抓取超过 idle_interval_s）短暂切到 QQ 音乐首页，
+  用一次 page_source 抓取当前可见的推荐候选；
+- 候选的发行日期通过线程池并发预解析，并按候选缓存「是否旧歌」的判定（verdict_ttl_s 过期）；
+- RadioCommand 读取到推荐后先查缓存，命中即可直接决定刷新与否；未命中时提交到同一线程池并限时等待。
+"""
+
+from __future__ import annotations
+
+import datetime as dt
+import threading
+import time
+import traceback
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FuturesTimeout
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional
+
+from ushareiplay.core.singleton import Singleton
+from ushareiplay.helpers.song_release import (
+    QQMusicSongReleaseLookup,
+    parse_release_date,
+    primary_topic,
+)
+
+
+DEFAULT_IDLE_INTERVAL_S = 900.0
+DEFAULT_MAX_WORKERS = 4
+DEFAULT_VERDICT_TTL_S = 6 * 3600.0
+DEFAULT_LOOKUP_TIMEOUT_S = 15.0
+
+
+@dataclass(frozen=True)
+class RadioVerdict:
+    """Pre-resolved release-date verdict for one recommendation candidate."""
+
+    topic: str
+    release_date: Optional[dt.date]
+    is_old: bool
+    resolved_at: float
+
+
+class RadioPrefetcher(Singleton):
+    """Background release-date pre-screening for radio recommendation candidates."""
+
+    def __init__(
+        self,
+        config: Optional[dict] = None,
+        *,
+        lookup: Optional[QQMusicSongReleaseLookup] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.config = config or {}
+        cfg = self.config.get("radio_prefetch", {}) or {}
+        self.enabled = bool(cfg.get("enabled", True))
+        self.idle_interval_s = float(cfg.get("idle_interval_s", DEFAULT_IDLE_INTERVAL_S))
+        self.verdict_ttl_s = float(cfg.get("verdict_ttl_s", DEFAULT_VERDICT_TTL_S))
+        self.lookup_timeout_s = float(cfg.get("lookup_timeout_s", DEFAULT_LOOKUP_TIMEOUT_S))
+        self.lookup = lookup or QQMusicSongReleaseLookup()
+        self._clock = clock
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, int(cfg.get("max_workers", DEFAULT_MAX_WORKERS))),
+            thread_name_prefix="radio-prefetch",
+        )
+        self._verdicts: Dict[str, RadioVerdict] = {}
+        self._pending: Dict[str, Future] = {}
+        self._lock = threading.RLock()
+        self._last_scrape = clock()
+        self.runtime = None
+        self.hits = 0
+        self.misses = 0
+
+    def configure_runtime(self, runtime) -> None:
+        """Runtime providing ``is_ui_busy()`` and ``ui_session(reason)`` (CommandRuntimeContext)."""
+        self.runtime = runtime
+
+    @property
+    def logger(self):
+        from ushareiplay.handlers.qq_music_handler import QQMusicHandler
+
+        return QQMusicHandler.instance().logger
+
+    def _cutoff(self) -> Optional[dt.date]:
+        filter_config = self.config.get("old_song_filter", {}) or {}
+        if not filter_config.get("enabled", True):
+            return None
+        return parse_release_date(filter_config.get("cutoff_date") or "2000-01-01")
+
+    # ------------------------------------------------------------------
+    # Verdict cache
+    # ------------------------------------------------------------------
+
+    def _fresh_verdict(self, topic: str) -> Optional[RadioVerdict]:
+        verdict = self._verdicts.get(topic)
+        if verdict is None:
+            return None
+        if self._clock() - verdict.resolved_at > self.verdict_ttl_s:
+            self._verdicts.pop(topic, None)
+            return None
+        return verdict
+
+    def _resolve(self, topic: str) -> RadioVerdict:
+        try:
+            release_date = parse_release_date(self.lookup.get_release_date(topic))
+        except Exception:
+            with self._lock:
+                self._pending.pop(topic, None)
+            raise
+        cutoff = self._cutoff()
+        verdict = RadioVerdict(
+            topic=topic,
+            release_date=release_date,
+            is_old=bool(release_date and cutoff and release_date < cutoff),
+            resolved_at=self._clock(),
+        )
+        # 判定入缓存与移出 pending 在同一把锁内完成，submit 不会在两者之间重复提交
+        with self._lock:
+            self._verdicts[topic] = verdict
+            self._pending.pop(topic, None)
+        return verdict
+
+    def submit(self, topics: Iterable[Optional[str]]) -> Dict[str, Future]:
+        """Queue release-date lookups for candidates without a fresh verdict; returns in-flight futures."""
+        futures: Dict[str, Future] = {}
+        for raw in topics:
+            topic = (raw or "").strip()
+            if not topic:
+                continue
+            with self._lock:
+                if self._fresh_verdict(topic) is not None:
+                    continue
+                future = self._pending.get(topic)
+                if future is None:
+                    future = self._executor.submit(self._resolve, topic)
+                    self._pending[topic] = future
+            futures[topic] = future
+        return futures
+
+    def verdict(self, topic: Optional[str], timeout: Optional[float] = None) -> Optional[RadioVerdict]:
+        """
+        Cached verdict for ``topic``; on a miss the lookup runs on the pool and is awaited up to
+        ``timeout`` (default lookup_timeout_s). Returns None when the lookup fails or times out.
+        """
+        topic = (topic or "").strip()
+        if not topic:
+            return None
+        cached = self._fresh_verdict(topic)
+        if cached is not None:
+            self.hits += 1
+            return cached
+        self.misses += 1
+        future = self.submit([topic]).get(topic)
+        if future is None:
+            return self._fresh_verdict(topic)
+        try:
+            return future.result(timeout=self.lookup_timeout_s if timeout is None else timeout)
+        except FuturesTimeout:
+            self.logger.warning(f"Release date lookup timed out for radio candidate: {topic}")
+        except Exception as exc:
+            self.logger.warning(f"Failed to query song release date for {topic}: {exc}")
+        return None
+
+    # ------------------------------------------------------------------
+    # Idle scraping
+    # ------------------------------------------------------------------
+
+    def scrape_candidates(self) -> List[str]:
+        """Read every visible collection recommendation topic from one QQ Music home snapshot."""
+        from ushareiplay.handlers.qq_music_handler import QQMusicHandler
+        from ushareiplay.handlers.soul_handler import SoulHandler
+
+        music_handler = QQMusicHandler.instance()
+        topics: List[str] = []
+        try:
+            if not music_handler.key_actions.switch_to_app():
+                return []
+            if not music_handler.navigate_to_home():
+                return []
+            snapshot = music_handler.page_snapshot()
+            if snapshot is None:
+                return []
+            for node in snapshot.find_all("collection_topic"):
+                topic = primary_topic(node.get("text"))
+                if topic and topic not in topics:
+                    topics.append(topic)
+        finally:
+            SoulHandler.instance().key_actions.switch_to_app()
+        self.submit(topics)
+        self.logger.info(f"Radio prefetch scraped {len(topics)} candidate(s): {topics}")
+        return topics
+
+    def _is_idle(self) -> bool:
+        from ushareiplay.core.message_queue import MessageQueue
+
+        if self.runtime is None or self.runtime.is_ui_busy():
+            return False
+        if MessageQueue.is_initialized() and MessageQueue.instance().get_queue_size() > 0:
+            return False
+        return True
+
+    async def maybe_prefetch(self) -> bool:
+        """Main-loop hook: scrape candidates when the bot has been idle long enough."""
+        if not self.enabled or self._clock() - self._last_scrape < self.idle_interval_s:
+            return False
+        if not self._is_idle():
+            return False
+        self._last_scrape = self._clock()
+        try:
+            async with self.runtime.ui_session("radio_prefetch"):
+                return bool(self.scrape_candidates())
+        except Exception:
+            self.logger.error(f"Radio prefetch failed: {traceback.format_exc()}")
+            return False
+
+    def status(self) -> dict:
+        return {
+            "verdicts": len(self._verdicts),
+            "pending": len(self._pending),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -67,6 +67,27 @@ class RecoveryManager(Singleton):
             self.logger.error(f"Error closing drawer {drawer_key}: {str(e)}")
             return False
 
+    def restore_after_abort(self, drawers=('online_drawer', 'slide_drawer'), max_back: int = 3) -> bool:
+        """
+        命令被中止（超时/取消）后把 UI 拉回聊天室：切回 Soul、关闭残留抽屉，再逐次返回直到看到 room_id。
+
+        Returns:
+            bool: 回到聊天室返回 True
+        """
+        try:
+            self.handler.key_actions.switch_to_app()
+            for drawer_key in drawers:
+                if self._is_drawer_visible(drawer_key):
+                    self.close_drawer(drawer_key)
+            for _ in range(max_back):
+                if self.handler.element_finder.try_find_element('room_id', log=False):
+                    return True
+                self.handler.key_actions.press_back()
+            return bool(self.handler.element_finder.try_find_element('room_id', log=False))
+        except Exception as e:
+            self.logger.error(f"Error restoring UI after aborted command: {str(e)}")
+            return False
+
     def _is_drawer_visible(self, drawer_key: str) -> bool:
         element = self.handler.element_finder.try_find_element(drawer_key, log=False)
         if not element:
@@ -7,6 +7,7 @@ from typing import Dict
 
 from tortoise.exceptions import IntegrityError
 
+from ushareiplay.core.command_cache import TIMER_CHANGED, invalidate_command_cache
 from ushareiplay.core.message_queue import MessageQueue
 from ushareiplay.core.singleton import Singleton
 
@@ -152,6 +153,8 @@ class TimerManager(Singleton):
 
         except Exception as e:
             self.logger.error(f"Error triggering timer {timer_key}: {str(e)}")
+        finally:
+            invalidate_command_cache(TIMER_CHANGED)
 
     async def _sanitize_db(self):
         """ORM 加载前用原生 SQL 修正不合法的 next_trigger 值（如带时区后缀）"""
@@ -226,6 +229,7 @@ class TimerManager(Singleton):
             except Exception as e:
                 self.logger.error(f"Error loading timer {t.key}: {str(e)}, skipping")
         self.logger.info(f"Loaded {len(self._timers)} timers from database")
+        invalidate_command_cache(TIMER_CHANGED)
 
     async def _migrate_from_json(self):
         """首次运行时从 timers.json 迁移数据到数据库"""
@@ -369,6 +373,7 @@ class TimerManager(Singleton):
             'next_trigger': next_trigger.isoformat(),
         }
         self.logger.info(f"Added timer {key}: {message} at {target_time}")
+        invalidate_command_cache(TIMER_CHANGED)
         return self._timers[key]
 
     async def fire_timer(self, timer_key: str) -> dict:
@@ -393,6 +398,7 @@ class TimerManager(Singleton):
             if deleted:
                 self._timers.pop(timer_key, None)
                 self.logger.info(f"Removed timer {timer_key}")
+                invalidate_command_cache(TIMER_CHANGED)
                 return True
             return False
         except Exception as e:
@@ -1,5 +1,7 @@
 """用户管理器：在在线列表中查找用户并打开其信息页等"""
 
+from typing import List, Tuple
+
 from ushareiplay.core.singleton import Singleton
 
 YELLOW_DUCK_NAME = "小黄鸭"  # 礼物列表兜底礼物，固定为列表首位，点击即送无需点赠送
@@ -158,12 +160,35 @@ class UserManager(Singleton):
 
         任意一步失败返回 False，不抛异常。
         """
+        sent, returned = self._send_private_session(nickname, [message])
+        return sent == 1 and returned
+
+    def send_private_messages_to_user(self, nickname: str, messages: List[str]) -> Tuple[int, bool]:
+        """
+        在同一次私聊会话中依次发送多条消息（只打开、返回一次），返回 (成功发送的条数, 是否回到聊天室)。
+
+        已发出的消息即使返回聊天室失败也计入，避免重试时重复发送。
+        """
+        return self._send_private_session(nickname, messages)
+
+    def _send_private_session(self, nickname: str, messages: List[str]) -> Tuple[int, bool]:
+        """打开与 nickname 的私聊页、逐条发送并返回聊天室；返回 (已发送条数, 是否回到聊天室)。
+
+        会话中途失败或返回入口找不到时，交给 RecoveryManager 把 UI 拉回聊天室。
+        """
+        sent, returned = self._run_private_session(nickname, messages)
+        if not returned:
+            returned = self._restore_room(nickname)
+        return sent, returned
+
+    def _run_private_session(self, nickname: str, messages: List[str]) -> Tuple[int, bool]:
+        sent = 0
         try:
             self.handler.key_actions.switch_to_app()
             open_result = self.open_user_profile_from_online_list(nickname)
             if 'error' in open_result:
                 self.logger.warning(f"打开用户资料页失败: {nickname}, error={open_result['error']}")
-                return False
+                return sent, False
 
             avatar = self.handler.element_finder.wait_for_element_clickable(
                 'sender_avatar',
@@ -171,10 +196,10 @@ class UserManager(Singleton):
             )
             if not avatar:
                 self.logger.warning(f"未找到头像入口: {nickname}")
-                return False
+                return sent, False
             if not self.handler.gesture_handler.click_element_at(avatar, y_ratio=0.7):
                 self.logger.warning(f"点击头像入口失败: {nickname}")
-                return False
+                return sent, False
 
             private_chat_btn = self.handler.element_finder.wait_for_element_clickable(
                 'private_chat_button',
@@ -182,31 +207,35 @@ class UserManager(Singleton):
             )
             if not private_chat_btn:
                 self.logger.warning(f"未找到私聊按钮: {nickname}")
-                return False
+                return sent, False
             private_chat_btn.click()
 
-            input_box = self.handler.element_finder.wait_for_element_clickable(
-                'private_message_input',
-                timeout=5,
-            )
-            if not input_box:
-                self.logger.warning(f"未找到私聊输入框: {nickname}")
-                return False
-            input_box.send_keys(message)
-
-            send_button = self.handler.element_finder.wait_for_element_clickable(
-                'private_message_send',
-                timeout=5,
-            )
-            if not send_button:
-                self.logger.warning(f"未找到私聊发送按钮: {nickname}")
-                return False
-            send_button.click()
-
-            return self._return_to_room_after_private_chat(nickname)
+            for message in messages:
+                input_box = self.handler.element_finder.wait_for_element_clickable(
+                    'private_message_input',
+                    timeout=5,
+                )
+                if not input_box:
+                    self.logger.warning(f"未找到私聊输入框: {nickname}")
+                    return sent, False
+                if not self.handler.key_actions.type_text(message, input_box):
+                    self.logger.warning(f"私聊输入失败: {nickname}")
+                    return sent, False
+
+                send_button = self.handler.element_finder.wait_for_element_clickable(
+                    'private_message_send',
+                    timeout=5,
+                )
+                if not send_button:
+                    self.logger.warning(f"未找到私聊发送按钮: {nickname}")
+                    return sent, False
+                send_button.click()
+                sent += 1
+
+            return sent, self._return_to_room_after_private_chat(nickname)
         except Exception as e:
             self.logger.error(f"私聊发送失败: {nickname}, error={e}")
-            return False
+            return sent, False
 
     def _return_to_room_after_private_chat(self, nickname: str) -> bool:
         """私聊发送后返回聊天室。"""
@@ -237,6 +266,17 @@ class UserManager(Singleton):
             self.logger.error(f"返回聊天室失败: {nickname}, error={e}")
             return False
 
+    def _restore_room(self, nickname: str) -> bool:
+        """私聊会话没能正常返回时恢复到聊天室。"""
+        try:
+            restored = bool(self.handler.controller.recovery_manager.restore_after_abort())
+        except Exception as e:
+            self.logger.error(f"私聊后恢复聊天室失败: {nickname}, error={e}")
+            return False
+        if not restored:
+            self.logger.warning(f"私聊后未能回到聊天室: {nickname}")
+        return restored
+
     def _close_online_drawer(self):
         """关闭在线用户抽屉"""
         recovery_manager = self.handler.controller.recovery_manager
@@ -8,6 +8,11 @@ from ushareiplay.models.exit_event import ExitEvent
 from ushareiplay.models.focus_event import FocusEvent
 from ushareiplay.models.timer import Timer
 from ushareiplay.models.receive_event import ReceiveEvent
+from ushareiplay.models.lyrics_entry import LyricsEntry
+from ushareiplay.models.play_history import PlayHistoryEntry
+from ushareiplay.models.private_message import PrivateMessage
+from ushareiplay.models.chat_message import ChatMessage
+from ushareiplay.models.workflow_step import WorkflowStep
 
-__all__ = ['User', 'SeatReservation', 'MessageInfo', 'Keyword', 'EnterEvent', 'ReturnEvent', 'ExitEvent', 'FocusEvent', 'Timer', 'ReceiveEvent']
+__all__ = ['User', 'SeatReservation', 'MessageInfo', 'Keyword', 'EnterEvent', 'ReturnEvent', 'ExitEvent', 'FocusEvent', 'Timer', 'ReceiveEvent', 'LyricsEntry', 'PlayHistoryEntry', 'PrivateMessage', 'ChatMessage', 'WorkflowStep']
  
\ No newline at end of file
@@ -0,0 +1,16 @@
+from tortoise import fields
+from tortoise.models import Model
+
+
+class ChatMessage(Model):
+    id = fields.IntField(pk=True)
+    nickname = fields.CharField(max_length=255, default="", index=True)
+    kind = fields.CharField(max_length=32, default="plain_chat")  # ChatIntakeKind.value
+    text = fields.TextField()  # 可见文本（命令含触发前缀）；全文索引见 chat_messages_fts
+    created_at = fields.DatetimeField(index=True)  # 收到消息的时间（写入为批量延迟，不能用 auto_now_add）
+
+    class Meta:
+        table = "chat_messages"
+
+    def __str__(self):
+        return f"ChatMessage({self.nickname}: {self.text} @ {self.created_at})"
@@ -0,0 +1,22 @@
+from tortoise import fields
+from tortoise.models import Model
+
+
+class LyricsEntry(Model):
+    id = fields.IntField(pk=True)
+    song_key = fields.CharField(max_length=255, unique=True)  # 归一化的 歌名|歌手（或查询词）
+    song = fields.CharField(max_length=255, default="")
+    singer = fields.CharField(max_length=255, default="")
+    raw_lines = fields.TextField(default="[]")  # JSON array：去空行后的原始歌词行
+    text_length = fields.IntField(default=0)  # 原始歌词总字符数（分组目标长度的依据）
+    line_max_width = fields.IntField(default=0)  # wrapped_lines / groups 对应的换行宽度
+    wrapped_lines = fields.TextField(default="[]")  # JSON array：按宽度换行后的行
+    groups = fields.TextField(default="[]")  # JSON array：默认分组（force_groups=0）
+    created_at = fields.DatetimeField(auto_now_add=True)
+    updated_at = fields.DatetimeField(auto_now=True)
+
+    class Meta:
+        table = "lyrics_cache"
+
+    def __str__(self):
+        return f"LyricsEntry({self.song_key}, chars={self.text_length})"
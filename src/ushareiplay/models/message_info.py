@@ -1,4 +1,5 @@
 from dataclasses import dataclass
+from typing import Optional
 
 
 @dataclass
@@ -9,3 +10,4 @@ class MessageInfo:
     silent: bool = False
     private_reply: bool = False
     sleep_exempt: bool = False
+    request_id: Optional[str] = None  # 控制接口请求 ID（见 core/control_server.py）
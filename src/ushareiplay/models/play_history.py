@@ -0,0 +1,20 @@
+from tortoise import fields
+from tortoise.models import Model
+
+
+class PlayHistoryEntry(Model):
+    id = fields.IntField(pk=True)
+    song = fields.CharField(max_length=255)
+    singer = fields.CharField(max_length=255, default="")
+    album = fields.CharField(max_length=255, default="")
+    requester = fields.CharField(max_length=255, default="")  # 切歌时的播放者（PlaylistState.player_name）
+    playlist = fields.CharField(max_length=255, default="")  # 当前歌单名称
+    mode = fields.CharField(max_length=32, default="unknown")  # QQMusicHandler.list_mode
+    release_date = fields.CharField(max_length=16, null=True)  # ISO 日期，未知为 NULL
+    played_at = fields.DatetimeField(index=True)  # 检测到切歌的时间（写入为批量延迟，不能用 auto_now_add）
+
+    class Meta:
+        table = "play_history"
+
+    def __str__(self):
+        return f"PlayHistoryEntry({self.song} - {self.singer} @ {self.played_at})"
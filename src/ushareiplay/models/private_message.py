@@ -0,0 +1,18 @@
+from tortoise import fields
+from tortoise.models import Model
+
+
+class PrivateMessage(Model):
+    id = fields.IntField(pk=True)
+    recipient = fields.CharField(max_length=255, index=True)
+    content = fields.TextField()
+    status = fields.CharField(max_length=16, default="pending", index=True)  # pending / sent / failed
+    attempts = fields.IntField(default=0)  # 已尝试投递的私聊会话次数
+    created_at = fields.DatetimeField(auto_now_add=True)
+    sent_at = fields.DatetimeField(null=True)
+
+    class Meta:
+        table = "private_messages"
+
+    def __str__(self):
+        return f"PrivateMessage(to={self.recipient}, status={self.status}, attempts={self.attempts})"
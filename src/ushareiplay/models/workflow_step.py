@@ -0,0 +1,23 @@
+from tortoise import fields
+from tortoise.models import Model
+
+
+class WorkflowStep(Model):
+    id = fields.IntField(pk=True)
+    workflow = fields.CharField(max_length=64)  # 例如 post_party_create
+    run_key = fields.CharField(max_length=128, index=True)  # 一次运行：<party_id>@<创建时间>
+    party_id = fields.CharField(max_length=64, null=True, index=True)
+    step = fields.CharField(max_length=128)
+    command = fields.TextField()
+    status = fields.CharField(max_length=16, default="pending")  # pending / done / skipped / failed / blocked
+    attempts = fields.IntField(default=0)
+    error = fields.TextField(null=True)
+    created_at = fields.DatetimeField(auto_now_add=True)
+    updated_at = fields.DatetimeField(auto_now=True)
+
+    class Meta:
+        table = "workflow_steps"
+        unique_together = (("run_key", "step"),)
+
+    def __str__(self):
+        return f"WorkflowStep({self.run_key}/{self.step}: {self.status}, attempts={self.attempts})"
@@ -1,6 +1,7 @@
 import traceback
 from typing import Optional
 
+from ushareiplay.core.command_cache import SONG_CHANGED, invalidate_command_cache
 from ushareiplay.core.singleton import Singleton
 
 
@@ -137,6 +138,12 @@ class PlaybackBroadcaster(Singleton):
             else:
                 self.logger.warning("Song info missing required keys")
 
+    def _record_play_history(self, info: dict):
+        from ushareiplay.managers.play_history import PlayHistory
+
+        if PlayHistory.is_initialized():
+            PlayHistory.instance().record(info)
+
     def update(self):
         """
         更新播放信息，检测变化并处理
@@ -166,6 +173,7 @@ class PlaybackBroadcaster(Singleton):
 
             # 检查歌曲信息是否变化（只比较关键字段）
             if current_playback_key != last_playback_key:
+                invalidate_command_cache(SONG_CHANGED)
                 # 记录是否是第一次初始化
                 is_first_init = last_playback_key is None
                 # 只保存基本播放信息，不包含额外字段
@@ -174,6 +182,7 @@ class PlaybackBroadcaster(Singleton):
                 # 第一次初始化时不广播，避免启动时刷屏
                 if not is_first_init:
                     self.send_playing_message()
+                    self._record_play_history(info)
 
         except Exception:
             self.logger.error(f"Error in playback broadcaster update: {traceback.format_exc()}")
@@ -1,5 +1,6 @@
 from typing import Optional
 
+from ushareiplay.core.command_cache import PLAYLIST_CHANGED, invalidate_command_cache
 from ushareiplay.core.singleton import Singleton
 
 
@@ -33,6 +34,7 @@ class PlaylistState(Singleton):
         """设置播放器名称"""
         self._player_name = value
         self.logger.info(f"Player name set to: {value}")
+        invalidate_command_cache(PLAYLIST_CHANGED)
 
     @property
     def current_playlist_name(self) -> Optional[str]:
@@ -44,3 +46,4 @@ class PlaylistState(Singleton):
         """设置当前歌单名称"""
         self._current_playlist_name = value
         self.logger.info(f"Playlist name set to: {value}")
+        invalidate_command_cache(PLAYLIST_CHANGED)
@@ -1,3 +1,10 @@
+import json
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
 import pytest
 
 from ushareiplay.core.message_dispatch import MessageDispatch
@@ -26,3 +33,130 @@ def initialized_test_singletons():
     yield
 
     Singleton.reset_all_instances()
+
+
+class FakeClock:
+    """Manually advanced clock: ``now`` for monotonic callers, ``wall`` for datetime callers."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.wall = datetime(2026, 3, 10, 20, 0, 0)
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def fake_clock():
+    """Clock to inject as ``clock=``; tests move time by setting or incrementing ``now`` / ``wall``."""
+    return FakeClock()
+
+
+class StubServer:
+    """Threaded local HTTP/1.1 (keep-alive) server; subclasses implement ``respond(method, path, body)``."""
+
+    path = "/"
+
+    def __init__(self):
+        self.status = 200
+        self.delay_s = 0.0
+        self.requests = []
+        self.client_ports = set()
+        self.max_in_flight = 0
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _serve(self, method):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else b""
+                with stub._lock:
+                    stub.client_ports.add(self.client_address[1])
+                    stub._in_flight += 1
+                    stub.max_in_flight = max(stub.max_in_flight, stub._in_flight)
+                try:
+                    time.sleep(stub.delay_s)
+                    payload = json.dumps(stub.respond(method, self.path, body)).encode("utf-8")
+                    self.send_response(stub.status)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(payload)))
+                    self.end_headers()
+                    self.wfile.write(payload)
+                finally:
+                    with stub._lock:
+                        stub._in_flight -= 1
+
+            def do_GET(self):
+                self._serve("GET")
+
+            def do_POST(self):
+                self._serve("POST")
+
+            def log_message(self, *_args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.url = self.base_url + self.path
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def respond(self, method, path, body):
+        raise NotImplementedError
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class ClientSearchStub(StubServer):
+    """Local stand-in for QQ Music ``client_search_cp``: ``pubtimes`` maps keyword -> unix pubtime."""
+
+    path = "/soso/fcgi-bin/client_search_cp"
+
+    def __init__(self):
+        self.pubtimes = {}
+        super().__init__()
+
+    def respond(self, method, path, body):
+        keyword = parse_qs(urlparse(path).query).get("w", [""])[0]
+        with self._lock:
+            self.requests.append(keyword)
+        songs = [{"pubtime": self.pubtimes[keyword]}] if keyword in self.pubtimes else []
+        return {"data": {"song": {"list": songs}}}
+
+
+class ChatCompletionsStub(StubServer):
+    """Local OpenAI-compatible ``/v1/chat/completions``: ``replies`` maps user message -> assistant content."""
+
+    path = "/v1/chat/completions"
+
+    def __init__(self):
+        self.replies = {}
+        super().__init__()
+
+    def respond(self, method, path, body):
+        payload = json.loads(body or b"{}")
+        user_text = next((m["content"] for m in reversed(payload.get("messages", [])) if m.get("role") == "user"), "")
+        with self._lock:
+            self.requests.append(payload)
+        content = self.replies.get(user_text, '{"type": "reply", "content": "未能理解你的指令"}')
+        return {"choices": [{"message": {"role": "assistant", "content": content}}]}
+
+
+@pytest.fixture
+def client_search_stub():
+    stub = ClientSearchStub()
+    yield stub
+    stub.close()
+
+
+@pytest.fixture
+def chat_completions_stub():
+    stub = ChatCompletionsStub()
+    yield stub
+    stub.close()
@@ -143,3 +143,45 @@ def test_resolve_injection_nickname_uses_outlier_for_dollar_commands():
     assert runner.resolve_injection_nickname("＄info", "Console") == "Outlier"
     assert runner.resolve_injection_nickname(":info", "Console") == "Console"
     assert runner.resolve_injection_nickname("$info", "Alice") == "Alice"
+
+
+def test_send_control_command_uses_socket_and_falls_back_when_absent(tmp_path, monkeypatch):
+    import queue
+    import threading
+
+    from ushareiplay.core.control_server import DONE_EVENT, QUEUED_EVENT, ControlServer
+    from ushareiplay.core.observability import Observability, trace_context
+
+    runner = _load_runner()
+    monkeypatch.setattr(runner, "CONTROL_SOCKET", tmp_path / "control.sock")
+    assert runner.send_control_command(":help") is None
+
+    monkeypatch.chdir(tmp_path)
+    obs = Observability(run_id="run-1")
+    inputs = queue.Queue()
+    server = ControlServer(
+        config={"control_api": {"enabled": True, "socket_path": str(tmp_path / "control.sock")}},
+        input_queue=inputs,
+        obs=obs,
+    )
+    server.start()
+
+    def _tick():
+        item = inputs.get(timeout=5)
+        with trace_context(item["request_id"]):
+            obs.emit("queue.enqueue", ctx={"content": item["content"]})
+            obs.emit(QUEUED_EVENT, ctx={"commands": 1})
+            obs.emit("command.result", ctx={"prefix": "help", "success": True})
+            obs.emit(DONE_EVENT, ctx={"prefix": "help", "outcome": "done", "response": "ok"})
+
+    tick = threading.Thread(target=_tick)
+    tick.start()
+    try:
+        reply = runner.send_control_command(":help", nickname="Outlier", timeout_s=5)
+    finally:
+        tick.join()
+        server.stop()
+
+    verdict = runner.assert_control_result(reply)
+    assert verdict["ok"] is True
+    assert verdict["last_command_result"]["ctx"]["prefix"] == "help"
@@ -5,6 +5,10 @@ from queue import Queue
 import pytest
 
 from ushareiplay.core.app_controller import AppController
+from ushareiplay.core.control_server import ControlServer
+from ushareiplay.core.loop_watchdog import LoopWatchdog
+from ushareiplay.core.metrics import MetricsServer
+from ushareiplay.core.tick_profiler import TickProfiler
 
 
 class DriverAware:
@@ -70,6 +74,16 @@ def controller_without_init(driver=None):
     controller._is_reinitializing = False
     controller.logger = FakeLogger()
     controller.obs = FakeObserver()
+    controller.profiler = TickProfiler(config={}, obs=controller.obs)
+    controller.watchdog = LoopWatchdog(config={"loop_watchdog": {"enabled": False}})
+    controller.metrics_server = MetricsServer(config={})
+    controller.control_server = ControlServer(input_queue=None, obs=controller.obs)
+    controller._radio_prefetcher = None
+    controller._lyrics_cache = None
+    controller._play_history = None
+    controller._private_outbox = None
+    controller._chat_archive = None
+    controller.post_party_create_automation = None
     controller.soul_handler = None
     return controller
 
@@ -0,0 +1,82 @@
+from datetime import datetime, timedelta
+from unittest.mock import Mock
+
+import pytest
+import pytest_asyncio
+
+from ushareiplay.core.chat_intake import classify_chat_line
+from ushareiplay.core.db_manager import DatabaseManager
+from ushareiplay.dal.chat_message_dao import ChatMessageDAO
+from ushareiplay.managers.chat_archive import ChatArchive
+
+
+@pytest_asyncio.fixture
+async def archive_db():
+    manager = DatabaseManager(db_url="sqlite://:memory:")
+    await manager.init()
+    yield
+    await manager.close()
+
+
+def make_archive(monkeypatch, clock, **cfg):
+    monkeypatch.setattr(ChatArchive, "logger", Mock())
+    ChatArchive.reset_instance()
+    return ChatArchive.initialize({"chat_archive": cfg}, clock=clock, now=lambda: clock.wall)
+
+
+def _line(nickname, text):
+    return classify_chat_line(f"souler[{nickname}]说：{text}")
+
+
+@pytest.mark.asyncio
+async def test_lines_are_buffered_then_written_in_batches(archive_db, monkeypatch, fake_clock):
+    archive = make_archive(monkeypatch, fake_clock, batch_size=3, flush_interval_s=10)
+    for i in range(2):
+        assert archive.record(_line("Alice", f"hello {i}"))
+    assert await archive.maybe_flush() == 0
+    assert await ChatMessageDAO.count() == 0
+
+    archive.record(_line("Bob", ":play 晴天"))
+    assert await archive.maybe_flush() == 3
+    archive.record(_line("Bob", "late"))
+    fake_clock.now = 11
+    assert await archive.maybe_flush() == 1
+    assert archive.status() == {"pending": 0, "written": 4, "pruned": 0}
+
+
+@pytest.mark.asyncio
+async def test_search_by_text_nickname_and_time(archive_db, monkeypatch, fake_clock):
+    archive = make_archive(monkeypatch, fake_clock)
+    for nickname, text in [("Alice", "今天想听周杰伦的歌"), ("Bob", ":play 周杰伦 晴天"), ("Alice", "Hi 大家好")]:
+        archive.record(_line(nickname, text))
+        fake_clock.wall += timedelta(minutes=1)
+
+    # 未落盘的缓冲在查询前写入；长词走 FTS，短词（含中文两字）走子串匹配，大小写不敏感
+    assert [m.nickname for m in await archive.search("周杰伦")] == ["Bob", "Alice"]
+    assert [m.text for m in await archive.search("杰伦", nickname="Alice")] == ["今天想听周杰伦的歌"]
+    assert [m.text for m in await archive.search("hi")] == ["Hi 大家好"]
+    assert [m.kind for m in await archive.search("晴天")] == ["command"]
+    start = datetime(2026, 3, 10, 20, 1)
+    assert [m.text for m in await archive.search(since=start, until=start + timedelta(minutes=1))] == [
+        ":play 周杰伦 晴天"
+    ]
+    assert await archive.search("不存在的内容") == []
+
+
+@pytest.mark.asyncio
+async def test_whole_days_past_retention_are_pruned_with_their_index(archive_db, monkeypatch, fake_clock):
+    archive = make_archive(monkeypatch, fake_clock, retention_days=2, prune_interval_s=3600)
+    for days_ago in (3, 2, 0):
+        fake_clock.wall = datetime(2026, 3, 10, 23, 0) - timedelta(days=days_ago)
+        archive.record(_line("Alice", f"周杰伦 day-{days_ago}"))
+    await archive.maybe_flush(force=True)
+    assert archive.pruned == 1
+
+    fake_clock.wall = datetime(2026, 3, 11, 0, 5)
+    fake_clock.now = 1800
+    await archive.maybe_flush()
+    assert archive.pruned == 1  # 未到清理间隔
+    fake_clock.now = 3600
+    await archive.maybe_flush()
+    assert [m.text for m in await archive.search("周杰伦")] == ["周杰伦 day-0"]
+    assert archive.pruned == 2
@@ -0,0 +1,180 @@
+import asyncio
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+
+import pytest
+import pytest_asyncio
+
+from ushareiplay.core.base_command import BaseCommand
+from ushareiplay.core.command_cache import (
+    LEVEL_CHANGED,
+    PLAYLIST_CHANGED,
+    SONG_CHANGED,
+    CommandResultCache,
+    invalidate_command_cache,
+)
+from ushareiplay.core.db_manager import DatabaseManager
+from ushareiplay.commands.mode import ModeCommand
+from ushareiplay.commands.next import NextCommand
+from ushareiplay.dal.user_dao import UserDAO
+from ushareiplay.handlers.qq_music_handler import QQMusicHandler
+from ushareiplay.managers.command_manager import CommandManager
+
+
+class FakeRuntime:
+    def __init__(self):
+        self.controller = SimpleNamespace()
+        self.events = []
+        self.session_reasons = []
+
+    def emit(self, event, **kwargs):
+        self.events.append(event)
+
+    @asynccontextmanager
+    async def ui_session(self, reason):
+        self.session_reasons.append(reason)
+        yield
+
+
+class QueueCommand(BaseCommand):
+    """Stands in for :playlist — each uncached call is a device round trip."""
+
+    cache_ttl_s = 60.0
+    cache_invalidated_by = (SONG_CHANGED,)
+
+    def __init__(self):
+        self.calls = 0
+
+    def cache_key(self, message_info, parameters):
+        return "queue" if not parameters else None
+
+    async def do_process(self, message_info, parameters):
+        self.calls += 1
+        return {"playlist": f"queue v{self.calls}"}
+
+    async def process(self, message_info, parameters):
+        return await self.do_process(message_info, parameters)
+
+
+def make_manager():
+    runtime = FakeRuntime()
+    manager = CommandManager.__new__(CommandManager)
+    manager.__init__()
+    manager._runtime = runtime
+    manager._logger = SimpleNamespace(info=lambda *_: None, error=lambda *_: None, warning=lambda *_: None)
+    manager._handler = SimpleNamespace(config={"system_users": ["Console"]})
+    return manager, runtime
+
+
+def run(manager, command, nickname, parameters=()):
+    message_info = SimpleNamespace(content=":playlist", nickname=nickname)
+    command_info = {
+        "parameters": list(parameters),
+        "prefix": "playlist",
+        "response_template": "{playlist}",
+        "error_template": "error {error}",
+    }
+    return asyncio.run(manager.process_command(command, message_info, command_info))
+
+
+def test_repeat_requests_are_answered_from_memory_until_invalidated(fake_clock):
+    CommandResultCache.initialize({}, clock=fake_clock)
+    manager, runtime = make_manager()
+    command = QueueCommand()
+
+    assert run(manager, command, "Console") == "queue v1 @Console"
+    assert run(manager, command, "Console") == "queue v1 @Console"
+    assert command.calls == 1
+    assert runtime.session_reasons == ["command:playlist"]
+    assert "command.cache_hit" in runtime.events
+
+    invalidate_command_cache(SONG_CHANGED)
+    assert run(manager, command, "Console") == "queue v2 @Console"
+
+    fake_clock.now = 61
+    assert run(manager, command, "Console") == "queue v3 @Console"
+    # 带参数（播放操作）从不走缓存
+    run(manager, command, "Console", ["周杰伦"])
+    run(manager, command, "Console", ["周杰伦"])
+    assert command.calls == 5
+
+
+def test_config_ttl_override_and_errors_are_not_cached(fake_clock):
+    cache = CommandResultCache.initialize(
+        {"command_cache": {"ttl_s": {"playlist": 0}}}, clock=fake_clock
+    )
+    manager, _ = make_manager()
+    command = QueueCommand()
+
+    run(manager, command, "Console")
+    run(manager, command, "Console")
+    assert command.calls == 2
+
+    cache.put("k", {"error": "boom"}, 60)
+    assert cache.get("k") is None
+
+
+@pytest_asyncio.fixture
+async def user_db():
+    manager = DatabaseManager(db_url="sqlite://:memory:")
+    await manager.init()
+    yield
+    await manager.close()
+
+
+@pytest.mark.asyncio
+async def test_level_changes_invalidate_through_user_save(user_db, fake_clock):
+    cache = CommandResultCache.initialize({}, clock=fake_clock)
+    user = await UserDAO.get_or_create("Alice")
+    cache.put("LevelCommand:self:Alice", {"message": "L1"}, 300, (LEVEL_CHANGED,))
+
+    user.heat_value = 10
+    await user.save(update_fields=["heat_value"])
+    assert cache.get("LevelCommand:self:Alice") == {"message": "L1"}
+
+    await UserDAO.update_level(user.id, 3)
+    assert cache.get("LevelCommand:self:Alice") is None
+
+
+def _music_handler(mode_keys=()):
+    handler = QQMusicHandler.__new__(QQMusicHandler)
+    handler.logger = SimpleNamespace(info=lambda *_: None, warning=lambda *_: None, error=lambda *_: None)
+    handler.play_mode_key = "list"
+    handler._prepare_music_playback = lambda query: {"song": query, "singer": "周杰伦"}
+    handler.tap_selected_result = lambda queue=False: True
+    handler.key_actions = SimpleNamespace(switch_to_app=lambda: True, press_back=lambda: None)
+    found = iter(mode_keys)
+    handler.element_finder = SimpleNamespace(wait_for_any_element=lambda keys: (next(found), object()))
+    handler.gesture_handler = SimpleNamespace(click_element_at=lambda element: True)
+    return handler
+
+
+def _cached_queue_and_info(cache):
+    cache.put("PlaylistCommand:queue", {"playlist": "v1"}, 60, (SONG_CHANGED, PLAYLIST_CHANGED))
+    cache.put("InfoCommand:info", {"play_mode": "顺序播放"}, 10, (SONG_CHANGED, PLAYLIST_CHANGED))
+
+
+def test_play_next_drops_cached_queue_and_info(fake_clock):
+    cache = CommandResultCache.initialize({}, clock=fake_clock)
+    handler = _music_handler()
+    command = NextCommand(SimpleNamespace(soul_handler=SimpleNamespace(), music_handler=handler))
+    _cached_queue_and_info(cache)
+
+    assert asyncio.run(command.do_process(None, ["晴天"])) == {"song": "晴天", "singer": "周杰伦"}
+    assert cache.get("PlaylistCommand:queue") is None
+    assert cache.get("InfoCommand:info") is None
+
+
+def test_mode_change_drops_cached_info_but_same_mode_keeps_it(fake_clock):
+    cache = CommandResultCache.initialize({}, clock=fake_clock)
+    handler = _music_handler(["play_mode_list", "play_mode_single"])
+    command = ModeCommand(SimpleNamespace(soul_handler=SimpleNamespace(), music_handler=handler))
+    _cached_queue_and_info(cache)
+
+    assert asyncio.run(command.do_process(None, ["0"]))["message"] == "已经是顺序播放模式"
+    assert cache.get("InfoCommand:info") == {"play_mode": "顺序播放"}
+
+    assert asyncio.run(command.do_process(None, ["1"]))["message"] == "成功切换到单曲循环模式"
+    assert handler.play_mode_key == "single"
+    assert cache.get("InfoCommand:info") is None
+    assert cache.get("PlaylistCommand:queue") is None
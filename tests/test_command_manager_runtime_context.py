@@ -191,7 +191,7 @@ def test_handle_message_commands_merges_existing_private_reply(monkeypatch):
 
     captured = {}
 
-    async def _fake_process(command, message_info, command_info):
+    async def _fake_process(command, message_info, command_info, user=None):
         captured["content"] = message_info.content
         captured["private_reply"] = message_info.private_reply
         return None
@@ -227,7 +227,7 @@ def test_handle_message_commands_private_reply_keeps_confirmation_public(monkeyp
         ]
     )
 
-    async def _fake_process(_command, _message_info, _command_info):
+    async def _fake_process(_command, _message_info, _command_info, user=None):
         return "ok result @Console"
 
     monkeypatch.setattr(manager, "get_command", lambda _cmd: object())
@@ -264,7 +264,7 @@ def test_handle_message_commands_private_reply_error_routes_private(monkeypatch)
         ]
     )
 
-    async def _fake_process(_command, _message_info, _command_info):
+    async def _fake_process(_command, _message_info, _command_info, user=None):
         return "error boom @Console"
 
     monkeypatch.setattr(manager, "get_command", lambda _cmd: object())
@@ -0,0 +1,159 @@
+import asyncio
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+import pytest_asyncio
+
+from ushareiplay.core.command_pipeline import CommandPipeline
+from ushareiplay.core.db_manager import DatabaseManager
+from ushareiplay.core.rate_limiter import BucketStore, RateLimiter
+from ushareiplay.dal.user_dao import UserDAO
+from ushareiplay.managers.command_manager import CommandManager
+from ushareiplay.models.message_info import MessageInfo
+
+
+@pytest_asyncio.fixture
+async def pipeline_db():
+    manager = DatabaseManager(db_url="sqlite://:memory:")
+    await manager.init()
+    yield
+    await manager.close()
+
+
+class _Runtime:
+    """UI lane guarded by a real lock, like AppController.ui_session."""
+
+    def __init__(self):
+        self.ui_lock = asyncio.Lock()
+
+    def emit(self, event, **kwargs):
+        pass
+
+    @asynccontextmanager
+    async def ui_session(self, reason):
+        async with self.ui_lock:
+            yield
+
+
+class _HoldsUiFirst:
+    """The first call keeps the UI lane until released (a page wait inside the session)."""
+
+    def __init__(self):
+        self.release = asyncio.Event()
+        self.ran = []
+
+    async def process(self, message_info, parameters):
+        self.ran.append(message_info.nickname)
+        if len(self.ran) == 1:
+            await self.release.wait()
+        return {"x": message_info.nickname}
+
+
+def _manager(monkeypatch, system_users=()):
+    monkeypatch.setattr("ushareiplay.managers.command_manager.MessageDispatch.instance", MagicMock)
+    manager = CommandManager.instance()
+    manager._logger = MagicMock()
+    monkeypatch.setattr(manager, "_handler", SimpleNamespace(config={"system_users": list(system_users)}))
+    manager.initialize_parser(
+        [{"prefix": p, "level": 1, "response_template": "{x}", "error_template": "{error}"} for p in ("play", "next")]
+    )
+    monkeypatch.setattr(manager, "get_command", lambda prefix: SimpleNamespace(prefix=prefix))
+    return manager
+
+
+@pytest.mark.asyncio
+async def test_next_commands_are_enriched_while_the_ui_session_is_busy(monkeypatch, fake_clock):
+    manager = _manager(monkeypatch)
+    runtime = _Runtime()
+    manager.configure_runtime(runtime)
+    RateLimiter.initialize({"rate_limit": {"enabled": True}}, store=BucketStore(), clock=fake_clock)
+    command = _HoldsUiFirst()
+    monkeypatch.setattr(manager, "get_command", lambda prefix: command)
+    looked_up = []
+
+    async def _get_or_create(nickname):
+        looked_up.append(nickname)
+        return SimpleNamespace(level=1)
+
+    monkeypatch.setattr(UserDAO, "get_or_create", _get_or_create)
+    batch = asyncio.create_task(
+        manager.execute_command_messages([MessageInfo(f":play s{i}", f"u{i}") for i in range(3)])
+    )
+    for _ in range(20):
+        await asyncio.sleep(0)
+
+    # 第一条命令占着 UI，后两条的解析与查库已经完成
+    assert runtime.ui_lock.locked() and command.ran == ["u0"]
+    assert looked_up == ["u0", "u1", "u2"]
+
+    command.release.set()
+    assert await batch == 3
+    assert command.ran == ["u0", "u1", "u2"]
+    # 限流与等级校验共用流水线查到的用户，每条命令只查一次库
+    assert looked_up == ["u0", "u1", "u2"]
+
+
+@pytest.mark.asyncio
+async def test_lookups_run_ahead_of_a_slow_command_within_the_lookahead(monkeypatch):
+    manager = _manager(monkeypatch, system_users=("Console",))
+    looked_up = []
+
+    async def _get_or_create(nickname):
+        looked_up.append(nickname)
+        return SimpleNamespace(level=1)
+
+    monkeypatch.setattr(UserDAO, "get_or_create", _get_or_create)
+    messages = [MessageInfo(content=f":play s{i}", nickname=f"u{i}") for i in range(6)]
+    messages.insert(1, MessageInfo(content="hello", nickname="chat"))
+    messages.insert(2, MessageInfo(content=":next", nickname="Console"))
+    executed, seen_during_first = [], []
+
+    async def _execute(prepared):
+        executed.append((prepared.message_info.nickname, prepared.prefix))
+        if len(executed) == 1:
+            for _ in range(20):  # 第一条命令占着 UI
+                await asyncio.sleep(0)
+            seen_during_first.extend(looked_up)
+
+    await CommandPipeline(manager, lookahead=2).run(messages, _execute)
+
+    assert executed == (
+        [("u0", "play"), ("chat", None), ("Console", "next")] + [(f"u{i}", "play") for i in range(1, 6)]
+    )
+    # 执行段之前的缓冲放着无效消息与系统用户（都不查库），enrich 段手里的 u1 即为提前量上限
+    assert seen_during_first == ["u0", "u1"]
+    assert looked_up == [f"u{i}" for i in range(6)]
+
+
+@pytest.mark.asyncio
+async def test_user_saved_after_lookup_is_refetched_before_execution(pipeline_db, monkeypatch):
+    manager = _manager(monkeypatch)
+    levels = []
+
+    async def _execute(prepared):
+        levels.append((prepared.message_info.nickname, prepared.user.level))
+        if prepared.message_info.nickname == "Alice":
+            bob = await UserDAO.get_or_create("Bob")
+            bob.level = 3
+            await bob.save()
+
+    messages = [MessageInfo(content=":play a", nickname="Alice"), MessageInfo(content=":play b", nickname="Bob")]
+    await CommandPipeline(manager).run(messages, _execute)
+
+    assert levels == [("Alice", 0), ("Bob", 3)]
+
+
+@pytest.mark.asyncio
+async def test_failing_command_stops_the_batch_without_leaking_the_stages(monkeypatch):
+    manager = _manager(monkeypatch, system_users=("Console",))
+    messages = [MessageInfo(content=":play a", nickname="Console") for _ in range(10)]
+
+    async def _execute(prepared):
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        await CommandPipeline(manager, lookahead=1).run(messages, _execute)
+    pending = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+    assert pending == []
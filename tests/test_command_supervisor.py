@@ -0,0 +1,122 @@
+import asyncio
+import threading
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+
+from ushareiplay.core.command_supervisor import CommandCancelled, CommandSupervisor, bound_timeout, checkpoint
+from ushareiplay.core.ui.element_finder import ElementFinder
+from ushareiplay.managers.command_manager import CommandManager
+
+
+def _supervisor(clock, **cfg):
+    CommandSupervisor.reset_instance()
+    return CommandSupervisor.initialize({"command_deadline": cfg}, clock=clock)
+
+
+def test_waits_are_capped_to_the_deadline_and_raise_once_it_passes(fake_clock):
+    supervisor = _supervisor(fake_clock, default_s=30, timeout_s={"lyrics": 5})
+
+    assert bound_timeout(10) == 10  # 命令之外不受影响
+    with pytest.raises(CommandCancelled) as exc:
+        with supervisor.scope("lyrics"):
+            assert bound_timeout(10) == 5
+            fake_clock.now = 4
+            assert bound_timeout(10) == 1
+            fake_clock.now = 5
+            checkpoint()
+    assert exc.value.timed_out
+    assert supervisor.status() == {"running": None, "elapsed_s": None, "timeouts": 1, "cancelled": 0}
+
+
+def test_element_finder_polls_are_cancellation_checkpoints(fake_clock):
+    supervisor = _supervisor(fake_clock, default_s=60, probe_interval_s=0)
+    requests = iter([None, None, "agent_spool"])
+    supervisor.add_cancel_probe(lambda: next(requests))
+    owner = SimpleNamespace(driver=MagicMock(), config={"elements": {}}, logger=MagicMock())
+    owner.driver.find_element.side_effect = Exception("not there")
+    finder = ElementFinder(owner)
+
+    with pytest.raises(CommandCancelled) as exc:
+        with supervisor.scope("playlist"):
+            # 底层 except Exception 不会吞掉取消
+            finder.wait_for_element_polling("id", "x", timeout=30, poll_frequency=0.001)
+    assert exc.value.reason == "agent_spool"
+    assert owner.driver.find_element.call_count == 1
+
+
+class _Runtime:
+    def __init__(self):
+        self.events = []
+
+    def emit(self, event, **kwargs):
+        self.events.append((event, kwargs.get("ctx")))
+
+    @asynccontextmanager
+    async def ui_session(self, reason):
+        yield
+
+
+def _manager(monkeypatch):
+    runtime = _Runtime()
+    CommandManager.reset_instance()
+    manager = CommandManager.initialize()
+    manager.configure_runtime(runtime)
+    manager._logger = MagicMock()
+    recovery = MagicMock()
+    recovery.restore_after_abort.return_value = True
+    from ushareiplay.managers import recovery_manager
+
+    monkeypatch.setattr(recovery_manager.RecoveryManager, "instance", classmethod(lambda cls: recovery))
+    return manager, runtime, recovery
+
+
+def test_stuck_command_times_out_and_restores_ui(monkeypatch, fake_clock):
+    _supervisor(fake_clock, timeout_s={"radio": 0.05}, default_s=5)
+    manager, runtime, recovery = _manager(monkeypatch)
+
+    class _Stuck:
+        async def process(self, message_info, parameters):
+            await asyncio.sleep(10)
+
+    info = {"prefix": "radio", "retry": True}
+    result = asyncio.run(
+        manager._execute_command(_Stuck(), SimpleNamespace(nickname="Alice"), info, [], False)
+    )
+
+    assert result == {"error": "执行超时（0.05 秒），已中止"}
+    recovery.restore_after_abort.assert_called_once()
+    event, ctx = runtime.events[-1]
+    assert (event, ctx["prefix"], ctx["reason"], ctx["ui_restored"]) == ("command.timeout", "radio", "timeout", True)
+    assert CommandSupervisor.instance().running is None
+
+
+def test_console_cancel_from_another_thread_interrupts_blocking_wait(monkeypatch, fake_clock):
+    supervisor = _supervisor(fake_clock, default_s=30)
+    manager, runtime, _recovery = _manager(monkeypatch)
+    started = threading.Event()
+
+    class _BlockingWaits:
+        async def process(self, message_info, parameters):
+            started.set()
+            while True:  # 模拟同步 UI 等待链：只在检查点让出
+                checkpoint()
+                await asyncio.sleep(0)
+                threading.Event().wait(0.005)
+
+    def _console():
+        started.wait(2)
+        assert supervisor.cancel_running("console") == "playlist"
+
+    thread = threading.Thread(target=_console)
+    thread.start()
+    result = asyncio.run(
+        manager._execute_command(_BlockingWaits(), SimpleNamespace(nickname="Bob"), {"prefix": "playlist"}, [], False)
+    )
+    thread.join()
+
+    assert result == {"error": "命令已被取消"}
+    assert runtime.events[-1][0] == "command.cancelled"
+    assert supervisor.cancel_running("console") is None
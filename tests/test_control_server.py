@@ -0,0 +1,217 @@
+import asyncio
+import json
+import queue
+import socket
+import threading
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+
+from ushareiplay.core.command_supervisor import CommandSupervisor
+from ushareiplay.core.control_server import DONE_EVENT, EXPANDED_EVENT, QUEUED_EVENT, ControlServer
+from ushareiplay.core.message_queue import MessageQueue
+from ushareiplay.core.observability import Observability, trace_context
+from ushareiplay.core.runtime_services import AgentCommandSpool
+from ushareiplay.managers.command_manager import CommandManager
+from ushareiplay.models.message_info import MessageInfo
+
+
+@pytest.fixture
+def obs(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return Observability(run_id="test-run")
+
+
+@pytest.fixture
+def server(obs, tmp_path):
+    inputs = queue.Queue()
+    control = ControlServer(
+        config={"control_api": {"enabled": True, "socket_path": str(tmp_path / "control.sock")}},
+        input_queue=inputs,
+        obs=obs,
+    )
+    control.start()
+    assert control.listening
+    yield control, inputs
+    control.stop()
+    assert not (tmp_path / "control.sock").exists()
+
+
+def _request(control, *messages):
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(str(control.socket_path))
+        stream = sock.makefile("rwb")
+        replies = []
+        for message in messages:
+            stream.write((json.dumps(message) + "\n").encode("utf-8"))
+            stream.flush()
+            while True:
+                reply = json.loads(stream.readline())
+                replies.append(reply)
+                if reply["type"] not in ("accepted", "event"):
+                    break
+        return replies
+
+
+def _fake_main_loop(obs, inputs):
+    """Stand-in for the monitor tick: queue the command, execute it, report completion."""
+    item = inputs.get(timeout=5)
+    with trace_context(item["request_id"]):
+        obs.emit("queue.enqueue", ctx={"content": item["content"], "source": item["source"]})
+        obs.emit(QUEUED_EVENT, ctx={"commands": 1})
+        obs.emit("command.result", ctx={"prefix": "help", "success": True})
+        obs.emit(DONE_EVENT, ctx={"prefix": "help", "outcome": "done", "response": "ok @Console"})
+    obs.emit("state.snapshot", ctx={})  # 无关事件不会回传
+
+
+def test_command_round_trip_streams_traced_events_and_returns_result(server, obs):
+    control, inputs = server
+    loop = threading.Thread(target=_fake_main_loop, args=(obs, inputs))
+    loop.start()
+
+    replies = _request(control, {"op": "command", "id": "r1", "content": ":help"})
+    loop.join()
+
+    assert [r["type"] for r in replies] == ["accepted", "event", "event", "event", "event", "result"]
+    assert [r["event"]["event"] for r in replies if r["type"] == "event"] == [
+        "queue.enqueue", QUEUED_EVENT, "command.result", DONE_EVENT
+    ]
+    assert all(r["event"]["trace_id"] == "r1" for r in replies if r["type"] == "event")
+    result = replies[-1]
+    assert (result["id"], result["ok"], result["queued"]) == ("r1", True, 1)
+    assert result["commands"] == [{"prefix": "help", "outcome": "done", "response": "ok @Console"}]
+    assert control.status()["pending"] == 0
+
+
+def test_status_cancel_ping_errors_and_timeout(server, obs):
+    control, inputs = server
+    obs.write_status({"foreground_app": "Soul"})
+    CommandSupervisor.reset_instance()
+    supervisor = CommandSupervisor.initialize({})
+
+    with supervisor.scope("playlist") as scope:
+        replies = _request(
+            control,
+            {"op": "status"},
+            {"op": "cancel", "id": "c1"},
+            {"op": "ping"},
+            {"op": "command", "content": "  "},
+            {"op": "reboot"},
+            {"op": "command", "id": "slow", "content": ":next", "timeout_s": 0.2, "stream": False},
+        )
+        assert scope.reason == "agent_socket"
+    status, cancelled, pong, bad, unknown, timed_out = [r for r in replies if r["type"] != "accepted"]
+
+    assert status["status"]["foreground_app"] == "Soul" and status["command"]["running"] == "playlist"
+    assert (cancelled["id"], cancelled["prefix"]) == ("c1", "playlist")
+    assert pong["run_id"] == "test-run"
+    assert bad["error"] == "empty content" and unknown["type"] == "error"
+    assert (timed_out["ok"], timed_out["error"], timed_out["queued"]) == (False, "timeout", None)
+    assert inputs.get_nowait() == {
+        "content": ":next", "source": "agent_socket", "nickname": "Console", "request_id": "slow"
+    }
+
+
+class _Runtime:
+    def __init__(self, obs):
+        self.obs = obs
+
+    def emit(self, event, **kwargs):
+        self.obs.emit(event, **kwargs)
+
+
+def test_requested_commands_report_completion_under_their_trace(obs, monkeypatch):
+    events = []
+    obs.add_listener(events.append)
+    manager = CommandManager.instance()
+    manager.configure_runtime(_Runtime(obs))
+    manager._logger = MagicMock()
+    manager.initialize_parser([{"prefix": "help", "level": 1, "response_template": "{x}", "error_template": "{error}"}])
+    monkeypatch.setattr(manager, "_handler", SimpleNamespace(config={"system_users": ["Console"]}))
+    monkeypatch.setattr(manager, "get_command", lambda prefix: SimpleNamespace())
+
+    async def _process(command, message_info, command_info, user=None):
+        obs.emit("command.result", ctx={"prefix": "help"})
+        return "help text"
+
+    monkeypatch.setattr(manager, "process_command", _process)
+    monkeypatch.setattr("ushareiplay.managers.command_manager.MessageDispatch.instance", MagicMock)
+
+    # 带请求 ID 的命令不参与合并，请求方各自拿到结果
+    mq = MessageQueue.instance()
+    asyncio.run(mq.put_message(MessageInfo(":help", "Console", request_id="a"), source="agent_socket"))
+    asyncio.run(mq.put_message(MessageInfo(":help", "Console", request_id="b"), source="agent_socket"))
+    asyncio.run(mq.put_message(MessageInfo(":help", "Console")))
+    messages = asyncio.run(mq.get_all_messages()).values()
+    assert asyncio.run(manager.execute_runtime_queue_messages(messages)) == 3
+
+    assert [(e["event"], e.get("trace_id")) for e in events] == [
+        ("command.result", "a"), (DONE_EVENT, "a"),
+        ("command.result", "b"), (DONE_EVENT, "b"),
+        ("command.result", None),
+    ]
+    assert events[1]["ctx"] == {"prefix": "help", "outcome": "done", "response": "help text"}
+
+
+def test_spool_is_scanned_at_the_fallback_interval(tmp_path):
+    clock = SimpleNamespace(now=0.0)
+    inputs = queue.Queue()
+    spool = AgentCommandSpool(input_queue=inputs, command_dir=tmp_path, clock=lambda: clock.now)
+    spool.poll_interval_s = 5
+    (tmp_path / "1.cmd").write_text(":help", encoding="utf-8")
+    spool.drain()
+    (tmp_path / "2.cmd").write_text(":next", encoding="utf-8")
+    clock.now = 4
+    spool.drain()
+    assert inputs.qsize() == 1
+    clock.now = 5
+    spool.drain()
+    assert [inputs.get_nowait()["content"] for _ in range(2)] == [":help", ":next"]
+
+
+def test_invalid_failing_and_expanded_requests_always_report_done(obs, monkeypatch):
+    events = []
+    obs.add_listener(events.append)
+    manager = CommandManager.instance()
+    manager.configure_runtime(_Runtime(obs))
+    manager._logger = MagicMock()
+    manager.initialize_parser([{"prefix": "help", "level": 1, "response_template": "{x}", "error_template": "{error}"}])
+    monkeypatch.setattr(manager, "_handler", SimpleNamespace(config={"system_users": ["Console"]}))
+    monkeypatch.setattr(manager, "get_command", lambda prefix: SimpleNamespace())
+    monkeypatch.setattr("ushareiplay.managers.command_manager.MessageDispatch.instance", MagicMock)
+
+    async def _process(command, message_info, command_info, user=None):
+        if message_info.request_id == "boom":
+            raise RuntimeError("driver gone")
+        return "ok"
+
+    monkeypatch.setattr(manager, "process_command", _process)
+    with pytest.raises(RuntimeError):
+        asyncio.run(manager.execute_command_messages([
+            MessageInfo(":nosuch", "Console", request_id="bad"),
+            MessageInfo(":help", "Console", request_id="boom"),
+        ]))
+    asyncio.run(manager.execute_runtime_queue_messages([MessageInfo(":help;:help", "Console", request_id="two")]))
+
+    done = [(e.get("trace_id"), e["ctx"]["outcome"]) for e in events if e["event"] == DONE_EVENT]
+    assert done == [("bad", "invalid"), ("boom", "error"), ("two", "done"), ("two", "done")]
+    assert [e["ctx"] for e in events if e["event"] == EXPANDED_EVENT] == [{"extra": 1}]
+
+
+def test_expanded_request_waits_for_every_part(server, obs):
+    control, inputs = server
+
+    def _loop():
+        item = inputs.get(timeout=5)
+        with trace_context(item["request_id"]):
+            obs.emit(QUEUED_EVENT, ctx={"commands": 1})
+            obs.emit(EXPANDED_EVENT, ctx={"extra": 1})
+            obs.emit(DONE_EVENT, ctx={"prefix": "help", "outcome": "done", "response": "a"})
+            obs.emit(DONE_EVENT, ctx={"prefix": "help", "outcome": "done", "response": "b"})
+
+    loop = threading.Thread(target=_loop)
+    loop.start()
+    result = _request(control, {"op": "command", "id": "x", "content": ":help;:help", "stream": False})[-1]
+    loop.join()
+    assert [c["response"] for c in result["commands"]] == ["a", "b"]
@@ -311,7 +311,11 @@ def test_status_reporter_uses_supplied_screen_description():
             "soul_ui_state": "InChatReady",
             "qqmusic_ui_state": "Unknown",
             "anchors": ["message_content"],
-            "pipeline": {"ui_lock": "unlocked", "queue_size": 0},
+            "pipeline": {
+                "ui_lock": "unlocked",
+                "queue_size": 0,
+                "queue": {"depth": {"console": 0, "timer": 0, "chat": 0}, "coalesced": 0, "dropped": {}},
+            },
             "business": {
                 "party_id_current": "456",
                 "party_id_target": "123",
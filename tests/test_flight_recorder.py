@@ -0,0 +1,159 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+from selenium.common.exceptions import WebDriverException
+
+from ushareiplay.core.driver_decorator import with_driver_recovery
+from ushareiplay.core.flight_recorder import FlightRecorder
+from ushareiplay.core.runtime_context import DriverRecoveryContext, EventRuntimeContext
+from ushareiplay.core.session_replay import RecordingDriver
+from ushareiplay.managers.event_manager import EventManager
+
+
+CONFIG = {
+    "soul": {"elements": {"input_box_entry": "cn.soulapp.android:id/tvChat"}},
+    "qq_music": {"elements": {"playlist_entry": "//*[@text='播放列表']"}},
+}
+
+
+class FakeObserver:
+    def __init__(self):
+        self.events = []
+
+    def emit(self, name, **kwargs):
+        self.events.append((name, kwargs))
+
+
+class FakeDriver:
+    def __init__(self, sources):
+        self._sources = list(sources)
+
+    @property
+    def page_source(self):
+        return self._sources.pop(0)
+
+    def find_element(self, by, value):
+        return SimpleNamespace(by=by, value=value)
+
+    def execute_script(self, script, args):
+        return "ok"
+
+    def press_keycode(self, code):
+        return None
+
+
+def make_recorder(tmp_path, clock, **cfg):
+    cfg = {"max_snapshots": 2, "max_actions": 50, **cfg}
+    obs = FakeObserver()
+    recorder = FlightRecorder(
+        config={**CONFIG, "flight_recorder": cfg},
+        obs=obs,
+        dump_dir=tmp_path / "flight",
+        clock=clock,
+    )
+    return recorder, obs
+
+
+def test_ring_buffer_keeps_latest_distinct_snapshots_and_actions(tmp_path, fake_clock):
+    recorder, obs = make_recorder(tmp_path, fake_clock)
+    driver = RecordingDriver(FakeDriver(["<a/>", "<a/>", "<b/>", "<c/>"]), recorder)
+
+    for _ in range(4):
+        driver.page_source
+    driver.find_element("id", "cn.soulapp.android:id/tvChat")
+    driver.execute_script("mobile: clickGesture", {"x": 10, "y": 20})
+    driver.execute_script("mobile: shell", {"command": "dumpsys audio"})
+    driver.press_keycode(4)
+
+    assert recorder.stats()["snapshots"] == 2
+    directory = recorder.dump("unknown_page", {"consecutive": 1})
+
+    assert sorted(p.read_text() for p in (directory / "snapshots").glob("*.xml")) == ["<b/>", "<c/>"]
+    timeline = [json.loads(line) for line in (directory / "timeline.jsonl").read_text().splitlines()]
+    assert [e["op"] for e in timeline] == [
+        "page_source", "page_source", "page_source", "page_source", "action", "action", "shell", "action",
+    ]
+    assert timeline[1]["snapshot"] == timeline[0]["snapshot"]
+    assert timeline[4]["element_key"] == "input_box_entry"
+    assert timeline[5]["args"] == ["mobile: clickGesture", {"x": 10, "y": 20}]
+    assert timeline[7]["name"] == "press_keycode" and timeline[7]["args"] == [4]
+    meta = json.loads((directory / "meta.json").read_text())
+    assert meta["reason"] == "unknown_page" and meta["ctx"] == {"consecutive": 1}
+    assert obs.events[-1][0] == "flight.dump"
+
+
+def test_dump_is_rate_limited_per_reason(tmp_path, fake_clock):
+    recorder, _ = make_recorder(tmp_path, fake_clock, min_dump_interval_s=30)
+    recorder.record_page_source("<a/>", 0.01)
+
+    assert recorder.dump("unknown_page") is not None
+    fake_clock.now = 10
+    assert recorder.dump("unknown_page") is None
+    assert recorder.dump("driver_recovery") is not None
+    assert recorder.dump("unknown_page", force=True) is not None
+    fake_clock.now = 45
+    assert recorder.dump("unknown_page") is not None
+
+
+def test_disabled_recorder_keeps_nothing(tmp_path, fake_clock):
+    recorder, _ = make_recorder(tmp_path, fake_clock, enabled=False)
+    recorder.record_page_source("<a/>", 0.01)
+    recorder.record_action("press_keycode", [4], 0.01)
+
+    assert recorder.stats()["actions"] == 0
+    assert recorder.dump("crash") is None
+
+
+def test_driver_recovery_dumps_before_reinitializing(tmp_path, fake_clock):
+    recorder, _ = make_recorder(tmp_path, fake_clock)
+    recorder.record_page_source("<before/>", 0.01)
+    dumps_at_reinit = []
+
+    def reinitialize():
+        dumps_at_reinit.append(len(list((tmp_path / "flight").glob("*driver_recovery"))))
+        return True
+
+    class Worker:
+        driver_recovery_context = DriverRecoveryContext(
+            reinitialize_driver=reinitialize,
+            flight_recorder=recorder,
+        )
+
+        @with_driver_recovery(retry=False, op="write")
+        def press(self):
+            raise WebDriverException("session gone")
+
+    assert Worker().press() is None
+    assert dumps_at_reinit == [1]
+    meta = json.loads(next((tmp_path / "flight").glob("*/meta.json")).read_text())
+    assert meta["ctx"]["method"] == "press"
+
+
+def test_unknown_page_recovery_dumps_flight_recorder(tmp_path, fake_clock):
+    recorder, _ = make_recorder(tmp_path, fake_clock)
+    recorder.record_page_source("<unknown/>", 0.01)
+    manager = EventManager.__new__(EventManager)
+    logger = SimpleNamespace(debug=lambda *a, **k: None, warning=lambda *a, **k: None, error=lambda *a, **k: None)
+    manager._handler = SimpleNamespace(
+        logger=logger,
+        key_actions=SimpleNamespace(switch_to_app=lambda: True, press_back=lambda: True),
+    )
+    manager._logger = logger
+    manager._runtime = EventRuntimeContext(flight_recorder=recorder)
+    manager.event_modules = {}
+    manager.element_to_event = {}
+    manager._initialized = True
+    manager._consecutive_unknown_pages = 0
+
+    async def ready_source(**_kwargs):
+        return "<unknown/>"
+
+    manager._wait_page_source_ready_async = ready_source
+
+    outcome = asyncio.run(manager.react_to_page("<unknown/>"))
+
+    assert outcome["recovery"]["pressed_back"] is True
+    dumps = list((tmp_path / "flight").glob("*-unknown_page"))
+    assert len(dumps) == 1
+    assert (dumps[0] / "snapshots" / "000001.xml").read_text() == "<unknown/>"
@@ -83,6 +83,8 @@ async def test_unmatched_mention_resolves_to_command(monkeypatch):
     keyword_manager._config = {
         "llm": {"enabled": True, "api_key": "test"},
         "commands": [{"prefix": "play", "level": 1}],
+        # 覆盖 LLM 路径：关闭 LLM 之前的本地句式匹配
+        "intent_matcher": {"enabled": False},
     }
 
     async def _mock_find_keyword(_keyword, _username):
@@ -218,6 +220,7 @@ async def test_keyword_manager_resolves_root_config_from_controller(monkeypatch)
         "soul": {"room_owner": "Chainer"},
         "commands": [{"prefix": "play", "level": 1, "description": "播放歌曲"}],
         "llm": {"enabled": True, "api_key": "test-key"},
+        "intent_matcher": {"enabled": False},
     }
 
     # Simulate SoulHandler where handler.config is only root_config["soul"]
@@ -267,6 +270,7 @@ async def test_keyword_mention_with_room_owner_dispatches_properly(monkeypatch):
         "soul": {"room_owner": "Chainer"},
         "commands": [{"prefix": "play", "level": 1, "description": "播放歌曲"}],
         "llm": {"enabled": True, "api_key": "test-key"},
+        "intent_matcher": {"enabled": False},
     }
 
     async def _mock_find_keyword(_keyword, _username):
@@ -0,0 +1,104 @@
+import asyncio
+
+from ushareiplay.core.metrics import LLM_CALLS
+from ushareiplay.core.natural_language_resolver import NaturalLanguageResolver, NaturalLanguageResult
+
+
+COMMANDS = [
+    {"prefix": "play", "level": 1, "description": "播放指定歌曲"},
+    {"prefix": "next", "level": 0, "description": "切下一首歌"},
+]
+PLAY = '{"type": "command", "content": ":play 周杰伦 晴天"}'
+
+
+def make_resolver(stub, **cfg):
+    return NaturalLanguageResolver(
+        {"enabled": True, "api_key": "sk-test", "base_url": f"{stub.base_url}/v1", "timeout": 2, **cfg}
+    )
+
+
+def resolve(resolver, text, level=1, playback=None, user="Alice", room=None):
+    return resolver.resolve(text, user, level, COMMANDS, playback_info=playback, room_info=room)
+
+
+def test_repeated_phrases_are_served_from_cache_over_one_connection(chat_completions_stub):
+    chat_completions_stub.replies = {"放首晴天": PLAY, "放首晴天！": PLAY}
+    resolver = make_resolver(chat_completions_stub)
+
+    async def scenario():
+        first = await resolve(resolver, "放首晴天")
+        again = await resolve(resolver, "  放首晴天！")
+        other_level = await resolve(resolver, "放首晴天", level=0)
+        new_song = await resolve(resolver, "放首晴天", playback={"song": "七里香", "singer": "周杰伦"})
+        busier = await resolve(resolver, "放首晴天", room={"user_count": 12, "focus_count": 3})
+        other_user = await resolve(resolver, "放首晴天", user="Bob")
+        guest_room = await resolve(resolver, "放首晴天", room={"is_guest_room": True})
+        return first, again, other_level, new_song, busier, other_user, guest_room
+
+    first, again, other_level, new_song, busier, other_user, guest_room = asyncio.run(scenario())
+
+    assert first == again == busier == NaturalLanguageResult(type="command", content=":play 周杰伦 晴天")
+    assert other_level == new_song == other_user == guest_room == first
+    # 等级、当前歌曲、发言人与客房模式参与缓存键；在线人数不参与
+    assert len(chat_completions_stub.requests) == 5
+    assert len(chat_completions_stub.client_ports) == 1
+    assert chat_completions_stub.requests[0]["messages"][1]["content"] == "放首晴天"
+
+
+def test_replies_are_never_cached_so_each_speaker_gets_their_own_answer(chat_completions_stub):
+    resolver = make_resolver(chat_completions_stub)
+    playback = {"song": "晴天", "singer": "周杰伦", "player": "Alice", "playlist_name": "夜听"}
+
+    async def scenario():
+        for user in ("Alice", "Bob", "Alice"):
+            await resolve(resolver, "是我的歌单吗", playback=playback, user=user)
+        await resolve(resolver, "是我的歌单吗", playback={**playback, "player": "Bob"}, user="Bob")
+
+    asyncio.run(scenario())
+
+    speakers = [r["messages"][0]["content"].split("- 发言用户: ")[1].split("\n")[0] for r in chat_completions_stub.requests]
+    assert speakers == ["Alice", "Bob", "Alice", "Bob"]
+    assert resolver.cache.status()["entries"] == 0
+
+
+def test_identical_in_flight_requests_are_coalesced_and_concurrency_is_capped(chat_completions_stub):
+    chat_completions_stub.delay_s = 0.2
+    resolver = make_resolver(chat_completions_stub, max_concurrency=2)
+
+    async def scenario():
+        same = await asyncio.gather(*(resolve(resolver, "你好") for _ in range(5)))
+        distinct = await asyncio.gather(*(resolve(resolver, f"你好{i}") for i in range(4)))
+        return same, distinct
+
+    cached = LLM_CALLS.value("cached")
+    same, distinct = asyncio.run(scenario())
+
+    assert len(set(same)) == 1 and same[0].type == "reply"
+    assert len(chat_completions_stub.requests) == 1 + 4
+    assert chat_completions_stub.max_in_flight == 2
+    assert resolver.cache.status()["coalesced"] == 4
+    # 与合并请求同时进行的其他未命中请求不算作 cached
+    assert LLM_CALLS.value("cached") - cached == 4
+
+
+def test_failures_are_not_cached(chat_completions_stub):
+    chat_completions_stub.status = 500
+    resolver = make_resolver(chat_completions_stub)
+
+    assert asyncio.run(resolve(resolver, "放首晴天")) is None
+    chat_completions_stub.status = 200
+    chat_completions_stub.replies = {"放首晴天": PLAY}
+    assert asyncio.run(resolve(resolver, "放首晴天")).content == ":play 周杰伦 晴天"
+    assert len(chat_completions_stub.requests) == 2
+
+
+def test_static_prompt_is_rebuilt_only_when_commands_change():
+    resolver = NaturalLanguageResolver({"enabled": True})
+
+    text, version = resolver._static_prompt(COMMANDS, 1)
+    assert resolver._static_prompt([dict(c) for c in COMMANDS], 1) == (text, version)
+    assert resolver._static_prompt(COMMANDS, 1)[0] is text
+
+    changed = COMMANDS + [{"prefix": "vol", "level": 1, "description": "调整音量"}]
+    assert resolver._static_prompt(changed, 1)[1] != version
+    assert "`:vol`" in resolver._build_system_prompt("Alice", 1, changed)
@@ -0,0 +1,98 @@
+import asyncio
+import time
+import traceback
+
+from ushareiplay.core.loop_watchdog import LoopWatchdog, blocking_call_site
+
+
+class FakeObserver:
+    def __init__(self):
+        self.events = []
+
+    def emit(self, name, **kwargs):
+        self.events.append((name, kwargs))
+
+
+def _blocking_title_update():
+    time.sleep(0.35)
+
+
+def test_watchdog_dumps_main_stack_and_tasks_on_real_stall(tmp_path):
+    obs = FakeObserver()
+    stall_log = tmp_path / "stalls.log"
+    watchdog = LoopWatchdog(
+        config={"loop_watchdog": {"heartbeat_interval_s": 0.02, "stall_threshold_ms": 150}},
+        obs=obs,
+        stall_log_path=stall_log,
+    )
+
+    async def pending_worker():
+        await asyncio.sleep(10)
+
+    async def scenario():
+        watchdog.start()
+        worker = asyncio.create_task(pending_worker(), name="pending-worker")
+        await asyncio.sleep(0.05)
+        _blocking_title_update()
+        await asyncio.sleep(0.1)
+        worker.cancel()
+        await watchdog.stop()
+
+    asyncio.run(scenario())
+
+    names = [name for name, _ in obs.events]
+    assert names[0] == "loop.stall"
+    assert "loop.stall.end" in names
+    report = obs.events[0][1]["ctx"]
+    assert report["call_site"].endswith(":_blocking_title_update")
+    assert any("_blocking_title_update" in line for line in report["main_stack"])
+    assert "pending-worker" in [task["name"] for task in report["tasks"]]
+    assert watchdog.stall_counts() == [(report["call_site"], 1)]
+    assert "_blocking_title_update" in stall_log.read_text(encoding="utf-8")
+
+
+def test_check_reports_each_stall_episode_once(fake_clock):
+    obs = FakeObserver()
+    watchdog = LoopWatchdog(
+        config={"loop_watchdog": {"heartbeat_interval_s": 0.25, "stall_threshold_ms": 1000}},
+        obs=obs,
+        clock=fake_clock,
+    )
+    watchdog._last_beat = fake_clock.now
+
+    fake_clock.now += 0.5
+    assert watchdog.check() is None
+
+    fake_clock.now += 1.0
+    assert watchdog.check() is not None
+    fake_clock.now += 1.0
+    assert watchdog.check() is None
+
+    watchdog._last_beat = fake_clock.now
+    assert watchdog.check() is None
+
+    assert [name for name, _ in obs.events] == ["loop.stall", "loop.stall.end"]
+    assert watchdog.status()["stalls"] == 1
+    assert watchdog.status()["in_stall"] is False
+
+
+def test_blocking_call_site_prefers_package_frames():
+    stack = [
+        traceback.FrameSummary("/app/src/ushareiplay/core/app_controller.py", 10, "run_monitor_tick"),
+        traceback.FrameSummary("/app/src/ushareiplay/managers/room_name_manager.py", 42, "_update_title_ui"),
+        traceback.FrameSummary("/usr/lib/python3/urllib/request.py", 500, "urlopen"),
+    ]
+
+    assert blocking_call_site(stack) == "ushareiplay/managers/room_name_manager.py:42:_update_title_ui"
+    assert blocking_call_site([]) == "<unknown>"
+
+
+def test_disabled_watchdog_does_not_start_thread():
+    watchdog = LoopWatchdog(config={"loop_watchdog": {"enabled": False}})
+
+    async def scenario():
+        watchdog.start()
+        assert watchdog._thread is None
+        await watchdog.stop()
+
+    asyncio.run(scenario())
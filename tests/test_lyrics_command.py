@@ -1,7 +1,16 @@
+from contextlib import asynccontextmanager
 from types import SimpleNamespace
 from unittest.mock import MagicMock
 
+import pytest
+import pytest_asyncio
+
 from ushareiplay.commands.lyrics import LyricsCommand
+from ushareiplay.core.db_manager import DatabaseManager
+from ushareiplay.dal.lyrics_dao import LyricsDAO
+from ushareiplay.handlers.soul_handler import SoulHandler
+from ushareiplay.managers.command_manager import CommandManager
+from ushareiplay.managers.lyrics_cache import LyricsCache, lyrics_key
 
 
 def test_select_lyrics_tab_relocates_target_after_scroll():
@@ -24,3 +33,95 @@ def test_select_lyrics_tab_relocates_target_after_scroll():
     lyrics_tab.click.assert_called_once_with()
     container_marker.click.assert_not_called()
 
+
+
+LYRICS = "晴天 - 周杰伦\n\n故事的小黄花\nfrom the day we met you were the only one\n从出生那年就飘着"
+
+
+@pytest_asyncio.fixture
+async def lyrics_db():
+    manager = DatabaseManager(db_url="sqlite://:memory:")
+    await manager.init()
+    yield
+    await manager.close()
+
+
+def make_lyrics_command(fetch_results):
+    command = LyricsCommand.__new__(LyricsCommand)
+    command.controller = SimpleNamespace(config={"lyrics": {"line_max_width": 16}})
+    command.handler = MagicMock()
+    fetched = []
+
+    def fetch(query):
+        fetched.append(query)
+        return fetch_results.pop(0)
+
+    command.fetch_lyrics_text = fetch
+    return command, fetched
+
+
+@pytest.mark.asyncio
+async def test_lyrics_cache_answers_repeat_queries_without_device(lyrics_db):
+    cache = LyricsCache.initialize({"lyrics": {"line_max_width": 16}})
+    command, fetched = make_lyrics_command([{"text": LYRICS}])
+
+    first = await command.query_lyrics("晴天")
+    cache._memory.clear()
+    second = await command.query_lyrics("  晴天 ")
+    forced = await command.query_lyrics("晴天", 2)
+
+    assert fetched == ["晴天"]
+    assert first == second
+    assert first["groups"] == command.process_lyrics(LYRICS, max_width=16)
+    assert forced["groups"] == command.process_lyrics(LYRICS, max_width=16, force_groups=2)
+    record = await cache.get(lyrics_key("晴天"))
+    assert len(record.raw_lines) == 4
+    assert len(record.wrapped_lines) > len(record.raw_lines)
+
+
+@pytest.mark.asyncio
+async def test_lyrics_cache_keys_current_song_by_song_and_singer(lyrics_db, monkeypatch):
+    LyricsCache.initialize({})
+    command, fetched = make_lyrics_command([{"text": LYRICS}, {"error": "unused"}])
+    monkeypatch.setattr(
+        command,
+        "_current_song_info",
+        lambda: {"song": "晴天", "singer": "周杰伦", "album": "叶惠美"},
+    )
+
+    await command.query_lyrics("")
+    result = await command.query_lyrics("")
+
+    assert fetched == ["晴天 周杰伦 叶惠美"]
+    assert "groups" in result
+    assert await LyricsDAO.get_by_key(lyrics_key("晴天", "周杰伦")) is not None
+
+
+@pytest.mark.asyncio
+async def test_lyrics_warm_up_fetches_playing_song_once_while_idle(lyrics_db, monkeypatch):
+    clock = SimpleNamespace(now=0.0)
+    cache = LyricsCache.initialize({"lyrics_cache": {"warm_up_interval_s": 10}}, clock=lambda: clock.now)
+    command, fetched = make_lyrics_command([{"text": LYRICS}])
+    sessions = []
+
+    @asynccontextmanager
+    async def ui_session(reason):
+        sessions.append(reason)
+        yield
+
+    cache.configure_runtime(SimpleNamespace(is_ui_busy=lambda: False, ui_session=ui_session))
+    monkeypatch.setattr(cache, "_current_song", lambda: {"song": "晴天", "singer": "周杰伦", "album": "叶惠美"})
+    monkeypatch.setattr(CommandManager.instance(), "get_command", lambda name: command)
+    soul = SimpleNamespace(logger=MagicMock(), key_actions=SimpleNamespace(switch_to_app=lambda: True))
+    monkeypatch.setattr(SoulHandler, "_instance", soul, raising=False)
+    monkeypatch.setattr(SoulHandler, "_singleton_initialized", True, raising=False)
+
+    assert await cache.maybe_warm_up() is False
+    clock.now = 11
+    assert await cache.maybe_warm_up() is True
+    clock.now = 30
+    assert await cache.maybe_warm_up() is False
+
+    assert sessions == ["lyrics_warm_up"]
+    assert fetched == ["晴天 周杰伦 叶惠美"]
+    assert await LyricsDAO.get_by_key(lyrics_key("晴天", "周杰伦")) is not None
@@ -0,0 +1,95 @@
+import asyncio
+import logging
+from unittest.mock import MagicMock
+
+from ushareiplay.core.message_queue import MessageQueue
+from ushareiplay.models.message_info import MessageInfo
+
+
+def _queue(config=None, clock=None):
+    MessageQueue.reset_instance()
+    return MessageQueue.initialize(config, **({"clock": clock} if clock else {}))
+
+
+def _drain(queue):
+    return [(m.content, m.nickname) for m in asyncio.run(queue.get_all_messages()).values()]
+
+
+def _put(queue, content, nickname, source=None):
+    return asyncio.run(queue.put_message(MessageInfo(content=content, nickname=nickname), source=source))
+
+
+def test_drains_console_then_timer_then_chat_fifo_within_class():
+    queue = _queue()
+    _put(queue, ":play 晴天", "Alice")
+    _put(queue, ":mode 1", "Timer")
+    _put(queue, ":play 七里香", "Bob")
+    _put(queue, ":vol 8", "Console", source="agent_spool")
+
+    assert _drain(queue) == [
+        (":vol 8", "Console"),
+        (":mode 1", "Timer"),
+        (":play 晴天", "Alice"),
+        (":play 七里香", "Bob"),
+    ]
+    assert queue.get_queue_size() == 0
+
+
+def test_duplicate_commands_coalesce_within_window_and_upgrade_priority(fake_clock):
+    queue = _queue(clock=fake_clock)
+
+    assert _put(queue, ":next", "Alice") is True
+    assert _put(queue, ":next", "Bob") is False
+    assert _put(queue, ":play 晴天", "Alice") is True
+    assert _put(queue, ":play 晴天", "Bob") is True
+    assert _put(queue, "@Alice 谢谢", "Alice") and _put(queue, "@Alice 谢谢", "Alice")
+    assert _put(queue, ":next", "Console", source="console") is False
+
+    assert queue.status()["depth"] == {"console": 1, "timer": 0, "chat": 4}
+    assert queue.coalesced == 2
+    assert _drain(queue)[0] == (":next", "Alice")
+
+    fake_clock.now += 5
+    _put(queue, ":next", "Alice")
+    fake_clock.now += 5
+    assert _put(queue, ":next", "Bob") is True
+
+
+def test_source_caps_reject_and_stale_entries_expire_on_drain(fake_clock):
+    queue = _queue({"message_queue": {"source_caps": {"chat": 2}, "max_age_s": {"chat": 30, "timer": 0}}}, fake_clock)
+
+    assert _put(queue, ":play a", "Alice") and _put(queue, ":play b", "Bob")
+    assert _put(queue, ":play c", "Carol") is False
+    assert _put(queue, ":mode 1", "Timer") is True
+
+    fake_clock.now += 20
+    _put(queue, ":play c", "Carol")  # 仍满
+    fake_clock.now += 20
+    assert _drain(queue) == [(":mode 1", "Timer")]
+    assert queue.status()["dropped"] == {"cap": 2, "expired": 2}
+
+
+def test_rejected_chat_commands_notify_the_requester_once_and_drops_are_logged(monkeypatch, caplog):
+    dispatch = MagicMock()
+    monkeypatch.setattr("ushareiplay.core.message_dispatch.MessageDispatch.instance", lambda: dispatch)
+    queue = _queue({"message_queue": {"source_caps": {"chat": 1, "timer": 1}}})
+    caplog.set_level(logging.INFO, logger="ushareiplay.core.message_queue")
+
+    _put(queue, ":play a", "Alice")
+    _put(queue, ":play a", "Alice")
+    _put(queue, ":play b", "Bob")
+    _put(queue, ":play c", "Bob")
+    _put(queue, ":mode 1", "Timer")
+    _put(queue, ":mode 2", "Timer")
+
+    # 只有被上限拒绝的聊天用户收到提示，同一用户排空前只提示一次；合并与定时器来源只记日志
+    assert [c.args[0].nickname for c in dispatch.send_for_message_info.call_args_list] == ["Bob"]
+    assert "Bob" in dispatch.send_for_message_info.call_args.args[1]
+    messages = [r.getMessage() for r in caplog.records]
+    assert any("coalesced ':play a' from Alice" in m for m in messages)
+    assert sum("cap 1 reached" in m for m in messages) == 3
+
+    _drain(queue)
+    _put(queue, ":play a", "Alice")
+    _put(queue, ":play d", "Bob")
+    assert dispatch.send_for_message_info.call_count == 2
@@ -0,0 +1,120 @@
+import asyncio
+import urllib.request
+
+import pytest
+
+from ushareiplay.core.db_manager import DatabaseManager
+from ushareiplay.core.message_queue import MessageQueue
+from ushareiplay.core.metrics import (
+    DB_QUERY,
+    QUEUE_DEPTH,
+    MetricsRegistry,
+    MetricsServer,
+)
+from ushareiplay.core.runtime_services import RuntimeQueueDrainer
+from ushareiplay.models.message_info import MessageInfo
+
+
+def test_registry_renders_prometheus_text():
+    registry = MetricsRegistry()
+    commands = registry.counter("bot_commands_total", "Commands", ("command", "outcome"))
+    depth = registry.gauge("bot_queue_depth", "Depth", ("queue",))
+    latency = registry.histogram("bot_latency_seconds", "Latency", ("command",), buckets=(0.1, 1.0))
+
+    commands.labels("play", "ok").inc()
+    commands.labels("play", "ok").inc(2)
+    depth.labels("message_queue").set_function(lambda: 3)
+    latency.labels("play").observe(0.05)
+    latency.labels("play").observe(0.5)
+    latency.labels("play").observe(5)
+
+    text = registry.render()
+
+    assert "# TYPE bot_commands_total counter" in text
+    assert 'bot_commands_total{command="play",outcome="ok"} 3' in text
+    assert 'bot_queue_depth{queue="message_queue"} 3' in text
+    assert 'bot_latency_seconds_bucket{command="play",le="0.1"} 1' in text
+    assert 'bot_latency_seconds_bucket{command="play",le="1"} 2' in text
+    assert 'bot_latency_seconds_bucket{command="play",le="+Inf"} 3' in text
+    assert 'bot_latency_seconds_count{command="play"} 3' in text
+    assert 'bot_latency_seconds_sum{command="play"} 5.55' in text
+
+
+def test_registry_rejects_bad_labels_and_conflicting_definitions():
+    registry = MetricsRegistry()
+    counter = registry.counter("x_total", "x", ("a",))
+
+    assert registry.counter("x_total", "x", ("a",)) is counter
+    with pytest.raises(ValueError):
+        registry.gauge("x_total", "x", ("a",))
+    with pytest.raises(ValueError):
+        counter.labels("1", "2")
+    with pytest.raises(ValueError):
+        counter.inc()
+
+
+def test_metrics_server_serves_registry_over_http():
+    registry = MetricsRegistry()
+    registry.counter("served_total", "served").inc()
+    server = MetricsServer(config={"metrics": {"enabled": True, "port": 0}}, registry=registry)
+    server.start()
+    try:
+        host, port = server.address
+        with urllib.request.urlopen(f"http://{host}:{port}/metrics", timeout=5) as resp:
+            body = resp.read().decode("utf-8")
+            content_type = resp.headers["Content-Type"]
+    finally:
+        server.stop()
+
+    assert "served_total 1" in body
+    assert content_type.startswith("text/plain; version=0.0.4")
+    assert server.address is None
+
+
+def test_disabled_metrics_server_does_not_bind():
+    server = MetricsServer(config={})
+    server.start()
+    assert server.address is None
+    server.stop()
+
+
+def test_queue_depth_tracks_message_queue_and_drainer():
+    class FakeCommandManager:
+        async def execute_runtime_queue_messages(self, messages, send_screen_message):
+            assert QUEUE_DEPTH.value("runtime_drainer") == 2
+            return len(list(messages))
+
+    async def scenario():
+        queue = MessageQueue.instance()
+        await queue.put_message(MessageInfo(content=":play a", nickname="u"))
+        await queue.put_message(MessageInfo(content=":play b", nickname="u"))
+        assert QUEUE_DEPTH.value("message_queue") == 2
+        drainer = RuntimeQueueDrainer(
+            handler=None,
+            command_manager=FakeCommandManager(),
+            send_screen_message=lambda _text: None,
+        )
+        await drainer.drain()
+
+    asyncio.run(scenario())
+
+    assert QUEUE_DEPTH.value("message_queue") == 0
+    assert QUEUE_DEPTH.value("runtime_drainer") == 0
+
+
+def test_database_manager_times_queries():
+    async def scenario():
+        db = DatabaseManager("sqlite://:memory:")
+        before = DB_QUERY.count("execute_query_dict")
+        await db.init()
+        try:
+            from tortoise import connections
+
+            await connections.get("default").execute_query_dict("SELECT 1")
+        finally:
+            await db.close()
+        return before
+
+    before = asyncio.run(scenario())
+
+    assert DB_QUERY.count("execute_query_dict") > before
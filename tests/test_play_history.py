@@ -0,0 +1,122 @@
+from datetime import datetime, timedelta
+from unittest.mock import Mock
+
+import pytest
+import pytest_asyncio
+
+from ushareiplay.core.db_manager import DatabaseManager
+from ushareiplay.dal.play_history_dao import PlayHistoryDAO
+from ushareiplay.managers.play_history import PlayHistory
+from ushareiplay.state.playback_broadcaster import PlaybackBroadcaster
+
+
+@pytest_asyncio.fixture
+async def history_db():
+    manager = DatabaseManager(db_url="sqlite://:memory:")
+    await manager.init()
+    yield
+    await manager.close()
+
+
+class FakeTime:
+    def __init__(self):
+        self.mono = 0.0
+        self.wall = datetime(2026, 5, 1, 20, 0, 0)
+
+    def clock(self):
+        return self.mono
+
+    def now(self):
+        return self.wall
+
+    def advance(self, seconds):
+        self.mono += seconds
+        self.wall += timedelta(seconds=seconds)
+
+
+def make_history(fake, **cfg):
+    config = {"play_history": {"flush_interval_s": 30, "batch_size": 3, **cfg}}
+    history = PlayHistory.initialize(config, clock=fake.clock, now=fake.now)
+    history._loaded = True
+    return history
+
+
+def song(name, singer="周杰伦", **extra):
+    return {"song": name, "singer": singer, "album": "叶惠美", **extra}
+
+
+@pytest.mark.asyncio
+async def test_records_are_read_from_memory_and_flushed_in_batches(history_db):
+    fake = FakeTime()
+    history = make_history(fake)
+
+    history.record(song("晴天", release_date="2003-07-31"), requester="Alice", playlist="收藏", mode="favorites")
+    fake.advance(200)
+    history.record(song("七里香"), requester="Alice", playlist="收藏", mode="favorites")
+
+    assert [r.song for r in history.recent()] == ["七里香", "晴天"]
+    assert await history.maybe_flush() == 2  # flush_interval_s elapsed
+
+    history.record(song("稻香"))
+    history.record(song("夜曲"))
+    assert await history.maybe_flush() == 0  # neither interval nor batch_size reached
+    history.record(song("夜曲"))
+    assert await history.maybe_flush() == 3
+    assert await PlayHistoryDAO.count() == 5
+
+    latest = (await PlayHistoryDAO.recent(1))[0]
+    assert latest.song == "夜曲"
+    first = (await PlayHistoryDAO.recent(5))[-1]
+    assert (first.requester, first.playlist, first.mode, first.release_date) == ("Alice", "收藏", "favorites", "2003-07-31")
+
+
+@pytest.mark.asyncio
+async def test_failed_flush_keeps_records_for_retry(history_db, monkeypatch):
+    fake = FakeTime()
+    history = make_history(fake)
+    monkeypatch.setattr(PlayHistory, "logger", Mock())
+    history.record(song("晴天"))
+
+    async def broken(_records):
+        raise RuntimeError("database is locked")
+
+    monkeypatch.setattr(PlayHistoryDAO, "bulk_insert", broken)
+    assert await history.maybe_flush(force=True) == 0
+    assert history.status()["pending"] == 1
+
+    monkeypatch.undo()
+    await history.close()
+    assert await PlayHistoryDAO.count() == 1
+
+
+@pytest.mark.asyncio
+async def test_restart_loads_recent_window_for_radio_dedup(history_db):
+    fake = FakeTime()
+    history = make_history(fake, radio_dedup_window_s=3600)
+    history.record(song("晴天"))
+    await history.close()
+
+    fake.advance(600)
+    PlayHistory.reset_instance()
+    restarted = PlayHistory.initialize({"play_history": {"radio_dedup_window_s": 3600}}, clock=fake.clock, now=fake.now)
+    await restarted.maybe_flush()
+
+    assert restarted.played_recently("晴天 ")
+    assert not restarted.played_recently("七里香")
+    fake.advance(3600)
+    assert not restarted.played_recently("晴天")
+
+
+def test_broadcaster_records_song_changes_after_first_init(monkeypatch):
+    fake = FakeTime()
+    history = PlayHistory.initialize({}, clock=fake.clock, now=fake.now)
+    broadcaster = PlaybackBroadcaster.initialize()
+    monkeypatch.setattr(broadcaster, "send_playing_message", lambda: None)
+
+    broadcaster._playback_info_cache = song("晴天")
+    broadcaster.update()
+    broadcaster.update()
+    broadcaster._playback_info_cache = song("七里香")
+    broadcaster.update()
+
+    assert [r.song for r in history.recent()] == ["七里香"]
@@ -0,0 +1,162 @@
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+import pytest_asyncio
+
+from ushareiplay.core.control_server import DONE_EVENT
+from ushareiplay.core.db_manager import DatabaseManager
+from ushareiplay.core.message_queue import MessageQueue
+from ushareiplay.core.observability import Observability, trace_context
+from ushareiplay.core.post_party_create_automation import DEFAULT_STEP_TIMEOUT_S, PostPartyCreateAutomation
+from ushareiplay.dal.workflow_step_dao import WorkflowStepDAO
+from ushareiplay.managers.command_manager import CommandManager
+from ushareiplay.managers.topic_manager import TopicManager
+
+
+STEPS = [
+    {"name": "notice", "command": ":notice 欢迎"},
+    {"name": "topic", "command": ":topic 华语"},
+    {"name": "playlist", "command": ":playlist 每日推荐", "after": ["notice", "topic"]},
+    {"name": "mode", "command": ":mode -1", "after": "playlist"},
+]
+
+
+@pytest_asyncio.fixture
+async def workflow_db():
+    manager = DatabaseManager(db_url="sqlite://:memory:")
+    await manager.init()
+    yield
+    await manager.close()
+
+
+@pytest.fixture
+def obs(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return Observability(run_id="test-run")
+
+
+def make_automation(obs, clock, **cfg):
+    controller = SimpleNamespace(
+        config={"soul": {"post_party_create": {"enabled": True, "steps": STEPS, **cfg}}},
+        logger=None,
+        obs=obs,
+        soul_handler=SimpleNamespace(party_id="FM15321640"),
+    )
+    return PostPartyCreateAutomation(controller, clock=clock, now=lambda: clock.wall)
+
+
+async def _execute(obs, failing=()):
+    """Stand-in for the queue drain: run every queued command and report its outcome under its request ID."""
+    messages = list((await MessageQueue.instance().get_all_messages()).values())
+    for message in messages:
+        ok = message.content not in failing
+        with trace_context(message.request_id):
+            obs.emit("command.result", ctx={"success": ok, "error": None if ok else "ui busy"})
+            obs.emit(DONE_EVENT, ctx={"outcome": "done", "response": ""})
+    return [message.content for message in messages]
+
+
+@pytest.fixture
+def topic_manager():
+    TopicManager.reset_instance()
+    yield TopicManager.initialize()
+    TopicManager.reset_instance()
+
+
+@pytest.mark.asyncio
+async def test_steps_run_in_dependency_waves_skip_satisfied_state_and_retry(workflow_db, obs, topic_manager, fake_clock):
+    await MessageQueue.instance().clear_queue()
+    topic_manager.current_topic = "华语"
+    events = []
+    obs.add_listener(events.append)
+    auto = make_automation(obs, fake_clock, retry_backoff_s=10, max_attempts=2)
+
+    await auto.on_command_ready()
+    await auto.on_party_created_new()
+    # 话题已是期望值，直接跳过；notice 单独成一波
+    assert await _execute(obs, failing={":notice 欢迎"}) == [":notice 欢迎"]
+    assert auto.status()["steps"]["topic"] == "skipped"
+
+    await auto.maybe_advance()
+    assert auto.status()["steps"]["notice"] == "pending"
+    fake_clock.now = 9
+    await auto.maybe_advance()
+    assert await _execute(obs) == []
+    fake_clock.now = 10
+    await auto.maybe_advance()
+    assert await _execute(obs) == [":notice 欢迎"]
+
+    await auto.maybe_advance()
+    assert await _execute(obs) == [":playlist 每日推荐"]
+    await auto.maybe_advance()
+    assert await _execute(obs) == [":mode -1"]
+    await auto.maybe_advance()
+    assert not auto.running
+
+    finished = [e for e in events if e["event"] == "automation.post_party_create.finished"]
+    assert finished[0]["ctx"]["done"] == 3 and finished[0]["ctx"]["skipped"] == 1
+    rows = {row.step: (row.status, row.attempts) for row in await WorkflowStepDAO.get_run(finished[0]["ctx"]["run"])}
+    assert rows == {"notice": ("done", 2), "topic": ("skipped", 0), "playlist": ("done", 1), "mode": ("done", 1)}
+
+
+@pytest.mark.asyncio
+async def test_restart_resumes_unfinished_steps_and_never_redoes_finished_ones(workflow_db, obs, topic_manager, fake_clock):
+    await MessageQueue.instance().clear_queue()
+    auto = make_automation(obs, fake_clock, max_attempts=1)
+    await auto.on_command_ready()
+    await auto.on_party_created_new()
+    assert await _execute(obs, failing={":topic 华语"}) == [":notice 欢迎", ":topic 华语"]
+    await auto.maybe_advance()
+    # topic 失败，依赖它的步骤不再执行
+    assert auto.status()["steps"] == {"notice": "done", "topic": "failed", "playlist": "blocked", "mode": "blocked"}
+    assert not auto.running
+
+    # 进程重启：未新建派对，就绪后续跑同一运行，只执行未完成的步骤
+    fake_clock.wall = datetime(2026, 3, 10, 20, 10, 0)
+    restarted = make_automation(obs, fake_clock)
+    await restarted.on_command_ready()
+    assert await _execute(obs) == [":topic 华语"]
+    await restarted.maybe_advance()
+    assert await _execute(obs) == [":playlist 每日推荐"]
+    await restarted.maybe_advance()
+    assert await _execute(obs) == [":mode -1"]
+    await restarted.maybe_advance()
+    assert not restarted.running
+
+    # 重启循环里再次收到“新建派对”信号：全部已完成，不再重做
+    again = make_automation(obs, fake_clock)
+    await again.on_command_ready()
+    await again.on_party_created_new()
+    assert await _execute(obs) == []
+    assert not again.running
+
+
+@pytest.mark.asyncio
+async def test_plain_text_and_invalid_steps_are_never_resent(workflow_db, obs, topic_manager, monkeypatch, fake_clock):
+    await MessageQueue.instance().clear_queue()
+    manager = CommandManager.instance()
+    manager.configure_runtime(SimpleNamespace(emit=obs.emit))
+    manager._logger = MagicMock()
+    manager.initialize_parser([{"prefix": "help", "level": 1, "response_template": "{x}", "error_template": "{error}"}])
+    monkeypatch.setattr(manager, "_handler", SimpleNamespace(config={"system_users": ["Console"]}))
+    monkeypatch.setattr(manager, "get_command", lambda prefix: SimpleNamespace())
+    monkeypatch.setattr(manager, "process_command", AsyncMock(return_value="ok"))
+    monkeypatch.setattr("ushareiplay.managers.command_manager.MessageDispatch.instance", MagicMock)
+
+    auto = make_automation(obs, fake_clock, steps=None, commands=["欢迎大家", ":nosuch", ":help;:help"])
+    await auto.on_command_ready()
+    await auto.on_party_created_new()
+    assert auto.status()["steps"]["欢迎大家"] == "done"
+
+    # 真实的出队执行：无效命令报告 invalid，两条 :help 都结束后这一步才完成
+    queued = list((await MessageQueue.instance().get_all_messages()).values())
+    await manager.execute_runtime_queue_messages(queued)
+    await auto.maybe_advance()
+    assert auto.status()["steps"] == {"欢迎大家": "done", ":nosuch": "failed", ":help;:help": "done"}
+    assert not auto.running
+
+    fake_clock.now = DEFAULT_STEP_TIMEOUT_S + 1
+    await auto.maybe_advance()
+    assert await MessageQueue.instance().get_all_messages() == {}
@@ -0,0 +1,134 @@
+from contextlib import asynccontextmanager
+from unittest.mock import Mock
+
+import pytest
+import pytest_asyncio
+
+from ushareiplay.core.db_manager import DatabaseManager
+from ushareiplay.core.message_dispatch import MessageDispatch
+from ushareiplay.core.message_queue import MessageQueue
+from ushareiplay.managers.private_outbox import PrivateOutbox
+from ushareiplay.models.message_info import MessageInfo
+from ushareiplay.models.private_message import PrivateMessage
+
+
+@pytest_asyncio.fixture
+async def outbox_db():
+    manager = DatabaseManager(db_url="sqlite://:memory:")
+    await manager.init()
+    yield
+    await manager.close()
+
+
+class _Runtime:
+    def __init__(self):
+        self.events = []
+        self.sessions = []
+
+    def is_ui_busy(self):
+        return False
+
+    def emit(self, event, **kwargs):
+        self.events.append((event, kwargs["ctx"]))
+
+    @asynccontextmanager
+    async def ui_session(self, reason):
+        self.sessions.append(reason)
+        yield
+
+
+class _UserManager:
+    def __init__(self):
+        self.sessions = []
+        self.fail_after = {}
+        self.stranded = set()
+
+    def send_private_messages_to_user(self, nickname, messages):
+        self.sessions.append((nickname, list(messages)))
+        return min(len(messages), self.fail_after.get(nickname, len(messages))), nickname not in self.stranded
+
+
+def make_outbox(monkeypatch, clock, **cfg):
+    users = _UserManager()
+    monkeypatch.setattr(PrivateOutbox, "user_manager", users)
+    monkeypatch.setattr(PrivateOutbox, "logger", Mock())
+    PrivateOutbox.reset_instance()
+    outbox = PrivateOutbox.initialize({"private_outbox": cfg}, clock=clock)
+    runtime = _Runtime()
+    outbox.configure_runtime(runtime)
+    return outbox, users, runtime
+
+
+@pytest.mark.asyncio
+async def test_replies_are_grouped_per_recipient_and_delivered_when_idle(outbox_db, monkeypatch, fake_clock):
+    outbox, users, runtime = make_outbox(monkeypatch, fake_clock, max_recipients_per_flush=2)
+    dispatch = MessageDispatch.instance()
+    dispatch.configure_runtime(runtime)
+
+    for nickname, reply in [("Alice", "a1"), ("Bob", "b1"), ("Alice", "a2"), ("Carol", "c1")]:
+        assert dispatch.send_for_message_info(
+            MessageInfo(content="$info", nickname=nickname, private_reply=True), reply
+        ) is True
+    assert users.sessions == []
+
+    await MessageQueue.instance().put_message(MessageInfo(content=":next", nickname="Dave"))
+    assert await outbox.maybe_flush() == 0  # 队列非空且未超时：只落库不投递
+    assert await PrivateMessage.filter(status="pending").count() == 4
+    await MessageQueue.instance().clear_queue()
+
+    assert await outbox.maybe_flush() == 3
+    assert users.sessions == [("Alice", ["a1", "a2"]), ("Bob", ["b1"])]
+    assert runtime.sessions == ["private_outbox"]
+    assert await outbox.maybe_flush() == 1
+    assert await PrivateMessage.filter(status="sent").count() == 4
+    assert [ctx["sent"] for event, ctx in runtime.events if event == "message.outbox.flush"] == [2, 1, 1]
+
+
+@pytest.mark.asyncio
+async def test_overdue_replies_flush_even_when_queue_is_busy(outbox_db, monkeypatch, fake_clock):
+    outbox, users, _runtime = make_outbox(monkeypatch, fake_clock, max_wait_s=30)
+    outbox.enqueue("Alice", "hello")
+    await MessageQueue.instance().put_message(MessageInfo(content=":next", nickname="Dave"))
+
+    assert await outbox.maybe_flush() == 0
+    fake_clock.now = 31
+    assert await outbox.maybe_flush() == 1
+    assert users.sessions == [("Alice", ["hello"])]
+
+
+@pytest.mark.asyncio
+async def test_failed_replies_are_retried_then_given_up_and_survive_restart(outbox_db, monkeypatch, fake_clock):
+    outbox, users, _runtime = make_outbox(monkeypatch, fake_clock, max_attempts=2)
+    users.fail_after = {"Alice": 1}
+    outbox.enqueue("Alice", "one")
+    outbox.enqueue("Alice", "two")
+
+    assert await outbox.maybe_flush() == 1
+    row = await PrivateMessage.get(content="two")
+    assert (row.status, row.attempts) == ("pending", 1)
+
+    # 重启：未投递的回复从库中恢复
+    outbox, users, _runtime = make_outbox(monkeypatch, fake_clock, max_attempts=2)
+    users.fail_after = {"Alice": 0}
+    assert await outbox.maybe_flush() == 0
+    assert users.sessions == [("Alice", ["two"])]
+    row = await PrivateMessage.get(content="two")
+    assert (row.status, row.attempts) == ("failed", 2)
+    assert outbox.status()["pending"] == 0 and outbox.status()["failed"] == 1
+
+
+@pytest.mark.asyncio
+async def test_flush_stops_when_a_session_cannot_return_to_the_room(outbox_db, monkeypatch, fake_clock):
+    outbox, users, runtime = make_outbox(monkeypatch, fake_clock)
+    users.stranded = {"Alice"}
+    outbox.enqueue("Alice", "a1")
+    outbox.enqueue("Bob", "b1")
+
+    # Alice 的回复已发出，但 UI 没回到聊天室：不再去开 Bob 的私聊
+    assert await outbox.maybe_flush() == 1
+    assert users.sessions == [("Alice", ["a1"])]
+    assert [ctx["returned"] for event, ctx in runtime.events if event == "message.outbox.flush"] == [False]
+
+    users.stranded = set()
+    assert await outbox.maybe_flush() == 1
+    assert users.sessions[-1] == ("Bob", ["b1"])
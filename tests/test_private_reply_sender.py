@@ -33,7 +33,7 @@ def test_send_private_message_to_user_success_path():
 
     assert ok is True
     manager.open_user_profile_from_online_list.assert_called_once_with("Alice")
-    input_box.send_keys.assert_called_once_with("hello")
+    manager.handler.key_actions.type_text.assert_called_once_with("hello", input_box)
     avatar.click.assert_not_called()
     manager.handler.gesture_handler.click_element_at.assert_called_once_with(avatar, y_ratio=0.7)
     private_btn.click.assert_called_once()
@@ -136,3 +136,20 @@ def test_send_private_message_to_user_returns_false_when_avatar_offset_click_fai
     assert ok is False
     manager.handler.gesture_handler.click_element_at.assert_called_once_with(avatar, y_ratio=0.7)
     manager.logger.warning.assert_called()
+
+
+def test_failed_return_to_room_triggers_recovery_and_is_reported():
+    manager = _make_manager()
+    manager.open_user_profile_from_online_list = MagicMock(return_value={})
+    manager.handler.element_finder.wait_for_element_clickable.return_value = MagicMock()
+    manager.handler.element_finder.wait_for_any_element.return_value = (None, None)
+    manager.handler.gesture_handler.click_element_at.return_value = True
+    recovery = manager.handler.controller.recovery_manager
+
+    recovery.restore_after_abort.return_value = True
+    assert manager.send_private_messages_to_user("Frank", ["one", "two"]) == (2, True)
+    recovery.restore_after_abort.assert_called_once()
+
+    recovery.restore_after_abort.return_value = False
+    assert manager.send_private_messages_to_user("Frank", ["one"]) == (1, False)
+    assert manager.send_private_message_to_user("Frank", "one") is False
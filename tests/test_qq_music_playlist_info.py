@@ -1,5 +1,6 @@
 from types import SimpleNamespace
 
+from ushareiplay.core.ui.screen_state import ScreenTracker
 from ushareiplay.handlers.qq_music_handler import QQMusicHandler
 
 
@@ -7,6 +8,9 @@ class _Logger:
     def __init__(self):
         self.errors = []
 
+    def debug(self, message):
+        pass
+
     def info(self, message):
         pass
 
@@ -17,30 +21,76 @@ class _Logger:
         self.errors.append(message)
 
 
+ELEMENTS = {
+    "home_nav": '//android.view.ViewGroup[@content-desc="首页"]',
+    "playlist_entry": '//android.widget.ImageView[@content-desc="歌曲队列"]',
+    "playlist_item_container": '//android.widget.ImageView[@content-desc="删除"]/../android.widget.LinearLayout',
+    "playlist_current": '//android.widget.ImageView[@content-desc="删除"]/../android.view.View',
+    "play_mode_list_in_playlist": '//android.widget.ImageButton[@content-desc="顺序播放"]',
+    "play_mode_single_in_playlist": '//android.widget.ImageButton[@content-desc="单曲循环"]',
+    "play_mode_random_in_playlist": '//android.widget.ImageButton[@content-desc="随机播放"]',
+}
+
+
 class _Element:
-    def __init__(self, text="", location=None, size=None):
-        self.text = text
-        self.location = location or {"x": 0, "y": 0}
-        self.size = size or {"width": 100, "height": 40}
+    def __init__(self):
         self.clicks = 0
 
     def click(self):
         self.clicks += 1
 
-    def find_elements(self, by, value):
-        return self.text
-
 
 class _Driver:
-    def __init__(self):
+    def __init__(self, sources):
+        self.sources = list(sources)
+        self.page_source_reads = 0
         self.swipes = []
 
+    @property
+    def page_source(self):
+        self.page_source_reads += 1
+        if len(self.sources) > 1:
+            return self.sources.pop(0)
+        return self.sources[0]
+
     def swipe(self, start_x, start_y, end_x, end_y, duration):
         self.swipes.append((start_x, start_y, end_x, end_y, duration))
 
 
-def _playlist_item(song, singer):
-    return _Element([_Element(song), _Element(singer)])
+def _playlist_row(index, song, singer, current=False):
+    top = 100 + index * 100
+    marker = (
+        f'<android.view.View class="android.view.View" bounds="[10,{top + 280}][90,{top + 320}]"/>'
+        if current
+        else ""
+    )
+    return (
+        '<android.widget.RelativeLayout class="android.widget.RelativeLayout">'
+        f'<android.widget.LinearLayout class="android.widget.LinearLayout" bounds="[0,{top}][1000,{top + 40}]">'
+        f'<android.widget.TextView class="android.widget.TextView" text="{song}"/>'
+        f'<android.widget.TextView class="android.widget.TextView" text="{singer}"/>'
+        "</android.widget.LinearLayout>"
+        f"{marker}"
+        '<android.widget.ImageView class="android.widget.ImageView" content-desc="删除"/>'
+        "</android.widget.RelativeLayout>"
+    )
+
+
+def _playlist_page(rows, play_mode="顺序播放"):
+    body = "".join(_playlist_row(i, *row) for i, row in enumerate(rows))
+    return (
+        "<hierarchy>"
+        f'<android.widget.ImageButton class="android.widget.ImageButton" content-desc="{play_mode}"/>'
+        f"{body}</hierarchy>"
+    )
+
+
+HOME_PAGE = (
+    "<hierarchy>"
+    '<android.view.ViewGroup class="android.view.ViewGroup" content-desc="首页" bounds="[0,1800][200,1900]"/>'
+    '<android.widget.ImageView class="android.widget.ImageView" content-desc="歌曲队列" bounds="[900,1700][980,1780]"/>'
+    "</hierarchy>"
+)
 
 
 def test_get_current_playing_treats_missing_playback_nodes_as_optional():
@@ -55,106 +105,83 @@ def test_get_current_playing_treats_missing_playback_nodes_as_optional():
     assert handler.logger.errors == []
 
 
-def _make_handler(monkeypatch, visible_items, current_song, updated_items=None, marker_exists=True):
+def _make_handler(sources):
     handler = QQMusicHandler.__new__(QQMusicHandler)
     handler.logger = _Logger()
     handler.play_mode_key = "unknown"
-    handler.driver = _Driver()
-    handler.element_finder = SimpleNamespace()
-    handler.key_actions = SimpleNamespace()
+    handler.config = {"elements": ELEMENTS}
+    handler.driver = _Driver(sources)
+    handler.taps = []
     handler.gesture_handler = SimpleNamespace(
-        swipe=lambda *args: handler.driver.swipe(*args)
+        swipe=lambda *args: handler.driver.swipe(*args),
+        click_at=lambda x, y: handler.taps.append((x, y)) or True,
+    )
+    handler.playlist_entry = _Element()
+    handler.key_actions = SimpleNamespace(switch_to_app=lambda: True, press_back=lambda: None)
+    handler.element_finder = SimpleNamespace(
+        try_find_element=lambda key: handler.playlist_entry,
+        wait_for_element_clickable=lambda key: handler.playlist_entry,
     )
-    handler.playlist_entry = _Element("entry")
-    handler.playlist_current_queries = 0
-    handler.element_finder.find_elements_calls = 0
-
-    handler.key_actions.switch_to_app = lambda: True
-    handler.key_actions.press_back = lambda: None
-    monkeypatch.setattr(handler, "get_current_playing", lambda: {"song": current_song})
-    handler.element_finder.wait_for_element_clickable = lambda key: handler.playlist_entry
-    handler.element_finder.try_find_any_element = lambda keys: (None, None)
-
-    def try_find_element(key):
-        if key == "playlist_entry":
-            return handler.playlist_entry
-        if key == "playlist_current":
-            handler.playlist_current_queries += 1
-            if not marker_exists:
-                return None
-            return _Element(location={"x": 10, "y": 300}, size={"width": 80, "height": 40})
-        raise AssertionError(f"unexpected key: {key}")
-
-    def find_elements(key):
-        assert key == "playlist_item_container"
-        handler.element_finder.find_elements_calls += 1
-        if handler.element_finder.find_elements_calls == 1 or updated_items is None:
-            return visible_items
-        return updated_items
-
-    handler.element_finder.try_find_element = try_find_element
-    handler.element_finder.find_elements = find_elements
+    handler.screen_tracker = ScreenTracker(handler, sleep=lambda _s: None)
     return handler
 
 
-def test_get_playlist_info_returns_initial_list_when_current_marker_is_absent(monkeypatch):
+def test_get_playlist_info_opens_panel_from_home_via_screen_tracker():
     handler = _make_handler(
-        monkeypatch,
-        visible_items=[
-            _playlist_item("第一首", " - 歌手A"),
-            _playlist_item("第二首", " - 歌手B"),
-        ],
-        current_song="不在首屏",
-        marker_exists=False,
+        [HOME_PAGE, _playlist_page([("第一首", " - 歌手A"), ("第二首", " - 歌手B")], play_mode="单曲循环")]
     )
 
     result = handler.get_playlist_info()
 
     assert result == {"playlist": "第一首 - 歌手A\n第二首 - 歌手B"}
-    assert handler.playlist_current_queries == 1
+    assert handler.taps == [(940, 1740)]
+    assert handler.playlist_entry.clicks == 0
+    assert handler.driver.page_source_reads == 2
     assert handler.driver.swipes == []
-    assert handler.element_finder.find_elements_calls == 1
+    assert handler.play_mode_key == "single"
 
 
-def test_get_playlist_info_scrolls_when_marker_exists_but_current_title_is_not_visible(monkeypatch):
-    handler = _make_handler(
-        monkeypatch,
-        visible_items=[
-            _playlist_item("第一首", " - 歌手A"),
-            _playlist_item("第二首", " - 歌手B"),
-        ],
-        current_song="不在首屏",
-        updated_items=[
-            _playlist_item("当前歌", " - 歌手C"),
-            _playlist_item("第一首", " - 歌手A"),
-        ],
-    )
+def test_get_playlist_info_reuses_open_panel_snapshot():
+    handler = _make_handler([_playlist_page([("第一首", " - 歌手A")])])
 
     result = handler.get_playlist_info()
 
-    assert result == {"playlist": "当前歌 - 歌手C\n第一首 - 歌手A"}
-    assert handler.playlist_current_queries == 1
-    assert handler.driver.swipes == [(50, 320, 50, 0, 1000)]
-    assert handler.element_finder.find_elements_calls == 2
+    assert result == {"playlist": "第一首 - 歌手A"}
+    assert handler.driver.page_source_reads == 1
+    assert handler.taps == []
+    assert handler.playlist_entry.clicks == 0
 
 
-def test_get_playlist_info_scrolls_and_updates_playlist_when_current_title_visible(monkeypatch):
+def test_get_playlist_info_scrolls_when_current_row_is_below_first_item():
     handler = _make_handler(
-        monkeypatch,
-        visible_items=[
-            _playlist_item("当前歌", " - 歌手A"),
-            _playlist_item("第二首", " - 歌手B"),
-        ],
-        current_song="当前歌",
-        updated_items=[
-            _playlist_item("上一首", " - 歌手Z"),
-            _playlist_item("当前歌", " - 歌手A"),
-        ],
+        [
+            _playlist_page([("第一首", " - 歌手A"), ("第二首", " - 歌手B"), ("当前歌", " - 歌手C", True)]),
+            _playlist_page([("当前歌", " - 歌手C", True), ("第四首", " - 歌手D")]),
+        ]
     )
 
     result = handler.get_playlist_info()
 
-    assert result == {"playlist": "上一首 - 歌手Z\n当前歌 - 歌手A"}
-    assert handler.playlist_current_queries == 1
-    assert handler.driver.swipes == [(50, 320, 50, 0, 1000)]
-    assert handler.element_finder.find_elements_calls == 2
+    assert result == {"playlist": "当前歌 - 歌手C\n第四首 - 歌手D"}
+    assert handler.driver.swipes == [(50, 600, 50, 100, 1000)]
+    assert handler.driver.page_source_reads == 2
+    assert handler.play_mode_key == "list"
+
+
+def test_get_playlist_info_waits_for_panel_to_render():
+    handler = _make_handler([HOME_PAGE, "<hierarchy/>", _playlist_page([("第一首", " - 歌手A")])])
+
+    result = handler.get_playlist_info()
+
+    assert result == {"playlist": "第一首 - 歌手A"}
+    assert handler.driver.page_source_reads == 3
+
+
+def test_get_playlist_info_falls_back_to_element_waits_on_unknown_screen():
+    handler = _make_handler(["<hierarchy/>", _playlist_page([("第一首", " - 歌手A")])])
+
+    result = handler.get_playlist_info()
+
+    assert result == {"playlist": "第一首 - 歌手A"}
+    assert handler.playlist_entry.clicks == 1
+    assert handler.driver.page_source_reads == 2
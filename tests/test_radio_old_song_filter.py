@@ -341,6 +341,10 @@ class _PlayMusicHandler:
         assert music_query == "似是故人来 梅艳芳"
         return self.playing_info
 
+    def tap_selected_result(self, queue=False):
+        # 无快照候选时回退到点击第一条 result_item
+        return False
+
     def wait_for_element_clickable(self, key):
         assert key == "result_item"
         return self.result_item
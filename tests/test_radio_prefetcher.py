@@ -0,0 +1,144 @@
+import asyncio
+import datetime as dt
+import threading
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+
+from ushareiplay.core.ui.page_snapshot import PageSnapshot
+from ushareiplay.handlers.qq_music_handler import QQMusicHandler
+from ushareiplay.handlers.soul_handler import SoulHandler
+from ushareiplay.managers.radio_prefetcher import RadioPrefetcher
+
+
+CONFIG = {
+    "old_song_filter": {"enabled": True, "cutoff_date": "2000-01-01"},
+    "radio_prefetch": {"idle_interval_s": 60, "max_workers": 2, "verdict_ttl_s": 100},
+}
+
+HOME_SOURCE = """<hierarchy>
+  <android.widget.TextView resource-id="topic" text="老歌 - 歌手A" />
+  <android.widget.TextView resource-id="topic" text="新歌 - 歌手B" />
+  <android.widget.TextView resource-id="topic" text="老歌 - 歌手A" />
+</hierarchy>"""
+
+
+class FakeLookup:
+    DATES = {"老歌": "1995-05-01", "新歌": "2021-03-04"}
+
+    def __init__(self):
+        self.calls = []
+        self.gate = threading.Event()
+        self.gate.set()
+
+    def get_release_date(self, topic):
+        self.gate.wait(5)
+        self.calls.append(topic)
+        if topic == "boom":
+            raise RuntimeError("network down")
+        return self.DATES.get(topic)
+
+
+class FakeRuntime:
+    def __init__(self):
+        self.busy = False
+        self.sessions = []
+
+    def is_ui_busy(self):
+        return self.busy
+
+    @asynccontextmanager
+    async def ui_session(self, reason):
+        self.sessions.append(reason)
+        yield
+
+
+def install_handlers(monkeypatch, source=HOME_SOURCE):
+    logger = SimpleNamespace(info=lambda *a: None, warning=lambda *a: None, error=lambda *a: None)
+    switches = []
+    music = SimpleNamespace(
+        logger=logger,
+        key_actions=SimpleNamespace(switch_to_app=lambda: switches.append("qq") or True),
+        navigate_to_home=lambda: True,
+        page_snapshot=lambda: PageSnapshot.parse(source, {"collection_topic": "topic"}),
+    )
+    soul = SimpleNamespace(key_actions=SimpleNamespace(switch_to_app=lambda: switches.append("soul") or True))
+    for cls, instance in ((QQMusicHandler, music), (SoulHandler, soul)):
+        monkeypatch.setattr(cls, "_instance", instance, raising=False)
+        monkeypatch.setattr(cls, "_singleton_initialized", True, raising=False)
+    return switches
+
+
+def make_prefetcher(clock, **cfg):
+    lookup = FakeLookup()
+    config = {**CONFIG, "radio_prefetch": {**CONFIG["radio_prefetch"], **cfg}}
+    prefetcher = RadioPrefetcher.initialize(config, lookup=lookup, clock=clock)
+    return prefetcher, lookup
+
+
+def test_verdicts_are_cached_until_ttl_expires(monkeypatch, fake_clock):
+    install_handlers(monkeypatch)
+    prefetcher, lookup = make_prefetcher(fake_clock)
+    try:
+        old = prefetcher.verdict("老歌")
+        assert old.is_old and old.release_date == dt.date(1995, 5, 1)
+        assert prefetcher.verdict("老歌") is old
+        assert lookup.calls == ["老歌"]
+
+        fake_clock.now = 150
+        prefetcher.verdict("老歌")
+        assert lookup.calls == ["老歌", "老歌"]
+        assert prefetcher.status()["hits"] == 1
+    finally:
+        prefetcher.close()
+
+
+def test_failed_lookups_are_not_cached(monkeypatch, fake_clock):
+    install_handlers(monkeypatch)
+    prefetcher, lookup = make_prefetcher(fake_clock)
+    try:
+        assert prefetcher.verdict("boom") is None
+        assert prefetcher.verdict("boom") is None
+        assert lookup.calls == ["boom", "boom"]
+    finally:
+        prefetcher.close()
+
+
+def test_submit_deduplicates_in_flight_lookups(monkeypatch, fake_clock):
+    install_handlers(monkeypatch)
+    prefetcher, lookup = make_prefetcher(fake_clock)
+    lookup.gate.clear()
+    try:
+        first = prefetcher.submit(["新歌", "新歌"])
+        second = prefetcher.submit(["新歌"])
+        assert first["新歌"] is second["新歌"]
+        lookup.gate.set()
+        assert first["新歌"].result(5).is_old is False
+        assert lookup.calls == ["新歌"]
+    finally:
+        lookup.gate.set()
+        prefetcher.close()
+
+
+def test_idle_prefetch_scrapes_home_once_per_interval(monkeypatch, fake_clock):
+    switches = install_handlers(monkeypatch)
+    prefetcher, lookup = make_prefetcher(fake_clock)
+    runtime = FakeRuntime()
+    prefetcher.configure_runtime(runtime)
+    try:
+        assert asyncio.run(prefetcher.maybe_prefetch()) is False
+
+        fake_clock.now = 61
+        runtime.busy = True
+        assert asyncio.run(prefetcher.maybe_prefetch()) is False
+
+        runtime.busy = False
+        assert asyncio.run(prefetcher.maybe_prefetch()) is True
+        assert runtime.sessions == ["radio_prefetch"]
+        assert switches == ["qq", "soul"]
+        assert asyncio.run(prefetcher.maybe_prefetch()) is False
+
+        assert prefetcher.verdict("老歌").is_old is True
+        assert prefetcher.verdict("新歌").is_old is False
+        assert sorted(lookup.calls) == ["新歌", "老歌"]
+    finally:
+        prefetcher.close()
@@ -0,0 +1,121 @@
+import asyncio
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+
+from ushareiplay.core.rate_limiter import BucketStore, RateLimiter
+from ushareiplay.core.singleton import Singleton
+from ushareiplay.managers.command_manager import CommandManager
+
+
+CONFIG = {
+    "rate_limit": {
+        "user": {"capacity": 3, "refill_per_s": 0.5},
+        "commands": {"lyrics": {"capacity": 1, "refill_per_s": 0.1}},
+        "level_scale": {2: 2},
+        "exempt_level": 5,
+    }
+}
+
+
+def _limiter(store, clock):
+    RateLimiter.reset_instance()
+    return RateLimiter.initialize(CONFIG, store=store, clock=clock)
+
+
+def test_user_and_command_buckets_scale_with_level(fake_clock):
+    limiter = _limiter(BucketStore(), fake_clock)
+
+    assert [limiter.check("Alice", "play").allowed for _ in range(4)] == [True, True, True, False]
+    assert limiter.check("Bob", "lyrics").allowed
+    denied = limiter.check("Bob", "lyrics")
+    assert (denied.allowed, denied.scope, round(denied.retry_after_s)) == (False, "lyrics", 10)
+    # 命令桶拒绝时不扣用户总桶
+    assert limiter.check("Bob", "play").allowed and limiter.check("Bob", "play").allowed
+
+    assert sum(limiter.check("Carol", "play", level=2).allowed for _ in range(10)) == 6
+    assert all(limiter.check("Admin", "lyrics", level=5).allowed for _ in range(10))
+
+    fake_clock.now += 2
+    assert limiter.check("Alice", "play").allowed
+
+
+def test_one_notice_per_burst_and_buckets_survive_restart(fake_clock):
+    store = BucketStore()
+    limiter = _limiter(store, fake_clock)
+    for _ in range(3):
+        limiter.check("Alice", "play")
+
+    assert [limiter.check("Alice", "play").notify for _ in range(3)] == [True, False, False]
+
+    Singleton.reset_all_instances()
+    limiter = _limiter(store, fake_clock)
+    assert limiter.check("Alice", "play").allowed is False
+    fake_clock.now += 2
+    assert limiter.check("Alice", "play").allowed
+    assert limiter.check("Alice", "play").notify is True
+
+
+class _Runtime:
+    def __init__(self):
+        self.events = []
+
+    def emit(self, event, **kwargs):
+        self.events.append((event, kwargs))
+
+    @asynccontextmanager
+    async def ui_session(self, reason):
+        yield
+
+
+class _Handler:
+    def __init__(self):
+        self.sent = []
+        self.config = {"system_users": ["Console"]}
+        self.logger = SimpleNamespace(info=lambda *_: None, error=lambda *_: None)
+
+    def send_message(self, message):
+        self.sent.append(message)
+
+
+class _Command:
+    def __init__(self):
+        self.calls = 0
+
+    async def process(self, message_info, parameters):
+        self.calls += 1
+        return {"message": "ok"}
+
+
+def test_command_manager_drops_burst_before_acknowledging(monkeypatch, fake_clock):
+    from ushareiplay.dal import user_dao as user_dao_module
+
+    async def _get_or_create(username):
+        return SimpleNamespace(username=username, level=1)
+
+    monkeypatch.setattr(user_dao_module.UserDAO, "get_or_create", staticmethod(_get_or_create))
+    _limiter(BucketStore(), fake_clock)
+    runtime, handler, command = _Runtime(), _Handler(), _Command()
+    CommandManager.reset_instance()
+    manager = CommandManager.initialize()
+    manager.configure_runtime(runtime)
+    manager._handler = handler
+    manager._logger = handler.logger
+    manager.initialize_parser(
+        [{"prefix": "lyrics", "level": 1, "response_template": "{message}", "error_template": "Failed to get lyrics, because {error}"}]
+    )
+    monkeypatch.setattr(manager, "get_command", lambda _cmd: command)
+
+    messages = [SimpleNamespace(content=":lyrics", nickname="Alice") for _ in range(4)]
+    messages.append(SimpleNamespace(content=":lyrics", nickname="Console"))
+    asyncio.run(manager.execute_command_messages(messages))
+
+    assert command.calls == 2
+    assert [m.split("] ", 1)[-1] for m in handler.sent] == [
+        "lyrics ... @Alice",
+        "ok @Alice",
+        "Failed to get lyrics, because 操作太频繁，请 10 秒后再试",
+        "lyrics ... @Console",
+        "ok @Console",
+    ]
+    notified = [kw["ctx"]["notified"] for event, kw in runtime.events if event == "command.rate_limited"]
+    assert notified == [True, False, False]
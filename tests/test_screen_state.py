@@ -0,0 +1,156 @@
+from types import SimpleNamespace
+from unittest.mock import Mock
+
+from ushareiplay.core.ui.navigation import Navigator
+from ushareiplay.core.ui.page_snapshot import PageSnapshot
+from ushareiplay.core.ui.screen_state import ScreenTracker
+
+
+ELEMENTS = {
+    "home_nav": '//*[@content-desc="首页"]',
+    "my_nav": '//*[@content-desc="我的"]',
+    "fav_entry": '//*[@text="收藏"]',
+    "search_entry": "com.tencent.qqmusic:id/sub_edit_text",
+    "search_box": "com.tencent.qqmusic:id/searchItem",
+    "clear_search": '//*[@content-desc="清空"]',
+    "song_tab": '//*[@content-desc="歌曲 按钮"]',
+    "go_back": '//*[@content-desc="返回" and @class="android.widget.ImageButton"]',
+    "minimize_screen": '//*[@content-desc="返回" and @class="android.widget.ImageView"]',
+    "playing_record": '//*[@content-desc="专辑封面"]',
+    "playlist_entry": '//*[@content-desc="歌曲队列"]',
+    "playlist_header": '//*[@text="正在播放"]',
+    "filter_favourite": '//*[@content-desc="筛选"]',
+    "play_all": '//*[@text="全部播放"]',
+}
+
+
+def node(bounds, **attrs):
+    rendered = " ".join(f'{k.replace("_", "-")}="{v}"' for k, v in attrs.items())
+    return f'<node {rendered} bounds="{bounds}"/>'
+
+
+HOME = "<hierarchy>" + node("[0,1800][200,1900]", content_desc="首页") + node(
+    "[300,100][700,160]", resource_id="com.tencent.qqmusic:id/sub_edit_text"
+) + node("[900,1700][980,1780]", content_desc="歌曲队列") + node("[400,1800][600,1900]", content_desc="我的") + "</hierarchy>"
+MINE = "<hierarchy>" + node("[0,1800][200,1900]", content_desc="首页") + node("[100,400][300,460]", text="收藏") + "</hierarchy>"
+FAVORITES = "<hierarchy>" + node("[0,0][80,80]", content_desc="返回", **{"class": "android.widget.ImageButton"}) + node(
+    "[900,0][980,80]", content_desc="筛选"
+) + "</hierarchy>"
+SEARCH = "<hierarchy>" + node("[100,0][900,80]", resource_id="com.tencent.qqmusic:id/searchItem") + "</hierarchy>"
+RESULTS = "<hierarchy>" + node("[100,0][900,80]", resource_id="com.tencent.qqmusic:id/searchItem") + node(
+    "[900,0][980,80]", content_desc="清空"
+) + node("[0,100][200,160]", content_desc="歌曲 按钮") + "</hierarchy>"
+PLAYER = "<hierarchy>" + node("[0,0][80,80]", content_desc="返回", **{"class": "android.widget.ImageView"}) + node(
+    "[100,300][900,1100]", content_desc="专辑封面"
+) + node("[900,1700][980,1780]", content_desc="歌曲队列") + "</hierarchy>"
+PANEL = "<hierarchy>" + node("[0,900][300,960]", text="正在播放") + "</hierarchy>"
+
+
+class FakeScreen:
+    """Page sources keyed by screen; taps/back move along a scripted map."""
+
+    def __init__(self, current, taps_to=None, back_to=None):
+        self.current = current
+        self.taps_to = taps_to or {}
+        self.back_to = back_to or {}
+        self.actions = []
+        self.reads = 0
+
+    def snapshot(self):
+        self.reads += 1
+        return PageSnapshot.parse(self.current, ELEMENTS)
+
+    def click_at(self, x, y):
+        self.actions.append(("tap", x, y))
+        self.current = self.taps_to.get((self.current, (x, y)), self.current)
+        return True
+
+    def press_back(self):
+        self.actions.append(("back",))
+        self.current = self.back_to.get(self.current, self.current)
+        return True
+
+
+def make_tracker(screen):
+    owner = SimpleNamespace(
+        logger=Mock(),
+        page_snapshot=screen.snapshot,
+        gesture_handler=SimpleNamespace(click_at=screen.click_at),
+        key_actions=SimpleNamespace(press_back=screen.press_back),
+    )
+    return ScreenTracker(owner, settle_timeout=0, sleep=lambda _s: None), owner
+
+
+def test_classifies_each_screen_from_one_snapshot():
+    tracker, _ = make_tracker(FakeScreen(HOME))
+
+    def classify(source):
+        return tracker.classify(PageSnapshot.parse(source, ELEMENTS))
+
+    assert classify(HOME) == "home"
+    assert classify(MINE) == "mine"
+    assert classify(FAVORITES) == "favorites"
+    assert classify(SEARCH) == "search"
+    assert classify(RESULTS) == "results"
+    assert classify(PLAYER) == "player"
+    assert classify(PANEL) == "playlist_panel"
+    assert classify("<hierarchy/>") is None
+
+
+def test_plans_shortest_path_over_transition_graph():
+    tracker, _ = make_tracker(FakeScreen(HOME))
+
+    assert [t.action for t in tracker.plan("results", "favorites")] == ["back", "click:my_nav", "click:fav_entry"]
+    assert [t.action for t in tracker.plan("player", "search")] == ["click:minimize_screen", "click:search_entry"]
+    assert tracker.plan("home", "home") == []
+
+
+def test_navigate_walks_to_target_with_one_read_per_step():
+    screen = FakeScreen(
+        PLAYER,
+        taps_to={(PLAYER, (40, 40)): HOME, (HOME, (500, 130)): SEARCH},
+    )
+    tracker, _ = make_tracker(screen)
+
+    arrival = tracker.navigate("search")
+
+    assert arrival.origin == "player"
+    assert arrival.path == ["player", "home", "search"]
+    assert screen.actions == [("tap", 40, 40), ("tap", 500, 130)]
+    assert screen.reads == 3
+
+
+def test_navigate_learns_observed_transition_targets():
+    screen = FakeScreen(RESULTS, back_to={RESULTS: SEARCH, SEARCH: HOME})
+    tracker, _ = make_tracker(screen)
+
+    assert tracker.navigate("home").path == ["results", "search", "home"]
+    assert [t.target for t in tracker.plan("results", "home")] == ["search", "home"]
+
+
+def test_navigate_gives_up_on_unknown_screen_or_stuck_action():
+    tracker, _ = make_tracker(FakeScreen("<hierarchy/>"))
+    assert tracker.navigate("home") is None
+
+    stuck = FakeScreen(PANEL)
+    tracker, _ = make_tracker(stuck)
+    assert tracker.navigate("home") is None
+    assert stuck.actions == [("back",)]
+
+
+def test_navigator_skips_speculative_back_when_target_is_visible():
+    screen = FakeScreen(SEARCH)
+    target = object()
+    owner = SimpleNamespace(
+        logger=Mock(),
+        config={"elements": ELEMENTS},
+        page_snapshot=screen.snapshot,
+        key_actions=Mock(),
+        element_finder=Mock(),
+        screen_tracker=object(),
+    )
+    owner.element_finder.try_find_element.return_value = target
+
+    assert Navigator(owner).navigate_to_element("search_box", ["play_all"]) == ("search_box", target)
+    owner.key_actions.press_back.assert_not_called()
+    owner.element_finder.wait_for_any_element.assert_not_called()
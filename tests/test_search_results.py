@@ -0,0 +1,98 @@
+from types import SimpleNamespace
+from unittest.mock import Mock
+
+from ushareiplay.core.ui.page_snapshot import PageSnapshot
+from ushareiplay.handlers.qq_music_handler import QQMusicHandler
+from ushareiplay.helpers.search_results import low_quality_reason, match_score, parse_song_results, select_best
+
+
+ELEMENTS = {"result_item": "com.tencent.qqmusic:id/item_layout"}
+TEXT_VIEW = "android.widget.TextView"
+
+
+def row(top, song, meta):
+    return (
+        f'<node class="android.widget.LinearLayout" resource-id="com.tencent.qqmusic:id/item_layout" '
+        f'bounds="[0,{top}][1000,{top + 100}]">'
+        f'<node class="{TEXT_VIEW}" text="{song}" bounds="[40,{top + 10}][700,{top + 50}]"/>'
+        f'<node class="{TEXT_VIEW}" text="{meta}" bounds="[40,{top + 55}][700,{top + 90}]"/>'
+        f'<node class="android.widget.ImageView" content-desc="添加到播放队列" bounds="[900,{top + 20}][980,{top + 80}]"/>'
+        "</node>"
+    )
+
+
+def snapshot(*rows):
+    return PageSnapshot.parse("<hierarchy>" + "".join(rows) + "</hierarchy>", ELEMENTS)
+
+
+RESULTS = snapshot(
+    row(200, "晴天 (DJ版)", "DJ小鱼·晴天 DJ"),
+    row(300, "晴天 (Live)", "周杰伦·地表最强世界巡回演唱会"),
+    row(400, "晴天", "周杰伦·叶惠美"),
+    row(500, "七里香", "周杰伦·七里香"),
+)
+
+
+def test_parses_every_row_with_bounds_from_one_snapshot():
+    candidates = parse_song_results(RESULTS)
+
+    assert [c.song for c in candidates] == ["晴天 (DJ版)", "晴天 (Live)", "晴天", "七里香"]
+    third = candidates[2]
+    assert (third.singer, third.album) == ("周杰伦", "叶惠美")
+    assert third.bounds == (0, 400, 1000, 500)
+    assert third.queue_bounds == (900, 420, 980, 480)
+    assert parse_song_results(None) == []
+
+
+def test_scoring_prefers_query_match_and_applies_skip_policy():
+    candidates = parse_song_results(RESULTS)
+
+    assert select_best(candidates, "晴天 周杰伦", "favorites").song == "晴天"
+    assert select_best(candidates, "晴天 周杰伦", "singer").song == "晴天"
+    assert select_best(candidates, "晴天 live", "singer").song == "晴天 (Live)"
+    assert select_best(candidates, "七里香").song == "七里香"
+    # 无明确匹配时保持 QQ 音乐自身排序
+    assert select_best(candidates[2:], "周杰伦").index == 2
+    assert select_best([], "晴天") is None
+
+
+def test_exact_title_bonus_needs_whole_query_tokens():
+    candidates = parse_song_results(snapshot(
+        row(200, "天", "周杰伦·合辑"),
+        row(300, "晴天的雨", "某歌手·晴天的雨"),
+        row(400, "Shape of You", "Ed Sheeran·÷"),
+    ))
+    short, long_title, english = candidates
+
+    # 短歌名只是查询词的子串时不加精确匹配分
+    assert match_score(short, "晴天的雨") == 0
+    assert select_best(candidates, "晴天的雨 周杰伦").song == "晴天的雨"
+    assert match_score(english, "shape of you ed sheeran") == 1.5
+    assert match_score(english, "shape you") == 1.0
+
+
+def test_low_quality_reason_matches_music_manager_policy():
+    assert low_quality_reason("晴天 Remix", "周杰伦") == "dj"
+    assert low_quality_reason("晴天 (Live)", "周杰伦", list_mode="favorites") is None
+    assert low_quality_reason("晴天 (Live)", "周杰伦", list_mode="singer") == "live"
+    assert low_quality_reason("歌", "A/B/C/D", list_mode="singer") == "multi_artist"
+    assert low_quality_reason("歌", "周杰伦", "周杰伦", "singer") == "suspicious"
+
+
+def test_handler_taps_selected_candidate_by_bounds():
+    handler = QQMusicHandler.__new__(QQMusicHandler)
+    handler.list_mode = "favorites"
+    handler.logger = Mock()
+    handler.gesture_handler = SimpleNamespace(click_at=Mock(return_value=True))
+    handler.page_snapshot = lambda: RESULTS
+
+    best = handler._select_search_result("晴天")
+    assert best.song == "晴天"
+    assert handler.tap_selected_result()
+    handler.gesture_handler.click_at.assert_called_with(500, 450)
+    assert handler.tap_selected_result(queue=True)
+    handler.gesture_handler.click_at.assert_called_with(940, 450)
+
+    handler.page_snapshot = lambda: None
+    assert handler._select_search_result("晴天") is None
+    assert not handler.tap_selected_result()
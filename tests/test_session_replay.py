@@ -0,0 +1,175 @@
+import asyncio
+import json
+import logging
+from types import SimpleNamespace
+
+import pytest
+from selenium.common.exceptions import NoSuchElementException
+
+from ushareiplay.core.app_controller import AppController
+from ushareiplay.core.session_replay import (
+    RecordingDriver,
+    ReplayDriver,
+    ReplaySession,
+    SessionRecorder,
+    benchmark_ticks,
+    parse_bounds,
+)
+from ushareiplay.core.ui.element_finder import ElementFinder
+
+
+ROOM_XML = (
+    "<hierarchy>"
+    "<node package='cn.soulapp.android' class='android.widget.FrameLayout' bounds='[0,0][1080,2340]'>"
+    "<node resource-id='cn.soulapp.android:id/tvChat' class='android.widget.TextView' text='说点什么'"
+    " bounds='[40,2200][600,2300]' enabled='true' displayed='true'/>"
+    "<node resource-id='cn.soulapp.android:id/tvContent' class='android.widget.TextView' text='Alice: :info'"
+    " bounds='[40,1000][900,1100]'/>"
+    "</node>"
+    "</hierarchy>"
+)
+PLAYER_XML = (
+    "<hierarchy><node package='com.tencent.qqmusic' class='android.widget.TextView'"
+    " resource-id='com.tencent.qqmusic:id/song' text='晴天' bounds='[0,0][100,50]'/></hierarchy>"
+)
+
+
+class FakeDriver:
+    def __init__(self, sources):
+        self._sources = list(sources)
+        self.keycodes = []
+
+    @property
+    def page_source(self):
+        return self._sources.pop(0)
+
+    def execute_script(self, script, args):
+        return f"output of {args['command']}"
+
+    def press_keycode(self, code):
+        self.keycodes.append(code)
+
+
+def record_session(tmp_path):
+    recorder = SessionRecorder(tmp_path / "session")
+    driver = RecordingDriver(FakeDriver([ROOM_XML, ROOM_XML, PLAYER_XML]), recorder)
+    for _ in range(3):
+        driver.page_source
+    driver.execute_script("mobile: shell", {"command": "dumpsys media_session"})
+    driver.press_keycode(4)
+    return recorder.directory, driver
+
+
+def test_recording_driver_writes_session_and_deduplicates_frames(tmp_path):
+    directory, driver = record_session(tmp_path)
+
+    entries = [json.loads(line) for line in (directory / "session.jsonl").read_text().splitlines()]
+    assert [e["op"] for e in entries] == ["page_source", "page_source", "page_source", "shell", "action"]
+    assert entries[0]["file"] == entries[1]["file"]
+    assert entries[2]["file"] != entries[0]["file"]
+    assert len(list((directory / "frames").glob("*.xml"))) == 2
+    assert entries[3]["output"] == "output of dumpsys media_session"
+    assert entries[4]["name"] == "press_keycode" and entries[4]["args"] == [4]
+    assert driver.wrapped_driver.keycodes == [4]
+
+
+def test_replay_driver_serves_frames_in_order_and_shell_outputs(tmp_path):
+    directory, _ = record_session(tmp_path)
+    driver = ReplayDriver(ReplaySession.load(directory))
+
+    assert driver.page_source == ROOM_XML
+    assert driver.page_source == ROOM_XML
+    assert driver.page_source == PLAYER_XML
+    assert driver.exhausted is False
+    assert driver.page_source == PLAYER_XML
+    assert driver.exhausted is True
+    assert driver.execute_script("mobile: shell", {"command": "dumpsys media_session"}) == (
+        "output of dumpsys media_session"
+    )
+    assert driver.execute_script("mobile: shell", {"command": "dumpsys audio"}) == ""
+
+
+def test_replay_driver_loop_restarts_recording(tmp_path):
+    directory, _ = record_session(tmp_path)
+    driver = ReplayDriver(ReplaySession.load(directory), loop=True)
+
+    sources = [driver.page_source for _ in range(4)]
+
+    assert sources == [ROOM_XML, ROOM_XML, PLAYER_XML, ROOM_XML]
+
+
+def test_replay_driver_finds_elements_from_current_frame(tmp_path):
+    directory, _ = record_session(tmp_path)
+    driver = ReplayDriver(ReplaySession.load(directory))
+    driver.page_source
+
+    entry = driver.find_element("id", "cn.soulapp.android:id/tvChat")
+    assert entry.text == "说点什么"
+    assert entry.rect == {"x": 40, "y": 2200, "width": 560, "height": 100}
+    assert entry.get_attribute("className") == "android.widget.TextView"
+    assert entry.is_displayed() and entry.is_enabled()
+
+    contents = driver.find_elements("xpath", "//*[@resource-id='cn.soulapp.android:id/tvContent']")
+    assert [e.text for e in contents] == ["Alice: :info"]
+    assert len(driver.find_elements("class name", "android.widget.TextView")) == 2
+
+    entry.click()
+    entry.send_keys("hi")
+    assert driver.actions == [("click", entry.id), ("send_keys", entry.id, "hi")]
+
+    with pytest.raises(NoSuchElementException):
+        driver.find_element("id", "missing")
+
+
+def test_element_finder_resolves_config_keys_against_replay(tmp_path):
+    directory, _ = record_session(tmp_path)
+    driver = ReplayDriver(ReplaySession.load(directory))
+    driver.page_source
+    owner = SimpleNamespace(
+        driver=driver,
+        config={"elements": {"input_box_entry": "cn.soulapp.android:id/tvChat"}},
+        logger=logging.getLogger("test_session_replay"),
+    )
+
+    element = ElementFinder(owner).try_find_element("input_box_entry")
+
+    assert element is not None and element.text == "说点什么"
+
+
+def test_parse_bounds():
+    assert parse_bounds("[1,2][30,40]") == (1, 2, 30, 40)
+    assert parse_bounds("") is None
+
+
+def test_benchmark_ticks_reports_throughput_and_allocations(tmp_path):
+    directory, _ = record_session(tmp_path)
+    driver = ReplayDriver(ReplaySession.load(directory), loop=True)
+
+    async def tick():
+        driver.page_source
+        driver.find_elements("xpath", "//*[@text]")
+
+    report = asyncio.run(benchmark_ticks(tick, ticks=20))
+
+    assert report["ticks"] == 20
+    assert report["ticks_per_second"] > 0
+    assert {"alloc_peak_kb", "alloc_retained_kb", "alloc_blocks"} <= set(report)
+
+
+def test_controller_uses_injected_driver_factory_and_session_recorder(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "config.yaml").write_text("logging:\n  directory: logs\n", encoding="utf-8")
+    (tmp_path / "src").mkdir()
+    controller = AppController.__new__(AppController)
+    controller.run_id = "replay-run"
+    controller.obs = SimpleNamespace(emit=lambda *_args, **_kwargs: None)
+    controller.config = {"session_recorder": {"enabled": True, "directory": "artifacts/sessions"}}
+    controller._session_recorder = None
+    replay = object()
+    controller._driver_factory = lambda: replay
+
+    assert controller._init_driver() is replay
+
+    wrapped = controller._wrap_session_recorder(FakeDriver([ROOM_XML]))
+    assert isinstance(wrapped, RecordingDriver)
+    assert controller._session_recorder.directory == tmp_path / "artifacts" / "sessions" / "replay-run"
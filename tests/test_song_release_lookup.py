@@ -0,0 +1,80 @@
+import asyncio
+import time
+
+import pytest
+
+from ushareiplay.helpers.song_release import QQMusicSongReleaseLookup, ReleaseLookupUnavailable
+
+
+QING_TIAN = 1059580800  # 2003-07-31 00:00 (UTC+8)
+
+
+def test_lookups_reuse_one_keep_alive_connection(client_search_stub):
+    client_search_stub.pubtimes = {"晴天": QING_TIAN}
+    lookup = QQMusicSongReleaseLookup(search_url=client_search_stub.url, timeout=2)
+
+    assert lookup.get_release_date("晴天") == "2003-07-31"
+    assert lookup.get_release_date("七里香") is None
+    assert lookup.get_release_date("  ") is None
+
+    assert client_search_stub.requests == ["晴天", "七里香"]
+    assert len(client_search_stub.client_ports) == 1
+
+
+def test_batch_resolves_a_playlist_concurrently_within_the_pool_bound(client_search_stub):
+    client_search_stub.delay_s = 0.2
+    client_search_stub.pubtimes = {f"歌{i}": QING_TIAN for i in range(6)}
+    lookup = QQMusicSongReleaseLookup(search_url=client_search_stub.url, timeout=2, max_concurrency=3)
+
+    started = time.monotonic()
+    dates = asyncio.run(lookup.get_release_dates([f"歌{i}" for i in range(6)] + ["歌0", None, "无结果"]))
+    elapsed = time.monotonic() - started
+
+    assert dates == {**{f"歌{i}": "2003-07-31" for i in range(6)}, "无结果": None}
+    assert 2 <= client_search_stub.max_in_flight <= 3
+    assert elapsed < 7 * 0.2  # 串行至少 1.4s
+
+
+def test_per_request_deadline(client_search_stub):
+    client_search_stub.delay_s = 1.0
+    lookup = QQMusicSongReleaseLookup(search_url=client_search_stub.url, timeout=0.2)
+
+    started = time.monotonic()
+    with pytest.raises(Exception):
+        lookup.get_release_date("晴天")
+    assert time.monotonic() - started < 0.9
+
+
+def test_circuit_opens_after_failures_and_probes_after_reset(client_search_stub, fake_clock):
+    client_search_stub.status = 503
+    lookup = QQMusicSongReleaseLookup(
+        search_url=client_search_stub.url, timeout=2, failure_threshold=2, reset_timeout_s=60, clock=fake_clock
+    )
+
+    dates = asyncio.run(lookup.get_release_dates(["a", "b", "c", "d"]))
+    assert dates == {"a": None, "b": None, "c": None, "d": None}
+    sent = len(client_search_stub.requests)
+    assert lookup.breaker.state == "open"
+    with pytest.raises(ReleaseLookupUnavailable):
+        lookup.get_release_date("e")
+    assert len(client_search_stub.requests) == sent
+
+    fake_clock.now = 61
+    client_search_stub.status = 200
+    client_search_stub.pubtimes = {"晴天": QING_TIAN}
+    assert lookup.breaker.state == "half_open"
+    assert lookup.get_release_date("晴天") == "2003-07-31"
+    assert lookup.breaker.state == "closed"
+
+
+def test_unreachable_endpoint_fails_fast_for_the_whole_batch(client_search_stub):
+    url = client_search_stub.url
+    client_search_stub.close()
+    lookup = QQMusicSongReleaseLookup.from_config(
+        {"song_release": {"search_url": url, "timeout_s": 5, "failure_threshold": 1}}
+    )
+
+    started = time.monotonic()
+    dates = asyncio.run(lookup.get_release_dates([f"歌{i}" for i in range(20)]))
+    assert set(dates.values()) == {None}
+    assert time.monotonic() - started < 2
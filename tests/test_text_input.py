@@ -0,0 +1,157 @@
+import base64
+from types import SimpleNamespace
+from unittest.mock import Mock
+
+import pytest
+
+from ushareiplay.core.ui.key_actions import KeyActions
+from ushareiplay.core.ui.text_input import ADB_KEYBOARD_IME, TextInput
+
+
+class FakeDriver:
+    """Records text-entry round trips; ``ime`` / ``mobile_type`` toggle backend availability."""
+
+    def __init__(self, ime="com.android.inputmethod.latin/.LatinIME", mobile_type=True):
+        self.ime = ime
+        self.mobile_type = mobile_type
+        self.calls = []
+
+    def execute_script(self, script, args):
+        self.calls.append((script, args))
+        if script == "mobile: type":
+            if not self.mobile_type:
+                raise RuntimeError("Unknown mobile command 'type'")
+            return None
+        if args["command"].startswith("settings get"):
+            return self.ime + "\n"
+        return "Broadcast completed: result=0"
+
+    def set_clipboard_text(self, text):
+        self.calls.append(("clipboard", text))
+
+    def press_keycode(self, code):
+        self.calls.append(("keycode", code))
+
+
+class FakeElement:
+    def __init__(self, broken=False):
+        self.sent = []
+        self.text = ""
+        self.broken = broken
+
+    def send_keys(self, text):
+        if self.broken:
+            raise RuntimeError("stale element")
+        self.sent.append(text)
+        self.text += text
+
+    def clear(self):
+        self.text = ""
+
+
+def test_legacy_behaviour_before_self_test():
+    driver, element = FakeDriver(), FakeElement()
+    text_input = TextInput()
+
+    assert text_input.type_text(driver, "晴天") == "clipboard"
+    assert driver.calls == [("clipboard", "晴天"), ("keycode", 279)]
+    assert text_input.type_text(driver, "hi", element) == "send_keys"
+    assert element.sent == ["hi"]
+
+
+def test_self_test_prefers_adb_keyboard_when_active():
+    driver = FakeDriver(ime=ADB_KEYBOARD_IME, mobile_type=False)
+    obs = Mock()
+    text_input = TextInput(obs=obs)
+
+    assert text_input.self_test(driver) == "adb_keyboard"
+    assert [b.name for b in text_input.available][-1] == "clipboard"
+    obs.emit.assert_called_once()
+    assert obs.emit.call_args.args[0] == "text_input.selected"
+
+    driver.calls.clear()
+    assert text_input.type_text(driver, "周杰伦 晴天") == "adb_keyboard"
+    encoded = base64.b64encode("周杰伦 晴天".encode("utf-8")).decode("ascii")
+    assert driver.calls == [("mobile: shell", {"command": f"am broadcast -a ADB_INPUT_B64 --es msg {encoded}"})]
+
+
+def test_self_test_skips_unavailable_backends():
+    driver = FakeDriver(mobile_type=False)
+    text_input = TextInput()
+
+    text_input.self_test(driver)
+
+    assert text_input.probes["adb_keyboard"] is None
+    assert text_input.probes["mobile_type"] is None
+    assert [b.name for b in text_input.available] == ["send_keys", "clipboard"]
+    # 没有元素时跳过 send_keys
+    driver.calls.clear()
+    assert text_input.type_text(driver, "x") == "clipboard"
+
+
+def test_failing_backend_falls_back_and_is_demoted():
+    driver = FakeDriver()
+    text_input = TextInput()
+    text_input.self_test(driver)
+    assert text_input.backend.name == "mobile_type"
+
+    def broken(script, args):
+        raise RuntimeError("socket hang up")
+
+    driver.execute_script = broken
+    assert text_input.type_text(driver, "x") == "clipboard"
+    assert text_input.available[-1].name == "mobile_type"
+
+
+def test_forced_backend_skips_probes():
+    driver = FakeDriver()
+    text_input = TextInput(config={"text_input": {"backend": "clipboard"}})
+
+    assert text_input.self_test(driver) == "clipboard"
+    assert driver.calls == []
+
+
+def test_key_actions_type_text_uses_controller_backend():
+    driver = FakeDriver()
+    text_input = TextInput()
+    text_input.self_test(driver)
+    owner = SimpleNamespace(
+        driver=driver,
+        logger=Mock(),
+        config={},
+        error_count=0,
+        controller=SimpleNamespace(text_input=text_input),
+    )
+    driver.calls.clear()
+
+    assert KeyActions(owner).type_text("hello") is True
+    assert driver.calls == [("mobile: type", {"text": "hello"})]
+
+
+
+def test_target_element_is_typed_with_send_keys_and_focus_fallbacks_are_verified():
+    driver = FakeDriver()
+    text_input = TextInput()
+    text_input.self_test(driver)
+    assert text_input.backend.name == "mobile_type"
+
+    element = FakeElement()
+    driver.calls.clear()
+    assert text_input.type_text(driver, "hi", element) == "send_keys"
+    assert element.sent == ["hi"] and driver.calls == []
+
+    # send_keys 失败后焦点类后端兜底；焦点不在输入框（读回的文本不对）时继续降级，全部不对就报错
+    broken = FakeElement(broken=True)
+    with pytest.raises(RuntimeError, match="not found in the target field"):
+        text_input.type_text(driver, "hi", broken)
+
+    typed = FakeElement(broken=True)
+    original = driver.execute_script
+
+    def _type_into_focus(script, args):
+        if script == "mobile: type":
+            typed.text += args["text"]
+        return original(script, args)
+
+    driver.execute_script = _type_into_focus
+    assert text_input.type_text(driver, "hi", typed) == "mobile_type"
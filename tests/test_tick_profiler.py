@@ -0,0 +1,139 @@
+import asyncio
+from types import SimpleNamespace
+
+from ushareiplay.core.message_queue import MessageQueue
+from ushareiplay.core.runtime_context import CommandRuntimeContext, EventRuntimeContext
+from ushareiplay.core.runtime_services import StatusReporter
+from ushareiplay.core.tick_profiler import TickProfiler, percentile
+
+
+class FakeObserver:
+    def __init__(self):
+        self.events = []
+        self.statuses = []
+
+    def emit(self, name, **kwargs):
+        self.events.append((name, kwargs))
+
+    def write_status(self, status):
+        self.statuses.append(status)
+
+
+def make_profiler(clock, obs=None, **cfg):
+    return TickProfiler(config={"tick_profiler": cfg}, obs=obs, clock=clock)
+
+
+def test_percentile_uses_nearest_rank():
+    values = list(range(1, 101))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 95) == 95
+    assert percentile(values, 99) == 99
+    assert percentile([], 50) == 0.0
+
+
+def test_span_records_rolling_window_percentiles(fake_clock):
+    profiler = make_profiler(fake_clock, window=10)
+
+    for ms in range(1, 21):
+        with profiler.span("screen"):
+            fake_clock.now += ms / 1000.0
+
+    stats = profiler.snapshot()["screen"]
+    assert stats["count"] == 20
+    # only the last 10 samples (11..20ms) stay in the window
+    assert stats["p50_ms"] == 15.0
+    assert stats["p99_ms"] == 20.0
+    assert stats["max_ms"] == 20.0
+
+
+def test_budget_exceeded_is_flagged_and_emitted(fake_clock):
+    obs = FakeObserver()
+    profiler = make_profiler(fake_clock, obs=obs, budgets_ms={"event": 100, "spool": 10})
+
+    with profiler.span("event:message_content"):
+        fake_clock.now += 0.25
+    with profiler.span("spool"):
+        fake_clock.now += 0.001
+
+    snapshot = profiler.snapshot()
+    assert snapshot["event:message_content"]["budget_ms"] == 100
+    assert snapshot["event:message_content"]["over_budget"] == 1
+    assert snapshot["event:message_content"]["hot"] is True
+    assert snapshot["spool"]["over_budget"] == 0
+    assert obs.events == [
+        (
+            "tick.budget.exceeded",
+            {
+                "level": "WARNING",
+                "ctx": {"phase": "event:message_content", "duration_ms": 250.0, "budget_ms": 100.0},
+            },
+        )
+    ]
+
+
+def test_end_tick_emits_periodic_summary(fake_clock):
+    obs = FakeObserver()
+    profiler = make_profiler(fake_clock, obs=obs, summary_interval_ticks=2)
+
+    with profiler.span("status"):
+        fake_clock.now += 0.002
+    profiler.end_tick()
+    assert obs.events == []
+    profiler.end_tick()
+
+    assert [name for name, _ in obs.events] == ["tick.profile"]
+    ctx = obs.events[0][1]["ctx"]
+    assert ctx["ticks"] == 2
+    assert ctx["phases"]["status"]["count"] == 1
+
+
+def test_disabled_profiler_records_nothing(fake_clock):
+    profiler = make_profiler(fake_clock, enabled=False)
+
+    with profiler.span("screen"):
+        fake_clock.now += 5
+    profiler.end_tick()
+
+    assert profiler.status() == {"enabled": False, "ticks": 0, "phases": {}}
+
+
+def test_runtime_contexts_delegate_spans_to_profiler(fake_clock):
+    profiler = make_profiler(fake_clock)
+    event_runtime = EventRuntimeContext(profiler=profiler)
+    command_runtime = CommandRuntimeContext(controller=SimpleNamespace(profiler=profiler))
+
+    with event_runtime.span("event:user_count"):
+        fake_clock.now += 0.001
+    with command_runtime.span("command_update:timer"):
+        fake_clock.now += 0.001
+    with EventRuntimeContext().span("noop"):
+        pass
+
+    assert set(profiler.snapshot()) == {"event:user_count", "command_update:timer"}
+
+
+def test_status_reporter_includes_profiler_snapshot(fake_clock):
+    asyncio.run(MessageQueue.instance().clear_queue())
+    obs = FakeObserver()
+    profiler = make_profiler(fake_clock)
+    with profiler.span("queue_drain"):
+        fake_clock.now += 0.003
+    reporter = StatusReporter(
+        config={},
+        ui_lock=SimpleNamespace(locked=lambda: False),
+        obs=obs,
+        profiler=profiler,
+    )
+
+    asyncio.run(
+        reporter.update(
+            screen={
+                "foreground_app": "Soul",
+                "soul_ui_state": "InUnknownPage",
+                "qqmusic_ui_state": "Unknown",
+                "anchors": [],
+            }
+        )
+    )
+
+    assert obs.statuses[0]["profiler"]["phases"]["queue_drain"]["p50_ms"] == 3.0
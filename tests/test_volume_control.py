@@ -0,0 +1,81 @@
+from types import SimpleNamespace
+from unittest.mock import Mock
+
+from ushareiplay.helpers.volume_control import VolumeControl
+
+
+class FakeShell:
+    """Android shell with an optional ``cmd media_session volume`` implementation."""
+
+    def __init__(self, level=2, cmd_supported=True, media_supported=True):
+        self.level = level
+        self.cmd_supported = cmd_supported
+        self.media_supported = media_supported
+        self.commands = []
+
+    def __call__(self, command):
+        self.commands.append(command)
+        if command == "dumpsys audio":
+            return f"- STREAM_VOICE_CALL:\n   streamVolume:4\n- STREAM_MUSIC:\n   streamVolume:{self.level}\n"
+        supported = self.cmd_supported if command.startswith("cmd ") else self.media_supported
+        if not supported:
+            return "/system/bin/sh: media: inaccessible or not found"
+        if "--get" in command:
+            return f"[v] will get volume\n[v] volume is {self.level} in range [0..15]"
+        self.level = int(command.rsplit(" ", 1)[1])
+        return f"[v] will set volume to index={self.level}"
+
+
+def test_set_is_one_call_and_reads_hit_the_cache(fake_clock):
+    shell = FakeShell(level=2)
+    volume = VolumeControl(shell, {"volume": {"cache_ttl_s": 30}}, clock=fake_clock)
+
+    assert volume.set_level(15) is True
+    assert shell.commands == ["cmd media_session volume --stream 3 --set 15"]
+    assert volume.get_level() == 15
+    assert len(shell.commands) == 1
+
+    fake_clock.now = 31
+    shell.level = 9  # changed on the device
+    assert volume.get_level() == 9
+    assert shell.commands[-1] == "cmd media_session volume --stream 3 --get"
+
+
+def test_falls_back_to_media_tool_and_remembers_it(fake_clock):
+    shell = FakeShell(level=5, cmd_supported=False)
+    volume = VolumeControl(shell, clock=fake_clock)
+
+    assert volume.read_level() == 5
+    assert shell.commands == [
+        "cmd media_session volume --stream 3 --get",
+        "media volume --stream 3 --get",
+    ]
+    volume.set_level(7)
+    assert shell.commands[-1] == "media volume --stream 3 --set 7"
+    assert len(shell.commands) == 3
+
+
+def test_reads_dumpsys_when_no_volume_tool_exists(fake_clock):
+    shell = FakeShell(level=6, cmd_supported=False, media_supported=False)
+    volume = VolumeControl(shell, clock=fake_clock)
+
+    assert volume.read_level() == 6
+    assert shell.commands[-1] == "dumpsys audio"
+    assert volume.set_level(10) is False
+    assert volume.cached_level() is None
+
+
+def test_music_manager_adjust_volume_uses_single_call(fake_clock):
+    from ushareiplay.managers.music_manager import MusicManager
+
+    shell = FakeShell(level=2)
+    manager = MusicManager.__new__(MusicManager)
+    manager.logger = Mock()
+    manager.music_handler = SimpleNamespace(config={}, key_actions=Mock())
+    manager._volume_control = VolumeControl(shell, clock=fake_clock)
+
+    assert manager.adjust_volume(15) == {"volume": 15}
+    assert shell.commands == ["cmd media_session volume --stream 3 --set 15"]
+    manager.music_handler.key_actions.press_volume_up.assert_not_called()
+    assert manager.adjust_volume(None) == {"volume": 15, "current": True}
+    assert len(shell.commands) == 1